@@ -12,9 +12,9 @@ from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeou
 
 logger = logging.getLogger(__name__)
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, status
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse, RedirectResponse
+from fastapi.responses import StreamingResponse, FileResponse, RedirectResponse, PlainTextResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel, Field
@@ -22,6 +22,7 @@ import asyncio
 import json as json_module
 
 from app.pipelines.rules import analyze_receipt
+from app.pipelines.deadline import deadline_in
 from app.repository.receipt_store import get_receipt_store
 from app.pipelines.ensemble import get_ensemble
 from app.api.feedback import router as feedback_router
@@ -29,6 +30,7 @@ from app.api.warranty_routes import router as warranty_router
 from app.auth.routes import router as auth_router, admin_router
 from app.auth.sso import router as sso_router
 from app.utils.audit_formatter import format_audit_for_human_review
+from app.telemetry.timings import get_global_histograms
 
 # PDF to image conversion
 try:
@@ -46,20 +48,24 @@ except ImportError:
     VISION_AVAILABLE = False
 
 try:
-    from app.pipelines.donut_extractor import extract_receipt_with_donut, DONUT_AVAILABLE
+    from app.pipelines.donut_extractor import (
+        extract_receipt_with_donut, DONUT_AVAILABLE, DONUT_MODEL_NAME
+    )
 except ImportError:
     DONUT_AVAILABLE = False
 
+from app.pipelines.onnx_backend import onnx_ready
+from app.pipelines.model_server import ModelServerError, get_model_client, model_server_enabled, remote_call
+from app.pipelines.model_registry import get_model_registry
+
 try:
     from app.pipelines.layoutlm_extractor import extract_receipt_with_layoutlm, LAYOUTLM_AVAILABLE
 except ImportError:
     LAYOUTLM_AVAILABLE = False
 
-try:
-    from app.models.donut_receipt import DonutReceiptExtractor
-    DONUT_RECEIPT_AVAILABLE = True
-except ImportError:
-    DONUT_RECEIPT_AVAILABLE = False
+# Donut-Receipt imports torch/transformers at module level: import it on first use
+from app.utils.lazy_import import module_available
+DONUT_RECEIPT_AVAILABLE = module_available("transformers") and module_available("torch")
 
 app = FastAPI(
     title="VeriReceipt API",
@@ -89,6 +95,13 @@ async def startup_init_auth():
     except Exception as e:
         logger.warning(f"Auth DB init warning: {e}")
 
+
+# Warm the configured models (MODEL_WARMUP) in the background; /ready waits for it
+@app.on_event("startup")
+async def startup_warm_models():
+    if not model_server_enabled():
+        get_model_registry().start_warmup()
+
 # Mount static files for web UI
 web_dir = Path(__file__).parent.parent.parent / "web"
 if web_dir.exists():
@@ -149,6 +162,11 @@ class AnalyzeResponse(BaseModel):
     currency: Optional[str] = None
     audit_events: Optional[List[Dict[str, Any]]] = None
     audit_report: Optional[str] = Field(None, description="Formatted audit report for human review")
+    # Provisional mode (/analyze?provisional=true): rules verdict returned before the VLM stages finish
+    provisional: Optional[bool] = Field(None, description="True if this is a provisional (rules-only) decision")
+    job_id: Optional[str] = Field(None, description="Job to poll (/jobs/{id}) or stream (/jobs/{id}/events) for the final decision")
+    final_may_differ: Optional[bool] = None
+    final_may_differ_reasons: Optional[List[str]] = None
 
 
 class BatchAnalyzeResponse(BaseModel):
@@ -183,6 +201,20 @@ class FeedbackResponse(BaseModel):
     message: str
 
 
+class RescoreRequest(BaseModel):
+    features_ids: Optional[List[str]] = Field(None, description="Snapshots to re-score (default: newest `limit`)")
+    limit: int = Field(1000, ge=1, le=100000)
+    policy: Optional[Dict[str, Any]] = Field(None, description="RescorePolicy overrides")
+    include_decisions: bool = False
+    changed_only: bool = False
+
+
+class RescoreResponse(BaseModel):
+    summary: Dict[str, Any]
+    results: List[Dict[str, Any]]
+    total_time_ms: float
+
+
 # ---------- Utility helpers ----------
 
 def _save_upload_to_disk(upload: UploadFile) -> Path:
@@ -285,6 +317,35 @@ def health_check():
     }
 
 
+@app.get("/ready", tags=["meta"])
+def readiness_check():
+    """Readiness: 503 until model warm-up finishes (or the model server is reachable and warm)."""
+    if model_server_enabled():
+        try:
+            models = get_model_client().ping().get("models", {})
+        except ModelServerError as e:
+            return JSONResponse(status_code=503, content={"ready": False, "error": str(e)})
+    else:
+        models = get_model_registry().status()
+    return JSONResponse(status_code=200 if models.get("ready") else 503, content=models)
+
+
+@app.get("/metrics", tags=["meta"], response_class=PlainTextResponse)
+def metrics():
+    """Latency histograms, LLM cache, Ollama circuit, model and worker memory (Prometheus text format)."""
+    body = get_global_histograms().render_prometheus()
+    from app.pipelines.llm_cache import get_llm_cache
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        body += llm_cache.render_prometheus()
+    from app.pipelines.ollama_client import render_ollama_prometheus
+    body += render_ollama_prometheus()
+    body += get_model_registry().render_prometheus()
+    from app.telemetry.memory import render_prometheus as render_memory_prometheus
+    body += render_memory_prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
 @app.get("/", tags=["meta"])
 def root():
     """Redirect to login page."""
@@ -300,8 +361,66 @@ def login_page():
     return RedirectResponse(url="/web/warranty.html")
 
 
+def _analyze_response(decision, processing_time_ms: float, analysis_ref=None, **extra) -> AnalyzeResponse:
+    """Build an AnalyzeResponse from a ReceiptDecision."""
+    # Serialize audit events to dicts
+    audit_events_dicts = [e.to_dict() if hasattr(e, 'to_dict') else e for e in decision.audit_events]
+    
+    # Generate formatted audit report for human review
+    try:
+        audit_report = format_audit_for_human_review(decision.to_dict())
+    except Exception as e:
+        audit_report = f"Error generating audit report: {str(e)}"
+    
+    return AnalyzeResponse(
+        label=decision.label,
+        score=decision.score,
+        reasons=decision.reasons,
+        minor_notes=decision.minor_notes or [],
+        processing_time_ms=round(processing_time_ms, 2),
+        receipt_ref=None,
+        analysis_ref=analysis_ref,
+        rule_version=decision.rule_version,
+        policy_version=decision.policy_version,
+        policy_name=decision.policy_name,
+        engine_version=decision.engine_version,
+        decision_id=decision.decision_id,
+        created_at=decision.created_at,
+        extraction_confidence_score=decision.extraction_confidence_score,
+        extraction_confidence_level=decision.extraction_confidence_level,
+        normalized_total=decision.normalized_total,
+        currency=decision.currency,
+        audit_events=audit_events_dicts,
+        audit_report=audit_report,
+        **extra,
+    )
+
+
+def _persist_final_and_cleanup(tmp_path: Path):
+    """on_final callback for provisional jobs: persist the final decision, drop the upload."""
+    def _on_final(job):
+        try:
+            if job.final is not None:
+                job.final.finalize_defaults()
+                store.save_analysis(str(tmp_path), job.final)
+        except Exception as e:
+            logger.warning(f"Persisting final decision for job {job.job_id} failed: {e}")
+        finally:
+            try:
+                tmp_path.unlink(missing_ok=True)
+            except Exception:
+                pass
+    return _on_final
+
+
 @app.post("/analyze", response_model=AnalyzeResponse, tags=["analysis"])
-async def analyze_endpoint(file: UploadFile = File(..., description="Receipt file (PDF, JPG, PNG)")):
+async def analyze_endpoint(
+    file: UploadFile = File(..., description="Receipt file (PDF, JPG, PNG)"),
+    provisional: bool = False,
+    x_deadline_ms: Optional[float] = Header(
+        None, description="End-to-end time budget in ms; optional stages are skipped to meet it"
+    ),
+):
     """
     Analyze a single uploaded receipt (PDF/image) and return:
     - **label**: real / fake / suspicious
@@ -310,6 +429,15 @@ async def analyze_endpoint(file: UploadFile = File(..., description="Receipt fil
     - **minor_notes**: Low-severity observations
     - **processing_time_ms**: Analysis duration
     
+    With `?provisional=true` the OCR + rules verdict is returned as soon as it
+    is available (`provisional: true`) and the Vision LLM stages finish in the
+    background; the final decision is published on `/jobs/{job_id}` and
+    `/jobs/{job_id}/events`. `final_may_differ` tells whether it can change.
+    
+    An `X-Deadline-Ms` header sets an end-to-end budget counted from request
+    arrival: optional stages (VLM, LLM, forensics) are skipped or truncated
+    to meet it and the skips are listed as DEADLINE_STAGE_SKIPPED events.
+    
     Supported formats: PDF, JPG, JPEG, PNG
     """
     # Validate file type
@@ -321,13 +449,37 @@ async def analyze_endpoint(file: UploadFile = File(..., description="Receipt fil
             detail=f"Unsupported file type: {file_ext}. Allowed: {', '.join(allowed_extensions)}"
         )
     
+    # Deadline counts from request arrival, before the upload is written
+    deadline = deadline_in(x_deadline_ms / 1000.0) if x_deadline_ms else None
+
     # 1. Save to temp file inside container
     tmp_path = _save_upload_to_disk(file)
     start_time = time.time()
+    keep_upload = False
 
     try:
+        if provisional:
+            from app.pipelines.provisional import analyze_receipt_provisional
+
+            # The final decision is persisted (and the upload removed) by the job
+            job = analyze_receipt_provisional(
+                str(tmp_path), on_final=_persist_final_and_cleanup(tmp_path), deadline=deadline
+            )
+            keep_upload = True
+            processing_time_ms = (time.time() - start_time) * 1000
+            decision = job.decision()
+            decision.finalize_defaults()
+            return _analyze_response(
+                decision,
+                processing_time_ms,
+                provisional=not job.done,
+                job_id=job.job_id,
+                final_may_differ=job.may_differ if not job.done else False,
+                final_may_differ_reasons=job.differ_reasons if not job.done else [],
+            )
+
         # 2. Run our rules pipeline
-        decision = analyze_receipt(str(tmp_path))
+        decision = analyze_receipt(str(tmp_path), deadline=deadline)
         processing_time_ms = (time.time() - start_time) * 1000
 
         # Finalize decision to populate IDs and timestamps
@@ -338,38 +490,7 @@ async def analyze_endpoint(file: UploadFile = File(..., description="Receipt fil
         # For DB backend, we may have a numeric analysis_id; for CSV, maybe filename.
         # For now, we don't expose receipt_id separately unless DB backend needs it.
 
-        
-        
-        # Serialize audit events to dicts
-        audit_events_dicts = [e.to_dict() if hasattr(e, 'to_dict') else e for e in decision.audit_events]
-        
-        # Generate formatted audit report for human review
-        try:
-            audit_report = format_audit_for_human_review(decision.to_dict())
-        except Exception as e:
-            audit_report = f"Error generating audit report: {str(e)}"
-        
-        return AnalyzeResponse(
-            label=decision.label,
-            score=decision.score,
-            reasons=decision.reasons,
-            minor_notes=decision.minor_notes or [],
-            processing_time_ms=round(processing_time_ms, 2),
-            receipt_ref=None,
-            analysis_ref=analysis_ref,
-            rule_version=decision.rule_version,
-            policy_version=decision.policy_version,
-            policy_name=decision.policy_name,
-            engine_version=decision.engine_version,
-            decision_id=decision.decision_id,
-            created_at=decision.created_at,
-            extraction_confidence_score=decision.extraction_confidence_score,
-            extraction_confidence_level=decision.extraction_confidence_level,
-            normalized_total=decision.normalized_total,
-            currency=decision.currency,
-            audit_events=audit_events_dicts,
-            audit_report=audit_report,
-        )
+        return _analyze_response(decision, processing_time_ms, analysis_ref=analysis_ref)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -377,10 +498,68 @@ async def analyze_endpoint(file: UploadFile = File(..., description="Receipt fil
         )
     finally:
         # 4. Best-effort cleanup
-        try:
-            tmp_path.unlink(missing_ok=True)
-        except Exception:
-            pass
+        if not keep_upload:
+            try:
+                tmp_path.unlink(missing_ok=True)
+            except Exception:
+                pass
+
+
+@app.get("/jobs/{job_id}", tags=["analysis"])
+async def get_job_endpoint(job_id: str):
+    """Status of a provisional analysis job, with the final decision once available."""
+    from app.pipelines.provisional import get_job
+
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    out = job.summary()
+    decision = job.final_decision()
+    if decision is not None:
+        out["decision"] = decision
+    return out
+
+
+@app.get("/jobs/{job_id}/events", tags=["analysis"])
+async def job_events_endpoint(job_id: str, timeout: float = 300.0):
+    """
+    Server-Sent Events for a provisional analysis job.
+
+    Emits `provisional` (replayed) then `final` or `error`, and closes.
+    Jobs owned by another API worker are followed through the shared job store.
+    """
+    from app.pipelines.provisional import get_job
+
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+
+    async def event_generator():
+        deadline = time.time() + timeout
+        seen = 0
+        current = job
+        while True:
+            # Re-read jobs owned by another worker; this worker's own job updates in place
+            current = get_job(job_id) or current
+            events = current.events()
+            for event, data in events[seen:]:
+                yield f"event: {event}\ndata: {json_module.dumps(data, default=str)}\n\n"
+            seen = len(events)
+            if current.done and seen >= len(current.events()):
+                break
+            if time.time() >= deadline:
+                yield f"event: timeout\ndata: {json_module.dumps(current.summary(), default=str)}\n\n"
+                break
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
 
 
 @app.post("/feedback", response_model=FeedbackResponse, tags=["feedback"])
@@ -502,6 +681,39 @@ async def batch_analyze_endpoint(files: List[UploadFile] = File(..., description
     )
 
 
+@app.post("/rescore", response_model=RescoreResponse, tags=["analysis"])
+def rescore_endpoint(payload: RescoreRequest):
+    """
+    Re-score stored feature snapshots with the current rules (no OCR / VLM).
+
+    Use the `features_id` returned in an analysis' debug payload, or omit
+    `features_ids` to backtest the newest `limit` snapshots.
+    """
+    from app.pipelines.rescore import RescorePolicy, rescore_many, summarize_rescore
+
+    start_time = time.time()
+    try:
+        results = rescore_many(
+            features_ids=payload.features_ids,
+            policy=RescorePolicy.from_dict(payload.policy),
+            limit=None if payload.features_ids else payload.limit,
+            workers=1,
+            keep_decisions=payload.include_decisions,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Rescore failed: {str(e)}"
+        )
+
+    shown = [r for r in results if r.changed or r.error] if payload.changed_only else results
+    return RescoreResponse(
+        summary=summarize_rescore(results),
+        results=[r.to_dict(include_decision=payload.include_decisions) for r in shown],
+        total_time_ms=round((time.time() - start_time) * 1000, 2),
+    )
+
+
 @app.get("/stats", response_model=StatsResponse, tags=["analytics"])
 def get_stats():
     """
@@ -680,16 +892,37 @@ async def analyze_hybrid(file: UploadFile = File(...)):
             return {"error": str(e), "time_seconds": round(time_module.time() - start, 2)}
     
     def run_donut():
-        # TEMPORARILY DISABLED - meta tensor issues with PyTorch/Transformers
-        # TODO: Fix DONUT model loading or upgrade transformers library
-        return {
-            "error": "DONUT temporarily disabled due to model loading issues",
-            "merchant": None,
-            "total": None,
-            "line_items_count": 0,
-            "data_quality": "N/A",
-            "time_seconds": 0
-        }
+        # PyTorch DONUT stays disabled - meta tensor issues with PyTorch/Transformers.
+        # The ONNX Runtime export (DONUT_BACKEND=onnx) loads without them.
+        if not (DONUT_AVAILABLE and onnx_ready("donut", DONUT_MODEL_NAME)):
+            return {
+                "error": "DONUT temporarily disabled due to model loading issues",
+                "merchant": None,
+                "total": None,
+                "line_items_count": 0,
+                "data_quality": "N/A",
+                "time_seconds": 0
+            }
+        
+        start = time_module.time()
+        try:
+            donut_path = image_path if is_pdf else temp_path
+            if model_server_enabled():
+                data = remote_call("donut", str(donut_path))
+            else:
+                with get_model_registry().acquire("donut") as extractor:
+                    data = extractor.extract_receipt_data(str(donut_path))
+            return {
+                "merchant": data.get("merchant"),
+                "total": data.get("total"),
+                "line_items_count": len(data.get("line_items") or []),
+                "data_quality": "good" if data.get("total") else "poor",
+                "backend": "onnx",
+                "time_seconds": round(time_module.time() - start, 2)
+            }
+        except Exception as e:
+            logger.warning("DONUT (onnx) error: %s", e, exc_info=True)
+            return {"error": str(e), "time_seconds": round(time_module.time() - start, 2)}
     
     def run_donut_receipt():
         # TEMPORARILY DISABLED - same meta tensor issues as DONUT
@@ -1418,7 +1651,8 @@ async def analyze_hybrid_stream(file: UploadFile = File(...)):
         update_queue.put({"event": "engine_start", "engine": "donut-receipt"})
         start = time_module.time()
         try:
-            data = extract_receipt_with_donut_receipt(str(temp_path))
+            from app.models.donut_receipt import analyze_receipt_donut
+            data = analyze_receipt_donut(str(temp_path))
             elapsed = time_module.time() - start
             result = {
                 "merchant": data.get("merchant"),
@@ -47,6 +47,10 @@ class LLMConfig:
         )
 
 
+# Ollama hosts that already passed the connection check in this process
+_verified_ollama_hosts = set()
+
+
 def get_llm_client(config: Optional[LLMConfig] = None):
     """
     Get LLM client based on configuration.
@@ -64,15 +68,17 @@ def get_llm_client(config: Optional[LLMConfig] = None):
         return None
     
     elif config.provider == "ollama":
+        # Shared pooled client (keep-alive + per-model concurrency limit).
+        # Its chat() matches ollama.Client.chat, so callers are unchanged.
+        from app.pipelines.ollama_client import get_ollama_client
+        client = get_ollama_client(config.ollama_base_url)
+        if client.base_url in _verified_ollama_hosts:
+            return client
         try:
-            from ollama import Client
-            client = Client(host=config.ollama_base_url)
-            # Test connection
+            # Test connection (once per host per process)
             client.list()
+            _verified_ollama_hosts.add(client.base_url)
             return client
-        except ImportError:
-            print("⚠️  Ollama package not installed. Run: pip install ollama")
-            return None
         except Exception as e:
             print(f"⚠️  Ollama connection failed: {e}")
             print(f"   Make sure Ollama is running at {config.ollama_base_url}")
@@ -12,6 +12,10 @@ import json
 # Thread-local storage for DB connections
 _thread_local = threading.local()
 
+# Unfiltered postal_patterns / cities / terms rows, cached by load_geo_snapshot()
+# (pre-fork warm-up) and shared read-only by every query
+_snapshot: Dict[str, List[Dict[str, Any]]] = {}
+
 def get_db_path() -> Path:
     """Get path to geo.sqlite database."""
     return Path(__file__).parent.parent / "data" / "geo.sqlite"
@@ -32,6 +36,8 @@ def get_connection() -> sqlite3.Connection:
 
 def query_postal_patterns() -> List[Dict[str, Any]]:
     """Get all postal patterns."""
+    if "postal_patterns" in _snapshot:
+        return _snapshot["postal_patterns"]
     conn = get_connection()
     cursor = conn.execute("""
         SELECT country_code, pattern, weight, description
@@ -42,6 +48,8 @@ def query_postal_patterns() -> List[Dict[str, Any]]:
 
 def query_cities(country_code: Optional[str] = None) -> List[Dict[str, Any]]:
     """Get cities, optionally filtered by country."""
+    if not country_code and "cities" in _snapshot:
+        return _snapshot["cities"]
     conn = get_connection()
     if country_code:
         cursor = conn.execute("""
@@ -60,6 +68,8 @@ def query_cities(country_code: Optional[str] = None) -> List[Dict[str, Any]]:
 
 def query_terms(country_code: Optional[str] = None, kind: Optional[str] = None) -> List[Dict[str, Any]]:
     """Get terms, optionally filtered by country and/or kind."""
+    if not country_code and not kind and "terms" in _snapshot:
+        return _snapshot["terms"]
     conn = get_connection()
     
     conditions = []
@@ -105,6 +115,26 @@ def close_connection():
         _thread_local.conn.close()
         delattr(_thread_local, "conn")
 
+def load_geo_snapshot() -> Dict[str, int]:
+    """Cache the postal pattern, city and term tables in memory; returns row counts.
+
+    Called before forking workers. The connection used is closed afterwards,
+    since SQLite connections must not cross a fork.
+    """
+    clear_geo_snapshot()
+    rows = {
+        "postal_patterns": query_postal_patterns(),
+        "cities": query_cities(),
+        "terms": query_terms(),
+    }
+    close_connection()
+    _snapshot.update(rows)
+    return {name: len(r) for name, r in rows.items()}
+
+def clear_geo_snapshot() -> None:
+    """Drop the cached tables (queries hit SQLite again)."""
+    _snapshot.clear()
+
 # ---------------------------------------------------------------------------
 # Geo / VAT knowledge queries
 # ---------------------------------------------------------------------------
@@ -11,6 +11,9 @@ from typing import Dict, Any, Optional
 import re
 import json
 
+from app.pipelines.model_registry import get_model_registry, register_model
+from app.pipelines.model_server import model_server_enabled, open_image, remote_call
+
 
 class DonutReceiptExtractor:
     """
@@ -134,7 +137,7 @@ class DonutReceiptExtractor:
         """
         try:
             # Load and preprocess image
-            image = Image.open(image_path).convert("RGB")
+            image = open_image(image_path).convert("RGB")
             
             # Resize if too large (for memory efficiency)
             max_size = 1280
@@ -374,8 +377,13 @@ def analyze_receipt_donut(image_path: str) -> Dict[str, Any]:
     Returns:
         Structured receipt data
     """
-    extractor = DonutReceiptExtractor()
-    return extractor.extract(image_path)
+    if model_server_enabled():
+        return remote_call("donut_receipt", image_path)
+    with get_model_registry().acquire("donut_receipt") as extractor:
+        return extractor.extract(image_path)
+
+
+register_model("donut_receipt", DonutReceiptExtractor)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+# app/pipelines/cascade.py
+"""
+Cost-aware analysis cascade.
+
+Every receipt used to pay for pixel forensics, semantic amount verification,
+the LLM classifier and VLM extraction regardless of how clear-cut it was.
+With the cascade enabled, analyze_receipt runs tiers in order and only
+escalates while the decision is ambiguous or a gate fires:
+
+  tier 0  rules     metadata + embedded text / OCR + rules
+  tier 1  forensics + pixel forensics, semantic amount verification (LLM),
+                    LLM document classifier
+  tier 2  vision    + VLM structured extraction, OCR vision fallback,
+                    vision veto
+
+Escalation (escalation_target):
+- ambiguous: score in [CASCADE_AMBIGUOUS_LOW, CASCADE_AMBIGUOUS_HIGH] or
+  label "suspicious" -> next tier
+- gates -> straight to the tier that resolves them:
+  suspicious_producer (R1_SUSPICIOUS_SOFTWARE fired)       -> tier 2
+  low_ocr_confidence  (ocr_confidence < CASCADE_LOW_OCR_CONFIDENCE) -> tier 2
+  a stage's own trigger fired but the stage was deferred
+  (semantic verification / LLM classifier)                 -> its tier
+
+Stages check stage_enabled(name) against the tier of the current context
+(execution_tier); outside a cascade every stage runs, so behaviour is
+unchanged when ANALYSIS_CASCADE is off. Each tier run is recorded as a
+CASCADE_TIER audit event.
+
+Features are rebuilt from the same OCR result at every tier. Inside
+carry_stage_results the expensive stages (run_stage) keep their output for
+the receipt, so escalating only pays for the stages the new tier enables.
+
+Configuration:
+- ANALYSIS_CASCADE            (default false)
+- CASCADE_AMBIGUOUS_LOW       (default 0.3)
+- CASCADE_AMBIGUOUS_HIGH      (default 0.7)
+- CASCADE_LOW_OCR_CONFIDENCE  (default 0.6)
+- CASCADE_MAX_TIER            (default 2)
+- CASCADE_VISION_VETO         (default true) run the vision veto at tier 2
+                              when the caller did not supply one
+"""
+
+import contextvars
+import copy
+import os
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+ANALYSIS_CASCADE = os.getenv("ANALYSIS_CASCADE", "false").lower() == "true"
+CASCADE_AMBIGUOUS_LOW = float(os.getenv("CASCADE_AMBIGUOUS_LOW", "0.3"))
+CASCADE_AMBIGUOUS_HIGH = float(os.getenv("CASCADE_AMBIGUOUS_HIGH", "0.7"))
+CASCADE_LOW_OCR_CONFIDENCE = float(os.getenv("CASCADE_LOW_OCR_CONFIDENCE", "0.6"))
+CASCADE_MAX_TIER = int(os.getenv("CASCADE_MAX_TIER", "2"))
+CASCADE_VISION_VETO = os.getenv("CASCADE_VISION_VETO", "true").lower() == "true"
+
+TIER_RULES = 0
+TIER_FORENSICS = 1
+TIER_VISION = 2
+TIER_NAMES = {TIER_RULES: "rules", TIER_FORENSICS: "forensics", TIER_VISION: "vision"}
+
+STAGE_TIERS = {
+    "image_forensics": TIER_FORENSICS,
+    "semantic_verification": TIER_FORENSICS,
+    "llm_classifier": TIER_FORENSICS,
+    "vision_extract": TIER_VISION,
+    "vision_fallback": TIER_VISION,
+    "vision_assessment": TIER_VISION,
+}
+
+# Gates that jump straight to a tier
+_GATE_TIERS = {
+    "suspicious_producer": TIER_VISION,
+    "low_ocr_confidence": TIER_VISION,
+}
+
+_current_tier: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("cascade_tier", default=None)
+_deferred: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("cascade_deferred", default=None)
+_stage_results: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "cascade_stage_results", default=None
+)
+
+
+@contextmanager
+def execution_tier(tier: int) -> Iterator[List[str]]:
+    """
+    Run the enclosed pipeline stages at `tier`.
+
+    Yields a list that receives the names of stages whose own trigger fired
+    but which were deferred because their tier is higher (note_deferred).
+    """
+    deferred: List[str] = []
+    tier_token = _current_tier.set(tier)
+    deferred_token = _deferred.set(deferred)
+    try:
+        yield deferred
+    finally:
+        _deferred.reset(deferred_token)
+        _current_tier.reset(tier_token)
+
+
+def current_tier() -> Optional[int]:
+    """Tier of the current context, or None outside a cascade."""
+    return _current_tier.get()
+
+
+def stage_enabled(stage: str) -> bool:
+    """True if `stage` may run in the current context."""
+    tier = _current_tier.get()
+    return tier is None or STAGE_TIERS.get(stage, TIER_RULES) <= tier
+
+
+def note_deferred(stage: str) -> None:
+    """Record that `stage` would have run but was deferred to a higher tier."""
+    deferred = _deferred.get()
+    if deferred is not None and stage not in deferred:
+        deferred.append(stage)
+
+
+@contextmanager
+def carry_stage_results(results: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Keep run_stage outputs in `results` for the enclosed feature builds.
+
+    Pass the same dict to every build of one receipt (each cascade tier, both
+    halves of a provisional analysis) so a stage runs at most once.
+    """
+    token = _stage_results.set(results)
+    try:
+        yield results
+    finally:
+        _stage_results.reset(token)
+
+
+def run_stage(stage: str, fn: Callable[[], Any]) -> Any:
+    """fn() for `stage`, or its earlier output for this receipt (see carry_stage_results)."""
+    results = _stage_results.get()
+    if results is None:
+        return fn()
+    if stage not in results:
+        results[stage] = fn()
+    # Callers may mutate what they get back; keep the carried copy pristine
+    return copy.deepcopy(results[stage])
+
+
+def _rule_id(event) -> Optional[str]:
+    if isinstance(event, dict):
+        return event.get("rule_id") or event.get("code")
+    return getattr(event, "rule_id", None) or getattr(event, "code", None)
+
+
+def escalation_target(
+    decision,
+    text_features: Dict[str, Any],
+    tier: int,
+    deferred: Optional[List[str]] = None,
+    max_tier: int = CASCADE_MAX_TIER,
+) -> Tuple[int, List[str]]:
+    """
+    Tier to escalate to after scoring at `tier`, and why.
+
+    Returns (tier, []) when the decision is clear-cut and no gate fires.
+    """
+    target = tier
+    reasons: List[str] = []
+
+    if decision.label == "suspicious" or CASCADE_AMBIGUOUS_LOW <= decision.score <= CASCADE_AMBIGUOUS_HIGH:
+        target = tier + 1
+        reasons.append("ambiguous_score")
+
+    gates: List[str] = []
+    fired = list(decision.events or []) + list(decision.audit_events or [])
+    if any(_rule_id(e) == "R1_SUSPICIOUS_SOFTWARE" for e in fired):
+        gates.append("suspicious_producer")
+    try:
+        ocr_conf = text_features.get("ocr_confidence")
+        if ocr_conf is not None and float(ocr_conf) < CASCADE_LOW_OCR_CONFIDENCE:
+            gates.append("low_ocr_confidence")
+    except (TypeError, ValueError):
+        pass
+    for gate in gates:
+        if _GATE_TIERS[gate] > tier:
+            target = max(target, _GATE_TIERS[gate])
+            reasons.append(gate)
+
+    for stage in deferred or []:
+        stage_tier = STAGE_TIERS.get(stage, TIER_RULES)
+        if stage_tier > tier:
+            target = max(target, stage_tier)
+            reasons.append(f"{stage}_deferred")
+
+    target = min(target, max_tier)
+    if target <= tier:
+        return tier, []
+    return target, reasons
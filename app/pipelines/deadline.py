@@ -0,0 +1,145 @@
+# app/pipelines/deadline.py
+"""
+End-to-end request deadline.
+
+OCR, VLM extraction, semantic verification, the LLM classifier, forensics
+and the duplicate check each had their own timeout (or none), so there was
+no overall budget per receipt. analyze_receipt(..., deadline=...) (and the
+API's X-Deadline-Ms header) set a deadline for the current context:
+
+- optional stages call stage_allowed(name) and are skipped when the
+  remaining budget is below the stage's minimum (STAGE_MIN_BUDGET_S)
+- Ollama calls get their read timeout truncated to the remaining budget
+  (clamp_timeout), and are not made at all when it is exhausted
+- multi-page VLM extraction stops submitting pages
+- every skip / truncation is collected (track via request_deadline) and
+  emitted by the rules engine as a DEADLINE_STAGE_SKIPPED audit event
+
+Deadlines are absolute time.monotonic() values; use deadline_in(seconds)
+to build one from a budget. OCR and the rules themselves always run.
+
+Configuration:
+- ANALYZE_DEADLINE_S          (default 0 = none) default budget per receipt
+- DEADLINE_STAGE_MIN_BUDGETS  JSON {stage: seconds} overriding the minimums
+"""
+
+import contextvars
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ANALYZE_DEADLINE_S = float(os.getenv("ANALYZE_DEADLINE_S", "0"))
+DEADLINE_STAGE_MIN_BUDGETS = os.getenv("DEADLINE_STAGE_MIN_BUDGETS", "")
+
+# Minimum remaining budget (seconds) for an optional stage to start
+STAGE_MIN_BUDGET_S: Dict[str, float] = {
+    "duplicate_check": 0.05,
+    "image_forensics": 0.5,
+    "semantic_verification": 2.0,
+    "llm_classifier": 2.0,
+    "vision_extract": 4.0,
+    "vision_extract_page": 4.0,
+    "vision_fallback": 4.0,
+    "vision_assessment": 4.0,
+    "ollama_call": 0.5,
+}
+
+
+def _parse_min_budgets(raw: str) -> Dict[str, float]:
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+        return {str(k): float(v) for k, v in data.items()} if isinstance(data, dict) else {}
+    except Exception as e:
+        logger.warning("Invalid DEADLINE_STAGE_MIN_BUDGETS (%s); ignoring", e)
+        return {}
+
+
+STAGE_MIN_BUDGET_S.update(_parse_min_budgets(DEADLINE_STAGE_MIN_BUDGETS))
+
+
+class _DeadlineState:
+    __slots__ = ("deadline", "skips")
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.skips: List[Dict[str, Any]] = []
+
+
+_state: contextvars.ContextVar[Optional[_DeadlineState]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+def deadline_in(seconds: Optional[float]) -> Optional[float]:
+    """Absolute deadline `seconds` from now (None/<=0 -> no deadline)."""
+    if not seconds or seconds <= 0:
+        return None
+    return time.monotonic() + float(seconds)
+
+
+@contextmanager
+def request_deadline(deadline: Optional[float]) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Apply `deadline` (absolute monotonic time) to the enclosed stages.
+
+    Yields the list of skipped / truncated stages. A nested call with a later
+    deadline keeps the outer one; deadline=None inherits the current one.
+    """
+    outer = _state.get()
+    if deadline is None or (outer is not None and outer.deadline <= deadline):
+        yield outer.skips if outer is not None else []
+        return
+    state = _DeadlineState(deadline)
+    token = _state.set(state)
+    try:
+        yield state.skips
+    finally:
+        _state.reset(token)
+        if outer is not None:
+            outer.skips.extend(state.skips)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (may be negative), or None without one."""
+    state = _state.get()
+    if state is None:
+        return None
+    return state.deadline - time.monotonic()
+
+
+def note_skip(stage: str, reason: str = "deadline", **extra: Any) -> None:
+    state = _state.get()
+    if state is None:
+        return
+    left = state.deadline - time.monotonic()
+    entry = {"stage": stage, "reason": reason, "remaining_s": round(left, 3), **extra}
+    state.skips.append(entry)
+
+
+def stage_allowed(stage: str) -> bool:
+    """
+    True if `stage` may start: no deadline, or enough budget left.
+
+    Records a skip when it may not.
+    """
+    left = remaining()
+    if left is None:
+        return True
+    needed = STAGE_MIN_BUDGET_S.get(stage, 0.0)
+    if left >= needed:
+        return True
+    note_skip(stage, reason="deadline", min_budget_s=needed)
+    return False
+
+
+def clamp_timeout(timeout: float) -> float:
+    """`timeout` truncated to the remaining budget (unchanged without a deadline)."""
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(0.0, min(float(timeout), left))
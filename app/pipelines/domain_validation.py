@@ -9,6 +9,7 @@ except ModuleNotFoundError as e:
     _yaml_import_error = e
 
 from app.pipelines.document_intent import DocumentIntentResult
+from app.utils.compiled_cache import load_compiled
 
 
 DomainHintPayload = Dict[str, Any]
@@ -33,6 +34,8 @@ def make_domain_hint(*, domain: Optional[str], confidence: float, evidence: Opti
 
 
 _DOMAINPACK_CACHE: Optional[List[Dict[str, Any]]] = None
+# Bump when the parsed pack structure changes so cached packs are rebuilt
+DOMAINPACK_CACHE_VERSION = 1
 
 
 def _load_domainpacks() -> List[Dict[str, Any]]:
@@ -52,17 +55,20 @@ def _load_domainpacks() -> List[Dict[str, Any]]:
         _DOMAINPACK_CACHE = []
         return _DOMAINPACK_CACHE
 
-    for f in sorted(base_dir.glob("*.yaml")):
-        if f.name.startswith("_"):
-            continue
-        with open(f, "r", encoding="utf-8") as fp:
-            data = yaml.safe_load(fp)
-        if isinstance(data, dict) and data.get("id"):
-            data["_source_file"] = str(f)
-            packs.append(data)
-
-    _DOMAINPACK_CACHE = packs
-    return packs
+    sources = [f for f in sorted(base_dir.glob("*.yaml")) if not f.name.startswith("_")]
+
+    def build() -> List[Dict[str, Any]]:
+        for f in sources:
+            with open(f, "r", encoding="utf-8") as fp:
+                data = yaml.safe_load(fp)
+            if isinstance(data, dict) and data.get("id"):
+                data["_source_file"] = str(f)
+                packs.append(data)
+        return packs
+
+    # Parsed packs are cached on disk until a YAML file changes
+    _DOMAINPACK_CACHE = load_compiled("domainpacks", sources, build, version=DOMAINPACK_CACHE_VERSION)
+    return _DOMAINPACK_CACHE
 
 
 def infer_domain_from_domainpacks(
@@ -8,20 +8,30 @@ DONUT is a document-specific vision transformer that:
 - More accurate than OCR for data extraction
 
 Model: naver-clova-ix/donut-base-finetuned-cord-v2 (receipt understanding)
+
+DONUT_BACKEND=onnx loads the ONNX Runtime export (int8 by default) instead
+of the PyTorch checkpoint; see app.pipelines.onnx_backend.
 """
 
 from typing import Dict, Any, Optional
 from pathlib import Path
 import json
 
-# DONUT requires transformers and torch
-try:
-    from transformers import DonutProcessor, VisionEncoderDecoderModel
+from app.pipelines.model_registry import get_model_registry, register_model
+from app.pipelines.model_server import model_server_enabled, open_image, remote_call
+from app.pipelines.onnx_backend import backend_for, load_ort_model, onnx_ready
+from app.utils.lazy_import import lazy_import, module_available
+
+DONUT_MODEL_NAME = "naver-clova-ix/donut-base-finetuned-cord-v2"
+
+# DONUT requires transformers and torch; both are imported on first use
+# (app.utils.lazy_import) to keep API startup fast
+DONUT_AVAILABLE = all(module_available(m) for m in ("transformers", "torch", "PIL"))
+torch = lazy_import("torch")
+transformers = lazy_import("transformers")
+if DONUT_AVAILABLE:
     from PIL import Image
-    import torch
-    DONUT_AVAILABLE = True
-except ImportError:
-    DONUT_AVAILABLE = False
+else:
     print("⚠️  DONUT dependencies not installed. Install with:")
     print("   pip install transformers torch pillow")
 
@@ -33,7 +43,7 @@ class DonutExtractor:
     This uses a pre-trained DONUT model fine-tuned on receipts (CORD dataset).
     """
     
-    def __init__(self, model_name: str = "naver-clova-ix/donut-base-finetuned-cord-v2"):
+    def __init__(self, model_name: str = DONUT_MODEL_NAME, backend: Optional[str] = None):
         """
         Initialize DONUT model.
         
@@ -41,6 +51,7 @@ class DonutExtractor:
             model_name: HuggingFace model name
                 - donut-base-finetuned-cord-v2: Receipt understanding (recommended)
                 - donut-base: Base model (needs fine-tuning)
+            backend: "torch" or "onnx" (default: DONUT_BACKEND)
         """
         if not DONUT_AVAILABLE:
             raise ImportError("DONUT dependencies not installed")
@@ -48,6 +59,8 @@ class DonutExtractor:
         self.model_name = model_name
         self.processor = None
         self.model = None
+        self.requested_backend = backend
+        self.backend = "torch"
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         
         print(f"🔧 Loading DONUT model: {model_name}")
@@ -60,7 +73,17 @@ class DonutExtractor:
             return
             
         print("   Loading processor...")
-        self.processor = DonutProcessor.from_pretrained(self.model_name)
+        self.processor = transformers.DonutProcessor.from_pretrained(self.model_name)
+        
+        if onnx_ready("donut", self.model_name, backend=self.requested_backend):
+            # Exported ONNX Runtime graphs: no PyTorch weights, no meta tensors
+            print("   Loading ONNX model...")
+            self.model = load_ort_model("donut", self.model_name)
+            self.backend = "onnx"
+            print("✅ DONUT model loaded (onnx)")
+            return
+        if (self.requested_backend or backend_for("donut")) == "onnx":
+            print("   ⚠️ ONNX backend requested but no export found, using PyTorch")
         
         print("   Loading model...")
         try:
@@ -70,7 +93,7 @@ class DonutExtractor:
             cache_dir = os.path.expanduser("~/.cache/huggingface/hub")
             
             # Force eager loading with ALL lazy mechanisms disabled
-            self.model = VisionEncoderDecoderModel.from_pretrained(
+            self.model = transformers.VisionEncoderDecoderModel.from_pretrained(
                 self.model_name,
                 torch_dtype=torch.float32,
                 low_cpu_mem_usage=False,  # Disable lazy loading
@@ -90,7 +113,7 @@ class DonutExtractor:
                 gc.collect()
                 
                 # Try loading with use_safetensors=False
-                self.model = VisionEncoderDecoderModel.from_pretrained(
+                self.model = transformers.VisionEncoderDecoderModel.from_pretrained(
                     self.model_name,
                     torch_dtype=torch.float32,
                     low_cpu_mem_usage=False,
@@ -115,6 +138,11 @@ class DonutExtractor:
             traceback.print_exc()
             raise
     
+    def unload(self):
+        """Release the model (reloaded on next use)."""
+        self.model = None
+        self.processor = None
+    
     def extract_from_image(self, image_path: str, task_prompt: str = "<s_cord-v2>") -> Dict[str, Any]:
         """
         Extract structured data from receipt image using DONUT.
@@ -140,13 +168,14 @@ class DonutExtractor:
         except ImportError:
             pass  # HEIF support not available
         
-        image = Image.open(image_path)
+        image = open_image(image_path)
         image.load()  # Ensure image data is loaded
         image = image.convert("RGB")
         
         # Prepare inputs
         pixel_values = self.processor(image, return_tensors="pt").pixel_values
-        pixel_values = pixel_values.to(self.device)
+        if self.backend == "torch":
+            pixel_values = pixel_values.to(self.device)
         
         # Generate
         decoder_input_ids = self.processor.tokenizer(
@@ -154,14 +183,15 @@ class DonutExtractor:
             add_special_tokens=False,
             return_tensors="pt"
         ).input_ids
-        decoder_input_ids = decoder_input_ids.to(self.device)
+        if self.backend == "torch":
+            decoder_input_ids = decoder_input_ids.to(self.device)
         
         # Run model
         with torch.no_grad():
             outputs = self.model.generate(
                 pixel_values,
                 decoder_input_ids=decoder_input_ids,
-                max_length=self.model.decoder.config.max_position_embeddings,
+                max_length=self.model.config.decoder.max_position_embeddings,
                 pad_token_id=self.processor.tokenizer.pad_token_id,
                 eos_token_id=self.processor.tokenizer.eos_token_id,
                 use_cache=True,
@@ -259,6 +289,15 @@ def get_donut_extractor() -> DonutExtractor:
     return _donut_extractor
 
 
+def _load_donut() -> DonutExtractor:
+    extractor = get_donut_extractor()
+    extractor.load_model()
+    return extractor
+
+
+register_model("donut", _load_donut, lambda extractor: extractor.unload())
+
+
 def extract_receipt_with_donut(image_path: str) -> Dict[str, Any]:
     """
     Extract receipt data using DONUT.
@@ -269,7 +308,7 @@ def extract_receipt_with_donut(image_path: str) -> Dict[str, Any]:
     Returns:
         Extracted data dictionary
     """
-    if not DONUT_AVAILABLE:
+    if not DONUT_AVAILABLE and not model_server_enabled():
         return {
             "error": "DONUT not available",
             "merchant": None,
@@ -289,8 +328,11 @@ def extract_receipt_with_donut(image_path: str) -> Dict[str, Any]:
             "line_items": []
         }
     
-    extractor = get_donut_extractor()
-    return extractor.extract_from_image(image_path)
+    if model_server_enabled():
+        return remote_call("donut", image_path, raw=True)
+    
+    with get_model_registry().acquire("donut") as extractor:
+        return extractor.extract_from_image(image_path)
 
 
 def compare_donut_with_ocr(donut_data: Dict, ocr_features: Dict) -> Dict[str, Any]:
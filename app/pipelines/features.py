@@ -28,6 +28,7 @@ from app.signals import (
     signal_merchant_confidence_low,
 )
 from app.telemetry.address_metrics import record_address_features
+from app.telemetry.timings import StageLaps
 
 logger = logging.getLogger(__name__)
 
@@ -1721,6 +1722,8 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
     This is the core bridge between low-level extraction and the rule engine.
     """
 
+    feature_laps = StageLaps("features")
+    feature_laps.mark("text_pages")
     full_text, page_texts = _get_all_text_pages(raw)
     lines = full_text.split("\n") if full_text else []
     
@@ -1729,6 +1732,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
     # Use heuristic classification to select appropriate validation profile
     # ============================================================================
     
+    feature_laps.mark("geo_detection")
     # NEW: Geo-aware document classification (Steps 1-4)
     geo_profile = detect_geo_and_profile(full_text, lines)
     
@@ -1801,6 +1805,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
         requires_corroboration = geo_profile.get("requires_corroboration")
         doc_family_guess = geo_profile.get("doc_family_guess")
 
+    feature_laps.mark("amounts")
     # --- Extract basic features needed for early decisions ---
     # Total & line items
     all_amounts = _extract_candidate_amounts(lines)
@@ -1820,6 +1825,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
     currency_symbols = _extract_currency_symbols(full_text)
     has_currency = bool(currency_symbols)
 
+    feature_laps.mark("merchant")
     # Merchant candidate (needed for bias calculation)
     merchant_candidate = _guess_merchant_line(lines)
     
@@ -1847,6 +1853,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
     # NOTE: conf must be computed before any address-derived features
     # (V2.1 consistency + V2.2 multi-address both require doc_profile_confidence)
     
+    feature_laps.mark("address")
     # Address validation (geo-agnostic, structure-based)
     address_profile = validate_address(full_text)
     
@@ -1920,6 +1927,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
         ),
     }
 
+    feature_laps.mark("file_metadata")
     # --- File & metadata features -------------------------------------------
     meta = raw.pdf_metadata or {}
     producer = (meta.get("producer") or meta.get("creator") or "") or ""
@@ -1950,6 +1958,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
         "image_height": image_height,
     }
 
+    feature_laps.mark("text_fields")
     # --- Text features (continued) -------------------------------------------
     # NOTE: total_mismatch is an *initial* estimate. If semantic verification overrides
     # totals/line-items, we will recompute total_mismatch after SVL.
@@ -1985,6 +1994,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
     receipt_date = _extract_receipt_date(full_text)
     receipt_time = _extract_receipt_time(full_text)
     
+    feature_laps.mark("lang_routing")
     # NEW: Language pack routing information
     lang_system = _get_lang_system()
     router = lang_system['router']
@@ -2007,6 +2017,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
     merchant_phone = _extract_merchant_phone(full_text)
     city, pin_code = _extract_city_and_pin(full_text)
 
+    feature_laps.mark("text_stats")
     # Get raw OCR text before normalization for spacing analysis
     raw_ocr_text = "\n".join(raw.ocr_text_per_page) if raw.ocr_text_per_page else ""
     text_stats = _compute_text_stats(lines, raw_text=raw_ocr_text)
@@ -2033,6 +2044,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
             _low_count = sum(1 for c in _all_word_confs if c < 0.5)
             ocr_low_conf_word_ratio = _low_count / len(_all_word_confs)
     
+    feature_laps.mark("semantic_verification")
     # --- Semantic Verification Layer (SVL) ---
     # Use LLM to verify amounts when extraction confidence is low or mismatch is large
     semantic_amounts = None
@@ -2045,21 +2057,28 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
             should_use_semantic_verification
         )
         
+        from app.pipelines.cascade import note_deferred, run_stage, stage_enabled
+        from app.pipelines.deadline import stage_allowed
+        
         # Decide if semantic verification is needed
-        if should_use_semantic_verification(
+        svl_needed = should_use_semantic_verification(
             ocr_confidence=ocr_confidence,
             line_items_confidence=line_items_confidence,
             total_mismatch_ratio=initial_mismatch_ratio
-        ):
+        )
+        if svl_needed and not stage_enabled("semantic_verification"):
+            # Cost-aware cascade: deferred to a higher tier
+            note_deferred("semantic_verification")
+        elif svl_needed and stage_allowed("semantic_verification"):
             logger.info("Triggering semantic verification (low confidence or large mismatch)")
             semantic_verification_invoked = True
             
-            semantic_amounts = llm_verify_amounts(
+            semantic_amounts = run_stage("semantic_verification", lambda: llm_verify_amounts(
                 text=full_text,
                 extracted_amounts=all_amounts,
                 ocr_confidence=ocr_confidence,
                 doc_subtype=doc_subtype_guess
-            )
+            ))
             
             if semantic_amounts and semantic_amounts.confidence >= 0.85:
                 # Use semantic amounts instead of regex extraction
@@ -2173,13 +2192,23 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
     # Add geo-specific features (MX RFC, US ZIP, IN GSTIN, etc.)
     text_features.update(geo_profile.get("geo_specific_features", {}))
     
+    feature_laps.mark("vision_fallback")
     # Vision LLM fallback for failed OCR extractions
     try:
-        from app.pipelines.ocr_fallback import integrate_vision_fallback
+        from app.pipelines.ocr_fallback import integrate_vision_fallback, vision_fallback_needed
+        from app.pipelines.cascade import note_deferred, stage_enabled
+        from app.pipelines.deadline import stage_allowed
         import os
         # Get original image path if available
         image_path = raw.pdf_metadata.get("file_path") if raw.pdf_metadata else None
-        if image_path and os.path.exists(image_path):
+        fallback_needed = bool(
+            image_path and os.path.exists(image_path)
+            and vision_fallback_needed(text_features, ocr_metadata, doc_subtype_guess)
+        )
+        if fallback_needed and not stage_enabled("vision_fallback"):
+            # Cost-aware cascade: deferred to a higher tier
+            note_deferred("vision_fallback")
+        elif fallback_needed and stage_allowed("vision_fallback"):
             text_features = integrate_vision_fallback(
                 text_features=text_features,
                 ocr_metadata=ocr_metadata,
@@ -2227,12 +2256,19 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
         "unique_char_count": text_stats["unique_char_count"],
     }
 
+    feature_laps.mark("image_forensics")
     # Run pixel-level image forensics on the first page image
     try:
         from app.pipelines.image_forensics import run_image_forensics
+        from app.pipelines.cascade import run_stage, stage_enabled
+        from app.pipelines.deadline import stage_allowed
         image_path = raw.pdf_metadata.get("file_path") if raw.pdf_metadata else None
-        if image_path and os.path.exists(image_path):
-            img_forensics = run_image_forensics(image_path)
+        if not stage_enabled("image_forensics"):
+            forensic_features["image_forensics"] = {"forensics_available": False, "skipped": "cascade_tier"}
+        elif image_path and os.path.exists(image_path) and not stage_allowed("image_forensics"):
+            forensic_features["image_forensics"] = {"forensics_available": False, "skipped": "deadline"}
+        elif image_path and os.path.exists(image_path):
+            img_forensics = run_stage("image_forensics", lambda: run_image_forensics(image_path))
             forensic_features["image_forensics"] = img_forensics
         else:
             forensic_features["image_forensics"] = {"forensics_available": False}
@@ -2240,6 +2276,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
         logger.warning(f"Image forensics skipped: {e}")
         forensic_features["image_forensics"] = {"forensics_available": False}
 
+    feature_laps.mark("domain_intent")
     domain_hint = infer_domain_from_domainpacks(
         text_features=text_features,
         lang_features=lang_pack_info,
@@ -2255,33 +2292,44 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
             classify_document_with_llm,
             integrate_llm_classification,
         )
-        from app.config.llm_config import LLMConfig, get_llm_client
         
         # Defensive float conversions - handle None values
         domain_conf = float(domain_hint.get("confidence") or 0.0) if domain_hint else 0.0
         lang_conf = float(geo_profile.get("lang_confidence") or 0.0)
         lang_guess = geo_profile.get("lang_guess")
         
-        if should_call_llm_classifier(
+        from app.pipelines.cascade import note_deferred, run_stage, stage_enabled
+        from app.pipelines.deadline import stage_allowed
+        
+        classifier_needed = should_call_llm_classifier(
             doc_profile_confidence=float(doc_profile.get("doc_profile_confidence") or 0.0),
             domain_confidence=domain_conf,
             doc_subtype=str(doc_profile.get("doc_subtype_guess") or doc_subtype_guess or "unknown"),
             lang_confidence=lang_conf,
             lang_guess=lang_guess,
             merchant_candidate=merchant_candidate,
-        ):
-            # Initialize LLM client from config
-            llm_config = LLMConfig.from_env()
-            llm_client = get_llm_client(llm_config)
+        )
+        if classifier_needed and not stage_enabled("llm_classifier"):
+            # Cost-aware cascade: deferred to a higher tier
+            note_deferred("llm_classifier")
+        elif classifier_needed and stage_allowed("llm_classifier"):
+            def _classify():
+                from app.config.llm_config import LLMConfig, get_llm_client
+                
+                # Initialize LLM client from config
+                llm_config = LLMConfig.from_env()
+                llm_client = get_llm_client(llm_config)
+                
+                return classify_document_with_llm(
+                    text=full_text,
+                    llm_client=llm_client,
+                    provider=llm_config.provider,
+                    model=llm_config.ollama_model if llm_config.provider == "ollama" else llm_config.openai_model,
+                    max_chars=2000,
+                    max_tokens=llm_config.max_tokens,
+                )
             
-            llm_result = classify_document_with_llm(
-                text=full_text,
-                llm_client=llm_client,
-                provider=llm_config.provider,
-                model=llm_config.ollama_model if llm_config.provider == "ollama" else llm_config.openai_model,
-                max_chars=2000,
-                max_tokens=llm_config.max_tokens,
-            )
+            llm_result = run_stage("llm_classifier", _classify)
             
             # Merge LLM results with existing heuristics
             # Pass source_text for evidence grounding
@@ -2333,6 +2381,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
     if llm_classification:
         text_features["llm_classification"] = llm_classification
 
+    feature_laps.mark("language_id")
     # ============================================================================
     # PHASE 2: Deterministic Language Identification
     # ============================================================================
@@ -2364,6 +2413,7 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
         doc_profile["lang_confidence"] = 0.0
         doc_profile["lang_source"] = "fallback"
 
+    feature_laps.mark("signals")
     # ------------------------------------------------------------------
     # Unified Signal Emission (V1)
     # ------------------------------------------------------------------
@@ -2461,6 +2511,8 @@ def build_features(raw: ReceiptRaw) -> ReceiptFeatures:
                 f"This is a schema violation - CI must fail to prevent corrupted telemetry."
             )
 
+    feature_laps.stop()
+
     return ReceiptFeatures(
         file_features=file_features,
         text_features=text_features,
@@ -5,8 +5,40 @@ Identifies the dominant script(s) in text to select appropriate language packs.
 """
 
 import re
-from typing import Dict, List, Tuple
-from collections import Counter
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Lookup tables cover the Basic Multilingual Plane; code points above it are
+# rare in receipts and classified one by one
+BMP_SIZE = 0x10000
+
+
+@lru_cache(maxsize=None)
+def bmp_whitespace() -> np.ndarray:
+    """Code points in the BMP for which str.isspace() is true."""
+    return np.array([cp for cp in range(BMP_SIZE) if chr(cp).isspace()], dtype=np.uint32)
+
+
+@lru_cache(maxsize=None)
+def bmp_alpha_mask() -> np.ndarray:
+    """Boolean mask over the BMP: True where str.isalpha() is true."""
+    return np.array([chr(cp).isalpha() for cp in range(BMP_SIZE)], dtype=bool)
+
+
+def classify_codepoints(text: str, table: np.ndarray, classify_astral: Callable[[str], int]) -> np.ndarray:
+    """
+    Class id of every character of `text`: `table[code point]` for BMP
+    characters, `classify_astral(char)` above it. One array lookup instead of
+    a Python loop over the text.
+    """
+    cps = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    astral = cps >= BMP_SIZE
+    ids = table[np.where(astral, 0, cps)]
+    if astral.any():
+        ids[astral] = [classify_astral(chr(cp)) for cp in cps[astral]]
+    return ids
 
 
 class ScriptDetector:
@@ -80,6 +112,40 @@ class ScriptDetector:
             self._compiled_ranges[script] = [
                 (start, end) for start, end in ranges
             ]
+        # Script names by table id (0 = unknown or whitespace)
+        self._scripts = ['unknown'] + list(self._compiled_ranges)
+        self._table = None
+        # Routing and summaries ask for the same text's counts several times
+        self._counts_for = lru_cache(maxsize=64)(self._count_scripts)
+    
+    def _lookup_table(self) -> np.ndarray:
+        """Code point -> script id over the BMP (first matching range wins)."""
+        if self._table is None:
+            table = np.zeros(BMP_SIZE, dtype=np.uint8)
+            for script_id, script in enumerate(self._scripts[1:], start=1):
+                for start, end in self._compiled_ranges[script]:
+                    if start >= BMP_SIZE:
+                        continue
+                    segment = table[start:min(end, BMP_SIZE - 1) + 1]
+                    segment[segment == 0] = script_id
+            table[bmp_whitespace()] = 0
+            self._table = table
+        return self._table
+    
+    def _astral_script_id(self, char: str) -> int:
+        script = self._get_char_script(char)
+        return 0 if script == 'unknown' else self._scripts.index(script)
+    
+    def _count_scripts(self, text: str) -> Tuple[Tuple[str, int], ...]:
+        ids = classify_codepoints(text, self._lookup_table(), self._astral_script_id)
+        present, first_seen, counts = np.unique(ids, return_index=True, return_counts=True)
+        # Scripts in order of first appearance, as a character-by-character count would give
+        order = np.argsort(first_seen, kind='stable')
+        return tuple(
+            (self._scripts[present[i]], int(counts[i]))
+            for i in order
+            if present[i] != 0
+        )
     
     def _get_char_script(self, char: str) -> str:
         """Get the script for a single character."""
@@ -102,15 +168,8 @@ class ScriptDetector:
         Returns:
             Dictionary mapping script names to character counts
         """
-        script_counts = Counter()
-        
-        for char in text:
-            if char.strip():  # Skip whitespace
-                script = self._get_char_script(char)
-                if script != 'unknown':
-                    script_counts[script] += 1
-        
-        return dict(script_counts)
+        # Whitespace and unknown scripts are not counted
+        return dict(self._counts_for(text))
     
     def get_dominant_script(self, text: str, min_threshold: int = 5) -> Tuple[str, float]:
         """
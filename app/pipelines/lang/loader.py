@@ -12,15 +12,19 @@ except ModuleNotFoundError as e:
     yaml = None  # type: ignore
     _yaml_import_error = e
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import logging
 from dataclasses import dataclass
 
+from app.utils.compiled_cache import load_compiled
 from .schema import LangPack, KeywordGroup, LabelGroup, CompanyInfo, AddressInfo, CurrencyInfo
 
 
 logger = logging.getLogger(__name__)
 
+# Bump when merging or the pack classes change so cached packs are rebuilt
+LANGPACK_CACHE_VERSION = 1
+
 
 @dataclass
 class LoadedPack:
@@ -73,6 +77,24 @@ class LangPackLoader:
         if not self.langpack_dir.exists():
             raise FileNotFoundError(f"Language pack directory not found: {self.langpack_dir}")
         
+        # Skip documentation / helper files like _schema.yaml
+        sources = [f for f in self.langpack_dir.glob('*.yaml') if not f.name.startswith('_')]
+        # Parsed, validated and merged packs are cached until a YAML file changes
+        self._packs, self._merged_packs = load_compiled(
+            f"langpacks-{'strict' if self.strict else 'lenient'}",
+            sources,
+            self._build,
+            version=LANGPACK_CACHE_VERSION,
+        )
+        
+        self._loaded = True
+        logger.info(f"Loaded {len(self._packs)} language packs")
+    
+    def _build(self) -> Tuple[Dict[str, LoadedPack], Dict[str, LangPack]]:
+        """Parse and merge all YAML packs (uncached path of load_all)."""
+        self._packs = {}
+        self._merged_packs = {}
+        
         # Load common.yaml first (base pack)
         common_file = self.langpack_dir / 'common.yaml'
         if common_file.exists():
@@ -81,7 +103,6 @@ class LangPackLoader:
             logger.warning(f"Common pack not found: {common_file}")
         
         # Load all other YAML files
-        # Skip documentation / helper files like _schema.yaml
         for yaml_file in self.langpack_dir.glob('*.yaml'):
             if yaml_file.name == 'common.yaml':
                 continue
@@ -91,9 +112,7 @@ class LangPackLoader:
         
         # Create merged packs
         self._create_merged_packs()
-        
-        self._loaded = True
-        logger.info(f"Loaded {len(self._packs)} language packs")
+        return self._packs, self._merged_packs
     
     def _load_single_pack(self, yaml_file: Path, is_common: bool) -> None:
         """Load a single YAML language pack."""
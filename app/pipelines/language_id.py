@@ -19,9 +19,14 @@ Design Principles:
 
 import logging
 import unicodedata
+from functools import lru_cache
 from typing import Dict, Optional, Tuple, List
 from pathlib import Path
 
+import numpy as np
+
+from app.pipelines.lang.detect_script import BMP_SIZE, bmp_alpha_mask, classify_codepoints
+
 logger = logging.getLogger(__name__)
 
 # fastText model will be lazy-loaded
@@ -35,6 +40,9 @@ _MODEL_PATH = Path(__file__).parent.parent.parent / "resources" / "models" / "li
 _MIN_SCRIPT_ALPHA_CHARS = 30
 _DOMINANT_SCRIPT_RATIO = 0.60
 
+# Results memoized per text; several stages identify the same document
+_DETECT_CACHE_SIZE = 1024
+
 _SCRIPT_BUCKETS = (
     "latin",
     "arabic",
@@ -46,37 +54,52 @@ _SCRIPT_BUCKETS = (
     "hebrew",
 )
 
+_BUCKET_RANGES = {
+    "arabic": ((0x0600, 0x06FF), (0x0750, 0x077F), (0x08A0, 0x08FF)),
+    "hebrew": ((0x0590, 0x05FF),),
+    "cyrillic": ((0x0400, 0x04FF), (0x0500, 0x052F)),
+    "han": ((0x4E00, 0x9FFF), (0x3400, 0x4DBF)),
+    "hiragana": ((0x3040, 0x309F),),
+    "katakana": ((0x30A0, 0x30FF),),
+    "hangul": ((0xAC00, 0xD7AF), (0x1100, 0x11FF)),
+    "latin": ((0x0041, 0x007A), (0x00C0, 0x024F)),
+}
+
 def _script_bucket(ch: str) -> str:
     o = ord(ch)
-    if (0x0600 <= o <= 0x06FF) or (0x0750 <= o <= 0x077F) or (0x08A0 <= o <= 0x08FF):
-        return "arabic"
-    if 0x0590 <= o <= 0x05FF:
-        return "hebrew"
-    if (0x0400 <= o <= 0x04FF) or (0x0500 <= o <= 0x052F):
-        return "cyrillic"
-    if (0x4E00 <= o <= 0x9FFF) or (0x3400 <= o <= 0x4DBF):
-        return "han"
-    if 0x3040 <= o <= 0x309F:
-        return "hiragana"
-    if 0x30A0 <= o <= 0x30FF:
-        return "katakana"
-    if (0xAC00 <= o <= 0xD7AF) or (0x1100 <= o <= 0x11FF):
-        return "hangul"
-    if (0x0041 <= o <= 0x007A) or (0x00C0 <= o <= 0x024F):
-        return "latin"
+    for name, ranges in _BUCKET_RANGES.items():
+        for start, end in ranges:
+            if start <= o <= end:
+                return name
     return "other"
 
-def _script_stats(text: str) -> Dict[str, float]:
-    counts = {k: 0 for k in _SCRIPT_BUCKETS}
-    counts["other"] = 0
-    alpha_total = 0
+# Bucket ids for the vectorized count: 0 = not alphabetic, then the buckets, then "other"
+_BUCKET_NAMES = ("",) + _SCRIPT_BUCKETS + ("other",)
+_BUCKET_IDS = {name: i for i, name in enumerate(_BUCKET_NAMES)}
 
-    for ch in text:
-        if not ch.isalpha():
-            continue
-        alpha_total += 1
-        b = _script_bucket(ch)
-        counts[b] = counts.get(b, 0) + 1
+
+@lru_cache(maxsize=None)
+def _bucket_table() -> np.ndarray:
+    """Code point -> bucket id over the BMP, matching _script_bucket() for alphabetic chars."""
+    table = np.where(bmp_alpha_mask(), _BUCKET_IDS["other"], 0).astype(np.uint8)
+    codepoints = np.arange(BMP_SIZE)
+    for name in _SCRIPT_BUCKETS:
+        in_bucket = np.zeros(BMP_SIZE, dtype=bool)
+        for start, end in _BUCKET_RANGES[name]:
+            in_bucket |= (codepoints >= start) & (codepoints <= end)
+        table[in_bucket & (table != 0)] = _BUCKET_IDS[name]
+    return table
+
+
+def _astral_bucket_id(ch: str) -> int:
+    return _BUCKET_IDS[_script_bucket(ch)] if ch.isalpha() else 0
+
+
+def _script_stats(text: str) -> Dict[str, float]:
+    ids = classify_codepoints(text, _bucket_table(), _astral_bucket_id)
+    per_id = np.bincount(ids, minlength=len(_BUCKET_NAMES))
+    counts = {name: int(per_id[i]) for i, name in enumerate(_BUCKET_NAMES) if i}
+    alpha_total = int(per_id[1:].sum())
 
     if alpha_total <= 0:
         return {"alpha_total": 0, "dominant": "other", "dominant_ratio": 0.0, "ratios": {}}
@@ -106,6 +129,7 @@ def _script_to_lang_hint(script: str, ratios: Dict[str, float]) -> Optional[str]
         return "ja" if kana_ratio >= 0.02 else "zh"
     return None
 
+@lru_cache(maxsize=_DETECT_CACHE_SIZE)
 def _script_based_language(text: str) -> Tuple[Optional[str], float]:
     st = _script_stats(text)
 
@@ -226,11 +250,8 @@ def extract_language_text(text_lines: List[str]) -> str:
     return joined[:2000]
 
 
-def detect_language(text: str, min_confidence: float = 0.40) -> Tuple[str, float]:
-    """
-    Detect language using fastText with receipt-aware gating.
-    """
-
+def _pre_detect(text: str) -> Optional[Tuple[str, float]]:
+    """Result decided without fastText (gating, script pre-detection), else None."""
     # Defensive
     if not text:
         return "mixed", 0.0
@@ -249,6 +270,27 @@ def detect_language(text: str, min_confidence: float = 0.40) -> Tuple[str, float
     script_lang, script_conf = _script_based_language(text)
     if script_lang and script_conf >= 0.85:
         return script_lang, script_conf
+    return None
+
+
+def _from_prediction(labels, probs, min_confidence: float) -> Tuple[str, float]:
+    if not labels or not len(probs):
+        return "mixed", 0.0
+
+    lang_code = labels[0].replace("__label__", "")
+    confidence = float(probs[0])
+
+    if confidence < min_confidence:
+        return "mixed", confidence
+
+    return lang_code, confidence
+
+
+@lru_cache(maxsize=_DETECT_CACHE_SIZE)
+def _detect_language_memo(text: str, min_confidence: float) -> Tuple[str, float]:
+    decided = _pre_detect(text)
+    if decided is not None:
+        return decided
 
     model = _load_fasttext_model()
     if model is None:
@@ -256,21 +298,44 @@ def detect_language(text: str, min_confidence: float = 0.40) -> Tuple[str, float
 
     try:
         labels, probs = model.predict(text.replace("\n", " "), k=1)
+        return _from_prediction(labels, probs, min_confidence)
 
-        if not labels or not probs:
-            return "mixed", 0.0
+    except Exception as e:
+        logger.error(f"Language detection failed: {e}")
+        return "mixed", 0.0
 
-        lang_code = labels[0].replace("__label__", "")
-        confidence = float(probs[0])
 
-        if confidence < min_confidence:
-            return "mixed", confidence
+def detect_language(text: str, min_confidence: float = 0.40) -> Tuple[str, float]:
+    """
+    Detect language using fastText with receipt-aware gating.
 
-        return lang_code, confidence
+    Results are memoized per text.
+    """
+    return _detect_language_memo(text, min_confidence)
 
-    except Exception as e:
-        logger.error(f"Language detection failed: {e}")
-        return "mixed", 0.0
+
+def detect_languages(texts: List[str], min_confidence: float = 0.40) -> List[Tuple[str, float]]:
+    """
+    detect_language() for many texts, with one fastText predict() call for
+    all texts that reach the model (offline and batch jobs).
+    """
+    results: List[Optional[Tuple[str, float]]] = [_pre_detect(t) for t in texts]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if pending:
+        model = _load_fasttext_model()
+        if model is None:
+            for i in pending:
+                results[i] = ("mixed", 0.0)
+        else:
+            try:
+                labels, probs = model.predict([texts[i].replace("\n", " ") for i in pending], k=1)
+                for i, lab, prob in zip(pending, labels, probs):
+                    results[i] = _from_prediction(lab, prob, min_confidence)
+            except Exception as e:
+                logger.error(f"Batch language detection failed: {e}")
+                for i in pending:
+                    results[i] = ("mixed", 0.0)
+    return results
 
 
 def identify_language(text_lines: List[str]) -> Dict[str, any]:
@@ -300,6 +365,23 @@ def identify_language(text_lines: List[str]) -> Dict[str, any]:
     # Detect language
     lang_code, confidence = detect_language(clean_text)
     
+    return _language_result(text_lines, clean_text, lang_code, confidence)
+
+
+def identify_languages(documents: List[List[str]]) -> List[Dict[str, any]]:
+    """
+    identify_language() for many documents, sending all fastText-bound texts
+    in a single predict() call.
+    """
+    clean_texts = [extract_language_text(lines) for lines in documents]
+    detected = detect_languages(clean_texts)
+    return [
+        _language_result(lines, clean, lang_code, confidence)
+        for lines, clean, (lang_code, confidence) in zip(documents, clean_texts, detected)
+    ]
+
+
+def _language_result(text_lines: List[str], clean_text: str, lang_code: str, confidence: float) -> Dict[str, any]:
     return {
         "lang": lang_code,
         "lang_confidence": confidence,
@@ -11,33 +11,25 @@ Token Sources:
 """
 
 import re
+import copy
 import logging
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+from app.utils.lazy_import import lazy_import, module_available
+
 logger = logging.getLogger(__name__)
 
-# Try imports
-try:
-    import fitz  # PyMuPDF
-    HAS_PYMUPDF = True
-except ImportError:
-    HAS_PYMUPDF = False
+# Optional backends, imported on first use (app.utils.lazy_import)
+HAS_PYMUPDF = module_available("fitz")
+fitz = lazy_import("fitz")  # PyMuPDF
 
-try:
-    import easyocr
-    HAS_EASYOCR = True
-    _easyocr_reader = None
-except ImportError:
-    HAS_EASYOCR = False
-    _easyocr_reader = None
+HAS_EASYOCR = module_available("easyocr")
 
-try:
-    import pytesseract
-    HAS_TESSERACT = True
-except ImportError:
-    HAS_TESSERACT = False
+HAS_TESSERACT = module_available("pytesseract")
+pytesseract = lazy_import("pytesseract")
 
 try:
     from PIL import Image
@@ -47,7 +39,6 @@ except ImportError:
     HAS_PIL = False
 
 
-@dataclass
 class LayoutToken:
     """
     A text token with optional bounding box coordinates.
@@ -63,17 +54,69 @@ class LayoutToken:
         line_idx: Line index within the document
         confidence: OCR confidence score (0.0-1.0, None if not applicable)
         metadata: Additional token metadata
+    
+    One of these is built per OCR word, so the class is slotted (no per-instance
+    __dict__) and the metadata dict is only allocated when a token has metadata
+    or it is first accessed. Construction, attributes, equality and repr match
+    the former dataclass; to_dict() gives what dataclasses.asdict() gave.
     """
-    text: str
-    x0: Optional[float] = None
-    y0: Optional[float] = None
-    x1: Optional[float] = None
-    y1: Optional[float] = None
-    page: int = 0
-    source: str = "unknown"
-    line_idx: int = 0
-    confidence: Optional[float] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    __slots__ = ("text", "x0", "y0", "x1", "y1", "page", "source", "line_idx", "confidence", "_metadata")
+
+    FIELDS = ("text", "x0", "y0", "x1", "y1", "page", "source", "line_idx", "confidence", "metadata")
+
+    def __init__(
+        self,
+        text: str,
+        x0: Optional[float] = None,
+        y0: Optional[float] = None,
+        x1: Optional[float] = None,
+        y1: Optional[float] = None,
+        page: int = 0,
+        source: str = "unknown",
+        line_idx: int = 0,
+        confidence: Optional[float] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        self.text = text
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.page = page
+        self.source = source
+        self.line_idx = line_idx
+        self.confidence = confidence
+        self._metadata = metadata
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+    
+    @metadata.setter
+    def metadata(self, value: Dict[str, Any]) -> None:
+        self._metadata = value
+    
+    def _astuple(self) -> tuple:
+        return (self.text, self.x0, self.y0, self.x1, self.y1, self.page, self.source,
+                self.line_idx, self.confidence, self._metadata or {})
+    
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._astuple() == other._astuple()
+    
+    __hash__ = None  # mutable, like the dataclass it replaces
+    
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={value!r}" for name, value in zip(self.FIELDS, self._astuple()))
+        return f"{self.__class__.__name__}({values})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        d = dict(zip(self.FIELDS, self._astuple()))
+        d["metadata"] = copy.deepcopy(d["metadata"])
+        return d
     
     @property
     def has_coords(self) -> bool:
@@ -129,6 +172,33 @@ class LayoutDocument:
     source: str = "unknown"
     lines: List[str] = field(default_factory=list)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    _geometry: Any = field(default=None, init=False, repr=False, compare=False)
+    _spatial_index: Any = field(default=None, init=False, repr=False, compare=False)
+    
+    def geometry(self):
+        """
+        Struct-of-arrays view (TokenGeometry) of the tokens with coordinates.
+        
+        Built on first use and reused until the token list changes length.
+        """
+        from app.pipelines.token_geometry import TokenGeometry
+        
+        # Cached as (token count it was built from, geometry)
+        if self._geometry is None or self._geometry[0] != len(self.tokens):
+            self._geometry = (len(self.tokens), TokenGeometry.from_tokens(self.tokens))
+        return self._geometry[1]
+    
+    def spatial_index(self):
+        """
+        SpatialIndex over the tokens for neighbourhood queries.
+        
+        Built on first use and reused until the token list changes length.
+        """
+        from app.pipelines.spatial_index import SpatialIndex
+        
+        if self._spatial_index is None or self._spatial_index[0] != len(self.tokens):
+            self._spatial_index = (len(self.tokens), SpatialIndex(self.tokens))
+        return self._spatial_index[1]
     
     def get_page_tokens(self, page: int) -> List[LayoutToken]:
         """Get all tokens for a specific page."""
@@ -163,16 +233,6 @@ class LayoutDocument:
 # Token Builders
 # -----------------------------------------------------------------------------
 
-def _get_easyocr_reader():
-    """Lazy load EasyOCR reader."""
-    global _easyocr_reader
-    if _easyocr_reader is None and HAS_EASYOCR:
-        logger.info("Loading EasyOCR reader...")
-        _easyocr_reader = easyocr.Reader(['en'], gpu=False)
-        logger.info("EasyOCR reader loaded")
-    return _easyocr_reader
-
-
 def build_tokens_from_pymupdf(pdf_path: str) -> LayoutDocument:
     """
     Build LayoutTokens from a PDF using PyMuPDF.
@@ -286,15 +346,20 @@ def build_tokens_from_easyocr(image_path: str) -> LayoutDocument:
     if not HAS_PIL:
         raise ImportError("PIL is required for image processing")
     
-    reader = _get_easyocr_reader()
     img = Image.open(image_path)
-    img_array = np.array(img)
     
     # Get image dimensions
     width, height = img.size
     
     # Run OCR with detail=1 to get bounding boxes
-    results = reader.readtext(img_array, detail=1)
+    from app.pipelines.model_server import model_server_enabled, remote_call
+    if model_server_enabled():
+        results = remote_call("easyocr", img)
+    else:
+        # Reader shared with app.pipelines.ocr through the model registry
+        from app.pipelines.model_registry import get_model_registry
+        with get_model_registry().acquire("easyocr") as reader:
+            results = reader.readtext(np.array(img), detail=1)
     
     tokens = []
     lines = []
@@ -918,19 +983,28 @@ def _has_legal_suffix(text: str) -> bool:
     return False
 
 
+@lru_cache(maxsize=4096)
+def _is_contact_text(text: str) -> bool:
+    """True if text carries contact info (indicator word, phone or email)."""
+    text_lower = text.lower()
+    if any(ind in text_lower for ind in CONTACT_INDICATORS):
+        return True
+    # Check for phone pattern
+    if re.search(r'[\+]?[\d\s\-\(\)]{7,}', text):
+        return True
+    # Check for email pattern
+    if re.search(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}', text):
+        return True
+    return False
+
+
 def _has_nearby_contact(token: LayoutToken, doc: LayoutDocument, window: int = 3) -> bool:
     """Check if there's contact info within ±window lines of the token."""
-    for other in doc.tokens:
-        if abs(other.line_idx - token.line_idx) <= window and other.line_idx != token.line_idx:
-            other_lower = other.text.lower()
-            if any(ind in other_lower for ind in CONTACT_INDICATORS):
-                return True
-            # Check for phone pattern
-            if re.search(r'[\+]?[\d\s\-\(\)]{7,}', other.text):
-                return True
-            # Check for email pattern
-            if re.search(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}', other.text):
-                return True
+    index = doc.spatial_index()
+    for pos in index.on_lines(token.line_idx - window, token.line_idx + window):
+        other = index.tokens[pos]
+        if other.line_idx != token.line_idx and _is_contact_text(other.text):
+            return True
     return False
 
 
@@ -11,20 +11,49 @@ Advantages over DONUT:
 - More robust to format variations
 
 Model: microsoft/layoutlm-base-uncased or layoutlmv3
+
+Forward passes from concurrent requests go through an in-process
+micro-batching queue (app.pipelines.microbatch): encodings are padded and
+stacked into one batch of up to LAYOUTLM_MAX_BATCH, waiting at most
+LAYOUTLM_MAX_WAIT_MS for more requests. Torch intra-op threads are pinned
+(LAYOUTLM_TORCH_THREADS, default cpu_count / WEB_CONCURRENCY) so several API
+workers don't oversubscribe the cores.
+
+Configuration:
+- LAYOUTLM_BATCHING       (default true)
+- LAYOUTLM_MAX_BATCH      (default 8)
+- LAYOUTLM_MAX_WAIT_MS    (default 10)
+- LAYOUTLM_TORCH_THREADS  (default 0 = cpu_count // WEB_CONCURRENCY)
+- LAYOUTLM_BACKEND        "torch" or "onnx" (see app.pipelines.onnx_backend)
+- MODEL_SERVER_SOCKET     run on the shared model server (app.pipelines.model_server)
 """
 
 from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 import json
+import os
+import threading
+
+from app.pipelines.microbatch import MicroBatcher
+from app.pipelines.model_registry import get_model_registry, register_model
+from app.pipelines.model_server import model_server_enabled, open_image, remote_call
+from app.pipelines.onnx_backend import backend_for, load_ort_model, onnx_ready
+from app.utils.lazy_import import lazy_import, module_available
 
-# LayoutLM requires transformers, torch, and PIL
-try:
-    from transformers import LayoutLMv3Processor, LayoutLMv3ForTokenClassification
+LAYOUTLM_MODEL_NAME = "microsoft/layoutlmv3-base"
+LAYOUTLM_BATCHING = os.getenv("LAYOUTLM_BATCHING", "true").lower() == "true"
+LAYOUTLM_MAX_BATCH = int(os.getenv("LAYOUTLM_MAX_BATCH", "8"))
+LAYOUTLM_MAX_WAIT_MS = float(os.getenv("LAYOUTLM_MAX_WAIT_MS", "10"))
+LAYOUTLM_TORCH_THREADS = int(os.getenv("LAYOUTLM_TORCH_THREADS", "0"))
+
+# LayoutLM requires transformers, torch, and PIL; torch/transformers are
+# imported on first use (app.utils.lazy_import) to keep API startup fast
+LAYOUTLM_AVAILABLE = all(module_available(m) for m in ("transformers", "torch", "PIL"))
+torch = lazy_import("torch")
+transformers = lazy_import("transformers")
+if LAYOUTLM_AVAILABLE:
     from PIL import Image
-    import torch
-    LAYOUTLM_AVAILABLE = True
-except ImportError:
-    LAYOUTLM_AVAILABLE = False
+else:
     print("⚠️  LayoutLM dependencies not installed. Install with:")
     print("   pip install transformers torch pillow pytesseract")
 
@@ -39,7 +68,7 @@ class LayoutLMExtractor:
     - Layout understanding (spatial positions)
     """
     
-    def __init__(self, model_name: str = "microsoft/layoutlmv3-base"):
+    def __init__(self, model_name: str = LAYOUTLM_MODEL_NAME, backend: Optional[str] = None):
         """
         Initialize LayoutLM model.
         
@@ -47,6 +76,7 @@ class LayoutLMExtractor:
             model_name: HuggingFace model name
                 - layoutlmv3-base: General document understanding
                 - layoutlm-base-uncased: Original LayoutLM
+            backend: "torch" or "onnx" (default: LAYOUTLM_BACKEND)
         """
         if not LAYOUTLM_AVAILABLE:
             raise ImportError("LayoutLM dependencies not installed")
@@ -55,22 +85,88 @@ class LayoutLMExtractor:
         self.processor = None
         self.model = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self._load_lock = threading.Lock()
+        self._batcher: Optional[MicroBatcher] = None
+        self.requested_backend = backend
+        self.backend = "torch"
         
         print(f"🔧 Loading LayoutLM model: {model_name}")
         print(f"   Device: {self.device}")
     
     def load_model(self):
         """Load LayoutLM model and processor."""
-        if self.processor is None:
-            print("   Loading processor...")
-            self.processor = LayoutLMv3Processor.from_pretrained(self.model_name)
-            
-            print("   Loading model...")
-            self.model = LayoutLMv3ForTokenClassification.from_pretrained(self.model_name)
-            self.model.to(self.device)
-            self.model.eval()
-            
-            print("✅ LayoutLM model loaded")
+        with self._load_lock:
+            if self.model is None:
+                _pin_torch_threads()
+                
+                print("   Loading processor...")
+                self.processor = transformers.LayoutLMv3Processor.from_pretrained(self.model_name)
+                
+                print("   Loading model...")
+                if onnx_ready("layoutlm", self.model_name, backend=self.requested_backend):
+                    # Exported ONNX Runtime graph (int8 by default), same call signature
+                    model = load_ort_model("layoutlm", self.model_name)
+                    self.backend = "onnx"
+                else:
+                    if (self.requested_backend or backend_for("layoutlm")) == "onnx":
+                        print("   ⚠️ ONNX backend requested but no export found, using PyTorch")
+                    model = transformers.LayoutLMv3ForTokenClassification.from_pretrained(self.model_name)
+                    model.to(self.device)
+                    model.eval()
+                self.model = model
+                
+                if LAYOUTLM_BATCHING:
+                    self._batcher = MicroBatcher(
+                        self.predict_batch,
+                        max_batch_size=LAYOUTLM_MAX_BATCH,
+                        max_wait_s=LAYOUTLM_MAX_WAIT_MS / 1000.0,
+                        name="layoutlm-batch",
+                    )
+                
+                print("✅ LayoutLM model loaded")
+    
+    def unload(self):
+        """Release the model (reloaded on next use); queued batches finish first."""
+        with self._load_lock:
+            if self._batcher is not None:
+                self._batcher.close()
+                self._batcher = None
+            self.model = None
+            self.processor = None
+    
+    def encode(self, image) -> Dict[str, Any]:
+        """Processor encoding (OCR + layout) for one PIL image, on CPU."""
+        return self.processor(
+            image,
+            return_tensors="pt",
+            padding="max_length",
+            truncation=True
+        )
+    
+    def predict_batch(self, encodings: List[Dict[str, Any]]) -> List[List[int]]:
+        """
+        One forward pass for several encodings; per-encoding token predictions.
+        
+        Sequences are right-padded to the longest one (attention_mask 0) and
+        predictions are trimmed back to each input's length, so every result
+        equals a single-image forward pass.
+        """
+        lengths = [int(enc["input_ids"].shape[1]) for enc in encodings]
+        batch = _pad_and_stack(encodings, pad_token_id=self.processor.tokenizer.pad_token_id or 0)
+        if self.backend == "torch":
+            batch = {k: v.to(self.device) for k, v in batch.items()}
+        
+        with torch.no_grad():
+            outputs = self.model(**batch)
+        
+        predictions = outputs.logits.argmax(-1).cpu()
+        return [predictions[i, :n].tolist() for i, n in enumerate(lengths)]
+    
+    def predict(self, encoding: Dict[str, Any]) -> List[int]:
+        """Token predictions for one encoding (micro-batched with concurrent callers)."""
+        if self._batcher is not None:
+            return self._batcher.submit(encoding).result()
+        return self.predict_batch([encoding])[0]
     
     def extract_with_ocr(self, image_path: str) -> Dict[str, Any]:
         """
@@ -88,26 +184,14 @@ class LayoutLMExtractor:
             self.load_model()
         
         # Load image
-        image = Image.open(image_path).convert("RGB")
+        image = open_image(image_path).convert("RGB")
         
         # Use processor to get OCR + layout
         # This automatically runs OCR and extracts bounding boxes
-        encoding = self.processor(
-            image,
-            return_tensors="pt",
-            padding="max_length",
-            truncation=True
-        )
-        
-        # Move to device
-        encoding = {k: v.to(self.device) for k, v in encoding.items()}
-        
-        # Run model
-        with torch.no_grad():
-            outputs = self.model(**encoding)
+        encoding = self.encode(image)
         
-        # Get predictions
-        predictions = outputs.logits.argmax(-1).squeeze().tolist()
+        # Run model (batched with concurrent requests)
+        predictions = self.predict(encoding)
         
         # Extract entities (simplified - would need proper NER labels)
         # For now, return basic structure
@@ -133,7 +217,7 @@ class LayoutLMExtractor:
             import pytesseract
             
             # Get OCR with positions
-            image = Image.open(image_path)
+            image = open_image(image_path)
             ocr_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
             
             # Extract text and positions
@@ -241,18 +325,71 @@ class LayoutLMExtractor:
         return None
 
 
+_threads_pinned = False
+
+
+def _pin_torch_threads() -> None:
+    """Pin torch intra-op threads once per process (see LAYOUTLM_TORCH_THREADS)."""
+    global _threads_pinned
+    if _threads_pinned:
+        return
+    _threads_pinned = True
+    threads = LAYOUTLM_TORCH_THREADS
+    if threads <= 0:
+        workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1") or 1))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+    torch.set_num_threads(threads)
+    print(f"   Torch threads: {threads}")
+
+
+_PAD_VALUES = {"attention_mask": 0, "bbox": 0, "token_type_ids": 0}
+
+
+def _pad_and_stack(encodings: List[Dict[str, Any]], pad_token_id: int = 0) -> Dict[str, Any]:
+    """Right-pad token-level tensors to the longest sequence and concatenate on the batch dim."""
+    if len(encodings) == 1:
+        return dict(encodings[0])
+    max_len = max(int(enc["input_ids"].shape[1]) for enc in encodings)
+    batch = {}
+    for key in encodings[0]:
+        tensors = []
+        for enc in encodings:
+            t = enc[key]
+            # Token-level tensors are [1, seq] or [1, seq, 4]; pixel_values are not padded
+            if key != "pixel_values" and t.dim() >= 2 and t.shape[1] < max_len:
+                pad_shape = (t.shape[0], max_len - t.shape[1]) + tuple(t.shape[2:])
+                pad_value = _PAD_VALUES.get(key, pad_token_id)
+                t = torch.cat([t, torch.full(pad_shape, pad_value, dtype=t.dtype)], dim=1)
+            tensors.append(t)
+        batch[key] = torch.cat(tensors, dim=0)
+    return batch
+
+
 # Convenience functions
 _layoutlm_extractor = None
+_extractor_lock = threading.Lock()
 
 
 def get_layoutlm_extractor() -> LayoutLMExtractor:
     """Get singleton LayoutLM extractor instance."""
     global _layoutlm_extractor
     if _layoutlm_extractor is None:
-        _layoutlm_extractor = LayoutLMExtractor()
+        # Concurrent requests must share one model (and one batching queue)
+        with _extractor_lock:
+            if _layoutlm_extractor is None:
+                _layoutlm_extractor = LayoutLMExtractor()
     return _layoutlm_extractor
 
 
+def _load_layoutlm() -> LayoutLMExtractor:
+    extractor = get_layoutlm_extractor()
+    extractor.load_model()
+    return extractor
+
+
+register_model("layoutlm", _load_layoutlm, lambda extractor: extractor.unload())
+
+
 def extract_receipt_with_layoutlm(image_path: str, method: str = "simple") -> Dict[str, Any]:
     """
     Extract receipt data using LayoutLM.
@@ -262,7 +399,14 @@ def extract_receipt_with_layoutlm(image_path: str, method: str = "simple") -> Di
         method: "simple" (rule-based) or "full" (requires fine-tuned model)
     
     This is the main function to use for LayoutLM extraction.
+    Runs on the model server when MODEL_SERVER_SOCKET is set.
     """
+    if model_server_enabled():
+        try:
+            return remote_call("layoutlm", image_path, method=method)
+        except Exception as e:
+            return {"error": str(e), "method": "layoutlm"}
+    
     if not LAYOUTLM_AVAILABLE:
         return {
             "error": "LayoutLM not available",
@@ -270,14 +414,13 @@ def extract_receipt_with_layoutlm(image_path: str, method: str = "simple") -> Di
         }
     
     try:
-        extractor = get_layoutlm_extractor()
-        
         if method == "simple":
-            # Use simple rule-based extraction (works out of the box)
-            result = extractor.extract_simple(image_path)
+            # Use simple rule-based extraction (works out of the box, no weights)
+            result = get_layoutlm_extractor().extract_simple(image_path)
         else:
-            # Use full model (requires fine-tuning)
-            result = extractor.extract_with_ocr(image_path)
+            # Use full model (requires fine-tuning); held so it can't be evicted mid-call
+            with get_model_registry().acquire("layoutlm") as extractor:
+                result = extractor.extract_with_ocr(image_path)
         
         # Standardize output format
         standardized = {
@@ -8,14 +8,21 @@ Privacy-first design:
 - Continuous improvement
 """
 
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple, Union
 from datetime import datetime
+import os
+import threading
 import uuid
 import re
 
 from app.models.feedback import ReceiptFeedback, LearningRule, FeedbackType, CorrectVerdict
 from app.repository.feedback_store import get_feedback_store
 
+# How long (seconds) a worker trusts its last-read learned-rules version before
+# re-checking the database. Rule writes made in the same process invalidate
+# the compiled rules immediately; this only bounds staleness across workers.
+LEARNED_RULES_VERSION_TTL = float(os.getenv("LEARNED_RULES_VERSION_TTL", "5"))
+
 
 def learn_from_feedback(feedback: ReceiptFeedback) -> Tuple[int, List[str]]:
     """
@@ -485,47 +492,121 @@ def _extract_pattern_from_indicator(indicator: str) -> str:
         return indicator[:50]  # First 50 chars
 
 
+# =============================================================================
+# Compiled learned-rule engine
+# =============================================================================
+
+RuleMatcher = Callable[[dict], Union[bool, str]]
+
+_USER_PATTERN_TYPES = (
+    "spacing_anomaly", "invalid_address", "invalid_phone", "date_manipulation", "amount_inflation",
+)
+
+
+class CompiledLearnedRules:
+    """
+    Enabled learned rules compiled once into per-rule matchers.
+
+    Rules are deduplicated by (rule_type, pattern) in store order: every rule
+    sharing a key matches the same receipts, so only the first one can ever
+    fire. Rules whose type/pattern can never match are dropped up front.
+    """
+
+    def __init__(self, rules: List[LearningRule], version: Optional[int] = None, store=None):
+        self.version = version
+        self.store = store
+        self.rule_count = len(rules)
+        self.matchers: List[Tuple[LearningRule, RuleMatcher]] = []
+
+        seen_keys = set()
+        for rule in rules:
+            dedup_key = (rule.rule_type, rule.pattern)
+            if dedup_key in seen_keys:
+                continue
+            seen_keys.add(dedup_key)
+
+            matcher = _compile_rule_matcher(rule)
+            if matcher is not None:
+                self.matchers.append((rule, matcher))
+
+    def apply(self, features: dict) -> Tuple[float, List[str]]:
+        """Apply the compiled rules to a features dict (see apply_learned_rules)."""
+        score_adjustment = 0.0
+        triggered_rules = []
+
+        for rule, matcher in self.matchers:
+            match_result = matcher(features)
+            if match_result:
+                score_adjustment += rule.confidence_adjustment
+
+                # Create detailed message for audit trail
+                if isinstance(match_result, str):
+                    message = match_result
+                else:
+                    message = _build_detailed_rule_message(rule, features)
+
+                triggered_rules.append(message)
+
+        # Cap total adjustment to prevent runaway scores
+        score_adjustment = min(score_adjustment, 0.40)
+
+        return score_adjustment, triggered_rules
+
+
+_compiled_rules: Optional[CompiledLearnedRules] = None
+_compiled_rules_lock = threading.Lock()
+
+
+def get_compiled_learned_rules(store=None) -> CompiledLearnedRules:
+    """
+    Get the compiled enabled learned rules, recompiling only when the store's
+    rules version has changed (or a different store is in use).
+    """
+    global _compiled_rules
+    store = store or get_feedback_store()
+
+    get_version = getattr(store, "get_rules_version", None)
+    if get_version is None:
+        # Store without versioning support: nothing to key a cache on
+        return CompiledLearnedRules(store.get_learned_rules(enabled_only=True), store=store)
+
+    version = get_version(max_age_seconds=LEARNED_RULES_VERSION_TTL)
+    cached = _compiled_rules
+    if cached is not None and cached.store is store and cached.version == version:
+        return cached
+
+    with _compiled_rules_lock:
+        cached = _compiled_rules
+        if cached is not None and cached.store is store and cached.version == version:
+            return cached
+        compiled = CompiledLearnedRules(
+            store.get_learned_rules(enabled_only=True), version=version, store=store
+        )
+        _compiled_rules = compiled
+        return compiled
+
+
+def invalidate_learned_rules_cache() -> None:
+    """Drop the compiled learned rules so the next analysis reloads them."""
+    global _compiled_rules
+    with _compiled_rules_lock:
+        _compiled_rules = None
+
+
 def apply_learned_rules(features: dict) -> Tuple[float, List[str]]:
     """
     Apply learned rules to adjust fraud score.
     
+    Uses the compiled rule cache, so the feedback store is only queried
+    when the learned-rules version changes.
+    
     Args:
         features: Receipt features dictionary
         
     Returns:
         Tuple of (score_adjustment, triggered_rules)
     """
-    store = get_feedback_store()
-    rules = store.get_learned_rules(enabled_only=True)
-    
-    score_adjustment = 0.0
-    triggered_rules = []
-    _matched_types = set()  # Per-rule-type dedup to prevent score inflation
-    
-    for rule in rules:
-        # Deduplicate: only allow one rule per (rule_type, pattern) combo
-        dedup_key = (rule.rule_type, rule.pattern)
-        if dedup_key in _matched_types:
-            continue
-        
-        # Check if rule applies to these features
-        match_result = _rule_matches_features(rule, features)
-        if match_result:
-            score_adjustment += rule.confidence_adjustment
-            _matched_types.add(dedup_key)
-            
-            # Create detailed message for audit trail
-            if isinstance(match_result, str):
-                message = match_result
-            else:
-                message = _build_detailed_rule_message(rule, features)
-            
-            triggered_rules.append(message)
-    
-    # Cap total adjustment to prevent runaway scores
-    score_adjustment = min(score_adjustment, 0.40)
-    
-    return score_adjustment, triggered_rules
+    return get_compiled_learned_rules().apply(features)
 
 
 def _rule_matches_features(rule: LearningRule, features: dict):
@@ -537,52 +618,81 @@ def _rule_matches_features(rule: LearningRule, features: dict):
         - True for basic match
         - String with detailed message for audit trail
     """
-    if rule.rule_type == "suspicious_software":
-        producer = features.get("file_features", {}).get("producer", "")
-        if rule.pattern.lower() in producer.lower():
-            return f"Learned pattern detected: Suspicious software '{rule.pattern}' found in document metadata (Producer: {producer}). Confidence adjustment: +{rule.confidence_adjustment:.2f}. Learned from {rule.learned_from_feedback_count} user feedback(s)."
+    matcher = _compile_rule_matcher(rule)
+    if matcher is None:
         return False
+    return matcher(features)
+
+
+def _compile_rule_matcher(rule: LearningRule) -> Optional[RuleMatcher]:
+    """
+    Build a matcher for one learned rule.
+    
+    Returns:
+        Callable(features) -> False | True | message, or None when the rule
+        can never match (unknown rule type or user pattern).
+    """
+    if rule.rule_type == "suspicious_software":
+        pattern_lower = rule.pattern.lower()
+
+        def match_software(features: dict):
+            producer = features.get("file_features", {}).get("producer", "")
+            if pattern_lower in producer.lower():
+                return f"Learned pattern detected: Suspicious software '{rule.pattern}' found in document metadata (Producer: {producer}). Confidence adjustment: +{rule.confidence_adjustment:.2f}. Learned from {rule.learned_from_feedback_count} user feedback(s)."
+            return False
+
+        return match_software
     
     elif rule.rule_type == "spacing_threshold":
-        spacing_issues = features.get("forensic_features", {}).get("has_excessive_spacing", False)
-        if spacing_issues:
-            consecutive_spaces = features.get("forensic_features", {}).get("max_consecutive_spaces", 0)
-            return f"Learned pattern detected: Excessive spacing anomaly (max {consecutive_spaces} consecutive spaces). This pattern was flagged by users {rule.learned_from_feedback_count} time(s) as suspicious. Confidence adjustment: +{rule.confidence_adjustment:.2f}."
-        return False
+        def match_spacing(features: dict):
+            spacing_issues = features.get("forensic_features", {}).get("has_excessive_spacing", False)
+            if spacing_issues:
+                consecutive_spaces = features.get("forensic_features", {}).get("max_consecutive_spaces", 0)
+                return f"Learned pattern detected: Excessive spacing anomaly (max {consecutive_spaces} consecutive spaces). This pattern was flagged by users {rule.learned_from_feedback_count} time(s) as suspicious. Confidence adjustment: +{rule.confidence_adjustment:.2f}."
+            return False
+
+        return match_spacing
     
     elif rule.rule_type == "date_manipulation":
-        has_date_issue = features.get("file_features", {}).get("has_date_issue", False)
-        if has_date_issue:
-            return f"Learned pattern detected: Date manipulation indicators found. Receipt date appears after file creation date. This pattern was confirmed by users {rule.learned_from_feedback_count} time(s). Confidence adjustment: +{rule.confidence_adjustment:.2f}."
-        return False
+        def match_date(features: dict):
+            has_date_issue = features.get("file_features", {}).get("has_date_issue", False)
+            if has_date_issue:
+                return f"Learned pattern detected: Date manipulation indicators found. Receipt date appears after file creation date. This pattern was confirmed by users {rule.learned_from_feedback_count} time(s). Confidence adjustment: +{rule.confidence_adjustment:.2f}."
+            return False
+
+        return match_date
     
     elif rule.rule_type == "user_identified_pattern":
-        # Check if this pattern actually matches the receipt features
         pattern_type = rule.pattern
-        forensic = features.get("forensic_features", {})
-        text_feat = features.get("text_features", {})
-        
-        matched = False
-        if pattern_type == "spacing_anomaly" and forensic.get("has_excessive_spacing"):
-            matched = True
-        elif pattern_type == "invalid_address" and not text_feat.get("has_address"):
-            matched = True
-        elif pattern_type == "invalid_phone" and not text_feat.get("has_phone"):
-            matched = True
-        elif pattern_type == "date_manipulation" and features.get("file_features", {}).get("has_date_issue"):
-            matched = True
-        elif pattern_type == "amount_inflation":
-            # Only match if there's evidence of amount issues (round total, mismatch, etc.)
-            total = text_feat.get("total_amount")
-            if total and isinstance(total, (int, float)) and total > 0 and total == int(total) and int(total) % 100 == 0:
-                matched = True
-        elif pattern_type not in ("spacing_anomaly", "invalid_address", "invalid_phone", "date_manipulation", "amount_inflation"):
-            # Unknown pattern types: don't auto-match, require explicit feature presence
+        # Unknown pattern types: don't auto-match, require explicit feature presence
+        if pattern_type not in _USER_PATTERN_TYPES:
+            return None
+
+        def match_user_pattern(features: dict):
+            # Check if this pattern actually matches the receipt features
+            forensic = features.get("forensic_features", {})
+            text_feat = features.get("text_features", {})
+            
             matched = False
-        
-        if matched:
-            detail_msg = _get_pattern_details(pattern_type, features)
-            return f"Learned pattern detected: {pattern_type}. {detail_msg} This pattern was identified by users {rule.learned_from_feedback_count} time(s). Confidence adjustment: +{rule.confidence_adjustment:.2f}."
-        return False
+            if pattern_type == "spacing_anomaly" and forensic.get("has_excessive_spacing"):
+                matched = True
+            elif pattern_type == "invalid_address" and not text_feat.get("has_address"):
+                matched = True
+            elif pattern_type == "invalid_phone" and not text_feat.get("has_phone"):
+                matched = True
+            elif pattern_type == "date_manipulation" and features.get("file_features", {}).get("has_date_issue"):
+                matched = True
+            elif pattern_type == "amount_inflation":
+                # Only match if there's evidence of amount issues (round total, mismatch, etc.)
+                total = text_feat.get("total_amount")
+                if total and isinstance(total, (int, float)) and total > 0 and total == int(total) and int(total) % 100 == 0:
+                    matched = True
+            
+            if matched:
+                detail_msg = _get_pattern_details(pattern_type, features)
+                return f"Learned pattern detected: {pattern_type}. {detail_msg} This pattern was identified by users {rule.learned_from_feedback_count} time(s). Confidence adjustment: +{rule.confidence_adjustment:.2f}."
+            return False
+
+        return match_user_pattern
     
-    return False
+    return None
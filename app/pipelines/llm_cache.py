@@ -0,0 +1,223 @@
+"""
+Persistent LLM/VLM response cache.
+
+Disk-backed (SQLite), size-bounded LRU cache for Ollama responses, keyed by
+sha256 over model + model digest + endpoint + prompt/messages + image content
++ options. The digest (from Ollama's /api/tags) changes when a tag is
+re-pulled with new weights, so responses from the old weights stop matching;
+calls whose model digest is unknown are not cached.
+Wired into app.pipelines.ollama_client, so every call site that goes through
+the shared client (vision extraction, vision fraud/authenticity checks,
+semantic amount verification, LLM document classification) is covered.
+
+Only successful responses are stored. Hit/miss/eviction counters are
+exported on /metrics.
+
+Configuration:
+- LLM_CACHE_ENABLED   (default true)
+- LLM_CACHE_PATH      (default <user cache dir>/llm_cache.db, see app.utils.cache_dir)
+- LLM_CACHE_MAX_MB    (default 256) total response bytes before LRU eviction
+- LLM_CACHE_TTL_DAYS  (default 0 = no expiry)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.utils.cache_dir import user_cache_dir
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or str(user_cache_dir("llm_cache.db"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "0"))
+
+# Fraction of max size to shrink to when evicting (avoids evicting on every put)
+_EVICT_TARGET = 0.9
+
+
+def make_cache_key(endpoint: str, payload: Dict[str, Any], model_digest: Optional[str] = None) -> str:
+    """
+    Content-addressed key for an Ollama request payload.
+
+    `model_digest` identifies the weights behind the payload's model tag.
+    Images are hashed individually first so the key material stays small;
+    `stream` is ignored (responses are always collected).
+    """
+    material = {k: v for k, v in payload.items() if k not in ("images", "stream")}
+    images = payload.get("images") or []
+    material["images"] = [hashlib.sha256(img.encode("utf-8")).hexdigest() for img in images]
+    material["endpoint"] = endpoint
+    material["model_digest"] = model_digest
+    blob = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed LRU cache of raw JSON responses."""
+
+    def __init__(
+        self,
+        db_path: str = LLM_CACHE_PATH,
+        max_bytes: int = int(LLM_CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds: float = LLM_CACHE_TTL_DAYS * 86400,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+        self._init_db()
+        self._total_bytes = self._read_total_bytes()
+
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=5)
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+
+    def _read_total_bytes(self) -> int:
+        with self._get_connection() as conn:
+            return int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0])
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response dict, or None on miss/expiry/error."""
+        try:
+            now = time.time()
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self._count("misses")
+                    return None
+                if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                    self._count("misses")
+                    return None
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+            self._count("hits")
+            return json.loads(row[0])
+        except Exception as e:
+            self._count("errors")
+            logger.debug("LLM cache read failed: %s", e)
+            return None
+
+    def put(self, key: str, response: Dict[str, Any], model: Optional[str] = None) -> None:
+        """Store a response; evicts least-recently-used rows past max_bytes."""
+        try:
+            data = json.dumps(response, ensure_ascii=False)
+            size = len(data.encode("utf-8"))
+            now = time.time()
+            with self._get_connection() as conn:
+                old = conn.execute("SELECT size FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (cache_key, model, response, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, data, size, now, now),
+                )
+                with self._lock:
+                    self._total_bytes += size - (old[0] if old else 0)
+                    over = self._total_bytes > self.max_bytes
+                if over:
+                    self._evict(conn)
+            self._count("stores")
+        except Exception as e:
+            self._count("errors")
+            logger.debug("LLM cache write failed: %s", e)
+
+    def _evict(self, conn) -> None:
+        target = int(self.max_bytes * _EVICT_TARGET)
+        freed = 0
+        evicted = 0
+        with self._lock:
+            excess = self._total_bytes - target
+        for key, size in conn.execute("SELECT cache_key, size FROM llm_cache ORDER BY last_access ASC").fetchall():
+            if freed >= excess:
+                break
+            conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+            freed += size
+            evicted += 1
+        with self._lock:
+            self._total_bytes -= freed
+            self.stats["evictions"] += evicted
+
+    def clear(self) -> None:
+        with self._get_connection() as conn:
+            conn.execute("DELETE FROM llm_cache")
+        with self._lock:
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["bytes"] = self._total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def render_prometheus(self) -> str:
+        stats = self.get_stats()
+        lines = [
+            "# HELP verireceipt_llm_cache_events_total LLM/VLM response cache events.",
+            "# TYPE verireceipt_llm_cache_events_total counter",
+        ]
+        for key in ("hits", "misses", "stores", "evictions", "errors"):
+            lines.append(f'verireceipt_llm_cache_events_total{{event="{key}"}} {stats[key]}')
+        lines.append("# TYPE verireceipt_llm_cache_bytes gauge")
+        lines.append(f"verireceipt_llm_cache_bytes {stats['bytes']}")
+        return "\n".join(lines) + "\n"
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Global cache instance, or None when disabled/unavailable."""
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                try:
+                    _llm_cache = LLMResponseCache()
+                except Exception as e:
+                    logger.warning("LLM response cache unavailable: %s", e)
+                    return None
+    return _llm_cache
@@ -20,6 +20,8 @@ from dataclasses import dataclass, asdict
 import json
 import re
 
+from app.pipelines.ollama_client import CircuitOpenError, DeadlineExceededError
+
 
 @dataclass
 class LLMClassificationResult:
@@ -374,6 +376,16 @@ def classify_document_with_llm(
         
         return result
     
+    except CircuitOpenError:
+        return LLMClassificationResult(
+            confidence=0.0,
+            evidence=["skipped:circuit_open"]
+        )
+    except DeadlineExceededError:
+        return LLMClassificationResult(
+            confidence=0.0,
+            evidence=["skipped:deadline"]
+        )
     except Exception as e:
         return LLMClassificationResult(
             confidence=0.0,
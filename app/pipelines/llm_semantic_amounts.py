@@ -239,23 +239,18 @@ def _query_ollama(
     Returns:
         LLM response text or None if failed
     """
+    from app.pipelines.ollama_client import CircuitOpenError, get_ollama_client
     try:
-        url = "http://localhost:11434/api/generate"
-        payload = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature
-            }
-        }
-        
-        response = requests.post(url, json=payload, timeout=timeout)
-        response.raise_for_status()
-        
-        result = response.json()
-        return result.get("response", "")
+        return get_ollama_client().generate(
+            model,
+            prompt,
+            options={"temperature": temperature},
+            timeout=timeout,
+        )
     
+    except CircuitOpenError:
+        logger.info("Semantic verification skipped: circuit_open (model=%s)", model)
+        return None
     except requests.exceptions.ConnectionError:
         logger.debug("Ollama not available - semantic verification skipped")
         return None
@@ -4,9 +4,12 @@ from typing import Dict, Any
 import os
 import datetime
 
-import fitz  # PyMuPDF
 from PIL import Image
 
+from app.utils.lazy_import import lazy_import
+
+fitz = lazy_import("fitz")  # PyMuPDF, imported on first PDF
+
 
 def _fs_metadata(path: str) -> Dict[str, Any]:
     """Basic filesystem metadata for any file."""
@@ -0,0 +1,119 @@
+# app/pipelines/microbatch.py
+"""
+In-process micro-batching queue for model inference.
+
+Concurrent requests that each run a one-item forward pass serialize on the
+model. A MicroBatcher collects items submitted from any thread into batches
+of up to `max_batch_size`, waiting at most `max_wait_s` after the first item
+for more to arrive, and runs one `process_batch(items) -> results` call per
+batch on a single worker thread. Each submit() returns a Future for its own
+result; a failing batch fails every future in it.
+
+Used by layoutlm_extractor for LayoutLMv3 forward passes.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Batch concurrent submissions for `process_batch` on one worker thread."""
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 8,
+        max_wait_s: float = 0.01,
+        name: str = "microbatch",
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_s))
+        self.name = name
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {"batches": 0, "items": 0, "max_batch": 0, "errors": 0}
+
+    def submit(self, item: Any) -> Future:
+        """Queue `item`; the returned future resolves to its result."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name}: batcher is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._queue.put((item, future))
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the worker after the queued items are processed."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def _collect(self, first) -> Tuple[List[Tuple[Any, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            left = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=left) if left > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stop = self._collect(first)
+            # Drop futures cancelled while queued
+            batch = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch: List[Tuple[Any, Future]]) -> None:
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["items"] += len(batch)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+        try:
+            results = list(self.process_batch([item for item, _ in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name}: {len(results)} results for a batch of {len(batch)}")
+        except BaseException as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            logger.warning("%s: batch of %d failed: %s", self.name, len(batch), e)
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        for (_, fut), result in zip(batch, results):
+            fut.set_result(result)
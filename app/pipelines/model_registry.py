@@ -0,0 +1,317 @@
+# app/pipelines/model_registry.py
+"""
+Model lifecycle: warm-up, readiness, resident memory and LRU unloading.
+
+The heavy models (LayoutLM, DONUT, Donut-Receipt, the PyTorch vision LLM,
+EasyOCR) used to be loaded lazily by per-module globals on the first request
+and were never unloaded. Each module now registers its model here:
+
+    register_model("donut", load=..., unload=...)
+
+and callers use it through
+
+    with get_model_registry().acquire("donut") as extractor:
+        ...
+
+which loads on demand, marks the model in use (never evicted while in use)
+and refreshes its LRU position. After every load the registry measures the
+model's resident memory (process RSS growth during the load) and, while the
+total exceeds MODEL_MEMORY_BUDGET_MB, unloads least-recently-used idle
+models. Models named in MODEL_WARMUP are loaded in a background thread at
+startup; ready() turns true once warm-up finishes, which the API exposes as
+/ready (separate from the /health liveness check).
+
+Configuration:
+- MODEL_WARMUP            comma-separated model names, or "all" (default none)
+- MODEL_MEMORY_BUDGET_MB  (default 0 = unlimited)
+"""
+
+import gc
+import importlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "")
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+
+# Modules that register each known model when imported
+MODEL_MODULES = {
+    "layoutlm": "app.pipelines.layoutlm_extractor",
+    "donut": "app.pipelines.donut_extractor",
+    "donut_receipt": "app.models.donut_receipt",
+    "vision_pytorch": "app.pipelines.vision_llm_pytorch",
+    "easyocr": "app.pipelines.ocr",
+}
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB (0 if unknown)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class _Entry:
+    __slots__ = ("name", "load", "unload", "obj", "resident_mb", "last_used", "in_use",
+                 "loads", "evictions", "load_s", "error", "lock")
+
+    def __init__(self, name: str, load: Callable[[], Any], unload: Optional[Callable[[Any], None]]):
+        self.name = name
+        self.load = load
+        self.unload = unload
+        self.obj: Any = None
+        self.resident_mb = 0.0
+        self.last_used = 0.0
+        self.in_use = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_s: Optional[float] = None
+        self.error: Optional[str] = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Registered models with on-demand loading and LRU unloading under a memory budget."""
+
+    def __init__(self, budget_mb: float = MODEL_MEMORY_BUDGET_MB, measure: Callable[[], float] = _rss_mb):
+        self.budget_mb = budget_mb
+        self._measure = measure
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        # Loads are serialized so RSS growth is attributable to one model
+        self._load_lock = threading.Lock()
+        self._warmup: Optional[Dict[str, Any]] = None
+        self._warmup_done = threading.Event()
+        self._warmup_done.set()
+
+    # -- registration ------------------------------------------------------
+
+    def register(self, name: str, load: Callable[[], Any], unload: Optional[Callable[[Any], None]] = None) -> None:
+        """Register (or re-register) a model; `load()` must return it fully loaded."""
+        with self._lock:
+            self._entries[name] = _Entry(name, load, unload)
+
+    def _entry(self, name: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None and name in MODEL_MODULES:
+            importlib.import_module(MODEL_MODULES[name])
+            with self._lock:
+                entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"unknown model {name!r}")
+        return entry
+
+    # -- use ---------------------------------------------------------------
+
+    @contextmanager
+    def acquire(self, name: str) -> Iterator[Any]:
+        """Load `name` if needed and hold it (not evictable) for the block."""
+        entry = self._entry(name)
+        with entry.lock:
+            entry.in_use += 1
+        try:
+            obj = self._ensure_loaded(entry)
+            yield obj
+        finally:
+            with entry.lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def get(self, name: str) -> Any:
+        """Load `name` if needed and return it (refreshes its LRU position)."""
+        with self.acquire(name) as obj:
+            return obj
+
+    def _ensure_loaded(self, entry: _Entry) -> Any:
+        with entry.lock:
+            entry.last_used = time.monotonic()
+            if entry.obj is not None:
+                return entry.obj
+        with self._load_lock:
+            with entry.lock:
+                if entry.obj is not None:
+                    return entry.obj
+            before = self._measure()
+            start = time.perf_counter()
+            try:
+                obj = entry.load()
+            except Exception as e:
+                entry.error = f"{type(e).__name__}: {e}"
+                raise
+            with entry.lock:
+                entry.obj = obj
+                entry.resident_mb = max(0.0, self._measure() - before)
+                entry.load_s = round(time.perf_counter() - start, 3)
+                entry.loads += 1
+                entry.error = None
+            logger.info("Loaded model %s in %.1fs (%.0f MB)", entry.name, entry.load_s, entry.resident_mb)
+            self._enforce_budget(keep=entry.name)
+            return obj
+
+    # -- unloading ---------------------------------------------------------
+
+    def total_resident_mb(self) -> float:
+        with self._lock:
+            entries = list(self._entries.values())
+        return sum(e.resident_mb for e in entries if e.obj is not None)
+
+    def _enforce_budget(self, keep: str) -> List[str]:
+        if self.budget_mb <= 0:
+            return []
+        evicted = []
+        while self.total_resident_mb() > self.budget_mb:
+            with self._lock:
+                candidates = [
+                    e for e in self._entries.values()
+                    if e.obj is not None and e.in_use == 0 and e.name != keep
+                ]
+            if not candidates:
+                logger.warning(
+                    "Model memory %.0f MB over budget %.0f MB; nothing idle to unload",
+                    self.total_resident_mb(), self.budget_mb,
+                )
+                break
+            victim = min(candidates, key=lambda e: e.last_used)
+            if self.unload(victim.name):
+                evicted.append(victim.name)
+        return evicted
+
+    def unload(self, name: str) -> bool:
+        """Unload `name` unless it is in use; True if it was unloaded."""
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.obj is None or entry.in_use:
+                return False
+            obj, entry.obj = entry.obj, None
+            freed = entry.resident_mb
+            entry.resident_mb = 0.0
+            entry.evictions += 1
+        if entry.unload is not None:
+            try:
+                entry.unload(obj)
+            except Exception as e:
+                logger.warning("Unloading model %s failed: %s", name, e)
+        del obj
+        gc.collect()
+        _empty_device_cache()
+        logger.info("Unloaded model %s (~%.0f MB)", name, freed)
+        return True
+
+    # -- warm-up / readiness -----------------------------------------------
+
+    def warmup(self, names: List[str]) -> Dict[str, Any]:
+        """Load `names` now; returns {name: "ok" | error}."""
+        results: Dict[str, Any] = {}
+        for name in names:
+            try:
+                self.get(name)
+                results[name] = "ok"
+            except Exception as e:
+                logger.warning("Warm-up of model %s failed: %s", name, e)
+                results[name] = f"{type(e).__name__}: {e}"
+        return results
+
+    def start_warmup(self, names: Optional[List[str]] = None) -> None:
+        """Warm `names` (default MODEL_WARMUP) in a background thread; ready() waits for it."""
+        names = parse_warmup(MODEL_WARMUP) if names is None else names
+        if not names:
+            return
+        self._warmup = {"models": list(names), "results": {}, "started": time.time(), "seconds": None}
+        self._warmup_done.clear()
+
+        def run():
+            start = time.perf_counter()
+            try:
+                self._warmup["results"] = self.warmup(names)
+            finally:
+                self._warmup["seconds"] = round(time.perf_counter() - start, 2)
+                self._warmup_done.set()
+
+        threading.Thread(target=run, name="model-warmup", daemon=True).start()
+
+    def ready(self) -> bool:
+        """True when no warm-up is running."""
+        return self._warmup_done.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._warmup_done.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries.values())
+        models = {
+            e.name: {
+                "loaded": e.obj is not None,
+                "resident_mb": round(e.resident_mb, 1),
+                "in_use": e.in_use,
+                "loads": e.loads,
+                "evictions": e.evictions,
+                "load_s": e.load_s,
+                "error": e.error,
+            }
+            for e in entries
+        }
+        return {
+            "ready": self.ready(),
+            "warmup": dict(self._warmup) if self._warmup else None,
+            "budget_mb": self.budget_mb,
+            "resident_mb": round(self.total_resident_mb(), 1),
+            "models": models,
+        }
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP verireceipt_model_resident_mb Resident memory attributed to a loaded model",
+            "# TYPE verireceipt_model_resident_mb gauge",
+        ]
+        status = self.status()
+        for name, m in sorted(status["models"].items()):
+            lines.append(f'verireceipt_model_resident_mb{{model="{name}"}} {m["resident_mb"]}')
+        lines.append("# HELP verireceipt_model_evictions_total Models unloaded under the memory budget")
+        lines.append("# TYPE verireceipt_model_evictions_total counter")
+        for name, m in sorted(status["models"].items()):
+            lines.append(f'verireceipt_model_evictions_total{{model="{name}"}} {m["evictions"]}')
+        lines.append(f"verireceipt_models_ready {1 if status['ready'] else 0}")
+        return "\n".join(lines) + "\n"
+
+
+def _empty_device_cache() -> None:
+    import sys
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def parse_warmup(raw: str) -> List[str]:
+    """MODEL_WARMUP value -> model names ("all" = every known model)."""
+    names = [n.strip() for n in (raw or "").split(",") if n.strip()]
+    if names == ["all"]:
+        return list(MODEL_MODULES)
+    return names
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _registry
+
+
+def register_model(name: str, load: Callable[[], Any], unload: Optional[Callable[[Any], None]] = None) -> None:
+    """Register a model with the global registry (called by the model's module on import)."""
+    _registry.register(name, load, unload)
@@ -0,0 +1,370 @@
+# app/pipelines/model_server.py
+"""
+Local model server: one process hosts the heavy models for many API workers.
+
+Every API worker that imports the extractors loads its own copy of LayoutLM,
+DONUT, Donut-Receipt, the PyTorch vision LLM and EasyOCR, which is why the
+API runs with a single worker. With MODEL_SERVER_SOCKET set, the extractors'
+entry points instead call a model-server process over a Unix socket:
+
+    python -m app.pipelines.model_server            # hosts the models
+    MODEL_SERVER_SOCKET=/tmp/verireceipt-models.sock uvicorn ... --workers N
+
+Images are handed off through multiprocessing.shared_memory: the client
+writes the decoded pixels into a block it owns, sends only its name, size
+and mode, and unlinks it once the reply arrives - no re-encoding, and no
+pixels on the socket. Requests and replies are length-prefixed JSON frames.
+
+Ops (DEFAULT_OPS): layoutlm, donut, donut_receipt, vision_pytorch, easyocr,
+plus ping (which reports model readiness). Models are managed by
+app.pipelines.model_registry in the server: MODEL_WARMUP loads them at
+start, the rest load on first use.
+
+Configuration:
+- MODEL_SERVER_SOCKET     (default unset = models run in-process)
+- MODEL_SERVER_TIMEOUT_S  (default 120) per call; truncated to the request
+                          deadline (app.pipelines.deadline)
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL import Image
+
+from app.pipelines.deadline import clamp_timeout
+
+logger = logging.getLogger(__name__)
+
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", "")
+MODEL_SERVER_TIMEOUT_S = float(os.getenv("MODEL_SERVER_TIMEOUT_S", "120"))
+
+_HEADER = struct.Struct("!I")
+_MAX_FRAME = 64 * 1024 * 1024
+
+# Set in the server process so extractors run their models locally there
+_serving = False
+
+
+class ModelServerError(RuntimeError):
+    """The model server is unreachable or the remote op failed."""
+
+
+def model_server_enabled() -> bool:
+    """True if extractor calls should go to the model server."""
+    return bool(MODEL_SERVER_SOCKET) and not _serving
+
+
+def open_image(image) -> Image.Image:
+    """PIL image from a path or an already-decoded image."""
+    return image if isinstance(image, Image.Image) else Image.open(image)
+
+
+# ---------------------------------------------------------------------------
+# Framing
+# ---------------------------------------------------------------------------
+
+def _json_default(value: Any) -> Any:
+    # numpy scalars / arrays (EasyOCR boxes, model outputs)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def _send(sock: socket.socket, message: Dict[str, Any]) -> None:
+    payload = json.dumps(message, default=_json_default).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> Optional[bytes]:
+    chunks = []
+    while n:
+        chunk = sock.recv(min(n, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > _MAX_FRAME:
+        raise ModelServerError(f"frame of {size} bytes exceeds limit")
+    payload = _recv_exact(sock, size)
+    if payload is None:
+        return None
+    return json.loads(payload.decode("utf-8"))
+
+
+# ---------------------------------------------------------------------------
+# Shared-memory image hand-off
+# ---------------------------------------------------------------------------
+
+def _share_image(image) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    img = open_image(image)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    data = img.tobytes()
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    shm.buf[:len(data)] = data
+    return shm, {"shm": shm.name, "size": list(img.size), "mode": img.mode, "nbytes": len(data)}
+
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # The client owns (and unlinks) the block; don't let this process's
+        # resource tracker unlink it too
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _load_shared_image(ref: Dict[str, Any]) -> Image.Image:
+    shm = _attach_shm(ref["shm"])
+    try:
+        return Image.frombytes(ref["mode"], tuple(ref["size"]), bytes(shm.buf[:ref["nbytes"]]))
+    finally:
+        shm.close()
+
+
+# ---------------------------------------------------------------------------
+# Ops (run in the server process; imports are lazy so only it loads models)
+# ---------------------------------------------------------------------------
+
+def _op_layoutlm(image, method: str = "simple"):
+    from app.pipelines.layoutlm_extractor import extract_receipt_with_layoutlm
+    return extract_receipt_with_layoutlm(image, method=method)
+
+
+def _op_donut(image, raw: bool = False):
+    from app.pipelines.model_registry import get_model_registry
+    with get_model_registry().acquire("donut") as extractor:
+        return extractor.extract_from_image(image) if raw else extractor.extract_receipt_data(image)
+
+
+def _op_donut_receipt(image):
+    from app.models.donut_receipt import analyze_receipt_donut
+    return analyze_receipt_donut(image)
+
+
+def _op_vision_pytorch(image, prompt: str, **kwargs):
+    from app.pipelines.vision_llm_pytorch import generate_pytorch
+    return generate_pytorch(image, prompt, **kwargs)
+
+
+def _op_easyocr(image):
+    import numpy as np
+
+    from app.pipelines.model_registry import get_model_registry
+    with get_model_registry().acquire("easyocr") as reader:
+        return reader.readtext(np.array(image), detail=1)
+
+
+# op -> (fn(image, **kwargs), serialize); serialized ops run one call at a
+# time (LayoutLM micro-batches concurrent calls itself)
+DEFAULT_OPS: Dict[str, Tuple[Callable[..., Any], bool]] = {
+    "layoutlm": (_op_layoutlm, False),
+    "donut": (_op_donut, True),
+    "donut_receipt": (_op_donut_receipt, True),
+    "vision_pytorch": (_op_vision_pytorch, True),
+    "easyocr": (_op_easyocr, True),
+}
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        while True:
+            try:
+                request = _recv(self.request)
+            except (OSError, ValueError, ModelServerError) as e:
+                logger.warning("model server: bad request: %s", e)
+                return
+            if request is None:
+                return
+            try:
+                _send(self.request, self.server.dispatch(request))
+            except OSError:
+                return
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server running model ops for API workers (one thread per connection)."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, ops: Optional[Dict[str, Tuple[Callable[..., Any], bool]]] = None):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.socket_path = socket_path
+        self.ops = dict(DEFAULT_OPS if ops is None else ops)
+        self._locks = {name: threading.Lock() for name, (_, serialize) in self.ops.items() if serialize}
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"calls": 0, "errors": 0}
+        super().__init__(socket_path, _Handler)
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "ping":
+            from app.pipelines.model_registry import get_model_registry
+            with self._stats_lock:
+                stats = dict(self.stats)
+            result = {"ops": sorted(self.ops), "stats": stats, "pid": os.getpid(),
+                      "models": get_model_registry().status()}
+            return {"ok": True, "result": result}
+        if op not in self.ops:
+            return {"ok": False, "error": f"unknown op {op!r}", "type": "KeyError"}
+
+        fn, _ = self.ops[op]
+        lock = self._locks.get(op)
+        try:
+            image = _load_shared_image(request["image"]) if request.get("image") else None
+            if lock is not None:
+                with lock:
+                    result = fn(image, **request.get("kwargs", {}))
+            else:
+                result = fn(image, **request.get("kwargs", {}))
+        except Exception as e:
+            logger.warning("model server: %s failed: %s", op, e, exc_info=True)
+            with self._stats_lock:
+                self.stats["calls"] += 1
+                self.stats["errors"] += 1
+            return {"ok": False, "error": str(e), "type": type(e).__name__}
+        with self._stats_lock:
+            self.stats["calls"] += 1
+        return {"ok": True, "result": result}
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def serve(socket_path: str = "") -> None:
+    """Run the model server in this process until interrupted."""
+    global _serving
+    _serving = True
+    socket_path = socket_path or MODEL_SERVER_SOCKET or "/tmp/verireceipt-models.sock"
+    server = ModelServer(socket_path)
+    from app.pipelines.model_registry import get_model_registry
+    get_model_registry().start_warmup()
+    logger.info("Model server listening on %s (ops: %s)", socket_path, ", ".join(sorted(server.ops)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class ModelServerClient:
+    """Per-thread persistent connections to a model server."""
+
+    def __init__(self, socket_path: str, timeout_s: float = MODEL_SERVER_TIMEOUT_S):
+        self.socket_path = socket_path
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise ModelServerError(f"model server unreachable at {self.socket_path}: {e}") from e
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def call(self, op: str, image=None, **kwargs: Any) -> Any:
+        """Run `op` on the server with `image` (path or PIL image); returns its result."""
+        timeout = clamp_timeout(self.timeout_s)
+        if timeout <= 0:
+            raise ModelServerError(f"{op}: request deadline exceeded")
+        shm, ref = _share_image(image) if image is not None else (None, None)
+        try:
+            request = {"op": op, "image": ref, "kwargs": kwargs}
+            for attempt in (1, 2):
+                sock = self._connection()
+                sock.settimeout(timeout)
+                try:
+                    _send(sock, request)
+                    reply = _recv(sock)
+                except socket.timeout as e:
+                    # The reply may still arrive later; never reuse this connection
+                    self._drop_connection()
+                    raise ModelServerError(f"{op}: no reply within {timeout:.1f}s") from e
+                except OSError:
+                    reply = None
+                if reply is not None:
+                    break
+                # Server restarted / closed the connection: reconnect once
+                self._drop_connection()
+                if attempt == 2:
+                    raise ModelServerError(f"{op}: connection to model server lost")
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        if not reply.get("ok"):
+            raise ModelServerError(f"{op}: {reply.get('type', 'Error')}: {reply.get('error')}")
+        return reply.get("result")
+
+    def ping(self) -> Dict[str, Any]:
+        return self.call("ping")
+
+
+_client: Optional[ModelServerClient] = None
+_client_lock = threading.Lock()
+
+
+def get_model_client() -> ModelServerClient:
+    """Singleton client for MODEL_SERVER_SOCKET."""
+    global _client
+    with _client_lock:
+        if _client is None or _client.socket_path != MODEL_SERVER_SOCKET:
+            _client = ModelServerClient(MODEL_SERVER_SOCKET)
+        return _client
+
+
+def remote_call(op: str, image=None, **kwargs: Any) -> Any:
+    """Run `op` on the configured model server."""
+    return get_model_client().call(op, image, **kwargs)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="VeriReceipt local model server")
+    parser.add_argument("--socket", default="", help="Unix socket path (default: MODEL_SERVER_SOCKET)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    # Serve through the importable module so extractors see _serving
+    from app.pipelines.model_server import serve as _serve
+    _serve(args.socket)
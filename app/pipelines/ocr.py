@@ -22,27 +22,20 @@ import os
 from PIL import Image
 import numpy as np
 
+from app.pipelines.model_registry import get_model_registry, register_model
+from app.pipelines.model_server import model_server_enabled, remote_call
+from app.utils.lazy_import import lazy_import, module_available
+
 logger = logging.getLogger(__name__)
 
-# Try to import EasyOCR (better accuracy)
-try:
-    import easyocr
-    HAS_EASYOCR = True
-    _easyocr_reader = None  # Lazy load
-except ImportError:
-    easyocr = None
-    HAS_EASYOCR = False
-    _easyocr_reader = None
-
-# Try to import Tesseract (fallback)
-try:
-    import pytesseract
-    from pytesseract import TesseractNotFoundError  # type: ignore
-    HAS_TESSERACT = True
-except Exception:
-    pytesseract = None  # type: ignore
-    TesseractNotFoundError = Exception  # type: ignore
-    HAS_TESSERACT = False
+# EasyOCR (better accuracy; imports torch) and Tesseract (fallback; imports
+# pandas) are imported on first use to keep API startup fast
+HAS_EASYOCR = module_available("easyocr")
+easyocr = lazy_import("easyocr")
+_easyocr_reader = None  # Lazy load
+
+HAS_TESSERACT = module_available("pytesseract")
+pytesseract = lazy_import("pytesseract")
 
 # Check environment variable for OCR preference
 OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")  # auto, easyocr, tesseract
@@ -52,12 +45,24 @@ def _get_easyocr_reader():
     """Lazy load EasyOCR reader (downloads models on first use)"""
     global _easyocr_reader
     if _easyocr_reader is None:
+        if not HAS_EASYOCR:
+            raise ImportError("EasyOCR is not installed")
         logger.info("Loading EasyOCR reader (first time may download ~500MB models)...")
         _easyocr_reader = easyocr.Reader(['en'], gpu=False)  # Use GPU=True if available
         logger.info("✅ EasyOCR reader loaded")
     return _easyocr_reader
 
 
+def _unload_easyocr_reader(reader) -> None:
+    global _easyocr_reader
+    if _easyocr_reader is reader:
+        _easyocr_reader = None
+
+
+# Shared with layout_tokens (one reader per process)
+register_model("easyocr", _get_easyocr_reader, _unload_easyocr_reader)
+
+
 def _run_easyocr(img: Image.Image) -> tuple[str, float, list]:
     """
     Run EasyOCR on a single image with confidence scoring.
@@ -66,11 +71,14 @@ def _run_easyocr(img: Image.Image) -> tuple[str, float, list]:
         (text, avg_confidence, detailed_results)
     """
     try:
-        reader = _get_easyocr_reader()
-        # Convert PIL to numpy array
-        img_array = np.array(img)
-        # Run OCR with detail=1 to get confidence scores
-        results = reader.readtext(img_array, detail=1)
+        if model_server_enabled():
+            results = remote_call("easyocr", img)
+        else:
+            # Convert PIL to numpy array
+            img_array = np.array(img)
+            # Run OCR with detail=1 to get confidence scores
+            with get_model_registry().acquire("easyocr") as reader:
+                results = reader.readtext(img_array, detail=1)
         
         if not results:
             return "", 0.0, []
@@ -136,7 +144,7 @@ def _run_tesseract(img: Image.Image) -> tuple:
             detailed = []
         
         return text, avg_conf, detailed
-    except TesseractNotFoundError:
+    except pytesseract.TesseractNotFoundError:
         logger.warning("Tesseract binary not found in PATH")
         return "", 0.0, []
     except Exception as e:
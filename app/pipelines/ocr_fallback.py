@@ -15,6 +15,7 @@ logger = logging.getLogger(__name__)
 # Import vision LLM if available
 try:
     from app.pipelines.vision_llm import (
+        DEFAULT_VISION_MODEL,
         query_vision_model,
         extract_receipt_data_with_vision,
         detect_fraud_indicators_with_vision,
@@ -75,7 +76,8 @@ def should_use_vision_fallback(
 def extract_fields_with_vision(
     image_path: str,
     missing_fields: List[str],
-    doc_subtype: Optional[str] = None
+    doc_subtype: Optional[str] = None,
+    model: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Use vision LLM to extract missing fields from receipt image.
@@ -84,12 +86,14 @@ def extract_fields_with_vision(
         image_path: Path to receipt image
         missing_fields: List of fields to extract
         doc_subtype: Document subtype hint
+        model: Vision model (default VISION_MODEL)
     
     Returns:
         Dictionary of extracted fields with confidence scores
     """
     if not HAS_VISION_LLM:
         return {}
+    model = model or DEFAULT_VISION_MODEL
     
     try:
         # Build targeted prompt based on missing fields
@@ -118,10 +122,38 @@ Example format:
     "receipt_number": "12345"
 }}"""
         
+        # Reuse the combined extract+forensics prompt result when available
+        # (same image already analyzed by vision_extract / build_vision_assessment)
+        # (only when it ran on this model)
+        from app.pipelines.vision_combined import (
+            VISION_COMBINED_ENABLED,
+            VISION_COMBINED_MODEL,
+            analyze_image_combined,
+        )
+        if VISION_COMBINED_ENABLED and model == VISION_COMBINED_MODEL:
+            combined = analyze_image_combined(image_path, model=model)
+            vlm = (combined or {}).get("extraction")
+            if vlm:
+                extracted = {
+                    "total_amount": vlm.get("total"),
+                    "merchant_name": vlm.get("merchant_name"),
+                    "receipt_date": vlm.get("receipt_date"),
+                    "receipt_time": vlm.get("receipt_time"),
+                    "receipt_number": vlm.get("receipt_number"),
+                }
+                logger.info(f"✅ Vision LLM extracted {len(extracted)} fields (combined prompt)")
+                return {
+                    "extracted_fields": extracted,
+                    "vision_confidence": 0.7,
+                    "source": "vision_llm_fallback",
+                    "model_response": vlm,
+                }
+        
         # Query vision model
         response = query_vision_model(
             image_path=image_path,
             prompt=prompt,
+            model=model,
             temperature=0.1  # Low temperature for factual extraction
         )
         
@@ -156,6 +188,31 @@ Example format:
         return {}
 
 
+def _missing_fields(text_features: Dict[str, Any]) -> List[str]:
+    missing_fields = []
+    if not text_features.get("total_amount"):
+        missing_fields.append("total_amount")
+    if not text_features.get("merchant_candidate"):
+        missing_fields.append("merchant_candidate")
+    if not text_features.get("receipt_date"):
+        missing_fields.append("receipt_date")
+    if not text_features.get("receipt_time"):
+        missing_fields.append("receipt_time")
+    if not text_features.get("receipt_number"):
+        missing_fields.append("receipt_number")
+    return missing_fields
+
+
+def vision_fallback_needed(
+    text_features: Dict[str, Any],
+    ocr_metadata: Dict[str, Any],
+    doc_subtype: Optional[str] = None
+) -> bool:
+    """Whether integrate_vision_fallback would query the vision model for these features."""
+    ocr_confidence = ocr_metadata.get("avg_confidence", 1.0)
+    return should_use_vision_fallback(ocr_confidence, _missing_fields(text_features), doc_subtype)
+
+
 def integrate_vision_fallback(
     text_features: Dict[str, Any],
     ocr_metadata: Dict[str, Any],
@@ -176,26 +233,18 @@ def integrate_vision_fallback(
     """
     # Check if fallback needed
     ocr_confidence = ocr_metadata.get("avg_confidence", 1.0)
-    
-    missing_fields = []
-    if not text_features.get("total_amount"):
-        missing_fields.append("total_amount")
-    if not text_features.get("merchant_candidate"):
-        missing_fields.append("merchant_candidate")
-    if not text_features.get("receipt_date"):
-        missing_fields.append("receipt_date")
-    if not text_features.get("receipt_time"):
-        missing_fields.append("receipt_time")
-    if not text_features.get("receipt_number"):
-        missing_fields.append("receipt_number")
+    missing_fields = _missing_fields(text_features)
     
     if not should_use_vision_fallback(ocr_confidence, missing_fields, doc_subtype):
         return text_features
     
     logger.info(f"🔍 Triggering vision LLM fallback (OCR conf={ocr_confidence:.2f}, missing={missing_fields})")
     
-    # Extract fields with vision
-    vision_result = extract_fields_with_vision(image_path, missing_fields, doc_subtype)
+    # Extract fields with vision (once per receipt across cascade tiers)
+    from app.pipelines.cascade import run_stage
+    vision_result = run_stage(
+        "vision_fallback", lambda: extract_fields_with_vision(image_path, missing_fields, doc_subtype)
+    )
     
     if not vision_result:
         return text_features
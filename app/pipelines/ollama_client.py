@@ -0,0 +1,586 @@
+"""
+Shared Ollama HTTP client.
+
+All LLM/VLM call sites (vision_llm, vision_extract, llm_semantic_amounts,
+llm_classifier via llm_config.get_llm_client) go through one pooled,
+keep-alive `requests.Session` per Ollama host, with:
+
+- a per-model semaphore bounding concurrent generations against the single
+  local Ollama (OLLAMA_MAX_CONCURRENCY, default 2)
+- queue-wait and call-duration histograms (exposed on /metrics as
+  ollama.queue_wait.<model> / ollama.generate.<model>)
+- one timeout/retry policy: connect timeout OLLAMA_CONNECT_TIMEOUT, read
+  timeout per call; connection errors and 502/503/504 are retried
+  OLLAMA_MAX_RETRIES times with linear backoff, read timeouts never are
+- an optional persistent response cache (app.pipelines.llm_cache); cache
+  hits skip the queue entirely
+- a circuit breaker per model (closed/open/half-open) fed by timeouts,
+  connection errors and 5xx, plus a background health probe on /api/tags;
+  while a breaker is open (or the probe says the host is down) calls fail
+  instantly with CircuitOpenError instead of waiting out their timeouts
+- the request deadline (app.pipelines.deadline): read timeout and queue
+  wait are truncated to the remaining budget, and calls fail instantly with
+  DeadlineExceededError (a Timeout) once it is spent; truncated timeouts do
+  not count against the breaker
+
+Failures are raised as `requests` exceptions so call sites keep their
+existing error handling and fallbacks (CircuitOpenError is a
+ConnectionError). Calls rejected by an open breaker are also reported to
+`track_circuit_skips()` collectors so the pipeline can audit skipped stages.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.pipelines.deadline import STAGE_MIN_BUDGET_S, note_skip, remaining
+from app.pipelines.llm_cache import LLMResponseCache, get_llm_cache, make_cache_key
+from app.telemetry.timings import get_global_histograms
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "8"))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "1"))
+OLLAMA_RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.5"))
+OLLAMA_CB_FAILURE_THRESHOLD = int(os.getenv("OLLAMA_CB_FAILURE_THRESHOLD", "3"))
+OLLAMA_CB_RESET_TIMEOUT = float(os.getenv("OLLAMA_CB_RESET_TIMEOUT", "30"))
+OLLAMA_HEALTH_PROBE_INTERVAL = float(os.getenv("OLLAMA_HEALTH_PROBE_INTERVAL", "15"))
+# Max age of the model digests (from /api/tags) used in response-cache keys
+OLLAMA_DIGEST_TTL = float(os.getenv("OLLAMA_DIGEST_TTL", "60"))
+
+_RETRYABLE_STATUS = {502, 503, 504}
+
+# Per-request collector of calls rejected by an open breaker (see track_circuit_skips)
+_circuit_skips: contextvars.ContextVar[Optional[List[Dict[str, str]]]] = contextvars.ContextVar(
+    "ollama_circuit_skips", default=None
+)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a model's breaker is open."""
+
+
+class DeadlineExceededError(requests.exceptions.Timeout):
+    """Raised without touching the network when the request deadline is (nearly) spent."""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open after `reset_timeout` seconds, letting one trial call through;
+    the trial's outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = OLLAMA_CB_FAILURE_THRESHOLD,
+        reset_timeout: float = OLLAMA_CB_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """True if a call may proceed (consumes the half-open trial slot)."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Ollama circuit %s closed", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Ollama circuit %s opened after %d failure(s)", self.name, self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Inconclusive call (cut short by the caller's deadline): free the half-open trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def half_open_now(self) -> None:
+        """Skip the rest of the open period (health probe saw the host recover)."""
+        with self._lock:
+            if self._state == self.OPEN:
+                self._opened_at = time.monotonic() - self.reset_timeout
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {"state": state, "failures": self._failures, "rejected": self.rejected}
+
+
+def _is_outage(exc: Exception) -> bool:
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status in _RETRYABLE_STATUS
+
+
+@contextmanager
+def track_circuit_skips() -> Iterator[List[Dict[str, str]]]:
+    """
+    Collect calls rejected by an open breaker in the current context.
+
+    Yields a list that receives {"model", "endpoint", "reason"} entries; nested
+    collectors reuse the outer list.
+    """
+    current = _circuit_skips.get()
+    if current is not None:
+        yield current
+        return
+    skips: List[Dict[str, str]] = []
+    token = _circuit_skips.set(skips)
+    try:
+        yield skips
+    finally:
+        _circuit_skips.reset(token)
+
+
+def _note_circuit_skip(model: str, endpoint: str, reason: str) -> None:
+    skips = _circuit_skips.get()
+    if skips is not None:
+        entry = {"model": model, "endpoint": endpoint, "reason": reason}
+        if entry not in skips:
+            skips.append(entry)
+
+
+class OllamaClient:
+    """
+    Pooled client for one Ollama host.
+
+    Thread-safe: the Session's connection pool is shared across threads and
+    per-model semaphores are created lazily under a lock.
+    """
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_URL,
+        max_concurrency: int = OLLAMA_MAX_CONCURRENCY,
+        pool_size: int = OLLAMA_POOL_SIZE,
+        connect_timeout: float = OLLAMA_CONNECT_TIMEOUT,
+        max_retries: int = OLLAMA_MAX_RETRIES,
+        retry_backoff: float = OLLAMA_RETRY_BACKOFF,
+        cache: Optional[LLMResponseCache] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.connect_timeout = connect_timeout
+        self.max_retries = max(0, int(max_retries))
+        self.retry_backoff = retry_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+        # Model tag -> weights digest, from the last /api/tags (see model_digest)
+        self._digests: Dict[str, str] = {}
+        self._digests_at: Optional[float] = None
+
+        # Host health from the background probe (None = not probed yet)
+        self.host_healthy: Optional[bool] = None
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Concurrency / stats
+    # ------------------------------------------------------------------
+    def _model_slot(self, model: str) -> threading.BoundedSemaphore:
+        sem = self._semaphores.get(model)
+        if sem is None:
+            with self._lock:
+                sem = self._semaphores.get(model)
+                if sem is None:
+                    sem = threading.BoundedSemaphore(self.max_concurrency)
+                    self._semaphores[model] = sem
+                    self._stats[model] = {
+                        "calls": 0, "errors": 0, "timeouts": 0,
+                        "retries": 0, "in_flight": 0, "waiting": 0,
+                        "circuit_rejected": 0, "deadline_skipped": 0,
+                    }
+        return sem
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """The model's circuit breaker (created on first use)."""
+        cb = self._breakers.get(model)
+        if cb is None:
+            with self._lock:
+                cb = self._breakers.get(model)
+                if cb is None:
+                    cb = CircuitBreaker(f"{self.base_url}/{model}")
+                    self._breakers[model] = cb
+        return cb
+
+    def circuit_open(self, model: str) -> bool:
+        """
+        True when calls for `model` would be rejected right now (host probe
+        failed, or the model's breaker is open). Does not consume the
+        half-open trial, so stages can check before doing any work.
+        """
+        if self.host_healthy is False:
+            return True
+        return self.breaker(model).state == CircuitBreaker.OPEN
+
+    def get_breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {m: cb.snapshot() for m, cb in breakers.items()}
+
+    def _bump(self, model: str, key: str, delta: int = 1) -> None:
+        with self._lock:
+            self._stats[model][key] += delta
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-model call/error/timeout/retry counters and current queue depth."""
+        with self._lock:
+            return {m: dict(s) for m, s in self._stats.items()}
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def _post(
+        self,
+        path: str,
+        model: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        cache_key = None
+        if self.cache is not None and use_cache:
+            digest = self.model_digest(model)
+            if digest is not None:
+                cache_key = make_cache_key(path, payload, model_digest=digest)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        endpoint = path.rsplit("/", 1)[-1]
+        self._model_slot(model)
+        if self.host_healthy is False:
+            self._bump(model, "circuit_rejected")
+            _note_circuit_skip(model, endpoint, "host_unhealthy")
+            raise CircuitOpenError(f"Ollama circuit open for {model} (host_unhealthy)")
+
+        # Request deadline (app.pipelines.deadline): truncate the read
+        # timeout to the remaining budget, or don't call at all
+        truncated = False
+        budget = remaining()
+        if budget is not None:
+            if budget < STAGE_MIN_BUDGET_S.get("ollama_call", 0.0):
+                self._bump(model, "deadline_skipped")
+                note_skip(f"ollama.{endpoint}", model=model)
+                raise DeadlineExceededError(f"Request deadline spent before Ollama {endpoint} ({model})")
+            if budget < timeout:
+                timeout = budget
+                truncated = True
+                note_skip(f"ollama.{endpoint}", reason="truncated", model=model, timeout_s=round(budget, 3))
+
+        if not self.breaker(model).allow():
+            self._bump(model, "circuit_rejected")
+            _note_circuit_skip(model, endpoint, "circuit_open")
+            raise CircuitOpenError(f"Ollama circuit open for {model} (circuit_open)")
+
+        result = self._post_uncached(path, model, payload, timeout, truncated=truncated)
+        if cache_key is not None:
+            self.cache.put(cache_key, result, model=model)
+        return result
+
+    def _post_uncached(
+        self,
+        path: str,
+        model: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        truncated: bool = False,
+    ) -> Dict[str, Any]:
+        sem = self._model_slot(model)
+        hist = get_global_histograms()
+
+        self._bump(model, "waiting")
+        wait_start = time.perf_counter()
+        if truncated:
+            # The queue wait counts against the deadline too
+            acquired = sem.acquire(timeout=timeout)
+            if acquired:
+                timeout = max(0.001, timeout - (time.perf_counter() - wait_start))
+        else:
+            acquired = sem.acquire()
+        if not acquired:
+            self._bump(model, "waiting", -1)
+            self._bump(model, "deadline_skipped")
+            self.breaker(model).release_trial()
+            note_skip(f"ollama.{path.rsplit('/', 1)[-1]}", model=model)
+            raise DeadlineExceededError(f"Request deadline spent waiting for an Ollama slot ({model})")
+        hist.observe(f"ollama.queue_wait.{model}", time.perf_counter() - wait_start)
+        self._bump(model, "waiting", -1)
+        self._bump(model, "in_flight")
+        self._bump(model, "calls")
+        call_start = time.perf_counter()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    resp = self.session.post(
+                        f"{self.base_url}{path}",
+                        json=payload,
+                        timeout=(self.connect_timeout, timeout),
+                    )
+                    if resp.status_code in _RETRYABLE_STATUS and attempt < self.max_retries:
+                        raise requests.exceptions.HTTPError(
+                            f"{resp.status_code} from Ollama", response=resp
+                        )
+                    resp.raise_for_status()
+                    data = resp.json()
+                    self.breaker(model).record_success()
+                    return data
+                except requests.exceptions.Timeout:
+                    self._bump(model, "timeouts")
+                    raise
+                except (requests.exceptions.ConnectionError, requests.exceptions.HTTPError) as e:
+                    status = getattr(getattr(e, "response", None), "status_code", None)
+                    retryable = isinstance(e, requests.exceptions.ConnectionError) or status in _RETRYABLE_STATUS
+                    if not retryable or attempt >= self.max_retries:
+                        raise
+                    attempt += 1
+                    self._bump(model, "retries")
+                    logger.debug("Ollama %s retry %d/%d (model=%s): %s", path, attempt, self.max_retries, model, e)
+                    time.sleep(self.retry_backoff * attempt)
+        except Exception as e:
+            self._bump(model, "errors")
+            # Timeouts / unreachable / overloaded feed the breaker; any other
+            # error means Ollama answered, which still proves it is up
+            if truncated and isinstance(e, requests.exceptions.Timeout):
+                # Cut short by the request deadline: says nothing about Ollama
+                self.breaker(model).release_trial()
+            elif _is_outage(e):
+                self.breaker(model).record_failure()
+            else:
+                self.breaker(model).record_success()
+            raise
+        finally:
+            hist.observe(f"ollama.{path.rsplit('/', 1)[-1]}.{model}", time.perf_counter() - call_start)
+            self._bump(model, "in_flight", -1)
+            sem.release()
+
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        images: Optional[List[str]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: float = 60,
+        cache: bool = True,
+        **extra: Any,
+    ) -> str:
+        """POST /api/generate (non-streaming) and return the response text."""
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": False}
+        if images:
+            payload["images"] = images
+        if options:
+            payload["options"] = options
+        payload.update(extra)
+        return self._post("/api/generate", model, payload, timeout, use_cache=cache).get("response", "")
+
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        options: Optional[Dict[str, Any]] = None,
+        timeout: float = 60,
+        cache: bool = True,
+        **extra: Any,
+    ) -> Dict[str, Any]:
+        """
+        POST /api/chat (non-streaming).
+
+        Returns the raw response dict (`{"message": {"content": ...}, ...}`),
+        matching the `ollama` package's Client.chat shape.
+        """
+        payload: Dict[str, Any] = {"model": model, "messages": messages, "stream": False}
+        if options:
+            payload["options"] = options
+        payload.update(extra)
+        return self._post("/api/chat", model, payload, timeout, use_cache=cache)
+
+    def list(self, timeout: float = 5) -> Dict[str, Any]:
+        """GET /api/tags (installed models). Doubles as a cheap liveness probe."""
+        resp = self.session.get(f"{self.base_url}/api/tags", timeout=(self.connect_timeout, timeout))
+        resp.raise_for_status()
+        tags = resp.json()
+        digests = {}
+        for entry in tags.get("models") or []:
+            for name in (entry.get("name"), entry.get("model")):
+                if name and entry.get("digest"):
+                    digests[name] = entry["digest"]
+        with self._lock:
+            self._digests = digests
+            self._digests_at = time.monotonic()
+        return tags
+
+    def model_digest(self, model: str) -> Optional[str]:
+        """
+        Digest of the weights currently behind `model`, or None if unknown.
+
+        Read from /api/tags (also refreshed by the health probe) at most
+        every OLLAMA_DIGEST_TTL seconds; a failed lookup is not retried
+        until then either, so an unreachable host costs one attempt.
+        """
+        at = self._digests_at
+        if self.host_healthy is not False and (at is None or time.monotonic() - at > OLLAMA_DIGEST_TTL):
+            try:
+                self.list(timeout=2.0)
+            except Exception as e:
+                logger.debug("Ollama model digest lookup failed for %s: %s", self.base_url, e)
+                with self._lock:
+                    self._digests_at = time.monotonic()
+        digests = self._digests
+        if model in digests:
+            return digests[model]
+        return digests.get(f"{model}:latest") if ":" not in model else None
+
+    # ------------------------------------------------------------------
+    # Health probe
+    # ------------------------------------------------------------------
+    def probe(self, timeout: float = 2.0) -> bool:
+        """
+        One health check. A failure marks the host unhealthy (every call then
+        fails fast); a success marks it healthy and moves open breakers to
+        half-open so the next call tests the model right away.
+        """
+        try:
+            self.list(timeout=timeout)
+            healthy = True
+        except Exception as e:
+            logger.debug("Ollama health probe failed for %s: %s", self.base_url, e)
+            healthy = False
+        if healthy != self.host_healthy:
+            log = logger.info if healthy else logger.warning
+            log("Ollama host %s is %s", self.base_url, "healthy" if healthy else "unreachable")
+        self.host_healthy = healthy
+        if healthy:
+            with self._lock:
+                breakers = list(self._breakers.values())
+            for cb in breakers:
+                cb.half_open_now()
+        return healthy
+
+    def start_health_probe(self, interval: float = OLLAMA_HEALTH_PROBE_INTERVAL) -> None:
+        """Probe the host every `interval` seconds on a daemon thread (idempotent)."""
+        if interval <= 0 or (self._probe_thread is not None and self._probe_thread.is_alive()):
+            return
+        self._probe_stop.clear()
+
+        def _loop():
+            while not self._probe_stop.is_set():
+                self.probe()
+                self._probe_stop.wait(interval)
+
+        self._probe_thread = threading.Thread(target=_loop, name="ollama-health-probe", daemon=True)
+        self._probe_thread.start()
+
+    def stop_health_probe(self) -> None:
+        self._probe_stop.set()
+        self._probe_thread = None
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP verireceipt_ollama_circuit_open Ollama circuit breaker state (1 = rejecting calls).",
+            "# TYPE verireceipt_ollama_circuit_open gauge",
+        ]
+        for model, snap in sorted(self.get_breaker_states().items()):
+            is_open = 1 if snap["state"] == CircuitBreaker.OPEN or self.host_healthy is False else 0
+            lines.append(f'verireceipt_ollama_circuit_open{{host="{self.base_url}",model="{model}"}} {is_open}')
+        lines.append("# TYPE verireceipt_ollama_host_up gauge")
+        up = "" if self.host_healthy is None else str(int(self.host_healthy))
+        if up:
+            lines.append(f'verireceipt_ollama_host_up{{host="{self.base_url}"}} {up}')
+        return "\n".join(lines) + "\n"
+
+
+_clients: Dict[str, OllamaClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_ollama_client(base_url: Optional[str] = None) -> OllamaClient:
+    """Get the process-wide pooled client for an Ollama host."""
+    url = (base_url or OLLAMA_URL).rstrip("/")
+    client = _clients.get(url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(url)
+            if client is None:
+                client = OllamaClient(url, cache=get_llm_cache())
+                client.start_health_probe()
+                _clients[url] = client
+    return client
+
+
+def render_ollama_prometheus() -> str:
+    """Breaker/host-health gauges for every client created so far."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return "".join(c.render_prometheus() for c in clients)
+
+
+def reset_ollama_clients() -> None:
+    """Drop cached clients (tests / after fork)."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.stop_health_probe()
+            client.session.close()
+        _clients.clear()
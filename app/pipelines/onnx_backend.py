@@ -0,0 +1,177 @@
+# app/pipelines/onnx_backend.py
+"""
+ONNX Runtime inference backend for the LayoutLM and DONUT extractors.
+
+On CPU-only nodes the full-precision PyTorch checkpoints loaded with
+`from_pretrained` are slow and large (and DONUT hits meta-tensor loading
+issues). This backend loads models exported with Hugging Face Optimum and,
+by default, dynamically int8-quantized, through ONNX Runtime:
+
+- LayoutLMv3 token classification -> ORTModelForTokenClassification
+- DONUT (VisionEncoderDecoder)    -> ORTModelForVision2Seq (supports generate)
+
+Both ORT models keep the transformers call signatures, so the extractors'
+pre/post-processing is unchanged. Export with:
+
+    python scripts/export_onnx.py --engine layoutlm donut
+
+and check parity / latency / memory against PyTorch with:
+
+    python scripts/onnx_parity_bench.py data/raw/*.jpg --bench
+
+Configuration:
+- EXTRACTOR_BACKEND       "torch" (default) or "onnx" for both engines
+- LAYOUTLM_BACKEND        per-engine override (default EXTRACTOR_BACKEND)
+- DONUT_BACKEND           per-engine override (default EXTRACTOR_BACKEND)
+- ONNX_MODEL_DIR          (default models/onnx) export root
+- ONNX_QUANTIZED          (default true) load the int8 export, else fp32
+- ONNX_INTRA_OP_THREADS   (default 0 = ONNX Runtime's choice)
+"""
+
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.utils.lazy_import import module_available
+
+logger = logging.getLogger(__name__)
+
+# optimum.onnxruntime pulls in onnxruntime, transformers and torch; it is only
+# imported when a model is loaded or exported (app.utils.lazy_import)
+ONNX_AVAILABLE = module_available("onnxruntime") and module_available("optimum")
+
+EXTRACTOR_BACKEND = os.getenv("EXTRACTOR_BACKEND", "torch").lower()
+LAYOUTLM_BACKEND = os.getenv("LAYOUTLM_BACKEND", EXTRACTOR_BACKEND).lower()
+DONUT_BACKEND = os.getenv("DONUT_BACKEND", EXTRACTOR_BACKEND).lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/onnx")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "true").lower() == "true"
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+
+# Optimum export task per engine
+ENGINE_TASKS = {
+    "layoutlm": "token-classification",
+    "donut": "image-to-text-with-past",
+}
+
+_BACKENDS = {"layoutlm": LAYOUTLM_BACKEND, "donut": DONUT_BACKEND}
+
+
+def backend_for(engine: str) -> str:
+    """Configured backend for an engine: "torch" or "onnx"."""
+    backend = _BACKENDS.get(engine, EXTRACTOR_BACKEND)
+    return "onnx" if backend == "onnx" else "torch"
+
+
+def onnx_model_path(model_name: str, quantized: Optional[bool] = None, root: Optional[str] = None) -> Path:
+    """Export directory for a model: <ONNX_MODEL_DIR>/<model slug>/<int8|fp32>."""
+    quantized = ONNX_QUANTIZED if quantized is None else quantized
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "--", model_name)
+    return Path(root or ONNX_MODEL_DIR) / slug / ("int8" if quantized else "fp32")
+
+
+def onnx_ready(engine: str, model_name: str, backend: Optional[str] = None) -> bool:
+    """True if `engine` is configured (or `backend` asks) for ONNX and its export is on disk."""
+    return (
+        (backend or backend_for(engine)) == "onnx"
+        and ONNX_AVAILABLE
+        and onnx_model_path(model_name).is_dir()
+    )
+
+
+def _session_options():
+    import onnxruntime as ort
+
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if ONNX_INTRA_OP_THREADS > 0:
+        opts.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+    return opts
+
+
+def load_ort_model(engine: str, model_name: str):
+    """Load the exported ORT model for `engine` (raises if missing)."""
+    if not ONNX_AVAILABLE:
+        raise ImportError("ONNX backend needs: pip install 'optimum[onnxruntime]'")
+    path = onnx_model_path(model_name)
+    if not path.is_dir():
+        raise FileNotFoundError(
+            f"No ONNX export for {model_name} at {path}; run scripts/export_onnx.py --engine {engine}"
+        )
+    from optimum.onnxruntime import ORTModelForTokenClassification, ORTModelForVision2Seq
+
+    cls = ORTModelForTokenClassification if engine == "layoutlm" else ORTModelForVision2Seq
+    logger.info("Loading %s ONNX model from %s", engine, path)
+    return cls.from_pretrained(path, provider="CPUExecutionProvider", session_options=_session_options())
+
+
+def export_model(engine: str, model_name: str, root: Optional[str] = None, quantize: bool = True) -> Dict[str, Any]:
+    """
+    Export `model_name` to ONNX (fp32) and, if `quantize`, a dynamic int8 copy.
+
+    Returns {"fp32": path, "int8": path or None}. Processor/tokenizer files are
+    saved next to the graphs so either directory loads on its own.
+    """
+    from optimum.exporters.onnx import main_export
+    from transformers import AutoProcessor
+
+    fp32_dir = onnx_model_path(model_name, quantized=False, root=root)
+    fp32_dir.mkdir(parents=True, exist_ok=True)
+    main_export(model_name, output=fp32_dir, task=ENGINE_TASKS[engine], device="cpu")
+    AutoProcessor.from_pretrained(model_name).save_pretrained(fp32_dir)
+    out: Dict[str, Any] = {"fp32": str(fp32_dir), "int8": None}
+
+    if quantize:
+        from optimum.onnxruntime import ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        int8_dir = onnx_model_path(model_name, quantized=True, root=root)
+        int8_dir.mkdir(parents=True, exist_ok=True)
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        # Seq2seq exports have several graphs (encoder, decoder, decoder with past)
+        for onnx_file in sorted(fp32_dir.glob("*.onnx")):
+            quantizer = ORTQuantizer.from_pretrained(fp32_dir, file_name=onnx_file.name)
+            quantizer.quantize(save_dir=int8_dir, quantization_config=qconfig)
+        # Quantized graphs get a _quantized suffix; restore the names ORTModel expects
+        for q_file in int8_dir.glob("*_quantized.onnx"):
+            q_file.replace(int8_dir / q_file.name.replace("_quantized", ""))
+        for extra in fp32_dir.iterdir():
+            if extra.suffix != ".onnx" and extra.is_file() and not (int8_dir / extra.name).exists():
+                (int8_dir / extra.name).write_bytes(extra.read_bytes())
+        out["int8"] = str(int8_dir)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Parity helpers (scripts/onnx_parity_bench.py, tests)
+# ---------------------------------------------------------------------------
+
+PARITY_FIELDS = ("merchant", "total", "date")
+
+
+def _norm_field(value: Any) -> Any:
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, str):
+        return " ".join(value.split()).lower() or None
+    return value
+
+
+def field_parity(reference: Dict[str, Any], candidate: Dict[str, Any], fields=PARITY_FIELDS) -> Dict[str, Any]:
+    """Compare extracted fields; returns {"match": bool, "diffs": {field: (ref, cand)}}."""
+    diffs = {}
+    for name in fields:
+        ref, cand = _norm_field(reference.get(name)), _norm_field(candidate.get(name))
+        if ref != cand:
+            diffs[name] = (reference.get(name), candidate.get(name))
+    return {"match": not diffs, "diffs": diffs}
+
+
+def token_agreement(reference, candidate) -> float:
+    """Fraction of positions where two token-prediction sequences agree."""
+    n = max(len(reference), len(candidate))
+    if n == 0:
+        return 1.0
+    same = sum(1 for a, b in zip(reference, candidate) if a == b)
+    return same / n
@@ -18,14 +18,14 @@ from dataclasses import dataclass, asdict
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+from app.utils.lazy_import import lazy_import, module_available
+
 logger = logging.getLogger(__name__)
 
-# Try to import PyMuPDF
-try:
-    import fitz  # PyMuPDF
-    HAS_PYMUPDF = True
-except ImportError:
-    HAS_PYMUPDF = False
+# PyMuPDF, imported on first use
+HAS_PYMUPDF = module_available("fitz")
+fitz = lazy_import("fitz")
+if not HAS_PYMUPDF:
     logger.warning("PyMuPDF (fitz) not available - will always use OCR fallback")
 
 
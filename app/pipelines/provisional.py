@@ -0,0 +1,636 @@
+# app/pipelines/provisional.py
+"""
+Provisional-then-final receipt decisions.
+
+analyze_receipt blocks on the Vision LLM (structured extraction, and the
+vision veto when the caller runs it) although OCR + rules alone produce a
+decision in a few seconds. In provisional mode:
+
+1. OCR, features and rules run synchronously and a provisional
+   ReceiptDecision (finalized=False) is returned right away. Only non-VLM
+   stages run here: the OCR vision fallback is deferred as well.
+2. The VLM stages (OCR vision fallback, extraction merge, duplicate check on
+   merged fields, vision veto) continue on a background worker; features
+   are rebuilt from the same OCR result (earlier stage outputs are reused,
+   see cascade.carry_stage_results), the rules are re-run on the merged
+   features and the final decision (finalized=True) is published on the
+   job (poll GET /jobs/{id} or stream GET /jobs/{id}/events).
+
+Whether the final decision may differ from the provisional one is decided by
+a deterministic rule (final_may_differ) from the stages still pending and
+the provisional label. When no VLM stage would run (extraction disabled,
+Ollama circuit open, ...) the decision is final immediately.
+
+The request deadline (analyze_receipt(..., deadline=...), X-Deadline-Ms)
+covers both halves: the background stages are skipped or truncated against
+the same budget. With the analysis cascade enabled (app.pipelines.cascade)
+the provisional decision is the tier-0 (rules) run and the background half
+resumes the cascade from there, escalating exactly as a synchronous
+analyze_receipt would; a decision that does not escalate is final at once.
+
+Jobs are written through to a shared store (app.repository.job_store) so
+any API worker can serve GET /jobs/{id} and its event stream.
+
+Configuration:
+- PROVISIONAL_MAX_WORKERS  (default 4) background finalization workers
+- PROVISIONAL_JOB_STORE / PROVISIONAL_JOB_DB / PROVISIONAL_JOB_TTL_S, see
+  app.repository.job_store
+"""
+
+import contextvars
+import copy
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from app.pipelines.deadline import ANALYZE_DEADLINE_S, deadline_in, request_deadline, stage_allowed
+from app.pipelines.ollama_client import get_ollama_client, track_circuit_skips
+from app.pipelines.rules import (
+    _analyze_receipt_cascade,
+    _apply_duplicate_check,
+    _apply_vision_extract,
+    _features_from_raw,
+    _finalize_analysis,
+    _ingest_receipt,
+    _score_and_explain,
+    analyze_receipt,
+)
+from app.repository.job_store import PROVISIONAL_JOB_TTL_S, get_job_store
+from app.schemas.receipt import ReceiptDecision
+from app.telemetry.timings import attach_timings, request_timer
+
+logger = logging.getLogger(__name__)
+
+PROVISIONAL_MAX_WORKERS = int(os.getenv("PROVISIONAL_MAX_WORKERS", "4"))
+
+STAGE_VISION_EXTRACT = "vision_extract"
+STAGE_VISION_FALLBACK = "vision_fallback"
+STAGE_VISION_ASSESSMENT = "vision_assessment"
+STAGE_DUPLICATE_CHECK = "duplicate_check"
+STAGE_CASCADE_ESCALATION = "cascade_escalation"
+
+PDF_EXTS = {".pdf"}
+
+
+def pending_vlm_stages(file_path: str, run_vision_assessment: bool = True,
+                       vision_image_path: Optional[str] = None) -> List[str]:
+    """
+    VLM stages that could run for this receipt right now.
+
+    The OCR vision fallback is listed while its model is reachable; whether
+    the receipt actually needs it is only known after OCR (see
+    analyze_receipt_provisional).
+    """
+    from app.pipelines.vision_extract import OLLAMA_URL, VISION_EXTRACT_ENABLED, VISION_EXTRACT_MODEL
+
+    stages: List[str] = []
+    if VISION_EXTRACT_ENABLED and not get_ollama_client(OLLAMA_URL).circuit_open(VISION_EXTRACT_MODEL):
+        stages.append(STAGE_VISION_EXTRACT)
+    image_for_vision = vision_image_path or (
+        None if os.path.splitext(file_path)[1].lower() in PDF_EXTS else file_path
+    )
+    try:
+        from app.pipelines.ocr_fallback import HAS_VISION_LLM
+        from app.pipelines.vision_llm import DEFAULT_VISION_MODEL, vision_assessment_available
+        if HAS_VISION_LLM and vision_assessment_available(DEFAULT_VISION_MODEL):
+            stages.append(STAGE_VISION_FALLBACK)
+    except ImportError:
+        pass
+    if run_vision_assessment and image_for_vision:
+        try:
+            from app.pipelines.vision_llm import vision_assessment_available
+            if vision_assessment_available():
+                stages.append(STAGE_VISION_ASSESSMENT)
+        except ImportError:
+            pass
+    return stages
+
+
+def final_may_differ(provisional: ReceiptDecision, pending: Sequence[str]) -> Tuple[bool, List[str]]:
+    """
+    Deterministic rule: can the final decision differ from the provisional one?
+
+    - vision_veto_pending: the vision assessment is pending and the provisional
+      label is not already "fake" (the veto can only move a decision to fake)
+    - vlm_field_merge_pending: VLM extraction is pending; merged merchant /
+      total / subtotal / tax / items feed many rules, in either direction
+    - vision_fallback_pending: OCR was weak or missed merchant / total / date
+      and the vision fallback will fill them, in either direction
+    - duplicate_check_pending: the fingerprint check runs on merged fields
+    - cascade_escalation_pending: the cascade escalates past the rules tier;
+      forensics / LLM / VLM stages can move the score in either direction
+
+    No pending stage -> the provisional decision is the final one.
+    """
+    reasons: List[str] = []
+    if STAGE_VISION_ASSESSMENT in pending and provisional.label != "fake":
+        reasons.append("vision_veto_pending")
+    if STAGE_VISION_EXTRACT in pending:
+        reasons.append("vlm_field_merge_pending")
+    if STAGE_VISION_FALLBACK in pending:
+        reasons.append("vision_fallback_pending")
+    if STAGE_DUPLICATE_CHECK in pending:
+        reasons.append("duplicate_check_pending")
+    if STAGE_CASCADE_ESCALATION in pending:
+        reasons.append("cascade_escalation_pending")
+    return bool(reasons), reasons
+
+
+class ProvisionalJob:
+    """One provisional analysis and its background finalization."""
+
+    def __init__(self, file_path: str, provisional: ReceiptDecision, pending: Sequence[str]):
+        self.job_id = str(uuid.uuid4())
+        self.file_path = file_path
+        self.provisional = provisional
+        self.final: Optional[ReceiptDecision] = None
+        self.pending_stages = list(pending)
+        self.may_differ, self.differ_reasons = final_may_differ(provisional, pending)
+        self.status = "provisional" if pending else "final"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None if pending else self.created_at
+        self._cond = threading.Condition()
+        self._events: List[Tuple[str, Dict[str, Any]]] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("final", "error")
+
+    @property
+    def label_changed(self) -> Optional[bool]:
+        if self.final is None:
+            return None
+        return self.final.label != self.provisional.label
+
+    def decision(self) -> ReceiptDecision:
+        """Best decision available now (final if finished, else provisional)."""
+        return self.final or self.provisional
+
+    def final_decision(self) -> Optional[Dict[str, Any]]:
+        return self.final.to_dict() if self.final is not None else None
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        with self._cond:
+            self._events.append((event, data))
+            self._save()
+            self._cond.notify_all()
+
+    def _save(self) -> None:
+        """Write the job through to the shared store (other workers read it there)."""
+        store = get_job_store()
+        if store is None:
+            return
+        try:
+            store.save(
+                self.job_id, self.status, self.created_at, self.finished_at,
+                self.summary(), self._events, self.final_decision(),
+            )
+        except Exception as e:
+            logger.warning("Provisional job %s: saving to the job store failed: %s", self.job_id, e)
+
+    def complete(self, final: ReceiptDecision) -> None:
+        with self._cond:
+            self.final = final
+            self.status = "final"
+            self.finished_at = time.time()
+        payload = self.summary()
+        payload["decision"] = final.to_dict()
+        self.publish("final", payload)
+
+    def fail(self, error: str) -> None:
+        with self._cond:
+            self.status = "error"
+            self.error = error
+            self.finished_at = time.time()
+        self.publish("error", self.summary())
+
+    def events(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Snapshot of the events published so far."""
+        with self._cond:
+            return list(self._events)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until finalized (or failed). Returns True when done."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout=timeout)
+
+    def iter_events(self, timeout: Optional[float] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield published events (replaying earlier ones) until final/error or timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        seen = 0
+        while True:
+            with self._cond:
+                while seen >= len(self._events):
+                    if self.done and seen >= len(self._events):
+                        return
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return
+                    self._cond.wait(remaining)
+                batch = self._events[seen:]
+                seen = len(self._events)
+            for item in batch:
+                yield item
+                if item[0] in ("final", "error"):
+                    return
+
+    def summary(self) -> Dict[str, Any]:
+        d = self.decision()
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "label": d.label,
+            "score": d.score,
+            "finalized": d.finalized,
+            "provisional_label": self.provisional.label,
+            "provisional_score": self.provisional.score,
+            "label_changed": self.label_changed,
+            "final_may_differ": self.may_differ,
+            "final_may_differ_reasons": self.differ_reasons,
+            "pending_stages": self.pending_stages,
+            "error": self.error,
+        }
+
+
+class StoredJob:
+    """Read-only view of a job owned by another API worker, loaded from the job store."""
+
+    def __init__(self, state: Dict[str, Any]):
+        self.job_id = state["job_id"]
+        self.status = state["status"]
+        self._summary = state["summary"]
+        self._events = state["events"]
+        self._decision = state["decision"]
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("final", "error")
+
+    def final_decision(self) -> Optional[Dict[str, Any]]:
+        return self._decision
+
+    def events(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return list(self._events)
+
+    def summary(self) -> Dict[str, Any]:
+        return dict(self._summary)
+
+
+_jobs: Dict[str, ProvisionalJob] = {}
+_jobs_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _register(job: ProvisionalJob) -> None:
+    now = time.time()
+    with _jobs_lock:
+        expired = [
+            jid for jid, j in _jobs.items()
+            if j.finished_at is not None and now - j.finished_at > PROVISIONAL_JOB_TTL_S
+        ]
+        for jid in expired:
+            del _jobs[jid]
+        _jobs[job.job_id] = job
+    store = get_job_store()
+    if store is not None:
+        try:
+            store.prune()
+        except Exception as e:
+            logger.warning("Provisional job store prune failed: %s", e)
+
+
+def get_job(job_id: str) -> Optional[Union[ProvisionalJob, StoredJob]]:
+    """This worker's job, else its latest state from the shared job store."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job
+    store = get_job_store()
+    if store is None:
+        return None
+    try:
+        state = store.load(job_id)
+    except Exception as e:
+        logger.warning("Provisional job store lookup failed for %s: %s", job_id, e)
+        return None
+    return StoredJob(state) if state else None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, PROVISIONAL_MAX_WORKERS), thread_name_prefix="provisional-final"
+            )
+        return _executor
+
+
+def analyze_receipt_provisional(
+    file_path: str,
+    extracted_total: str = None,
+    extracted_merchant: str = None,
+    extracted_date: str = None,
+    apply_learned: bool = True,
+    run_vision_assessment: bool = True,
+    vision_image_path: Optional[str] = None,
+    on_final: Optional[Callable[[ProvisionalJob], None]] = None,
+    deadline: Optional[float] = None,
+) -> ProvisionalJob:
+    """
+    Run OCR + rules now and finalize with the VLM stages in the background.
+
+    Returns a registered ProvisionalJob whose `provisional` decision is
+    available immediately. `on_final(job)` runs on the worker after the job
+    is finalized or failed (persistence, temp-file cleanup).
+    For PDFs the vision veto needs `vision_image_path` (a rendered page).
+    `deadline` is an absolute time.monotonic() deadline for the whole
+    analysis, both halves (defaults to ANALYZE_DEADLINE_S, as analyze_receipt).
+    With the cascade enabled the cascade's own vision veto setting applies
+    instead of `run_vision_assessment`.
+    """
+    if deadline is None:
+        deadline = deadline_in(ANALYZE_DEADLINE_S)
+
+    from app.pipelines.cascade import ANALYSIS_CASCADE
+    if ANALYSIS_CASCADE:
+        return _analyze_provisional_cascade(
+            file_path, extracted_total, extracted_merchant, extracted_date,
+            apply_learned, on_final, deadline,
+        )
+
+    pending = pending_vlm_stages(file_path, run_vision_assessment, vision_image_path)
+
+    if not pending:
+        # Nothing to wait for: the full pipeline is as fast as the provisional one
+        decision = analyze_receipt(
+            file_path,
+            extracted_total=extracted_total,
+            extracted_merchant=extracted_merchant,
+            extracted_date=extracted_date,
+            apply_learned=apply_learned,
+            deadline=deadline,
+        )
+        return _final_job(file_path, decision, on_final)
+
+    from app.pipelines.cascade import TIER_FORENSICS, carry_stage_results, execution_tier
+
+    fields = {
+        "extracted_total": extracted_total,
+        "extracted_merchant": extracted_merchant,
+        "extracted_date": extracted_date,
+    }
+    stage_results: Dict[str, Any] = {}
+    name = os.path.basename(str(file_path))
+    with request_timer(name=f"{name}:provisional") as timer, \
+            track_circuit_skips() as circuit_skips, \
+            request_deadline(deadline) as deadline_skips:
+        raw = _ingest_receipt(timer, file_path)
+        # Every feature stage below the vision tier; the OCR vision fallback
+        # is noted as deferred when the receipt needs it
+        with execution_tier(TIER_FORENSICS) as deferred, carry_stage_results(stage_results):
+            features = _features_from_raw(timer, raw, **fields)
+        if STAGE_VISION_FALLBACK in pending and STAGE_VISION_FALLBACK not in deferred:
+            pending.remove(STAGE_VISION_FALLBACK)
+        if STAGE_VISION_EXTRACT in pending or STAGE_VISION_FALLBACK in pending:
+            # Fingerprints must use the VLM-merged merchant/total
+            pending.append(STAGE_DUPLICATE_CHECK)
+        else:
+            _apply_duplicate_check(timer, features, file_path)
+        provisional_features = copy.deepcopy(features)
+        if circuit_skips:
+            provisional_features.text_features["llm_circuit_skips"] = list(circuit_skips)
+        if deadline_skips:
+            provisional_features.text_features["deadline_skips"] = list(deadline_skips)
+        with timer.stage("pipeline.rules", "pipeline"):
+            provisional = _score_and_explain(provisional_features, apply_learned=apply_learned)
+
+    if not pending:
+        # Only the vision fallback was possible and OCR did not need it
+        decision = _finalize_analysis(timer, provisional_features, provisional, file_path)
+        return _final_job(file_path, decision, on_final)
+
+    job = _provisional_job(file_path, provisional, pending, timer)
+    _get_executor().submit(
+        _finalize_job, job, features, raw, fields, stage_results, apply_learned,
+        vision_image_path or file_path, list(circuit_skips), list(deadline_skips),
+        deadline, on_final,
+    )
+    return job
+
+
+def _final_job(
+    file_path: str,
+    decision: ReceiptDecision,
+    on_final: Optional[Callable[[ProvisionalJob], None]],
+) -> ProvisionalJob:
+    """Register a job that is final from the start."""
+    job = ProvisionalJob(file_path, decision, [])
+    _register(job)
+    job.complete(decision)
+    _run_callback(on_final, job)
+    return job
+
+
+def _provisional_job(file_path: str, provisional: ReceiptDecision, pending: Sequence[str], timer) -> ProvisionalJob:
+    """Mark `provisional` as such, register its job and publish the provisional event."""
+    provisional.finalized = False
+    if provisional.debug is None:
+        provisional.debug = {}
+    attach_timings(provisional.debug, timer)
+
+    job = ProvisionalJob(file_path, provisional, pending)
+    provisional.debug["provisional"] = {
+        "job_id": job.job_id,
+        "pending_stages": job.pending_stages,
+        "final_may_differ": job.may_differ,
+        "final_may_differ_reasons": job.differ_reasons,
+    }
+    _register(job)
+    job.publish("provisional", job.summary())
+    return job
+
+
+def _finalize_job(
+    job: ProvisionalJob,
+    features,
+    raw,
+    fields: Dict[str, Optional[str]],
+    stage_results: Dict[str, Any],
+    apply_learned: bool,
+    vision_image_path: str,
+    provisional_skips: List[Dict[str, str]],
+    provisional_deadline_skips: List[Dict[str, Any]],
+    deadline: Optional[float],
+    on_final: Optional[Callable[[ProvisionalJob], None]],
+) -> None:
+    """Background half: VLM stages, re-score, publish the final decision."""
+    from app.pipelines.cascade import carry_stage_results
+
+    try:
+        name = os.path.basename(str(job.file_path))
+        with request_timer(name=f"{name}:final") as timer, \
+                track_circuit_skips() as circuit_skips, \
+                request_deadline(deadline) as deadline_skips:
+            circuit_skips.extend(provisional_skips)
+            deadline_skips.extend(provisional_deadline_skips)
+
+            # Vision veto in parallel with extraction (they share a single
+            # combined-prompt VLM call when VISION_MODEL is the combined model)
+            vision_result: Dict[str, Any] = {}
+            vision_thread = None
+            if STAGE_VISION_ASSESSMENT in job.pending_stages and stage_allowed("vision_assessment"):
+                def _run_vision():
+                    try:
+                        from app.pipelines.vision_llm import build_vision_assessment
+                        vision_result["assessment"] = build_vision_assessment(vision_image_path)
+                    except Exception as e:
+                        logger.warning("Provisional job %s: vision assessment failed: %s", job.job_id, e)
+                # Copy the context so the deadline / skip collectors follow the call
+                vision_thread = threading.Thread(
+                    target=contextvars.copy_context().run, args=(_run_vision,),
+                    name="provisional-vision", daemon=True,
+                )
+                vision_thread.start()
+
+            if STAGE_VISION_FALLBACK in job.pending_stages:
+                # Rebuild with the vision fallback; every other stage reuses its output
+                with carry_stage_results(stage_results):
+                    features = _features_from_raw(timer, raw, **fields)
+            if STAGE_VISION_EXTRACT in job.pending_stages:
+                _apply_vision_extract(timer, features, job.file_path)
+            if STAGE_DUPLICATE_CHECK in job.pending_stages:
+                _apply_duplicate_check(timer, features, job.file_path)
+            if vision_thread is not None:
+                with timer.stage("pipeline.vision_assessment", "pipeline"):
+                    vision_thread.join()
+
+            if circuit_skips:
+                features.text_features["llm_circuit_skips"] = list(circuit_skips)
+            if deadline_skips:
+                features.text_features["deadline_skips"] = list(deadline_skips)
+            with timer.stage("pipeline.rules", "pipeline"):
+                final = _score_and_explain(
+                    features, apply_learned=apply_learned,
+                    vision_assessment=vision_result.get("assessment"),
+                )
+        final = _finalize_analysis(timer, features, final, job.file_path)
+        _complete_job(job, final)
+    except Exception as e:
+        logger.warning("Provisional job %s finalization failed: %s", job.job_id, e, exc_info=True)
+        job.fail(str(e))
+    finally:
+        _run_callback(on_final, job)
+
+
+def _analyze_provisional_cascade(
+    file_path: str,
+    extracted_total: Optional[str],
+    extracted_merchant: Optional[str],
+    extracted_date: Optional[str],
+    apply_learned: bool,
+    on_final: Optional[Callable[[ProvisionalJob], None]],
+    deadline: Optional[float],
+) -> ProvisionalJob:
+    """
+    analyze_receipt_provisional with the cascade: the rules tier runs now and
+    the escalation it asks for (if any) is resumed in the background.
+    """
+    from app.pipelines.cascade import TIER_RULES
+
+    fields = {
+        "extracted_total": extracted_total,
+        "extracted_merchant": extracted_merchant,
+        "extracted_date": extracted_date,
+    }
+    name = os.path.basename(str(file_path))
+    with request_timer(name=f"{name}:provisional") as timer, \
+            track_circuit_skips() as circuit_skips, \
+            request_deadline(deadline) as deadline_skips:
+        raw = _ingest_receipt(timer, file_path)
+        stage_results: Dict[str, Any] = {}
+        features, provisional = _analyze_receipt_cascade(
+            timer, file_path, apply_learned=apply_learned,
+            circuit_skips=circuit_skips, deadline_skips=deadline_skips,
+            raw=raw, last_tier=TIER_RULES, stage_results=stage_results, **fields,
+        )
+
+    escalation = provisional.debug["cascade"].pop("pending_escalation", None)
+    if escalation is None:
+        # Clear-cut at the rules tier: a synchronous cascade would stop here too
+        decision = _finalize_analysis(timer, features, provisional, file_path)
+        return _final_job(file_path, decision, on_final)
+
+    job = _provisional_job(file_path, provisional, [STAGE_CASCADE_ESCALATION], timer)
+    job.provisional.debug["provisional"]["cascade_escalation"] = escalation
+    _get_executor().submit(
+        _finalize_cascade_job, job, raw, fields, stage_results, escalation["tier"],
+        list(provisional.debug["cascade"]["tiers"]), apply_learned,
+        list(circuit_skips), list(deadline_skips), deadline, on_final,
+    )
+    return job
+
+
+def _finalize_cascade_job(
+    job: ProvisionalJob,
+    raw,
+    fields: Dict[str, Optional[str]],
+    stage_results: Dict[str, Any],
+    tier: int,
+    trail: List[Dict[str, Any]],
+    apply_learned: bool,
+    provisional_skips: List[Dict[str, str]],
+    provisional_deadline_skips: List[Dict[str, Any]],
+    deadline: Optional[float],
+    on_final: Optional[Callable[[ProvisionalJob], None]],
+) -> None:
+    """Background half with the cascade: resume escalation at `tier`."""
+    try:
+        name = os.path.basename(str(job.file_path))
+        with request_timer(name=f"{name}:final") as timer, \
+                track_circuit_skips() as circuit_skips, \
+                request_deadline(deadline) as deadline_skips:
+            circuit_skips.extend(provisional_skips)
+            deadline_skips.extend(provisional_deadline_skips)
+            features, final = _analyze_receipt_cascade(
+                timer, job.file_path, apply_learned=apply_learned,
+                circuit_skips=circuit_skips, deadline_skips=deadline_skips,
+                raw=raw, first_tier=tier, trail=trail, stage_results=stage_results, **fields,
+            )
+        final = _finalize_analysis(timer, features, final, job.file_path)
+        _complete_job(job, final)
+    except Exception as e:
+        logger.warning("Provisional job %s finalization failed: %s", job.job_id, e, exc_info=True)
+        job.fail(str(e))
+    finally:
+        _run_callback(on_final, job)
+
+
+def _complete_job(job: ProvisionalJob, final: ReceiptDecision) -> None:
+    final.finalized = True
+    if final.debug is None:
+        final.debug = {}
+    final.debug["provisional"] = {
+        "job_id": job.job_id,
+        "provisional_label": job.provisional.label,
+        "provisional_score": job.provisional.score,
+        "label_changed": final.label != job.provisional.label,
+        "final_may_differ_reasons": job.differ_reasons,
+    }
+    if final.label != job.provisional.label and not job.may_differ:
+        logger.warning("Provisional job %s: label changed although final_may_differ=False", job.job_id)
+    job.complete(final)
+
+
+def _run_callback(cb: Optional[Callable[[ProvisionalJob], None]], job: ProvisionalJob) -> None:
+    if cb is None:
+        return
+    try:
+        cb(job)
+    except Exception as e:
+        logger.warning("Provisional job %s on_final callback failed: %s", job.job_id, e)
@@ -0,0 +1,247 @@
+"""
+Fast re-scoring of stored feature snapshots.
+
+Runs only the rule engine (`_score_and_explain`) on ReceiptFeatures persisted
+by analyze_receipt, so rule weight / learned rule / doc profile / label policy
+changes can be backtested in seconds without re-running OCR or Vision LLM.
+
+Usage:
+    from app.pipelines.rescore import rescore, rescore_many, RescorePolicy
+
+    decision = rescore(features_id)
+    results = rescore_many(policy=RescorePolicy(fake_threshold=0.65), limit=5000)
+    summarize_rescore(results)
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.pipelines.rules import _label_from_score, _score_and_explain, rule_overrides
+from app.repository.feature_store import (
+    FeatureSnapshotStore,
+    decode_snapshot,
+    get_feature_store,
+)
+from app.schemas.receipt import ReceiptDecision, ReceiptFeatures
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RescorePolicy:
+    """
+    Knobs applied on top of the current rule engine when re-scoring.
+
+    - weight_overrides: rule_id -> new raw weight (scaled by the receipt's
+      confidence factor like any other weight)
+    - disabled_rules: rule_ids whose events are dropped along with their
+      weight and reason text
+    - thresholds mirror rules._label_from_score
+
+    Overrides are applied inside the rule engine (rules.rule_overrides), before
+    the score is clamped, so the result matches a run with the changed rules.
+    """
+    name: str = "rescore"
+    apply_learned: bool = True
+    fake_threshold: float = 0.70
+    suspicious_threshold: float = 0.35
+    critical_fake_count: int = 2
+    weight_overrides: Dict[str, float] = field(default_factory=dict)
+    disabled_rules: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "RescorePolicy":
+        if not data:
+            return cls()
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+
+@dataclass
+class RescoreResult:
+    """Outcome of re-scoring one snapshot, with the originally stored verdict."""
+    features_id: str
+    label: str
+    score: float
+    previous_label: Optional[str] = None
+    previous_score: Optional[float] = None
+    error: Optional[str] = None
+    decision: Optional[ReceiptDecision] = None
+
+    @property
+    def changed(self) -> bool:
+        return self.previous_label is not None and self.label != self.previous_label
+
+    def to_dict(self, include_decision: bool = False) -> Dict[str, Any]:
+        out = {
+            "features_id": self.features_id,
+            "label": self.label,
+            "score": self.score,
+            "previous_label": self.previous_label,
+            "previous_score": self.previous_score,
+            "changed": self.changed,
+        }
+        if self.error:
+            out["error"] = self.error
+        if include_decision and self.decision is not None:
+            out["decision"] = self.decision.to_dict()
+        return out
+
+
+def apply_policy(decision: ReceiptDecision, policy: RescorePolicy) -> ReceiptDecision:
+    """Apply the policy's label thresholds to a decision scored under its rule overrides."""
+    decision.label = _label_from_score(
+        decision.score,
+        [ev.get("severity") for ev in decision.events or []],
+        fake_threshold=policy.fake_threshold,
+        suspicious_threshold=policy.suspicious_threshold,
+        critical_fake_count=policy.critical_fake_count,
+    )
+    decision.policy_name = policy.name
+    return decision
+
+
+def rescore_features(
+    features: ReceiptFeatures,
+    policy: Optional[RescorePolicy] = None,
+    vision_assessment: Optional[Dict[str, Any]] = None,
+) -> ReceiptDecision:
+    """Re-run the rule engine on in-memory features (and the original vision veto input) under a policy."""
+    policy = policy or RescorePolicy()
+    with rule_overrides(policy.weight_overrides, policy.disabled_rules):
+        decision = _score_and_explain(
+            features, apply_learned=policy.apply_learned, vision_assessment=vision_assessment
+        )
+    return apply_policy(decision, policy)
+
+
+def rescore(
+    features_id: str,
+    policy: Optional[RescorePolicy] = None,
+    store: Optional[FeatureSnapshotStore] = None,
+) -> ReceiptDecision:
+    """Re-score one stored snapshot. Raises KeyError if it does not exist."""
+    store = store or get_feature_store()
+    snapshot = store.load_snapshot(features_id)
+    if snapshot is None:
+        raise KeyError(f"Unknown features_id: {features_id}")
+    features, vision_assessment = snapshot
+    decision = rescore_features(features, policy, vision_assessment=vision_assessment)
+    if decision.debug is None:
+        decision.debug = {}
+    decision.debug["features_id"] = features_id
+    return decision
+
+
+def _rescore_blob(
+    item: Tuple[Dict[str, Any], bytes],
+    policy: RescorePolicy,
+    keep_decision: bool,
+) -> RescoreResult:
+    meta, blob = item
+    fid = meta["features_id"]
+    try:
+        features, vision_assessment = decode_snapshot(blob)
+        decision = rescore_features(features, policy, vision_assessment=vision_assessment)
+        return RescoreResult(
+            features_id=fid,
+            label=decision.label,
+            score=decision.score,
+            previous_label=meta.get("label"),
+            previous_score=meta.get("score"),
+            decision=decision if keep_decision else None,
+        )
+    except Exception as e:
+        return RescoreResult(
+            features_id=fid,
+            label="error",
+            score=0.0,
+            previous_label=meta.get("label"),
+            previous_score=meta.get("score"),
+            error=str(e),
+        )
+
+
+def _rescore_chunk(
+    chunk: List[Tuple[Dict[str, Any], bytes]],
+    policy: RescorePolicy,
+    keep_decision: bool,
+) -> List[RescoreResult]:
+    # Silence per-receipt INFO logs in workers; they dominate wall time at scale
+    logging.getLogger("app.pipelines").setLevel(logging.WARNING)
+    return [_rescore_blob(item, policy, keep_decision) for item in chunk]
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rescore_many(
+    features_ids: Optional[Sequence[str]] = None,
+    policy: Optional[RescorePolicy] = None,
+    store: Optional[FeatureSnapshotStore] = None,
+    limit: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 200,
+    keep_decisions: bool = False,
+) -> List[RescoreResult]:
+    """
+    Re-score many snapshots (all of them, newest first, when no ids given).
+
+    Snapshots are streamed from the store in batches and scored in chunks;
+    with workers > 1 chunks are fanned out to a process pool (compressed
+    payloads are shipped as-is, decoding happens in the worker).
+    """
+    policy = policy or RescorePolicy()
+    store = store or get_feature_store()
+    if workers is None:
+        workers = max(1, min(8, (os.cpu_count() or 1) - 1))
+
+    items = store.iter_snapshots(features_ids=features_ids, limit=limit)
+    results: List[RescoreResult] = []
+
+    if workers <= 1:
+        for chunk in _chunks(items, chunk_size):
+            results.extend(_rescore_chunk(chunk, policy, keep_decisions))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_rescore_chunk, chunk, policy, keep_decisions)
+            for chunk in _chunks(items, chunk_size)
+        ]
+        for fut in futures:
+            results.extend(fut.result())
+    return results
+
+
+def summarize_rescore(results: Sequence[RescoreResult]) -> Dict[str, Any]:
+    """Label distribution and previous -> new label transitions."""
+    labels: Dict[str, int] = {}
+    transitions: Dict[str, int] = {}
+    errors = 0
+    for r in results:
+        if r.error:
+            errors += 1
+            continue
+        labels[r.label] = labels.get(r.label, 0) + 1
+        if r.changed:
+            key = f"{r.previous_label}->{r.label}"
+            transitions[key] = transitions.get(key, 0) + 1
+    return {
+        "total": len(results),
+        "errors": errors,
+        "changed": sum(transitions.values()),
+        "labels": labels,
+        "transitions": transitions,
+    }
@@ -0,0 +1,226 @@
+"""
+Declarative Rule Registry
+
+Rules (and rule groups) in `rules._score_and_explain` register here as units
+that declare:
+- the shared inputs they consume (evaluated lazily, at most once per receipt)
+- the Rule × Family Matrix key they are gated on (if any)
+- whether the DocumentProfile can switch them off
+
+The engine asks a per-receipt RuleContext whether a unit should run BEFORE
+computing anything for it, so DISABLED/FORBIDDEN rules cost a dict lookup
+instead of their full input computation. A unit that runs reads its declared
+inputs through `ctx.inputs(rule_id)`, a lazy view over the memoized context:
+an input nobody reads is never computed, and reading an undeclared one is an
+error. Event/reason output is unchanged: the registry only decides *whether*
+a unit runs, never *what* it emits.
+"""
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from app.pipelines.rule_family_matrix import (
+    RULE_FAMILY_MATRIX,
+    ExecutionMode,
+    get_execution_mode,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    """
+    Declaration of a rule (or rule group) evaluated by the rule engine.
+
+    Attributes:
+        rule_id: Unique identifier (RULE_ID for single rules, GROUP_* for groups)
+        group: Rule group label as used in `_score_and_explain` comments
+        emits: Rule IDs the unit can emit (used for profile/matrix gating of groups)
+        inputs: Shared inputs the unit consumes (names registered via `rule_input`)
+        matrix_key: Input name holding the doc subtype the matrix is keyed on
+            (readable through `ctx.inputs` like a declared input).
+            None means the unit is not governed by RULE_FAMILY_MATRIX.
+        profile_gated: Consult `doc_profiles.should_apply_rule` for this rule_id
+        description: Short human-readable description
+    """
+    rule_id: str
+    group: str
+    emits: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()
+    matrix_key: Optional[str] = None
+    profile_gated: bool = False
+    description: str = ""
+
+
+RULE_REGISTRY: Dict[str, RuleSpec] = {}
+
+INPUT_PROVIDERS: Dict[str, Callable[["RuleContext"], Any]] = {}
+
+
+def register_rule(spec: RuleSpec) -> RuleSpec:
+    """Register a rule spec. Re-registering the same rule_id replaces it."""
+    RULE_REGISTRY[spec.rule_id] = spec
+    return spec
+
+
+def get_rule_spec(rule_id: str) -> Optional[RuleSpec]:
+    """Look up a registered rule spec."""
+    return RULE_REGISTRY.get(rule_id)
+
+
+def rule_input(name: str):
+    """
+    Decorator registering a lazily-evaluated shared input.
+
+    The provider receives the RuleContext and may pull other inputs via
+    `ctx.get(...)`; each input is computed at most once per receipt.
+    """
+    def decorator(fn: Callable[["RuleContext"], Any]) -> Callable[["RuleContext"], Any]:
+        INPUT_PROVIDERS[name] = fn
+        return fn
+    return decorator
+
+
+class RuleInputs(Mapping):
+    """
+    Read-only view of the inputs a unit declared.
+
+    Values are computed on first access through the owning RuleContext, so
+    they are shared with (and memoized for) every other unit on the receipt.
+    """
+
+    def __init__(self, ctx: "RuleContext", spec: RuleSpec):
+        self._ctx = ctx
+        self._rule_id = spec.rule_id
+        names = tuple(spec.inputs)
+        if spec.matrix_key and spec.matrix_key not in names:
+            names += (spec.matrix_key,)
+        self._names = names
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._names:
+            raise KeyError(f"{self._rule_id} reads undeclared rule input '{name}'")
+        return self._ctx.get(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+class RuleContext:
+    """
+    Per-receipt evaluation context.
+
+    Holds the features, the DocumentProfile object and a memo of shared
+    inputs and gate decisions so every rule sees the same values.
+    """
+
+    def __init__(self, features: Any, doc_profile_obj: Any = None):
+        self.features = features
+        self.tf: Dict[str, Any] = getattr(features, "text_features", None) or {}
+        self.lf: Dict[str, Any] = getattr(features, "layout_features", None) or {}
+        self.ff: Dict[str, Any] = getattr(features, "file_features", None) or {}
+        self.fr: Dict[str, Any] = getattr(features, "forensic_features", None) or {}
+        self.doc_profile_obj = doc_profile_obj
+        self._inputs: Dict[str, Any] = {}
+        self._modes: Dict[str, ExecutionMode] = {}
+        self._profile_allows: Dict[str, bool] = {}
+        self.skipped: Dict[str, str] = {}
+
+    def get(self, name: str) -> Any:
+        """Return a shared input, computing it on first access."""
+        if name in self._inputs:
+            return self._inputs[name]
+        provider = INPUT_PROVIDERS.get(name)
+        if provider is None:
+            raise KeyError(f"No rule input provider registered for '{name}'")
+        value = provider(self)
+        self._inputs[name] = value
+        return value
+
+    def set(self, name: str, value: Any) -> None:
+        """Seed or override a shared input (e.g. when the engine already has it)."""
+        self._inputs[name] = value
+
+    def has(self, name: str) -> bool:
+        """Whether an input has already been evaluated."""
+        return name in self._inputs
+
+    def execution_mode(self, rule_id: str) -> ExecutionMode:
+        """
+        Execution mode for a rule on this receipt.
+
+        Rules with a matrix_key resolve through RULE_FAMILY_MATRIX using the
+        declared subtype input; everything else runs in BLOCK mode.
+        """
+        if rule_id in self._modes:
+            return self._modes[rule_id]
+        spec = RULE_REGISTRY.get(rule_id)
+        if spec is not None and spec.matrix_key:
+            mode = get_execution_mode(rule_id, self.get(spec.matrix_key))
+        else:
+            mode = ExecutionMode.BLOCK
+        self._modes[rule_id] = mode
+        return mode
+
+    def profile_allows(self, rule_id: str) -> bool:
+        """Memoized `doc_profiles.should_apply_rule` for the receipt's profile."""
+        if rule_id in self._profile_allows:
+            return self._profile_allows[rule_id]
+        if self.doc_profile_obj is None:
+            allowed = True
+        else:
+            from app.pipelines.doc_profiles import should_apply_rule
+            allowed = should_apply_rule(self.doc_profile_obj, rule_id)
+        self._profile_allows[rule_id] = allowed
+        return allowed
+
+    def inputs(self, rule_id: str) -> RuleInputs:
+        """Lazy view of the inputs `rule_id` declared (see RuleInputs)."""
+        spec = RULE_REGISTRY.get(rule_id)
+        if spec is None:
+            raise KeyError(f"No rule spec registered for '{rule_id}'")
+        return RuleInputs(self, spec)
+
+    def _emitted_rule_disabled(self, spec: RuleSpec, rule_id: str) -> bool:
+        """An emitted rule is off when the profile rejects it or the matrix forbids it."""
+        if not self.profile_allows(rule_id):
+            return True
+        if rule_id in RULE_FAMILY_MATRIX:
+            if rule_id in RULE_REGISTRY:
+                return self.execution_mode(rule_id) == ExecutionMode.FORBIDDEN
+            subtype = self.get(spec.matrix_key or "doc_subtype_for_matrix")
+            return get_execution_mode(rule_id, subtype) == ExecutionMode.FORBIDDEN
+        return False
+
+    def should_run(self, rule_id: str) -> bool:
+        """
+        Decide whether a registered unit runs, before any of its inputs are built.
+
+        A unit is skipped when it is FORBIDDEN by the matrix, gated off by the
+        profile, or when every rule it can emit is off for this document
+        (`doc_profiles.should_apply_rule` rejects it or RULE_FAMILY_MATRIX
+        forbids it). Unregistered IDs always run (fail open).
+        """
+        spec = RULE_REGISTRY.get(rule_id)
+        if spec is None:
+            return True
+
+        reason = None
+        if spec.matrix_key and self.execution_mode(rule_id) == ExecutionMode.FORBIDDEN:
+            reason = "matrix_forbidden"
+        elif spec.profile_gated and not self.profile_allows(rule_id):
+            reason = "profile_disabled"
+        elif spec.emits and all(self._emitted_rule_disabled(spec, r) for r in spec.emits):
+            reason = "all_rules_disabled"
+
+        if reason is not None:
+            self.skipped[rule_id] = reason
+            logger.debug(f"{rule_id} skipped before evaluation: {reason}")
+            return False
+        return True
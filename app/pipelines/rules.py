@@ -1,6 +1,9 @@
 # app/pipelines/rules.py
 
+import contextvars
 import logging
+import os
+from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 from typing import Any, Dict, List, Optional, Union, Tuple
 from datetime import datetime, date
@@ -12,12 +15,21 @@ from app.pipelines.rule_family_matrix import (
     get_execution_mode,
     ExecutionMode,
 )
+from app.pipelines.rule_registry import (
+    RuleContext,
+    RuleSpec,
+    register_rule,
+    rule_input,
+)
 from app.pipelines.template_quality_signals import (
     detect_keyword_typos,
     detect_spacing_anomaly,
     detect_date_format_anomaly,
 )
 from app.pipelines.features import build_features
+from app.telemetry.timings import StageLaps, attach_timings, maybe_export_trace, request_timer
+from app.pipelines.deadline import ANALYZE_DEADLINE_S, deadline_in, request_deadline, stage_allowed
+from app.pipelines.ollama_client import track_circuit_skips
 from app.pipelines.ingest import ingest_and_ocr
 from app.schemas.receipt import ReceiptDecision, ReceiptFeatures, ReceiptInput ,LearnedRuleAudit
 from app.geo.db import (
@@ -39,7 +51,8 @@ ENGINE_VERSION = "rules-v0.0.1"
 # Helper utilities (keep rule logic self-contained)
 # -----------------------------------------------------------------------------
 
-@dataclass
+# Slotted: a document emits hundreds of these (scripts/bench_compact_objects.py)
+@dataclass(slots=True)
 class RuleEvent:
     rule_id: str
     severity: str               # HARD_FAIL | CRITICAL | WARNING | INFO
@@ -48,6 +61,27 @@ class RuleEvent:
     message: str
     evidence: Dict[str, Any]
 
+# Rescore policy overrides (app.pipelines.rescore), applied as events are
+# emitted - before the score is summed and clamped - so score, label, events
+# and reasons all come out as if the rule weights had been changed in code.
+_rule_overrides: contextvars.ContextVar[Optional[Tuple[Dict[str, float], frozenset]]] = contextvars.ContextVar(
+    "rule_overrides", default=None
+)
+
+
+@contextmanager
+def rule_overrides(weights: Optional[Dict[str, float]] = None, disabled=()):
+    """
+    Within the block, rule_id -> raw weight overrides apply and events of
+    `disabled` rules are dropped (no weight, event or reason).
+    """
+    token = _rule_overrides.set((dict(weights or {}), frozenset(disabled or ())))
+    try:
+        yield
+    finally:
+        _rule_overrides.reset(token)
+
+
 def _emit_event(
     events: List[RuleEvent],
     reasons: Optional[List[str]],
@@ -63,6 +97,14 @@ def _emit_event(
     Emit a structured rule event AND (optionally) a text reason.
     Returns score delta to add.
     """
+    overrides = _rule_overrides.get()
+    if overrides is not None:
+        weight_overrides, disabled = overrides
+        if rule_id in disabled:
+            return 0.0
+        if rule_id in weight_overrides:
+            weight = weight_overrides[rule_id]
+
     sev = (severity or "INFO").upper().strip()
     raw_w = float(weight or 0.0)
     cf = float(confidence_factor or 1.0)
@@ -2454,6 +2496,145 @@ def _apply_learned_rules(
     return out
 
 
+def _label_from_score(
+    score: float,
+    severities: List[str],
+    fake_threshold: float = 0.70,
+    suspicious_threshold: float = 0.35,
+    critical_fake_count: int = 2,
+) -> str:
+    """
+    Final label policy (single source of truth, also used by re-scoring).
+
+    HARD_FAIL or >= critical_fake_count CRITICAL events force "fake";
+    otherwise the clamped score is bucketed by the two thresholds.
+    """
+    if any(s == "HARD_FAIL" for s in severities):
+        return "fake"
+    if sum(1 for s in severities if s == "CRITICAL") >= critical_fake_count:
+        return "fake"
+    if score >= fake_threshold:
+        return "fake"
+    if score >= suspicious_threshold:
+        return "suspicious"
+    return "real"
+
+
+# ---------------------------------------------------------------------------
+# Rule registry: shared inputs + rule declarations
+# ---------------------------------------------------------------------------
+# Shared inputs are computed lazily (once per receipt) through RuleContext;
+# each unit reads the ones it declares via rule_ctx.inputs(<rule_id>).
+# Rule groups declare the rule IDs they emit so the engine can skip a group
+# before building its inputs when every rule it could emit is disabled.
+
+@rule_input("blob_text")
+def _input_blob_text(ctx: RuleContext) -> str:
+    return _join_text(ctx.tf, ctx.lf)
+
+
+@rule_input("doc_type_hint")
+def _input_doc_type_hint(ctx: RuleContext) -> Any:
+    return _detect_document_type(ctx.get("blob_text"))
+
+
+@rule_input("legacy_doc_profile")
+def _input_legacy_doc_profile(ctx: RuleContext) -> Dict[str, Any]:
+    return _get_doc_profile(ctx.tf, doc_type_hint=ctx.get("doc_type_hint"))
+
+
+@rule_input("doc_subtype_for_matrix")
+def _input_doc_subtype_for_matrix(ctx: RuleContext) -> str:
+    # Matrix keys are doc SUBTYPES, not families
+    legacy = ctx.get("legacy_doc_profile")
+    return str(legacy.get("subtype") or ctx.tf.get("doc_subtype_guess") or "UNKNOWN").upper()
+
+
+@rule_input("doc_subtype_or_family")
+def _input_doc_subtype_or_family(ctx: RuleContext) -> str:
+    # R7C historically keys the matrix on the profile subtype, falling back to family
+    legacy = ctx.get("legacy_doc_profile")
+    return legacy.get("subtype", "").upper() or legacy.get("family", "").upper()
+
+
+@rule_input("full_text")
+def _input_full_text(ctx: RuleContext) -> str:
+    features = ctx.features
+    full_text = "\n".join(features.raw.ocr_text_per_page) if hasattr(features, 'raw') and hasattr(features.raw, 'ocr_text_per_page') else ""
+    if not full_text:
+        # Reconstruct from lines if available
+        lines = ctx.lf.get("lines", [])
+        full_text = "\n".join(lines) if lines else ""
+    if not full_text:
+        # Final fallback: use full_text from text_features (e.g. in test context)
+        full_text = ctx.tf.get("full_text", "")
+    return full_text
+
+
+@rule_input("full_text_lower")
+def _input_full_text_lower(ctx: RuleContext) -> str:
+    full_text = ctx.get("full_text")
+    return full_text.lower() if full_text else ""
+
+
+for _spec in (
+    # Matrix-gated single rules
+    RuleSpec("R7_TOTAL_MISMATCH", "R7", emits=("R7_TOTAL_MISMATCH",),
+             inputs=("legacy_doc_profile",), matrix_key="doc_subtype_for_matrix",
+             description="POS line items don't sum to total"),
+    RuleSpec("R7C_CREDIT_NOTE_RECONCILIATION", "R7C", emits=("R7C_CREDIT_NOTE_RECONCILIATION",),
+             inputs=("legacy_doc_profile",), matrix_key="doc_subtype_or_family",
+             description="Sign-aware credit note reconciliation"),
+    RuleSpec("R7B_INVOICE_TOTAL_RECONCILIATION", "R7B", emits=("R7B_INVOICE_TOTAL_RECONCILIATION",),
+             inputs=("legacy_doc_profile",), matrix_key="doc_subtype_for_matrix",
+             description="Invoice subtotal + tax + shipping reconciliation"),
+    RuleSpec("R9B_DOC_TYPE_UNKNOWN_OR_MIXED", "R9B",
+             emits=("R9B_DOC_TYPE_UNKNOWN_OR_MIXED", "R9B_DOC_TYPE_UNKNOWN_GATED"),
+             inputs=("legacy_doc_profile",), matrix_key="doc_subtype_for_matrix",
+             description="Document type unknown or mixed (soft degrade)"),
+    RuleSpec("R10_TEMPLATE_QUALITY", "R10", emits=("R10_TEMPLATE_QUALITY",),
+             inputs=("legacy_doc_profile", "full_text"), matrix_key="doc_subtype_for_matrix",
+             description="Template quality cluster"),
+    # Profile-gated single rules
+    RuleSpec("R16_SUSPICIOUS_DATE_GAP", "5", emits=("R16_SUSPICIOUS_DATE_GAP",),
+             profile_gated=True, description="Receipt vs creation date gap"),
+    # Self-contained rule groups
+    RuleSpec("GROUP_0_5_DUPLICATE", "0.5", emits=("R_DUPLICATE_RECEIPT",),
+             description="Duplicate receipt detection"),
+    RuleSpec("GROUP_5B2_HANDWRITTEN", "5B2", emits=("R_HANDWRITTEN_RECEIPT", "R_OCR_DEGRADED_VLM_ONLY"),
+             description="Handwritten receipt detection & OCR quality"),
+    RuleSpec("GROUP_5B3_ROUND_TOTAL", "5B3", emits=("R_ROUND_TOTAL",),
+             description="Round number detection"),
+    RuleSpec("GROUP_5B4_QTY_RATE", "5B4", emits=("R_QTY_RATE_MISMATCH",),
+             description="Qty x rate line item verification"),
+    RuleSpec("GROUP_5C_ADDRESS", "5C",
+             emits=("R_ADDRESS_FAKE", "R_ADDRESS_GEO_MISMATCH", "R_ADDRESS_IMPLAUSIBLE",
+                    "R_ADDRESS_MERCHANT_MISMATCH", "R_ADDRESS_MISSING"),
+             description="Address validation"),
+    RuleSpec("GROUP_5D_SCREENSHOT", "5D", emits=("R_SCREENSHOT_DETECTED",),
+             inputs=("full_text", "full_text_lower"), description="Screenshot detection"),
+    RuleSpec("GROUP_5E_STRUCTURE_ORDER", "5E", emits=("R_STRUCTURE_ORDER",),
+             inputs=("full_text",), description="Structure order anomaly"),
+    RuleSpec("GROUP_5G_BRAND", "5G", emits=("R_BRAND_CONSISTENCY",),
+             description="Brand / logo consistency"),
+    RuleSpec("GROUP_5G2_VLM_OCR", "5G2", emits=("R_VLM_OCR_CONTRADICTION",),
+             description="VLM-vs-OCR contradiction detection"),
+    RuleSpec("GROUP_5G3_CURRENCY", "5G3", emits=("R_CURRENCY_INCONSISTENCY",),
+             description="Currency symbol consistency"),
+    RuleSpec("GROUP_5H_TEMPLATE", "5H", emits=("R_TEMPLATE_MATCH",),
+             description="Template matching"),
+    RuleSpec("GROUP_5F_TAX", "5F", emits=("R7D_TAX_COMPONENT_VERIFICATION",),
+             inputs=("full_text_lower",), description="Tax component verification (multi-geo)"),
+    RuleSpec("GROUP_5H_GSTIN", "5H", emits=("R_GSTIN_FORMAT",),
+             description="GSTIN / tax registration validation"),
+    RuleSpec("GROUP_5I_NO_ELECTRONIC_ID", "5I", emits=("R_NO_ELECTRONIC_ID",),
+             inputs=("full_text_lower",), description="No electronic ID detection"),
+    RuleSpec("GROUP_5J_PIN_CITY", "5J", emits=("R_PIN_CITY_MISMATCH",),
+             description="PIN code / city cross-validation"),
+):
+    register_rule(_spec)
+
+
 def _score_and_explain(
     features: ReceiptFeatures,
     apply_learned: bool = True,
@@ -2469,6 +2650,9 @@ def _score_and_explain(
     lf = features.layout_features
     fr = features.forensic_features
 
+    rule_laps = StageLaps("rules")
+    rule_laps.mark("setup")
+
     conf_factor = _confidence_factor_from_features(ff, tf, lf, fr)
     
     # ============================================================================
@@ -2486,6 +2670,9 @@ def _score_and_explain(
     
     logger.info(f"Applying rules for doc_class={doc_class}, profile={doc_profile_obj.doc_class}, risk={doc_profile_obj.fraud_surface}")
 
+    # Per-receipt rule context: lazily evaluated shared inputs + memoized gates
+    rule_ctx = RuleContext(features, doc_profile_obj)
+
     def emit_event(*, events, reasons, rule_id, severity, weight, message, evidence=None, reason_text=None):
         # Apply profile-based severity override
         severity = get_rule_severity(doc_profile_obj, rule_id, severity)
@@ -2502,6 +2689,7 @@ def _score_and_explain(
             confidence_factor=conf_factor,
         )
 
+    rule_laps.mark("vision_veto")
     # ---------------------------------------------------------------------------
     # Vision veto (veto-only): if vision detects tampering, mark HARD_FAIL.
     # Vision can never *increase* trust; it only provides a downgrade/veto signal.
@@ -2540,11 +2728,79 @@ def _score_and_explain(
     except Exception as e:
         logger.warning(f"Vision veto evaluation failed: {e}")
 
+    # Audit LLM/VLM stages skipped instantly because the Ollama circuit was open
+    # (not a fraud signal; explains missing vision/LLM evidence)
+    _circuit_skipped = []
+    if str((vision_assessment or {}).get("skipped") or "") == "circuit_open":
+        _circuit_skipped.append({"stage": "vision_assessment", "reason": "circuit_open"})
+    _vlm_ext_meta = tf.get("vlm_extraction") if isinstance(tf.get("vlm_extraction"), dict) else {}
+    if _vlm_ext_meta.get("skipped") == "circuit_open":
+        _circuit_skipped.append({"stage": "vision_extract", "reason": "circuit_open"})
+    for _skip in tf.get("llm_circuit_skips") or []:
+        _circuit_skipped.append({"stage": f"ollama.{_skip.get('endpoint')}", **_skip})
+    if _circuit_skipped:
+        emit_event(
+            events=events,
+            reasons=None,
+            rule_id="LLM_SKIPPED_CIRCUIT_OPEN",
+            severity="INFO",
+            weight=0.0,
+            message="skipped: circuit_open (vision/LLM stages skipped, Ollama unavailable)",
+            evidence={"skipped": _circuit_skipped},
+        )
+
+    # Request deadline: optional stages skipped or truncated (app.pipelines.deadline)
+    _deadline_skipped = list(tf.get("deadline_skips") or [])
+    if _vlm_ext_meta.get("skipped") == "deadline" and not any(
+        _s.get("stage") == "vision_extract" for _s in _deadline_skipped
+    ):
+        _deadline_skipped.append({"stage": "vision_extract", "reason": "deadline"})
+    if _deadline_skipped:
+        emit_event(
+            events=events,
+            reasons=None,
+            rule_id="DEADLINE_STAGE_SKIPPED",
+            severity="INFO",
+            weight=0.0,
+            message=(
+                "skipped: deadline (optional stages skipped/truncated: "
+                + ", ".join(sorted({str(_s.get("stage")) for _s in _deadline_skipped})) + ")"
+            ),
+            evidence={"skipped": _deadline_skipped},
+        )
+
+    # Cost-aware cascade: record every tier run (app.pipelines.cascade)
+    _cascade = tf.get("analysis_cascade") if isinstance(tf.get("analysis_cascade"), dict) else None
+    if _cascade:
+        for _run in _cascade.get("previous") or []:
+            emit_event(
+                events=events,
+                reasons=None,
+                rule_id="CASCADE_TIER",
+                severity="INFO",
+                weight=0.0,
+                message=(
+                    f"Cascade tier {_run.get('tier')} ({_run.get('tier_name')}): "
+                    f"{_run.get('label')} {_run.get('score')} -> escalated to tier {_run.get('escalated_to')}"
+                ),
+                evidence=dict(_run),
+            )
+        emit_event(
+            events=events,
+            reasons=None,
+            rule_id="CASCADE_TIER",
+            severity="INFO",
+            weight=0.0,
+            message=f"Cascade tier {_cascade.get('tier')} ({_cascade.get('tier_name')}): final",
+            evidence={"tier": _cascade.get("tier"), "tier_name": _cascade.get("tier_name"), "final": True},
+        )
+
     source_type = ff.get("source_type")
 
-    blob_text = _join_text(tf, lf)
-    doc_type_hint = _detect_document_type(blob_text)
+    blob_text = rule_ctx.get("blob_text")
+    doc_type_hint = rule_ctx.get("doc_type_hint")
 
+    rule_laps.mark("geo_consistency")
     # ---------------------------------------------------------------------------
     # GeoRuleMatrix wiring (geo/currency/tax consistency)
     # Must never throw; must never return early.
@@ -2567,52 +2823,55 @@ def _score_and_explain(
     except Exception:
         minor_notes.append("Geo consistency checks skipped due to an internal error.")
 
+    rule_laps.mark("GROUP_0_5_DUPLICATE")
     # ---------------------------------------------------------------------------
     # RULE GROUP 0.5: Duplicate Receipt Detection
     # ---------------------------------------------------------------------------
-    try:
-        dup_check = tf.get("duplicate_check") or {}
-        if dup_check.get("is_duplicate"):
-            dup_type = dup_check.get("match_type", "unknown")
-            dup_details = dup_check.get("details", "")
-            matched_file = dup_check.get("matched_file", "unknown")
-            if dup_type == "exact":
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_DUPLICATE_RECEIPT",
-                    severity="HARD_FAIL",
-                    weight=0.60,
-                    message=f"Exact duplicate receipt detected (previously seen as {matched_file.rsplit('/', 1)[-1] if '/' in matched_file else matched_file})",
-                    evidence={
-                        "match_type": "exact",
-                        "matched_file": matched_file,
-                        "matched_merchant": dup_check.get("matched_merchant"),
-                        "matched_date": dup_check.get("matched_date"),
-                        "matched_total": dup_check.get("matched_total"),
-                    },
-                    reason_text=f"🚨 Duplicate Receipt: This receipt has identical merchant, date, and total as a previously submitted receipt. {dup_details}",
-                )
-            else:
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_DUPLICATE_RECEIPT",
-                    severity="CRITICAL",
-                    weight=0.40,
-                    message=f"Near-duplicate receipt detected ({dup_details})",
-                    evidence={
-                        "match_type": "fuzzy",
-                        "matched_file": matched_file,
-                        "matched_merchant": dup_check.get("matched_merchant"),
-                        "matched_date": dup_check.get("matched_date"),
-                        "matched_total": dup_check.get("matched_total"),
-                    },
-                    reason_text=f"⚠️ Near-Duplicate: This receipt closely matches a previously submitted one. {dup_details}",
-                )
-    except Exception as e:
-        logger.warning("Duplicate rule evaluation failed: %s", e)
+    if rule_ctx.should_run("GROUP_0_5_DUPLICATE"):
+        try:
+            dup_check = tf.get("duplicate_check") or {}
+            if dup_check.get("is_duplicate"):
+                dup_type = dup_check.get("match_type", "unknown")
+                dup_details = dup_check.get("details", "")
+                matched_file = dup_check.get("matched_file", "unknown")
+                if dup_type == "exact":
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_DUPLICATE_RECEIPT",
+                        severity="HARD_FAIL",
+                        weight=0.60,
+                        message=f"Exact duplicate receipt detected (previously seen as {matched_file.rsplit('/', 1)[-1] if '/' in matched_file else matched_file})",
+                        evidence={
+                            "match_type": "exact",
+                            "matched_file": matched_file,
+                            "matched_merchant": dup_check.get("matched_merchant"),
+                            "matched_date": dup_check.get("matched_date"),
+                            "matched_total": dup_check.get("matched_total"),
+                        },
+                        reason_text=f"🚨 Duplicate Receipt: This receipt has identical merchant, date, and total as a previously submitted receipt. {dup_details}",
+                    )
+                else:
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_DUPLICATE_RECEIPT",
+                        severity="CRITICAL",
+                        weight=0.40,
+                        message=f"Near-duplicate receipt detected ({dup_details})",
+                        evidence={
+                            "match_type": "fuzzy",
+                            "matched_file": matched_file,
+                            "matched_merchant": dup_check.get("matched_merchant"),
+                            "matched_date": dup_check.get("matched_date"),
+                            "matched_total": dup_check.get("matched_total"),
+                        },
+                        reason_text=f"⚠️ Near-Duplicate: This receipt closely matches a previously submitted one. {dup_details}",
+                    )
+        except Exception as e:
+            logger.warning("Duplicate rule evaluation failed: %s", e)
 
+    rule_laps.mark("GROUP_1_METADATA")
     # ---------------------------------------------------------------------------
     # RULE GROUP 1: Producer / metadata anomalies
     # ---------------------------------------------------------------------------
@@ -2731,6 +2990,7 @@ def _score_and_explain(
     except Exception as e:
         logger.warning(f"R1B_METADATA_TIMESTAMP_ANOMALY check failed: {e}")
 
+    rule_laps.mark("GROUP_2_TEXT")
     # ---------------------------------------------------------------------------
     # RULE GROUP 2: Text-based checks (amounts, merchant, dates)
     # ---------------------------------------------------------------------------
@@ -2758,7 +3018,7 @@ def _score_and_explain(
 
     # Doc-aware expectations (prevents false-positives on logistics docs etc.)
     # Use legacy_doc_profile to avoid collision with DocumentProfile object (profile_obj)
-    legacy_doc_profile = _get_doc_profile(tf, doc_type_hint=doc_type_hint)
+    legacy_doc_profile = rule_ctx.get("legacy_doc_profile")
     expects_amounts = _expects_amounts(tf, legacy_doc_profile)
     expects_total_line = _expects_total_line(tf, legacy_doc_profile)
     expects_date = _expects_date(tf, legacy_doc_profile)
@@ -2945,6 +3205,7 @@ def _score_and_explain(
                 },
             )
 
+    rule_laps.mark("R7_TOTAL_MISMATCH")
     # ---------------------------------------------------------------------------
     # R7: Total Mismatch (POS line items don't sum to total)
     # ---------------------------------------------------------------------------
@@ -2970,14 +3231,14 @@ def _score_and_explain(
     """
     # Enforce Rule × Family Matrix (matrix keys are doc SUBTYPES, not families)
     doc_family = legacy_doc_profile.get("family", "UNKNOWN").upper()
-    doc_subtype_for_matrix = str(legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or "UNKNOWN").upper()
-    execution_mode = get_execution_mode("R7_TOTAL_MISMATCH", doc_subtype_for_matrix)
+    doc_subtype_for_matrix = rule_ctx.inputs("R7_TOTAL_MISMATCH")["doc_subtype_for_matrix"]
+    execution_mode = rule_ctx.execution_mode("R7_TOTAL_MISMATCH")
     
     if execution_mode == ExecutionMode.FORBIDDEN:
         logger.debug(f"R7_TOTAL_MISMATCH skipped: {doc_subtype_for_matrix} not in allow-list")
         total_mismatch = False
     # GATED by profile: Skip for commercial invoices (complex line items with shipping, duties, etc.)
-    elif should_apply_rule(doc_profile_obj, "R7_TOTAL_MISMATCH"):
+    elif rule_ctx.profile_allows("R7_TOTAL_MISMATCH"):
         total_mismatch = bool(tf.get("total_mismatch", False))
     else:
         # RELAXATION: Even when profile gates it off, check for OBVIOUS mismatches
@@ -3084,6 +3345,7 @@ def _score_and_explain(
             reason_text="💰 Total Mismatch: Line items don't add up to the printed total.",
         )
 
+    rule_laps.mark("R7C_CREDIT_NOTE_RECONCILIATION")
     # ---------------------------------------------------------------------------
     # R7C: Credit Note Reconciliation (SIGN-AWARE VARIANT OF R7B)
     # ---------------------------------------------------------------------------
@@ -3128,7 +3390,7 @@ def _score_and_explain(
     is_credit_note = tf.get("is_credit_note", False)
     
     # Enforce Rule × Family Matrix (matrix keys are doc SUBTYPES)
-    execution_mode = get_execution_mode("R7C_CREDIT_NOTE_RECONCILIATION", doc_subtype or doc_family)
+    execution_mode = rule_ctx.execution_mode("R7C_CREDIT_NOTE_RECONCILIATION")
     
     if execution_mode == ExecutionMode.FORBIDDEN:
         logger.debug(f"R7C_CREDIT_NOTE_RECONCILIATION skipped: {doc_subtype or doc_family} forbidden")
@@ -3288,6 +3550,7 @@ def _score_and_explain(
                             ) if weight > 0 else None,
                         )
     
+    rule_laps.mark("R7B_INVOICE_TOTAL_RECONCILIATION")
     # ---------------------------------------------------------------------------
     # R7B: Invoice Total Reconciliation (for COMMERCIAL_INVOICE, TAX_INVOICE, etc.)
     # ---------------------------------------------------------------------------
@@ -3324,8 +3587,8 @@ def _score_and_explain(
     # RUNS AFTER R7C - skips credit notes (R7C handles those)
     
     # Enforce Rule × Family Matrix (matrix keys are doc SUBTYPES)
-    r7b_subtype = str(legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or "UNKNOWN").upper()
-    execution_mode = get_execution_mode("R7B_INVOICE_TOTAL_RECONCILIATION", r7b_subtype)
+    r7b_subtype = rule_ctx.inputs("R7B_INVOICE_TOTAL_RECONCILIATION")["doc_subtype_for_matrix"]
+    execution_mode = rule_ctx.execution_mode("R7B_INVOICE_TOTAL_RECONCILIATION")
     
     if execution_mode == ExecutionMode.FORBIDDEN:
         logger.debug(f"R7B_INVOICE_TOTAL_RECONCILIATION skipped: {r7b_subtype} forbidden")
@@ -3671,6 +3934,7 @@ def _score_and_explain(
                     },
                 )
 
+    rule_laps.mark("R9B_DOC_TYPE_UNKNOWN_OR_MIXED")
     # ---------------------------------------------------------------------------
     # R9B: Document Type Unknown or Mixed (SOFT DEGRADE)
     # ---------------------------------------------------------------------------
@@ -3701,8 +3965,8 @@ def _score_and_explain(
         doc_subtype = legacy_doc_profile.get("subtype", "").upper()
         
         # Enforce Rule × Family Matrix (matrix keys are doc SUBTYPES)
-        r9b_subtype = str(legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or "UNKNOWN").upper()
-        execution_mode = get_execution_mode("R9B_DOC_TYPE_UNKNOWN_OR_MIXED", r9b_subtype)
+        r9b_subtype = rule_ctx.inputs("R9B_DOC_TYPE_UNKNOWN_OR_MIXED")["doc_subtype_for_matrix"]
+        execution_mode = rule_ctx.execution_mode("R9B_DOC_TYPE_UNKNOWN_OR_MIXED")
         
         if execution_mode == ExecutionMode.FORBIDDEN:
             logger.debug(f"R9B_DOC_TYPE_UNKNOWN_OR_MIXED skipped: {r9b_subtype} forbidden")
@@ -3764,6 +4028,7 @@ def _score_and_explain(
                 reason_text="📄 Document Type Ambiguity: Contains mixed/unclear invoice/receipt language.",
             )
 
+    rule_laps.mark("GROUP_3_LAYOUT")
     # ---------------------------------------------------------------------------
     # RULE GROUP 3: Layout anomalies
     # ---------------------------------------------------------------------------
@@ -3806,19 +4071,13 @@ def _score_and_explain(
             reason_text=f"🔢 High Numeric Ratio: {numeric_line_ratio:.0%} of lines are purely numeric.",
         )
 
+    rule_laps.mark("GROUP_4_FORENSIC")
     # ---------------------------------------------------------------------------
     # RULE GROUP 4: Forensic cues
     # ---------------------------------------------------------------------------
     
     # R_TAMPER_WATERMARK: Detect fake receipt generators and watermarks (HIGH VALUE)
-    full_text = "\n".join(raw.ocr_text_per_page) if hasattr(features, 'raw') and hasattr(features.raw, 'ocr_text_per_page') else ""
-    if not full_text:
-        # Reconstruct from lines if available
-        lines = lf.get("lines", [])
-        full_text = "\n".join(lines) if lines else ""
-    if not full_text:
-        # Final fallback: use full_text from text_features (e.g. in test context)
-        full_text = tf.get("full_text", "")
+    full_text = rule_ctx.get("full_text")
     
     tamper_keywords = [
         "receiptfaker", "receipt faker", "fake receipt", "receipt generator",
@@ -3875,6 +4134,7 @@ def _score_and_explain(
             reason_text=f"🔤 Low Character Variety: Only {unique_char_count} unique characters.",
         )
 
+    rule_laps.mark("GROUP_4B_IMAGE_FORENSICS")
     # ---------------------------------------------------------------------------
     # RULE GROUP 4B: Pixel-level image forensics
     # ---------------------------------------------------------------------------
@@ -3983,6 +4243,7 @@ def _score_and_explain(
                 ),
             )
 
+    rule_laps.mark("GROUP_5_DATES")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5: Date validation (impossible dates, suspicious gaps)
     # ---------------------------------------------------------------------------
@@ -4058,7 +4319,7 @@ def _score_and_explain(
                 profile_obj = get_profile_for_doc_class(doc_class)
                 
                 profile_threshold = profile_obj.date_gap_threshold_days
-                should_check_gap = should_apply_rule(profile_obj, "R16_SUSPICIOUS_DATE_GAP")
+                should_check_gap = rule_ctx.profile_allows("R16_SUSPICIOUS_DATE_GAP")
                 
                 if not should_check_gap:
                     logger.info(f"R16_SUSPICIOUS_DATE_GAP skipped for {doc_class} (profile: apply_date_gap_rules=False)")
@@ -4122,6 +4383,7 @@ def _score_and_explain(
             reason_text=f"📅❓ Unparsable Date: '{receipt_date_str}' cannot be parsed into known format.",
         )
 
+    rule_laps.mark("GROUP_5B_PLAUSIBILITY")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5B: Plausibility checks (expert-style analysis)
     # ---------------------------------------------------------------------------
@@ -4377,6 +4639,7 @@ def _score_and_explain(
     except Exception as e:
         logger.warning(f"R_AMOUNT_PLAUSIBILITY check failed: {e}")
 
+    rule_laps.mark("GROUP_5B2_HANDWRITTEN")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5B2: Handwritten Receipt Detection & OCR Quality
     # ---------------------------------------------------------------------------
@@ -4384,99 +4647,101 @@ def _score_and_explain(
     # When OCR confidence is very low, it usually means the text is handwritten
     # or the image is poor quality — either way, the extracted amounts are
     # unreliable and the document warrants extra scrutiny.
-    try:
-        _ocr_conf = tf.get("ocr_confidence")
-        _ocr_engine = tf.get("ocr_engine", "unknown")
-        _low_conf_ratio = tf.get("ocr_low_conf_word_ratio")
-
-        # Two detection modes:
-        # 1. Average OCR confidence < 0.35 → entirely handwritten/degraded
-        # 2. Low-confidence word ratio > 0.30 → partially handwritten
-        #    (printed header inflates average, but data fields are handwritten)
-        _hw_triggered = False
-        _hw_reason = ""
-
-        # Suppress if VLM successfully read the receipt — low OCR confidence
-        # is just image degradation (e.g. WhatsApp compression), not handwriting.
-        _vlm_meta = tf.get("vlm_meta") or {}
-        _vlm_ext = tf.get("vlm_extraction") or {}
-        _vlm_read_ok = (
-            _vlm_meta.get("success")
-            and _vlm_ext.get("merchant_name")
-            and _vlm_ext.get("total") is not None
-        )
-
-        if _ocr_conf is not None and _ocr_conf < 0.35 and not _vlm_read_ok:
-            _hw_triggered = True
-            _hw_weight = 0.12 if _ocr_conf < 0.20 else 0.08
-            _hw_reason = (
-                f"📝 Low OCR Confidence: OCR engine scored only {_ocr_conf:.0%} confidence "
-                f"(threshold: 35%). This usually indicates a handwritten document, which is "
-                f"trivially easy to fabricate. Extracted amounts and dates should not be trusted "
-                f"without manual verification."
-            )
-            _hw_msg = f"Very low OCR confidence ({_ocr_conf:.0%}) — likely handwritten or degraded document"
-        elif _low_conf_ratio is not None and _low_conf_ratio > 0.30 and not _vlm_read_ok:
-            _hw_triggered = True
-            _hw_weight = 0.10 if _low_conf_ratio > 0.40 else 0.07
-            _hw_reason = (
-                f"📝 Partially Handwritten: {_low_conf_ratio:.0%} of OCR words have low confidence "
-                f"(< 50%), even though the overall average is {(_ocr_conf or 0):.0%}. This pattern "
-                f"indicates a document with printed headers but handwritten data fields (amounts, "
-                f"dates, quantities). Handwritten entries are trivially easy to fabricate."
-            )
-            _hw_msg = (
-                f"Partially handwritten document ({_low_conf_ratio:.0%} low-confidence words) "
-                f"— data fields may be unreliable"
+    if rule_ctx.should_run("GROUP_5B2_HANDWRITTEN"):
+        try:
+            _ocr_conf = tf.get("ocr_confidence")
+            _ocr_engine = tf.get("ocr_engine", "unknown")
+            _low_conf_ratio = tf.get("ocr_low_conf_word_ratio")
+
+            # Two detection modes:
+            # 1. Average OCR confidence < 0.35 → entirely handwritten/degraded
+            # 2. Low-confidence word ratio > 0.30 → partially handwritten
+            #    (printed header inflates average, but data fields are handwritten)
+            _hw_triggered = False
+            _hw_reason = ""
+
+            # Suppress if VLM successfully read the receipt — low OCR confidence
+            # is just image degradation (e.g. WhatsApp compression), not handwriting.
+            _vlm_meta = tf.get("vlm_meta") or {}
+            _vlm_ext = tf.get("vlm_extraction") or {}
+            _vlm_read_ok = (
+                _vlm_meta.get("success")
+                and _vlm_ext.get("merchant_name")
+                and _vlm_ext.get("total") is not None
             )
 
-        if _hw_triggered:
-            score += emit_event(
-                events=events,
-                reasons=reasons,
-                rule_id="R_HANDWRITTEN_RECEIPT",
-                severity="WARNING",
-                weight=_hw_weight,
-                message=_hw_msg,
-                evidence={
-                    "ocr_confidence": round(_ocr_conf, 3) if _ocr_conf is not None else None,
-                    "ocr_low_conf_word_ratio": round(_low_conf_ratio, 3) if _low_conf_ratio is not None else None,
-                    "ocr_engine": _ocr_engine,
-                    "detection_mode": "avg_confidence" if (_ocr_conf is not None and _ocr_conf < 0.35) else "low_conf_word_ratio",
-                    "implication": "Extracted amounts/dates may be unreliable",
-                },
-                reason_text=_hw_reason,
-            )
+            if _ocr_conf is not None and _ocr_conf < 0.35 and not _vlm_read_ok:
+                _hw_triggered = True
+                _hw_weight = 0.12 if _ocr_conf < 0.20 else 0.08
+                _hw_reason = (
+                    f"📝 Low OCR Confidence: OCR engine scored only {_ocr_conf:.0%} confidence "
+                    f"(threshold: 35%). This usually indicates a handwritten document, which is "
+                    f"trivially easy to fabricate. Extracted amounts and dates should not be trusted "
+                    f"without manual verification."
+                )
+                _hw_msg = f"Very low OCR confidence ({_ocr_conf:.0%}) — likely handwritten or degraded document"
+            elif _low_conf_ratio is not None and _low_conf_ratio > 0.30 and not _vlm_read_ok:
+                _hw_triggered = True
+                _hw_weight = 0.10 if _low_conf_ratio > 0.40 else 0.07
+                _hw_reason = (
+                    f"📝 Partially Handwritten: {_low_conf_ratio:.0%} of OCR words have low confidence "
+                    f"(< 50%), even though the overall average is {(_ocr_conf or 0):.0%}. This pattern "
+                    f"indicates a document with printed headers but handwritten data fields (amounts, "
+                    f"dates, quantities). Handwritten entries are trivially easy to fabricate."
+                )
+                _hw_msg = (
+                    f"Partially handwritten document ({_low_conf_ratio:.0%} low-confidence words) "
+                    f"— data fields may be unreliable"
+                )
 
-            # R_OCR_DEGRADED_VLM_ONLY: When OCR fails, check if VLM data is available
-            _vlm_total = tf.get("vlm_extraction", {}).get("total") if isinstance(tf.get("vlm_extraction"), dict) else None
-            _ocr_total = tf.get("total_amount")
-            _total_source = tf.get("total_source", "")
-            _effective_ocr_conf = _ocr_conf if _ocr_conf is not None else (1.0 - (_low_conf_ratio or 0))
-            if _total_source == "vlm" and _effective_ocr_conf < 0.40:
+            if _hw_triggered:
                 score += emit_event(
                     events=events,
                     reasons=reasons,
-                    rule_id="R_OCR_DEGRADED_VLM_ONLY",
-                    severity="INFO",
-                    weight=0.04,
-                    message="Amount data relies solely on VLM (OCR too degraded to cross-validate)",
+                    rule_id="R_HANDWRITTEN_RECEIPT",
+                    severity="WARNING",
+                    weight=_hw_weight,
+                    message=_hw_msg,
                     evidence={
                         "ocr_confidence": round(_ocr_conf, 3) if _ocr_conf is not None else None,
                         "ocr_low_conf_word_ratio": round(_low_conf_ratio, 3) if _low_conf_ratio is not None else None,
-                        "total_source": _total_source,
-                        "vlm_total": _vlm_total,
-                        "ocr_total_raw": _ocr_total,
+                        "ocr_engine": _ocr_engine,
+                        "detection_mode": "avg_confidence" if (_ocr_conf is not None and _ocr_conf < 0.35) else "low_conf_word_ratio",
+                        "implication": "Extracted amounts/dates may be unreliable",
                     },
-                    reason_text=(
-                        "🤖 VLM-Only Data: OCR confidence is too low to extract reliable text. "
-                        "All amount data comes from the Vision Language Model, which cannot be "
-                        "cross-validated against OCR. Manual verification recommended."
-                    ),
+                    reason_text=_hw_reason,
                 )
-    except Exception as e:
-        logger.warning(f"R_HANDWRITTEN_RECEIPT check failed: {e}")
 
+                # R_OCR_DEGRADED_VLM_ONLY: When OCR fails, check if VLM data is available
+                _vlm_total = tf.get("vlm_extraction", {}).get("total") if isinstance(tf.get("vlm_extraction"), dict) else None
+                _ocr_total = tf.get("total_amount")
+                _total_source = tf.get("total_source", "")
+                _effective_ocr_conf = _ocr_conf if _ocr_conf is not None else (1.0 - (_low_conf_ratio or 0))
+                if _total_source == "vlm" and _effective_ocr_conf < 0.40:
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_OCR_DEGRADED_VLM_ONLY",
+                        severity="INFO",
+                        weight=0.04,
+                        message="Amount data relies solely on VLM (OCR too degraded to cross-validate)",
+                        evidence={
+                            "ocr_confidence": round(_ocr_conf, 3) if _ocr_conf is not None else None,
+                            "ocr_low_conf_word_ratio": round(_low_conf_ratio, 3) if _low_conf_ratio is not None else None,
+                            "total_source": _total_source,
+                            "vlm_total": _vlm_total,
+                            "ocr_total_raw": _ocr_total,
+                        },
+                        reason_text=(
+                            "🤖 VLM-Only Data: OCR confidence is too low to extract reliable text. "
+                            "All amount data comes from the Vision Language Model, which cannot be "
+                            "cross-validated against OCR. Manual verification recommended."
+                        ),
+                    )
+        except Exception as e:
+            logger.warning(f"R_HANDWRITTEN_RECEIPT check failed: {e}")
+
+    rule_laps.mark("GROUP_5B3_ROUND_TOTAL")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5B3: Round Number Detection
     # ---------------------------------------------------------------------------
@@ -4484,65 +4749,67 @@ def _score_and_explain(
     # almost never have perfectly round totals (e.g. $50.00, ₹3000.00).
     # Round numbers suggest the amount was decided first and the receipt fabricated.
     # Exception: parking, tolls, subscriptions which ARE often round.
-    try:
-        _rn_total = _normalize_amount_str(tf.get("total_amount"))
-        _rn_subtype = str(
-            legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or ""
-        ).upper()
-        _rn_geo = str(tf.get("geo_country_guess") or "UNKNOWN").upper()
+    if rule_ctx.should_run("GROUP_5B3_ROUND_TOTAL"):
+        try:
+            _rn_total = _normalize_amount_str(tf.get("total_amount"))
+            _rn_subtype = str(
+                legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or ""
+            ).upper()
+            _rn_geo = str(tf.get("geo_country_guess") or "UNKNOWN").upper()
 
-        if _rn_total is not None and _rn_total > 0:
-            # Determine if the total is suspiciously round
-            # "Round" means divisible by a significant unit for the currency
-            _round_unit = 100 if _rn_geo in ("IN", "JP", "KR", "ID") else 10
-            _is_perfectly_round = (_rn_total % _round_unit) == 0 and _rn_total >= _round_unit * 2
+            if _rn_total is not None and _rn_total > 0:
+                # Determine if the total is suspiciously round
+                # "Round" means divisible by a significant unit for the currency
+                _round_unit = 100 if _rn_geo in ("IN", "JP", "KR", "ID") else 10
+                _is_perfectly_round = (_rn_total % _round_unit) == 0 and _rn_total >= _round_unit * 2
 
-            # Even rounder: divisible by 500 or 1000
-            _is_very_round = (_rn_total % (_round_unit * 10)) == 0 and _rn_total >= _round_unit * 10
+                # Even rounder: divisible by 500 or 1000
+                _is_very_round = (_rn_total % (_round_unit * 10)) == 0 and _rn_total >= _round_unit * 10
 
-            # Subtypes where round totals are normal (don't flag)
-            _round_exempt_subtypes = {
-                "PARKING", "TOLL", "SUBSCRIPTION", "MEMBERSHIP", "DONATION",
-                "RENT", "UTILITY", "INSURANCE",
-            }
-            _is_exempt = _rn_subtype in _round_exempt_subtypes
+                # Subtypes where round totals are normal (don't flag)
+                _round_exempt_subtypes = {
+                    "PARKING", "TOLL", "SUBSCRIPTION", "MEMBERSHIP", "DONATION",
+                    "RENT", "UTILITY", "INSURANCE",
+                }
+                _is_exempt = _rn_subtype in _round_exempt_subtypes
 
-            # Subtypes where round totals are extra suspicious
-            _round_suspicious_subtypes = {"FUEL", "POS_RESTAURANT", "POS_RETAIL", "GROCERY", "PHARMACY"}
-            _is_extra_suspicious = _rn_subtype in _round_suspicious_subtypes
+                # Subtypes where round totals are extra suspicious
+                _round_suspicious_subtypes = {"FUEL", "POS_RESTAURANT", "POS_RETAIL", "GROCERY", "PHARMACY"}
+                _is_extra_suspicious = _rn_subtype in _round_suspicious_subtypes
 
-            if _is_perfectly_round and not _is_exempt:
-                _rn_severity = "WARNING"
-                _rn_weight = 0.06
-                if _is_very_round:
-                    _rn_weight = 0.10
-                if _is_extra_suspicious:
-                    _rn_weight += 0.04
+                if _is_perfectly_round and not _is_exempt:
+                    _rn_severity = "WARNING"
+                    _rn_weight = 0.06
+                    if _is_very_round:
+                        _rn_weight = 0.10
+                    if _is_extra_suspicious:
+                        _rn_weight += 0.04
 
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_ROUND_TOTAL",
-                    severity=_rn_severity,
-                    weight=_rn_weight,
-                    message=f"Suspiciously round total amount ({_rn_total:,.0f})",
-                    evidence={
-                        "total_amount": _rn_total,
-                        "round_unit": _round_unit,
-                        "is_very_round": _is_very_round,
-                        "doc_subtype": _rn_subtype,
-                        "geo": _rn_geo,
-                    },
-                    reason_text=(
-                        f"🎯 Round Total: The total amount of {_rn_total:,.0f} is suspiciously round. "
-                        f"Real {'fuel' if _rn_subtype == 'FUEL' else 'retail'} transactions "
-                        f"almost never land on an exact round number. This is a common indicator "
-                        f"of fabricated receipts where the amount was chosen before the receipt was created."
-                    ),
-                )
-    except Exception as e:
-        logger.warning(f"R_ROUND_TOTAL check failed: {e}")
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_ROUND_TOTAL",
+                        severity=_rn_severity,
+                        weight=_rn_weight,
+                        message=f"Suspiciously round total amount ({_rn_total:,.0f})",
+                        evidence={
+                            "total_amount": _rn_total,
+                            "round_unit": _round_unit,
+                            "is_very_round": _is_very_round,
+                            "doc_subtype": _rn_subtype,
+                            "geo": _rn_geo,
+                        },
+                        reason_text=(
+                            f"🎯 Round Total: The total amount of {_rn_total:,.0f} is suspiciously round. "
+                            f"Real {'fuel' if _rn_subtype == 'FUEL' else 'retail'} transactions "
+                            f"almost never land on an exact round number. This is a common indicator "
+                            f"of fabricated receipts where the amount was chosen before the receipt was created."
+                        ),
+                    )
+        except Exception as e:
+            logger.warning(f"R_ROUND_TOTAL check failed: {e}")
 
+    rule_laps.mark("GROUP_5B4_QTY_RATE")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5B4: Qty x Rate Verification (Line Item Math Cross-Check)
     # ---------------------------------------------------------------------------
@@ -4550,459 +4817,470 @@ def _score_and_explain(
     # qty * rate should equal the amount. A mismatch suggests manual fabrication
     # (someone wrote the wrong numbers). This is especially useful for fuel receipts
     # where qty (liters) x rate (price/liter) = total should match.
-    try:
-        _vlm_extraction = tf.get("vlm_extraction")
-        if isinstance(_vlm_extraction, dict):
-            _vlm_items_raw = _vlm_extraction.get("items") or []
-        else:
-            _vlm_items_raw = []
+    if rule_ctx.should_run("GROUP_5B4_QTY_RATE"):
+        try:
+            _vlm_extraction = tf.get("vlm_extraction")
+            if isinstance(_vlm_extraction, dict):
+                _vlm_items_raw = _vlm_extraction.get("items") or []
+            else:
+                _vlm_items_raw = []
 
-        _qr_mismatches = []
-        for _item in _vlm_items_raw:
-            if not isinstance(_item, dict):
-                continue
-            _qty = _item.get("qty")
-            _price = _item.get("price")
-            _name = _item.get("name", "item")
+            _qr_mismatches = []
+            for _item in _vlm_items_raw:
+                if not isinstance(_item, dict):
+                    continue
+                _qty = _item.get("qty")
+                _price = _item.get("price")
+                _name = _item.get("name", "item")
 
-            if _qty is not None and _price is not None:
-                try:
-                    _qty_f = float(_qty)
-                    _price_f = float(_price)
-                    if _qty_f > 0 and _price_f > 0:
-                        _expected = _qty_f * _price_f
-                        # Check if there's a separate "amount" or "total" per line
-                        _line_total = _item.get("amount") or _item.get("total") or _item.get("line_total")
-                        if _line_total is not None:
+                if _qty is not None and _price is not None:
+                    try:
+                        _qty_f = float(_qty)
+                        _price_f = float(_price)
+                        if _qty_f > 0 and _price_f > 0:
+                            _expected = _qty_f * _price_f
+                            # Check if there's a separate "amount" or "total" per line
+                            _line_total = _item.get("amount") or _item.get("total") or _item.get("line_total")
+                            if _line_total is not None:
+                                try:
+                                    _line_total_f = float(_line_total)
+                                    if _line_total_f > 0:
+                                        _diff_pct = abs(_expected - _line_total_f) / _line_total_f * 100
+                                        if _diff_pct > 1.5:  # More than 1.5% off
+                                            _qr_mismatches.append({
+                                                "item": str(_name)[:40],
+                                                "qty": _qty_f,
+                                                "rate": _price_f,
+                                                "expected": round(_expected, 2),
+                                                "actual": _line_total_f,
+                                                "diff_pct": round(_diff_pct, 1),
+                                            })
+                                except (ValueError, TypeError):
+                                    pass
+                    except (ValueError, TypeError):
+                        pass
+
+            # Also check: for fuel receipts, if VLM gives qty (liters) and rate (price/liter),
+            # compare computed total vs the receipt total
+            if not _qr_mismatches and _vlm_items_raw:
+                _rn_subtype_qr = str(
+                    legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or ""
+                ).upper()
+                if _rn_subtype_qr == "FUEL" and len(_vlm_items_raw) <= 3:
+                    for _item in _vlm_items_raw:
+                        if not isinstance(_item, dict):
+                            continue
+                        _qty = _item.get("qty")
+                        _price = _item.get("price")
+                        _name = _item.get("name", "fuel")
+                        if _qty is not None and _price is not None:
                             try:
-                                _line_total_f = float(_line_total)
-                                if _line_total_f > 0:
-                                    _diff_pct = abs(_expected - _line_total_f) / _line_total_f * 100
-                                    if _diff_pct > 1.5:  # More than 1.5% off
-                                        _qr_mismatches.append({
-                                            "item": str(_name)[:40],
-                                            "qty": _qty_f,
-                                            "rate": _price_f,
-                                            "expected": round(_expected, 2),
-                                            "actual": _line_total_f,
-                                            "diff_pct": round(_diff_pct, 1),
-                                        })
+                                _qty_f = float(_qty)
+                                _price_f = float(_price)
+                                if _qty_f > 1 and _price_f > 1:
+                                    _computed = _qty_f * _price_f
+                                    # Compare against receipt total
+                                    _receipt_total = _normalize_amount_str(tf.get("total_amount"))
+                                    if _receipt_total and _receipt_total > 0:
+                                        _diff_pct = abs(_computed - _receipt_total) / _receipt_total * 100
+                                        if _diff_pct > 1.5:  # Fuel math should be exact
+                                            _qr_mismatches.append({
+                                                "item": str(_name)[:40],
+                                                "qty": _qty_f,
+                                                "rate": _price_f,
+                                                "expected": round(_computed, 2),
+                                                "actual": _receipt_total,
+                                                "diff_pct": round(_diff_pct, 1),
+                                                "comparison": "qty*rate vs receipt_total",
+                                            })
                             except (ValueError, TypeError):
                                 pass
-                except (ValueError, TypeError):
-                    pass
-
-        # Also check: for fuel receipts, if VLM gives qty (liters) and rate (price/liter),
-        # compare computed total vs the receipt total
-        if not _qr_mismatches and _vlm_items_raw:
-            _rn_subtype_qr = str(
-                legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or ""
-            ).upper()
-            if _rn_subtype_qr == "FUEL" and len(_vlm_items_raw) <= 3:
-                for _item in _vlm_items_raw:
-                    if not isinstance(_item, dict):
-                        continue
-                    _qty = _item.get("qty")
-                    _price = _item.get("price")
-                    _name = _item.get("name", "fuel")
-                    if _qty is not None and _price is not None:
-                        try:
-                            _qty_f = float(_qty)
-                            _price_f = float(_price)
-                            if _qty_f > 1 and _price_f > 1:
-                                _computed = _qty_f * _price_f
-                                # Compare against receipt total
-                                _receipt_total = _normalize_amount_str(tf.get("total_amount"))
-                                if _receipt_total and _receipt_total > 0:
-                                    _diff_pct = abs(_computed - _receipt_total) / _receipt_total * 100
-                                    if _diff_pct > 1.5:  # Fuel math should be exact
-                                        _qr_mismatches.append({
-                                            "item": str(_name)[:40],
-                                            "qty": _qty_f,
-                                            "rate": _price_f,
-                                            "expected": round(_computed, 2),
-                                            "actual": _receipt_total,
-                                            "diff_pct": round(_diff_pct, 1),
-                                            "comparison": "qty*rate vs receipt_total",
-                                        })
-                        except (ValueError, TypeError):
-                            pass
-
-        if _qr_mismatches:
-            _worst = max(_qr_mismatches, key=lambda m: m["diff_pct"])
-            _qr_weight = 0.10 if _worst["diff_pct"] > 5.0 else 0.06
-            score += emit_event(
-                events=events,
-                reasons=reasons,
-                rule_id="R_QTY_RATE_MISMATCH",
-                severity="WARNING",
-                weight=_qr_weight,
-                message=f"Line item math error: qty x rate does not match amount ({_worst['diff_pct']:.1f}% off)",
-                evidence={
-                    "mismatches": _qr_mismatches,
-                    "worst_item": _worst["item"],
-                    "worst_diff_pct": _worst["diff_pct"],
-                },
-                reason_text=(
-                    f"🧮 Math Error: For '{_worst['item']}', qty ({_worst['qty']}) x rate ({_worst['rate']}) "
-                    f"= {_worst['expected']:,.2f}, but the receipt shows {_worst['actual']:,.2f} "
-                    f"({_worst['diff_pct']:.1f}% discrepancy). This arithmetic error suggests "
-                    f"the receipt was manually created with incorrect calculations."
-                ),
-            )
-    except Exception as e:
-        logger.warning(f"R_QTY_RATE_MISMATCH check failed: {e}")
-
-    # ---------------------------------------------------------------------------
-    # RULE GROUP 5C: Address Validation (consumes features.py address signals)
-    # ---------------------------------------------------------------------------
-    # address_profile and merchant_address_consistency are extracted in features.py
-    # but were never consumed by the scoring engine — this is the bridge.
-    try:
-        address_profile = tf.get("address_profile") or {}
-        addr_classification = address_profile.get("address_classification", "")
-        merchant_addr_consistency = tf.get("merchant_address_consistency") or {}
-
-        # R_ADDRESS_FAKE: Detect known fake/placeholder address patterns
-        addr_evidence_list = address_profile.get("address_evidence", [])
-        if any("fake" in str(e).lower() or "placeholder" in str(e).lower() for e in addr_evidence_list):
-            score += emit_event(
-                events=events,
-                reasons=reasons,
-                rule_id="R_ADDRESS_FAKE",
-                severity="CRITICAL",
-                weight=0.30,
-                message="Address appears to be a fake/placeholder",
-                evidence={
-                    "address_classification": addr_classification,
-                    "address_evidence": addr_evidence_list,
-                },
-                reason_text="📍 Fake Address: Document contains a known fake/placeholder address pattern.",
-            )
 
-        # R_ADDRESS_MISSING: No address on document types that require one
-        # (invoices, commercial docs — but NOT POS receipts which often lack addresses)
-        doc_family_addr = legacy_doc_profile.get("family", "").upper()
-        doc_subtype_addr = legacy_doc_profile.get("subtype", "").upper()
-        expects_address = doc_family_addr in ("INVOICE", "COMMERCIAL") or "INVOICE" in doc_subtype_addr
-        is_pos_receipt = doc_subtype_addr.startswith("POS_")
-
-        if expects_address and addr_classification in ("NOT_AN_ADDRESS", ""):
-            dp_conf_addr = float(legacy_doc_profile.get("confidence", 0) or 0)
-            if dp_conf_addr >= 0.6:
+            if _qr_mismatches:
+                _worst = max(_qr_mismatches, key=lambda m: m["diff_pct"])
+                _qr_weight = 0.10 if _worst["diff_pct"] > 5.0 else 0.06
                 score += emit_event(
                     events=events,
                     reasons=reasons,
-                    rule_id="R_ADDRESS_MISSING",
+                    rule_id="R_QTY_RATE_MISMATCH",
                     severity="WARNING",
-                    weight=0.10,
-                    message="Invoice/commercial document has no detectable address",
+                    weight=_qr_weight,
+                    message=f"Line item math error: qty x rate does not match amount ({_worst['diff_pct']:.1f}% off)",
                     evidence={
-                        "address_classification": addr_classification,
-                        "doc_family": doc_family_addr,
-                        "doc_subtype": doc_subtype_addr,
-                        "doc_profile_confidence": dp_conf_addr,
+                        "mismatches": _qr_mismatches,
+                        "worst_item": _worst["item"],
+                        "worst_diff_pct": _worst["diff_pct"],
                     },
-                    reason_text="📍 No Address: Invoice/commercial document is missing an address — unusual for legitimate business documents.",
+                    reason_text=(
+                        f"🧮 Math Error: For '{_worst['item']}', qty ({_worst['qty']}) x rate ({_worst['rate']}) "
+                        f"= {_worst['expected']:,.2f}, but the receipt shows {_worst['actual']:,.2f} "
+                        f"({_worst['diff_pct']:.1f}% discrepancy). This arithmetic error suggests "
+                        f"the receipt was manually created with incorrect calculations."
+                    ),
                 )
+        except Exception as e:
+            logger.warning(f"R_QTY_RATE_MISMATCH check failed: {e}")
+
+    rule_laps.mark("GROUP_5C_ADDRESS")
+    # ---------------------------------------------------------------------------
+    # RULE GROUP 5C: Address Validation (consumes features.py address signals)
+    # ---------------------------------------------------------------------------
+    # address_profile and merchant_address_consistency are extracted in features.py
+    # but were never consumed by the scoring engine — this is the bridge.
+    if rule_ctx.should_run("GROUP_5C_ADDRESS"):
+        try:
+            address_profile = tf.get("address_profile") or {}
+            addr_classification = address_profile.get("address_classification", "")
+            merchant_addr_consistency = tf.get("merchant_address_consistency") or {}
 
-        # R_ADDRESS_IMPLAUSIBLE: Weak address structure (not fake, but not convincing)
-        if addr_classification == "WEAK_ADDRESS" and not is_pos_receipt:
-            addr_score = address_profile.get("address_score", 0)
-            if addr_score <= 2:
+            # R_ADDRESS_FAKE: Detect known fake/placeholder address patterns
+            addr_evidence_list = address_profile.get("address_evidence", [])
+            if any("fake" in str(e).lower() or "placeholder" in str(e).lower() for e in addr_evidence_list):
                 score += emit_event(
                     events=events,
                     reasons=reasons,
-                    rule_id="R_ADDRESS_IMPLAUSIBLE",
-                    severity="WARNING",
-                    weight=0.08,
-                    message="Address structure is implausible (very weak evidence)",
+                    rule_id="R_ADDRESS_FAKE",
+                    severity="CRITICAL",
+                    weight=0.30,
+                    message="Address appears to be a fake/placeholder",
                     evidence={
                         "address_classification": addr_classification,
-                        "address_score": addr_score,
                         "address_evidence": addr_evidence_list,
                     },
-                    reason_text="📍 Weak Address: Document address has very weak structural evidence — may be fabricated.",
-                )
-
-        # R_ADDRESS_MERCHANT_MISMATCH: Merchant name inconsistent with address
-        mac_verdict = merchant_addr_consistency.get("verdict", "")
-        if mac_verdict in ("INCONSISTENT", "SUSPICIOUS"):
-            mac_confidence = float(merchant_addr_consistency.get("confidence", 0) or 0)
-            if mac_confidence >= 0.6:
-                severity = "CRITICAL" if mac_verdict == "INCONSISTENT" else "WARNING"
-                weight = 0.15 if mac_verdict == "INCONSISTENT" else 0.08
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_ADDRESS_MERCHANT_MISMATCH",
-                    severity=severity,
-                    weight=weight,
-                    message=f"Merchant name inconsistent with address ({mac_verdict})",
-                    evidence={
-                        "verdict": mac_verdict,
-                        "confidence": mac_confidence,
-                        "merchant_address_consistency": merchant_addr_consistency,
-                    },
-                    reason_text=f"📍🏪 Merchant-Address Mismatch: The merchant name doesn't match the address on the document ({mac_verdict}).",
-                )
-        # R_ADDRESS_GEO_MISMATCH: VLM address conflicts with detected geo
-        # When VLM extracts an address, cross-validate city/state names against
-        # the detected geo. A Dubai address on an Indian-geo receipt is suspicious.
-        # NOTE: Only uses city/state name patterns (NOT postal codes which are ambiguous).
-        vlm_address = tf.get("vlm_address") or ""
-        if vlm_address and len(vlm_address) > 10:
-            _geo_guess = str(tf.get("geo_country_guess") or "").upper()
-            _geo_conf = float(tf.get("geo_confidence") or 0)
-            if _geo_guess and _geo_guess != "UNKNOWN" and _geo_conf >= 0.6:
-                # City/state name indicators only (no postal patterns — too ambiguous)
-                _ADDR_GEO_NAMES = {
-                    "IN": r"\b(india|hyderabad|mumbai|delhi|bangalore|bengaluru|chennai|kolkata|pune|ahmedabad|jaipur|lucknow|telangana|maharashtra|karnataka|tamil\s*nadu|kerala|gujarat)\b",
-                    "US": r"\b(usa|united\s*states|california|texas|new\s*york|florida|illinois|tennessee|georgia|virginia|ohio|michigan|arizona|north\s*carolina|washington)\b",
-                    "GB": r"\b(uk|united\s*kingdom|england|scotland|wales|london|manchester|birmingham|leeds|glasgow|liverpool)\b",
-                    "AE": r"\b(dubai|abu\s*dhabi|sharjah|ajman|uae|united\s*arab\s*emirates|rak|fujairah)\b",
-                    "SA": r"\b(riyadh|jeddah|makkah|mecca|medina|saudi|ksa|dammam)\b",
-                    "CA": r"\b(canada|ontario|quebec|toronto|vancouver|alberta|british\s*columbia|montreal|calgary|ottawa)\b",
-                    "AU": r"\b(australia|sydney|melbourne|brisbane|perth|adelaide|canberra)\b",
-                    "SG": r"\b(singapore)\b",
-                    "DE": r"\b(germany|deutschland|berlin|munich|frankfurt|hamburg|cologne)\b",
-                    "FR": r"\b(france|paris|lyon|marseille|toulouse|nice)\b",
-                    "JP": r"\b(japan|tokyo|osaka|kyoto|yokohama|nagoya)\b",
-                }
-                addr_lower = vlm_address.lower()
-
-                # Check if address has city/state names matching detected geo
-                geo_name_pat = _ADDR_GEO_NAMES.get(_geo_guess)
-                address_matches_geo = bool(
-                    re.search(geo_name_pat, addr_lower) if geo_name_pat else True
+                    reason_text="📍 Fake Address: Document contains a known fake/placeholder address pattern.",
                 )
 
-                # Only flag conflict if address has city/state names from a DIFFERENT country
-                # AND does NOT have names from the detected geo
-                address_conflicts_with = None
-                if not address_matches_geo:
-                    for other_geo, other_pattern in _ADDR_GEO_NAMES.items():
-                        if other_geo == _geo_guess:
-                            continue
-                        if re.search(other_pattern, addr_lower):
-                            address_conflicts_with = other_geo
-                            break
+            # R_ADDRESS_MISSING: No address on document types that require one
+            # (invoices, commercial docs — but NOT POS receipts which often lack addresses)
+            doc_family_addr = legacy_doc_profile.get("family", "").upper()
+            doc_subtype_addr = legacy_doc_profile.get("subtype", "").upper()
+            expects_address = doc_family_addr in ("INVOICE", "COMMERCIAL") or "INVOICE" in doc_subtype_addr
+            is_pos_receipt = doc_subtype_addr.startswith("POS_")
 
-                if address_conflicts_with:
+            if expects_address and addr_classification in ("NOT_AN_ADDRESS", ""):
+                dp_conf_addr = float(legacy_doc_profile.get("confidence", 0) or 0)
+                if dp_conf_addr >= 0.6:
                     score += emit_event(
                         events=events,
                         reasons=reasons,
-                        rule_id="R_ADDRESS_GEO_MISMATCH",
+                        rule_id="R_ADDRESS_MISSING",
                         severity="WARNING",
                         weight=0.10,
-                        message=f"Address suggests {address_conflicts_with} but document geo is {_geo_guess}",
+                        message="Invoice/commercial document has no detectable address",
                         evidence={
-                            "vlm_address": vlm_address[:100],
-                            "geo_country_guess": _geo_guess,
-                            "geo_confidence": _geo_conf,
-                            "address_suggests_country": address_conflicts_with,
+                            "address_classification": addr_classification,
+                            "doc_family": doc_family_addr,
+                            "doc_subtype": doc_subtype_addr,
+                            "doc_profile_confidence": dp_conf_addr,
                         },
-                        reason_text=(
-                            f"📍🌍 Address-Geo Mismatch: Address appears to be from {address_conflicts_with} "
-                            f"but other document signals point to {_geo_guess}. May indicate address forgery."
-                        ),
+                        reason_text="📍 No Address: Invoice/commercial document is missing an address — unusual for legitimate business documents.",
                     )
 
-    except Exception as e:
-        logger.warning(f"Address validation rules failed: {e}")
-
-    # ---------------------------------------------------------------------------
-    # RULE GROUP 5D: Screenshot Detection
-    # ---------------------------------------------------------------------------
-    # Expert insight: Fraudsters often submit screenshots of receipts (from apps,
-    # browsers, or other phones) instead of actual receipt photos/scans.
-    # Screenshots contain telltale UI elements visible in OCR text.
-    try:
-        _screenshot_lines = lf.get("lines", [])
-        if not _screenshot_lines:
-            _screenshot_lines = [l for l in full_text.split("\n") if l.strip()] if full_text else []
-
-        _screenshot_signals = []
-        _screenshot_signal_count = 0
-
-        # 1. Status bar indicators (top ~5 lines of OCR text)
-        _STATUS_BAR_PATTERNS = [
-            # Time patterns that appear in phone status bars
-            r"\b\d{1,2}:\d{2}\s*(AM|PM|am|pm)\b",
-            # Battery percentage
-            r"\b\d{1,3}\s*%\s*(battery|charged|charging)\b",
-            r"\bbattery\b",
-            # Signal/carrier indicators
-            r"\b(LTE|5G|4G|3G|EDGE|H\+|HSPA)\b",
-            r"\b(Wi-?Fi|WiFi|WLAN)\b",
-            # Common carrier names
-            r"\b(Verizon|AT&T|T-Mobile|Sprint|Vodafone|Airtel|Jio|BSNL|O2|EE|Three|Rogers|Bell|Telus)\b",
-            # Phone UI elements
-            r"\b(Settings|Notifications|Control Center|Do Not Disturb)\b",
-        ]
-
-        _top_lines = _screenshot_lines[:5] if len(_screenshot_lines) > 5 else _screenshot_lines
-        _top_text = " ".join(_top_lines).strip()
-        for pat in _STATUS_BAR_PATTERNS:
-            if re.search(pat, _top_text, re.IGNORECASE):
-                _screenshot_signals.append(f"Status bar pattern: {pat}")
-                _screenshot_signal_count += 1
-                break  # One status bar match is enough
-
-        # 2. Browser chrome / URL bar indicators (anywhere in text)
-        _full_text_lower = full_text.lower() if full_text else ""
-        _BROWSER_PATTERNS = [
-            (r"https?://[^\s]{5,}", "URL in text"),
-            (r"\b(chrome|safari|firefox|edge|opera|brave)\b.*\b(tab|tabs|bookmark|address)\b", "Browser UI"),
-            (r"\b(address\s+bar|search\s+bar|navigation\s+bar)\b", "Browser navigation"),
-            (r"\bnew\s+tab\b", "Browser new tab"),
-            (r"\b(incognito|private\s+browsing)\b", "Private browsing mode"),
-        ]
-        for pat, label in _BROWSER_PATTERNS:
-            if re.search(pat, _full_text_lower):
-                _screenshot_signals.append(f"Browser chrome: {label}")
-                _screenshot_signal_count += 1
-                break
-
-        # 3. App UI elements
-        _APP_UI_PATTERNS = [
-            (r"\b(share|forward|reply|delete|archive)\b.*\b(button|icon)\b", "App action buttons"),
-            (r"\b(home|back|recent|menu)\b.*\b(button|navigation)\b", "Navigation buttons"),
-            (r"\bscreenshot\s*(saved|taken|captured)\b", "Screenshot notification"),
-        ]
-        for pat, label in _APP_UI_PATTERNS:
-            if re.search(pat, _full_text_lower):
-                _screenshot_signals.append(f"App UI: {label}")
-                _screenshot_signal_count += 1
-                break
-
-        # 4. Combine with DPI screenshot-size signal from image forensics
-        _dpi_screenshot = False
-        if img_forensics.get("forensics_available"):
-            _dpi_data = img_forensics.get("dpi", {})
-            if _dpi_data.get("is_screenshot_size"):
-                _screenshot_signals.append(
-                    f"Screenshot dimensions: {_dpi_data.get('width')}×{_dpi_data.get('height')}"
-                )
-                _screenshot_signal_count += 1
-                _dpi_screenshot = True
+            # R_ADDRESS_IMPLAUSIBLE: Weak address structure (not fake, but not convincing)
+            if addr_classification == "WEAK_ADDRESS" and not is_pos_receipt:
+                addr_score = address_profile.get("address_score", 0)
+                if addr_score <= 2:
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_ADDRESS_IMPLAUSIBLE",
+                        severity="WARNING",
+                        weight=0.08,
+                        message="Address structure is implausible (very weak evidence)",
+                        evidence={
+                            "address_classification": addr_classification,
+                            "address_score": addr_score,
+                            "address_evidence": addr_evidence_list,
+                        },
+                        reason_text="📍 Weak Address: Document address has very weak structural evidence — may be fabricated.",
+                    )
 
-        # Emit rule if we have 2+ signals (text + dimension) or strong text signals
-        if _screenshot_signal_count >= 2:
-            score += emit_event(
-                events=events,
-                reasons=reasons,
-                rule_id="R_SCREENSHOT_DETECTED",
-                severity="WARNING",
-                weight=0.12,
-                message=f"Image appears to be a screenshot ({_screenshot_signal_count} signals)",
-                evidence={
-                    "signal_count": _screenshot_signal_count,
-                    "signals": _screenshot_signals[:5],
-                    "is_screenshot_size": _dpi_screenshot,
-                },
-                reason_text=(
-                    f"📱 Screenshot Detected: {_screenshot_signal_count} indicators suggest "
-                    f"this is a screenshot rather than an original receipt photo/scan. "
-                    + "; ".join(_screenshot_signals[:3])
-                ),
-            )
-    except Exception as e:
-        logger.warning(f"R_SCREENSHOT_DETECTED check failed: {e}")
+            # R_ADDRESS_MERCHANT_MISMATCH: Merchant name inconsistent with address
+            mac_verdict = merchant_addr_consistency.get("verdict", "")
+            if mac_verdict in ("INCONSISTENT", "SUSPICIOUS"):
+                mac_confidence = float(merchant_addr_consistency.get("confidence", 0) or 0)
+                if mac_confidence >= 0.6:
+                    severity = "CRITICAL" if mac_verdict == "INCONSISTENT" else "WARNING"
+                    weight = 0.15 if mac_verdict == "INCONSISTENT" else 0.08
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_ADDRESS_MERCHANT_MISMATCH",
+                        severity=severity,
+                        weight=weight,
+                        message=f"Merchant name inconsistent with address ({mac_verdict})",
+                        evidence={
+                            "verdict": mac_verdict,
+                            "confidence": mac_confidence,
+                            "merchant_address_consistency": merchant_addr_consistency,
+                        },
+                        reason_text=f"📍🏪 Merchant-Address Mismatch: The merchant name doesn't match the address on the document ({mac_verdict}).",
+                    )
+            # R_ADDRESS_GEO_MISMATCH: VLM address conflicts with detected geo
+            # When VLM extracts an address, cross-validate city/state names against
+            # the detected geo. A Dubai address on an Indian-geo receipt is suspicious.
+            # NOTE: Only uses city/state name patterns (NOT postal codes which are ambiguous).
+            vlm_address = tf.get("vlm_address") or ""
+            if vlm_address and len(vlm_address) > 10:
+                _geo_guess = str(tf.get("geo_country_guess") or "").upper()
+                _geo_conf = float(tf.get("geo_confidence") or 0)
+                if _geo_guess and _geo_guess != "UNKNOWN" and _geo_conf >= 0.6:
+                    # City/state name indicators only (no postal patterns — too ambiguous)
+                    _ADDR_GEO_NAMES = {
+                        "IN": r"\b(india|hyderabad|mumbai|delhi|bangalore|bengaluru|chennai|kolkata|pune|ahmedabad|jaipur|lucknow|telangana|maharashtra|karnataka|tamil\s*nadu|kerala|gujarat)\b",
+                        "US": r"\b(usa|united\s*states|california|texas|new\s*york|florida|illinois|tennessee|georgia|virginia|ohio|michigan|arizona|north\s*carolina|washington)\b",
+                        "GB": r"\b(uk|united\s*kingdom|england|scotland|wales|london|manchester|birmingham|leeds|glasgow|liverpool)\b",
+                        "AE": r"\b(dubai|abu\s*dhabi|sharjah|ajman|uae|united\s*arab\s*emirates|rak|fujairah)\b",
+                        "SA": r"\b(riyadh|jeddah|makkah|mecca|medina|saudi|ksa|dammam)\b",
+                        "CA": r"\b(canada|ontario|quebec|toronto|vancouver|alberta|british\s*columbia|montreal|calgary|ottawa)\b",
+                        "AU": r"\b(australia|sydney|melbourne|brisbane|perth|adelaide|canberra)\b",
+                        "SG": r"\b(singapore)\b",
+                        "DE": r"\b(germany|deutschland|berlin|munich|frankfurt|hamburg|cologne)\b",
+                        "FR": r"\b(france|paris|lyon|marseille|toulouse|nice)\b",
+                        "JP": r"\b(japan|tokyo|osaka|kyoto|yokohama|nagoya)\b",
+                    }
+                    addr_lower = vlm_address.lower()
+
+                    # Check if address has city/state names matching detected geo
+                    geo_name_pat = _ADDR_GEO_NAMES.get(_geo_guess)
+                    address_matches_geo = bool(
+                        re.search(geo_name_pat, addr_lower) if geo_name_pat else True
+                    )
+
+                    # Only flag conflict if address has city/state names from a DIFFERENT country
+                    # AND does NOT have names from the detected geo
+                    address_conflicts_with = None
+                    if not address_matches_geo:
+                        for other_geo, other_pattern in _ADDR_GEO_NAMES.items():
+                            if other_geo == _geo_guess:
+                                continue
+                            if re.search(other_pattern, addr_lower):
+                                address_conflicts_with = other_geo
+                                break
+
+                    if address_conflicts_with:
+                        score += emit_event(
+                            events=events,
+                            reasons=reasons,
+                            rule_id="R_ADDRESS_GEO_MISMATCH",
+                            severity="WARNING",
+                            weight=0.10,
+                            message=f"Address suggests {address_conflicts_with} but document geo is {_geo_guess}",
+                            evidence={
+                                "vlm_address": vlm_address[:100],
+                                "geo_country_guess": _geo_guess,
+                                "geo_confidence": _geo_conf,
+                                "address_suggests_country": address_conflicts_with,
+                            },
+                            reason_text=(
+                                f"📍🌍 Address-Geo Mismatch: Address appears to be from {address_conflicts_with} "
+                                f"but other document signals point to {_geo_guess}. May indicate address forgery."
+                            ),
+                        )
 
+        except Exception as e:
+            logger.warning(f"Address validation rules failed: {e}")
+
+    rule_laps.mark("GROUP_5D_SCREENSHOT")
     # ---------------------------------------------------------------------------
-    # RULE GROUP 5E: Structure Order Anomaly
+    # RULE GROUP 5D: Screenshot Detection
     # ---------------------------------------------------------------------------
-    # Expert insight: Real receipts/invoices follow a consistent structure:
-    #   Header → Line Items → Subtotal → Tax → Total
-    # If the total appears BEFORE line items, the document was likely fabricated
-    # by someone who typed the total first and items after.
-    try:
-        _struct_lines = lf.get("lines", [])
-        if not _struct_lines and full_text:
-            _struct_lines = [l for l in full_text.split("\n") if l.strip()]
-
-        if len(_struct_lines) >= 5:
-            # Find first occurrence of total-like keywords
-            _total_keywords = re.compile(
-                r"\b(grand\s+total|total\s+amount|total\s+due|net\s+total"
-                r"|amount\s+due|balance\s+due|total\b)",
-                re.IGNORECASE,
-            )
-            # Find first occurrence of line-item-like patterns
-            # Line items typically: quantity × description × price
-            _item_pattern = re.compile(
-                r"(\d+\s*[xX×]\s*.+\s+\d+[.,]\d{2})"    # "2 x Widget  45.00"
-                r"|(.+\s{2,}\d+[.,]\d{2}$)"               # "Widget        45.00"
-                r"|(\d+[.,]\d{2}\s{2,}.+)"                 # "45.00   Widget"
-            )
+    # Expert insight: Fraudsters often submit screenshots of receipts (from apps,
+    # browsers, or other phones) instead of actual receipt photos/scans.
+    # Screenshots contain telltale UI elements visible in OCR text.
+    if rule_ctx.should_run("GROUP_5D_SCREENSHOT"):
+        _ss_inputs = rule_ctx.inputs("GROUP_5D_SCREENSHOT")
+        try:
+            _screenshot_lines = lf.get("lines", [])
+            if not _screenshot_lines:
+                _ss_text = _ss_inputs["full_text"]
+                _screenshot_lines = [l for l in _ss_text.split("\n") if l.strip()] if _ss_text else []
+
+            _screenshot_signals = []
+            _screenshot_signal_count = 0
+
+            # 1. Status bar indicators (top ~5 lines of OCR text)
+            _STATUS_BAR_PATTERNS = [
+                # Time patterns that appear in phone status bars
+                r"\b\d{1,2}:\d{2}\s*(AM|PM|am|pm)\b",
+                # Battery percentage
+                r"\b\d{1,3}\s*%\s*(battery|charged|charging)\b",
+                r"\bbattery\b",
+                # Signal/carrier indicators
+                r"\b(LTE|5G|4G|3G|EDGE|H\+|HSPA)\b",
+                r"\b(Wi-?Fi|WiFi|WLAN)\b",
+                # Common carrier names
+                r"\b(Verizon|AT&T|T-Mobile|Sprint|Vodafone|Airtel|Jio|BSNL|O2|EE|Three|Rogers|Bell|Telus)\b",
+                # Phone UI elements
+                r"\b(Settings|Notifications|Control Center|Do Not Disturb)\b",
+            ]
 
-            _total_line_idx = None
-            _first_item_idx = None
-            _last_item_idx = None
-            _item_count = 0
+            _top_lines = _screenshot_lines[:5] if len(_screenshot_lines) > 5 else _screenshot_lines
+            _top_text = " ".join(_top_lines).strip()
+            for pat in _STATUS_BAR_PATTERNS:
+                if re.search(pat, _top_text, re.IGNORECASE):
+                    _screenshot_signals.append(f"Status bar pattern: {pat}")
+                    _screenshot_signal_count += 1
+                    break  # One status bar match is enough
+
+            # 2. Browser chrome / URL bar indicators (anywhere in text)
+            _full_text_lower = _ss_inputs["full_text_lower"]
+            _BROWSER_PATTERNS = [
+                (r"https?://[^\s]{5,}", "URL in text"),
+                (r"\b(chrome|safari|firefox|edge|opera|brave)\b.*\b(tab|tabs|bookmark|address)\b", "Browser UI"),
+                (r"\b(address\s+bar|search\s+bar|navigation\s+bar)\b", "Browser navigation"),
+                (r"\bnew\s+tab\b", "Browser new tab"),
+                (r"\b(incognito|private\s+browsing)\b", "Private browsing mode"),
+            ]
+            for pat, label in _BROWSER_PATTERNS:
+                if re.search(pat, _full_text_lower):
+                    _screenshot_signals.append(f"Browser chrome: {label}")
+                    _screenshot_signal_count += 1
+                    break
 
-            for idx, line in enumerate(_struct_lines):
-                stripped = line.strip()
-                if not stripped:
-                    continue
+            # 3. App UI elements
+            _APP_UI_PATTERNS = [
+                (r"\b(share|forward|reply|delete|archive)\b.*\b(button|icon)\b", "App action buttons"),
+                (r"\b(home|back|recent|menu)\b.*\b(button|navigation)\b", "Navigation buttons"),
+                (r"\bscreenshot\s*(saved|taken|captured)\b", "Screenshot notification"),
+            ]
+            for pat, label in _APP_UI_PATTERNS:
+                if re.search(pat, _full_text_lower):
+                    _screenshot_signals.append(f"App UI: {label}")
+                    _screenshot_signal_count += 1
+                    break
 
-                # Check for total (skip if just "subtotal" — that's expected before total)
-                if _total_line_idx is None:
-                    if _total_keywords.search(stripped):
-                        # Exclude subtotal-only matches
-                        if not re.match(r"^\s*sub\s*total", stripped, re.IGNORECASE):
-                            _total_line_idx = idx
-
-                # Check for line items
-                if _item_pattern.search(stripped):
-                    _item_count += 1
-                    if _first_item_idx is None:
-                        _first_item_idx = idx
-                    _last_item_idx = idx
-
-            # Anomaly: total found significantly before line items
-            if (_total_line_idx is not None
-                    and _first_item_idx is not None
-                    and _item_count >= 2
-                    and _total_line_idx < _first_item_idx):
-                # Total is before the first line item
-                _total_position_pct = round(
-                    _total_line_idx / max(1, len(_struct_lines)), 2
-                )
-                _items_position_pct = round(
-                    _first_item_idx / max(1, len(_struct_lines)), 2
-                )
+            # 4. Combine with DPI screenshot-size signal from image forensics
+            _dpi_screenshot = False
+            if img_forensics.get("forensics_available"):
+                _dpi_data = img_forensics.get("dpi", {})
+                if _dpi_data.get("is_screenshot_size"):
+                    _screenshot_signals.append(
+                        f"Screenshot dimensions: {_dpi_data.get('width')}×{_dpi_data.get('height')}"
+                    )
+                    _screenshot_signal_count += 1
+                    _dpi_screenshot = True
+
+            # Emit rule if we have 2+ signals (text + dimension) or strong text signals
+            if _screenshot_signal_count >= 2:
                 score += emit_event(
                     events=events,
                     reasons=reasons,
-                    rule_id="R_STRUCTURE_ORDER",
+                    rule_id="R_SCREENSHOT_DETECTED",
                     severity="WARNING",
-                    weight=0.10,
-                    message=(
-                        f"Total appears at line {_total_line_idx + 1} but "
-                        f"line items start at line {_first_item_idx + 1}"
-                    ),
+                    weight=0.12,
+                    message=f"Image appears to be a screenshot ({_screenshot_signal_count} signals)",
                     evidence={
-                        "total_line_idx": _total_line_idx,
-                        "first_item_idx": _first_item_idx,
-                        "last_item_idx": _last_item_idx,
-                        "item_count": _item_count,
-                        "total_position_pct": _total_position_pct,
-                        "items_position_pct": _items_position_pct,
-                        "total_line": _struct_lines[_total_line_idx].strip()[:80],
+                        "signal_count": _screenshot_signal_count,
+                        "signals": _screenshot_signals[:5],
+                        "is_screenshot_size": _dpi_screenshot,
                     },
                     reason_text=(
-                        f"🔢 Structure Anomaly: Total appears at line "
-                        f"{_total_line_idx + 1} ({_total_position_pct:.0%} into document) "
-                        f"but {_item_count} line items don't start until line "
-                        f"{_first_item_idx + 1} ({_items_position_pct:.0%}). "
-                        f"Real receipts list items before the total."
+                        f"📱 Screenshot Detected: {_screenshot_signal_count} indicators suggest "
+                        f"this is a screenshot rather than an original receipt photo/scan. "
+                        + "; ".join(_screenshot_signals[:3])
                     ),
                 )
-    except Exception as e:
-        logger.warning(f"R_STRUCTURE_ORDER check failed: {e}")
+        except Exception as e:
+            logger.warning(f"R_SCREENSHOT_DETECTED check failed: {e}")
 
+    rule_laps.mark("GROUP_5E_STRUCTURE_ORDER")
+    # ---------------------------------------------------------------------------
+    # RULE GROUP 5E: Structure Order Anomaly
+    # ---------------------------------------------------------------------------
+    # Expert insight: Real receipts/invoices follow a consistent structure:
+    #   Header → Line Items → Subtotal → Tax → Total
+    # If the total appears BEFORE line items, the document was likely fabricated
+    # by someone who typed the total first and items after.
+    if rule_ctx.should_run("GROUP_5E_STRUCTURE_ORDER"):
+        _struct_inputs = rule_ctx.inputs("GROUP_5E_STRUCTURE_ORDER")
+        try:
+            _struct_lines = lf.get("lines", [])
+            if not _struct_lines and _struct_inputs["full_text"]:
+                _struct_lines = [l for l in _struct_inputs["full_text"].split("\n") if l.strip()]
+
+            if len(_struct_lines) >= 5:
+                # Find first occurrence of total-like keywords
+                _total_keywords = re.compile(
+                    r"\b(grand\s+total|total\s+amount|total\s+due|net\s+total"
+                    r"|amount\s+due|balance\s+due|total\b)",
+                    re.IGNORECASE,
+                )
+                # Find first occurrence of line-item-like patterns
+                # Line items typically: quantity × description × price
+                _item_pattern = re.compile(
+                    r"(\d+\s*[xX×]\s*.+\s+\d+[.,]\d{2})"    # "2 x Widget  45.00"
+                    r"|(.+\s{2,}\d+[.,]\d{2}$)"               # "Widget        45.00"
+                    r"|(\d+[.,]\d{2}\s{2,}.+)"                 # "45.00   Widget"
+                )
+
+                _total_line_idx = None
+                _first_item_idx = None
+                _last_item_idx = None
+                _item_count = 0
+
+                for idx, line in enumerate(_struct_lines):
+                    stripped = line.strip()
+                    if not stripped:
+                        continue
+
+                    # Check for total (skip if just "subtotal" — that's expected before total)
+                    if _total_line_idx is None:
+                        if _total_keywords.search(stripped):
+                            # Exclude subtotal-only matches
+                            if not re.match(r"^\s*sub\s*total", stripped, re.IGNORECASE):
+                                _total_line_idx = idx
+
+                    # Check for line items
+                    if _item_pattern.search(stripped):
+                        _item_count += 1
+                        if _first_item_idx is None:
+                            _first_item_idx = idx
+                        _last_item_idx = idx
+
+                # Anomaly: total found significantly before line items
+                if (_total_line_idx is not None
+                        and _first_item_idx is not None
+                        and _item_count >= 2
+                        and _total_line_idx < _first_item_idx):
+                    # Total is before the first line item
+                    _total_position_pct = round(
+                        _total_line_idx / max(1, len(_struct_lines)), 2
+                    )
+                    _items_position_pct = round(
+                        _first_item_idx / max(1, len(_struct_lines)), 2
+                    )
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_STRUCTURE_ORDER",
+                        severity="WARNING",
+                        weight=0.10,
+                        message=(
+                            f"Total appears at line {_total_line_idx + 1} but "
+                            f"line items start at line {_first_item_idx + 1}"
+                        ),
+                        evidence={
+                            "total_line_idx": _total_line_idx,
+                            "first_item_idx": _first_item_idx,
+                            "last_item_idx": _last_item_idx,
+                            "item_count": _item_count,
+                            "total_position_pct": _total_position_pct,
+                            "items_position_pct": _items_position_pct,
+                            "total_line": _struct_lines[_total_line_idx].strip()[:80],
+                        },
+                        reason_text=(
+                            f"🔢 Structure Anomaly: Total appears at line "
+                            f"{_total_line_idx + 1} ({_total_position_pct:.0%} into document) "
+                            f"but {_item_count} line items don't start until line "
+                            f"{_first_item_idx + 1} ({_items_position_pct:.0%}). "
+                            f"Real receipts list items before the total."
+                        ),
+                    )
+        except Exception as e:
+            logger.warning(f"R_STRUCTURE_ORDER check failed: {e}")
+
+    rule_laps.mark("GROUP_5G_BRAND")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5G: Brand / Logo Consistency
     # ---------------------------------------------------------------------------
@@ -5018,241 +5296,247 @@ def _score_and_explain(
     #   A. Merchant name appears in top 5 lines (logo region)
     #   B. Known brand chains are formatted correctly
     #   C. Top lines contain plausible branding (not just numbers/dates)
-    try:
-        _brand_merchant = (tf.get("merchant_candidate") or "").strip()
-        _brand_lines = lf.get("lines", [])
-        if not _brand_lines:
-            _brand_lines = [l for l in full_text.split("\n") if l.strip()] if full_text else []
-
-        if _brand_merchant and len(_brand_merchant) >= 3 and len(_brand_lines) >= 5:
-            _brand_top = "\n".join(_brand_lines[:5]).lower()
-            _brand_merchant_lower = _brand_merchant.lower()
-            _brand_signals = []
-
-            # Check A: Merchant name should appear in logo region (top 5 lines)
-            _merchant_words = [w for w in _brand_merchant_lower.split() if len(w) >= 3]
-            _words_in_top = sum(1 for w in _merchant_words if w in _brand_top)
-            _merchant_in_top = (
-                _brand_merchant_lower in _brand_top
-                or (_merchant_words and _words_in_top >= max(1, len(_merchant_words) * 0.5))
-            )
+    if rule_ctx.should_run("GROUP_5G_BRAND"):
+        try:
+            _brand_merchant = (tf.get("merchant_candidate") or "").strip()
+            _brand_lines = lf.get("lines", [])
+            if not _brand_lines:
+                _brand_lines = [l for l in full_text.split("\n") if l.strip()] if full_text else []
+
+            if _brand_merchant and len(_brand_merchant) >= 3 and len(_brand_lines) >= 5:
+                _brand_top = "\n".join(_brand_lines[:5]).lower()
+                _brand_merchant_lower = _brand_merchant.lower()
+                _brand_signals = []
+
+                # Check A: Merchant name should appear in logo region (top 5 lines)
+                _merchant_words = [w for w in _brand_merchant_lower.split() if len(w) >= 3]
+                _words_in_top = sum(1 for w in _merchant_words if w in _brand_top)
+                _merchant_in_top = (
+                    _brand_merchant_lower in _brand_top
+                    or (_merchant_words and _words_in_top >= max(1, len(_merchant_words) * 0.5))
+                )
 
-            if not _merchant_in_top:
-                # Check if merchant appears anywhere in the doc (OCR + VLM text)
-                _full_lower = full_text.lower() if full_text else ""
-                # Also include VLM-extracted fields in the search corpus
-                _vlm_ext = tf.get("vlm_extraction") or {}
-                _vlm_text_parts = [
-                    str(_vlm_ext.get("merchant_name") or ""),
-                    str(_vlm_ext.get("address") or ""),
-                ]
-                for _vi in (_vlm_ext.get("items") or []):
-                    if isinstance(_vi, dict):
-                        _vlm_text_parts.append(str(_vi.get("name") or ""))
-                _vlm_combined = " ".join(_vlm_text_parts).lower()
-                _search_corpus = _full_lower + " " + _vlm_combined
+                if not _merchant_in_top:
+                    # Check if merchant appears anywhere in the doc (OCR + VLM text)
+                    _full_lower = full_text.lower() if full_text else ""
+                    # Also include VLM-extracted fields in the search corpus
+                    _vlm_ext = tf.get("vlm_extraction") or {}
+                    _vlm_text_parts = [
+                        str(_vlm_ext.get("merchant_name") or ""),
+                        str(_vlm_ext.get("address") or ""),
+                    ]
+                    for _vi in (_vlm_ext.get("items") or []):
+                        if isinstance(_vi, dict):
+                            _vlm_text_parts.append(str(_vi.get("name") or ""))
+                    _vlm_combined = " ".join(_vlm_text_parts).lower()
+                    _search_corpus = _full_lower + " " + _vlm_combined
                 
-                _merchant_in_body = _brand_merchant_lower in _search_corpus
-                if _merchant_in_body:
-                    _brand_signals.append("merchant_not_in_header_but_in_body")
-                else:
-                    _brand_signals.append("merchant_not_found_anywhere")
-
-            # Check B: Known brand chains should appear in specific format
-            _KNOWN_CHAINS = {
-                "mcdonald": ["mcdonald's", "mcdonalds", "mcd"],
-                "starbucks": ["starbucks", "starbucks coffee"],
-                "walmart": ["walmart", "wal-mart", "wal mart"],
-                "costco": ["costco", "costco wholesale"],
-                "amazon": ["amazon", "amazon.com", "amzn"],
-                "target": ["target"],
-                "ikea": ["ikea"],
-                "zara": ["zara"],
-                "h&m": ["h&m", "h & m"],
-                "uber": ["uber", "uber eats"],
-                "swiggy": ["swiggy"],
-                "zomato": ["zomato"],
-                "flipkart": ["flipkart"],
-                "reliance": ["reliance", "reliance retail", "reliance fresh"],
-                "big bazaar": ["big bazaar", "bigbazaar"],
-                "dmart": ["dmart", "d-mart", "d mart"],
-            }
-            for _chain_key, _chain_variants in _KNOWN_CHAINS.items():
-                if any(v in _brand_merchant_lower for v in _chain_variants):
-                    # This receipt claims to be from a known chain
-                    _chain_in_top = any(v in _brand_top for v in _chain_variants)
-                    if not _chain_in_top:
-                        _brand_signals.append(f"known_chain_{_chain_key}_not_in_header")
-                    break
+                    _merchant_in_body = _brand_merchant_lower in _search_corpus
+                    if _merchant_in_body:
+                        _brand_signals.append("merchant_not_in_header_but_in_body")
+                    else:
+                        _brand_signals.append("merchant_not_found_anywhere")
+
+                # Check B: Known brand chains should appear in specific format
+                _KNOWN_CHAINS = {
+                    "mcdonald": ["mcdonald's", "mcdonalds", "mcd"],
+                    "starbucks": ["starbucks", "starbucks coffee"],
+                    "walmart": ["walmart", "wal-mart", "wal mart"],
+                    "costco": ["costco", "costco wholesale"],
+                    "amazon": ["amazon", "amazon.com", "amzn"],
+                    "target": ["target"],
+                    "ikea": ["ikea"],
+                    "zara": ["zara"],
+                    "h&m": ["h&m", "h & m"],
+                    "uber": ["uber", "uber eats"],
+                    "swiggy": ["swiggy"],
+                    "zomato": ["zomato"],
+                    "flipkart": ["flipkart"],
+                    "reliance": ["reliance", "reliance retail", "reliance fresh"],
+                    "big bazaar": ["big bazaar", "bigbazaar"],
+                    "dmart": ["dmart", "d-mart", "d mart"],
+                }
+                for _chain_key, _chain_variants in _KNOWN_CHAINS.items():
+                    if any(v in _brand_merchant_lower for v in _chain_variants):
+                        # This receipt claims to be from a known chain
+                        _chain_in_top = any(v in _brand_top for v in _chain_variants)
+                        if not _chain_in_top:
+                            _brand_signals.append(f"known_chain_{_chain_key}_not_in_header")
+                        break
 
-            # Check C: Top lines should contain plausible branding (not just numbers)
-            _top_alpha_ratio = sum(
-                c.isalpha() for c in _brand_top
-            ) / max(len(_brand_top), 1)
-            if _top_alpha_ratio < 0.2:
-                _brand_signals.append("header_mostly_numeric")
+                # Check C: Top lines should contain plausible branding (not just numbers)
+                _top_alpha_ratio = sum(
+                    c.isalpha() for c in _brand_top
+                ) / max(len(_brand_top), 1)
+                if _top_alpha_ratio < 0.2:
+                    _brand_signals.append("header_mostly_numeric")
 
-            # Emit if 2+ brand signals detected
-            if len(_brand_signals) >= 2:
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_BRAND_CONSISTENCY",
-                    severity="WARNING",
-                    weight=0.10,
-                    message=f"Brand/logo inconsistency: {', '.join(_brand_signals[:3])}",
-                    evidence={
-                        "merchant": _brand_merchant,
-                        "signals": _brand_signals,
-                        "signal_count": len(_brand_signals),
-                        "merchant_in_header": _merchant_in_top,
-                    },
-                    reason_text=(
-                        f"🏷️ Brand Inconsistency: Merchant '{_brand_merchant}' "
-                        f"shows {len(_brand_signals)} branding anomalies: "
-                        f"{'; '.join(_brand_signals[:3])}. "
-                        f"Real receipts prominently display the merchant/brand "
-                        f"name in the header region."
-                    ),
-                )
-            elif len(_brand_signals) == 1 and "merchant_not_found_anywhere" in _brand_signals:
-                # Single strong signal: merchant name doesn't appear at all
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_BRAND_CONSISTENCY",
-                    severity="INFO",
-                    weight=0.05,
-                    message=f"Merchant '{_brand_merchant}' not found in document text",
-                    evidence={
-                        "merchant": _brand_merchant,
-                        "signals": _brand_signals,
-                        "merchant_in_header": False,
-                    },
-                    reason_text=(
-                        f"🏷️ Brand Note: Extracted merchant '{_brand_merchant}' "
-                        f"does not appear anywhere in the document OCR text."
-                    ),
-                )
-    except Exception as e:
-        logger.warning(f"R_BRAND_CONSISTENCY check failed: {e}")
+                # Emit if 2+ brand signals detected
+                if len(_brand_signals) >= 2:
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_BRAND_CONSISTENCY",
+                        severity="WARNING",
+                        weight=0.10,
+                        message=f"Brand/logo inconsistency: {', '.join(_brand_signals[:3])}",
+                        evidence={
+                            "merchant": _brand_merchant,
+                            "signals": _brand_signals,
+                            "signal_count": len(_brand_signals),
+                            "merchant_in_header": _merchant_in_top,
+                        },
+                        reason_text=(
+                            f"🏷️ Brand Inconsistency: Merchant '{_brand_merchant}' "
+                            f"shows {len(_brand_signals)} branding anomalies: "
+                            f"{'; '.join(_brand_signals[:3])}. "
+                            f"Real receipts prominently display the merchant/brand "
+                            f"name in the header region."
+                        ),
+                    )
+                elif len(_brand_signals) == 1 and "merchant_not_found_anywhere" in _brand_signals:
+                    # Single strong signal: merchant name doesn't appear at all
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_BRAND_CONSISTENCY",
+                        severity="INFO",
+                        weight=0.05,
+                        message=f"Merchant '{_brand_merchant}' not found in document text",
+                        evidence={
+                            "merchant": _brand_merchant,
+                            "signals": _brand_signals,
+                            "merchant_in_header": False,
+                        },
+                        reason_text=(
+                            f"🏷️ Brand Note: Extracted merchant '{_brand_merchant}' "
+                            f"does not appear anywhere in the document OCR text."
+                        ),
+                    )
+        except Exception as e:
+            logger.warning(f"R_BRAND_CONSISTENCY check failed: {e}")
 
+    rule_laps.mark("GROUP_5G2_VLM_OCR")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5G2: VLM-vs-OCR Contradiction Detection
     # ---------------------------------------------------------------------------
     # If VLM and OCR extract wildly different merchants or totals, that's suspicious.
     # Legitimate receipts should be consistently readable by both engines.
-    try:
-        _vlm_ext_m3 = tf.get("vlm_extraction") or {}
-        _vlm_meta_m3 = tf.get("vlm_meta") or {}
-        if _vlm_meta_m3.get("success"):
-            _ocr_merchant_m3 = (tf.get("merchant_candidate") or "").strip().lower()
-            _vlm_merchant_m3 = str(_vlm_ext_m3.get("merchant_name") or "").strip().lower()
-            _ocr_total_m3 = tf.get("ocr_total_amount")  # original OCR total before VLM override
-            _vlm_total_m3 = _vlm_ext_m3.get("total")
+    if rule_ctx.should_run("GROUP_5G2_VLM_OCR"):
+        try:
+            _vlm_ext_m3 = tf.get("vlm_extraction") or {}
+            _vlm_meta_m3 = tf.get("vlm_meta") or {}
+            if _vlm_meta_m3.get("success"):
+                _ocr_merchant_m3 = (tf.get("merchant_candidate") or "").strip().lower()
+                _vlm_merchant_m3 = str(_vlm_ext_m3.get("merchant_name") or "").strip().lower()
+                _ocr_total_m3 = tf.get("ocr_total_amount")  # original OCR total before VLM override
+                _vlm_total_m3 = _vlm_ext_m3.get("total")
             
-            _contradiction_signals = []
+                _contradiction_signals = []
             
-            # Merchant contradiction: both present but completely different
-            if (_ocr_merchant_m3 and len(_ocr_merchant_m3) >= 3
-                and _vlm_merchant_m3 and len(_vlm_merchant_m3) >= 3):
-                _ocr_words = set(_ocr_merchant_m3.split())
-                _vlm_words = set(_vlm_merchant_m3.split())
-                _overlap = len(_ocr_words & _vlm_words)
-                if _overlap == 0 and len(_ocr_words) >= 1 and len(_vlm_words) >= 1:
-                    _contradiction_signals.append(
-                        f"merchant_mismatch: OCR='{_ocr_merchant_m3}' vs VLM='{_vlm_merchant_m3}'"
-                    )
+                # Merchant contradiction: both present but completely different
+                if (_ocr_merchant_m3 and len(_ocr_merchant_m3) >= 3
+                    and _vlm_merchant_m3 and len(_vlm_merchant_m3) >= 3):
+                    _ocr_words = set(_ocr_merchant_m3.split())
+                    _vlm_words = set(_vlm_merchant_m3.split())
+                    _overlap = len(_ocr_words & _vlm_words)
+                    if _overlap == 0 and len(_ocr_words) >= 1 and len(_vlm_words) >= 1:
+                        _contradiction_signals.append(
+                            f"merchant_mismatch: OCR='{_ocr_merchant_m3}' vs VLM='{_vlm_merchant_m3}'"
+                        )
             
-            # Total contradiction: both present but diverge >25%
-            if _ocr_total_m3 is not None and _vlm_total_m3 is not None:
-                try:
-                    _ocr_t = float(_ocr_total_m3)
-                    _vlm_t = float(_vlm_total_m3)
-                    if _ocr_t > 0 and _vlm_t > 0:
-                        _divergence = abs(_ocr_t - _vlm_t) / max(_ocr_t, _vlm_t)
-                        if _divergence > 0.25:
-                            _contradiction_signals.append(
-                                f"total_mismatch: OCR={_ocr_t:.2f} vs VLM={_vlm_t:.2f} ({_divergence:.0%} divergence)"
-                            )
-                except (ValueError, TypeError):
-                    pass
+                # Total contradiction: both present but diverge >25%
+                if _ocr_total_m3 is not None and _vlm_total_m3 is not None:
+                    try:
+                        _ocr_t = float(_ocr_total_m3)
+                        _vlm_t = float(_vlm_total_m3)
+                        if _ocr_t > 0 and _vlm_t > 0:
+                            _divergence = abs(_ocr_t - _vlm_t) / max(_ocr_t, _vlm_t)
+                            if _divergence > 0.25:
+                                _contradiction_signals.append(
+                                    f"total_mismatch: OCR={_ocr_t:.2f} vs VLM={_vlm_t:.2f} ({_divergence:.0%} divergence)"
+                                )
+                    except (ValueError, TypeError):
+                        pass
             
-            if _contradiction_signals:
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_VLM_OCR_CONTRADICTION",
-                    severity="WARNING",
-                    weight=0.08,
-                    message=f"VLM and OCR produced contradictory data: {'; '.join(_contradiction_signals)}",
-                    evidence={
-                        "contradictions": _contradiction_signals,
-                        "ocr_merchant": _ocr_merchant_m3,
-                        "vlm_merchant": _vlm_merchant_m3,
-                        "ocr_total": _ocr_total_m3,
-                        "vlm_total": _vlm_total_m3,
-                    },
-                    reason_text=(
-                        f"⚠️ OCR/VLM Contradiction: Two independent extraction engines produced "
-                        f"different results: {'; '.join(_contradiction_signals)}. This may indicate "
-                        f"the document has been altered — one engine reads the original data while "
-                        f"the other reads the modified version."
-                    ),
-                )
-    except Exception as e:
-        logger.warning(f"R_VLM_OCR_CONTRADICTION check failed: {e}")
+                if _contradiction_signals:
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_VLM_OCR_CONTRADICTION",
+                        severity="WARNING",
+                        weight=0.08,
+                        message=f"VLM and OCR produced contradictory data: {'; '.join(_contradiction_signals)}",
+                        evidence={
+                            "contradictions": _contradiction_signals,
+                            "ocr_merchant": _ocr_merchant_m3,
+                            "vlm_merchant": _vlm_merchant_m3,
+                            "ocr_total": _ocr_total_m3,
+                            "vlm_total": _vlm_total_m3,
+                        },
+                        reason_text=(
+                            f"⚠️ OCR/VLM Contradiction: Two independent extraction engines produced "
+                            f"different results: {'; '.join(_contradiction_signals)}. This may indicate "
+                            f"the document has been altered — one engine reads the original data while "
+                            f"the other reads the modified version."
+                        ),
+                    )
+        except Exception as e:
+            logger.warning(f"R_VLM_OCR_CONTRADICTION check failed: {e}")
 
+    rule_laps.mark("GROUP_5G3_CURRENCY")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5G3: Currency Symbol Consistency
     # ---------------------------------------------------------------------------
     # A legitimate receipt should have consistent currency. Multiple different
     # currency symbols (e.g., $ and ₹) on the same receipt is suspicious.
-    try:
-        _curr_symbols = tf.get("currency_symbols") or []
-        if len(_curr_symbols) >= 2:
-            # Normalize: group equivalent symbols (e.g., "$" and "USD" are the same)
-            _CURR_GROUPS = {
-                "USD": {"$", "usd", "us$"},
-                "EUR": {"€", "eur"},
-                "GBP": {"£", "gbp"},
-                "INR": {"₹", "inr", "rs", "rs."},
-                "JPY": {"¥", "jpy", "yen"},
-                "CAD": {"cad", "c$"},
-                "AED": {"aed", "د.إ"},
-                "SGD": {"sgd", "s$"},
-            }
-            _detected_groups = set()
-            for sym in _curr_symbols:
-                sym_lower = str(sym).lower().strip()
-                matched_group = None
-                for grp, variants in _CURR_GROUPS.items():
-                    if sym_lower in variants:
-                        matched_group = grp
-                        break
-                _detected_groups.add(matched_group or sym_lower)
+    if rule_ctx.should_run("GROUP_5G3_CURRENCY"):
+        try:
+            _curr_symbols = tf.get("currency_symbols") or []
+            if len(_curr_symbols) >= 2:
+                # Normalize: group equivalent symbols (e.g., "$" and "USD" are the same)
+                _CURR_GROUPS = {
+                    "USD": {"$", "usd", "us$"},
+                    "EUR": {"€", "eur"},
+                    "GBP": {"£", "gbp"},
+                    "INR": {"₹", "inr", "rs", "rs."},
+                    "JPY": {"¥", "jpy", "yen"},
+                    "CAD": {"cad", "c$"},
+                    "AED": {"aed", "د.إ"},
+                    "SGD": {"sgd", "s$"},
+                }
+                _detected_groups = set()
+                for sym in _curr_symbols:
+                    sym_lower = str(sym).lower().strip()
+                    matched_group = None
+                    for grp, variants in _CURR_GROUPS.items():
+                        if sym_lower in variants:
+                            matched_group = grp
+                            break
+                    _detected_groups.add(matched_group or sym_lower)
             
-            if len(_detected_groups) >= 2:
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_CURRENCY_INCONSISTENCY",
-                    severity="WARNING",
-                    weight=0.10,
-                    message=f"Multiple currencies detected: {', '.join(sorted(_detected_groups))}",
-                    evidence={
-                        "currency_symbols": _curr_symbols,
-                        "normalized_groups": sorted(_detected_groups),
-                    },
-                    reason_text=(
-                        f"💱 Currency Inconsistency: This receipt contains multiple currency "
-                        f"symbols ({', '.join(sorted(_detected_groups))}). Legitimate receipts "
-                        f"typically use a single currency."
-                    ),
-                )
-    except Exception as e:
-        logger.warning(f"R_CURRENCY_INCONSISTENCY check failed: {e}")
+                if len(_detected_groups) >= 2:
+                    score += emit_event(
+                        events=events,
+                        reasons=reasons,
+                        rule_id="R_CURRENCY_INCONSISTENCY",
+                        severity="WARNING",
+                        weight=0.10,
+                        message=f"Multiple currencies detected: {', '.join(sorted(_detected_groups))}",
+                        evidence={
+                            "currency_symbols": _curr_symbols,
+                            "normalized_groups": sorted(_detected_groups),
+                        },
+                        reason_text=(
+                            f"💱 Currency Inconsistency: This receipt contains multiple currency "
+                            f"symbols ({', '.join(sorted(_detected_groups))}). Legitimate receipts "
+                            f"typically use a single currency."
+                        ),
+                    )
+        except Exception as e:
+            logger.warning(f"R_CURRENCY_INCONSISTENCY check failed: {e}")
 
+    rule_laps.mark("GROUP_5H_TEMPLATE")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5H: Template Matching
     # ---------------------------------------------------------------------------
@@ -5261,68 +5545,70 @@ def _score_and_explain(
     # to be from a known chain but its structure doesn't match the expected
     # template, that's a fraud signal. Conversely, a strong template match
     # boosts confidence in legitimacy.
-    try:
-        _tmpl_merchant = (tf.get("merchant_candidate") or "").strip().lower()
-        _tmpl_lines = lf.get("lines", [])
-        if _tmpl_merchant and len(_tmpl_lines) >= 5:
-            from app.pipelines.templates.registry import get_registry
-            from app.pipelines.templates.matcher import TemplateMatcher
-
-            _registry = get_registry()
-            if _registry.count() > 0:
-                _matcher = TemplateMatcher(_registry.get_all())
-                _matches = _matcher.match(_tmpl_lines, top_k=3, min_confidence=0.3)
-
-                if _matches:
-                    _best = _matches[0]
-                    _best_name = _best.template.template_name.lower()
-                    _best_conf = _best.confidence
-
-                    # Check: Does claimed merchant match best template?
-                    _claimed_matches_template = (
-                        _tmpl_merchant in _best_name
-                        or _best_name in _tmpl_merchant
-                        or any(
-                            kw in _tmpl_merchant
-                            for kw in _best.template.merchant_keywords
-                            if len(kw) >= 3
+    if rule_ctx.should_run("GROUP_5H_TEMPLATE"):
+        try:
+            _tmpl_merchant = (tf.get("merchant_candidate") or "").strip().lower()
+            _tmpl_lines = lf.get("lines", [])
+            if _tmpl_merchant and len(_tmpl_lines) >= 5:
+                from app.pipelines.templates.registry import get_registry
+                from app.pipelines.templates.matcher import TemplateMatcher
+
+                _registry = get_registry()
+                if _registry.count() > 0:
+                    _matcher = TemplateMatcher(_registry.get_all())
+                    _matches = _matcher.match(_tmpl_lines, top_k=3, min_confidence=0.3)
+
+                    if _matches:
+                        _best = _matches[0]
+                        _best_name = _best.template.template_name.lower()
+                        _best_conf = _best.confidence
+
+                        # Check: Does claimed merchant match best template?
+                        _claimed_matches_template = (
+                            _tmpl_merchant in _best_name
+                            or _best_name in _tmpl_merchant
+                            or any(
+                                kw in _tmpl_merchant
+                                for kw in _best.template.merchant_keywords
+                                if len(kw) >= 3
+                            )
                         )
-                    )
 
-                    # Case 1: Receipt claims known chain but structure doesn't match
-                    _is_known_chain = any(
-                        kw in _tmpl_merchant
-                        for t in _registry.get_all()
-                        for kw in t.merchant_keywords
-                        if len(kw) >= 4
-                    )
-                    if _is_known_chain and not _claimed_matches_template and _best_conf < 0.5:
-                        score += emit_event(
-                            events=events,
-                            reasons=reasons,
-                            rule_id="R_TEMPLATE_MATCH",
-                            severity="WARNING",
-                            weight=0.08,
-                            message=f"Receipt claims '{tf.get('merchant_candidate')}' but structure doesn't match known template",
-                            evidence={
-                                "claimed_merchant": tf.get("merchant_candidate"),
-                                "best_template": _best.template.template_name,
-                                "best_confidence": round(_best_conf, 3),
-                                "match_details": {
-                                    k: round(v, 2) for k, v in _best.match_details.items()
-                                },
-                            },
-                            reason_text=(
-                                f"📋 Template Mismatch: Receipt claims to be from "
-                                f"'{tf.get('merchant_candidate')}' but its structural "
-                                f"fingerprint best matches '{_best.template.template_name}' "
-                                f"(confidence: {_best_conf:.0%}). Known chains produce "
-                                f"consistent receipt formats."
-                            ),
+                        # Case 1: Receipt claims known chain but structure doesn't match
+                        _is_known_chain = any(
+                            kw in _tmpl_merchant
+                            for t in _registry.get_all()
+                            for kw in t.merchant_keywords
+                            if len(kw) >= 4
                         )
-    except Exception as e:
-        logger.warning(f"R_TEMPLATE_MATCH check failed: {e}")
+                        if _is_known_chain and not _claimed_matches_template and _best_conf < 0.5:
+                            score += emit_event(
+                                events=events,
+                                reasons=reasons,
+                                rule_id="R_TEMPLATE_MATCH",
+                                severity="WARNING",
+                                weight=0.08,
+                                message=f"Receipt claims '{tf.get('merchant_candidate')}' but structure doesn't match known template",
+                                evidence={
+                                    "claimed_merchant": tf.get("merchant_candidate"),
+                                    "best_template": _best.template.template_name,
+                                    "best_confidence": round(_best_conf, 3),
+                                    "match_details": {
+                                        k: round(v, 2) for k, v in _best.match_details.items()
+                                    },
+                                },
+                                reason_text=(
+                                    f"📋 Template Mismatch: Receipt claims to be from "
+                                    f"'{tf.get('merchant_candidate')}' but its structural "
+                                    f"fingerprint best matches '{_best.template.template_name}' "
+                                    f"(confidence: {_best_conf:.0%}). Known chains produce "
+                                    f"consistent receipt formats."
+                                ),
+                            )
+        except Exception as e:
+            logger.warning(f"R_TEMPLATE_MATCH check failed: {e}")
 
+    rule_laps.mark("GROUP_5F_TAX")
     # ---------------------------------------------------------------------------
     # RULE GROUP 5F: Tax Component Verification (multi-geo)
     # ---------------------------------------------------------------------------
@@ -5337,815 +5623,825 @@ def _score_and_explain(
     #   EU/UK:       VAT components should sum to total tax
     #   Gulf (AE/SA/OM/BH): Single VAT — component should equal total tax
     #   General:     If multiple tax lines detected, they should sum to total tax
-    try:
-        _tax_val = _normalize_amount_str(tf.get("tax_amount"))
-        _subtotal_val = _normalize_amount_str(tf.get("subtotal"))
-        _total_val = _normalize_amount_str(tf.get("total_amount"))
-        _geo = tf.get("geo_country_guess", "").upper()
-
-        # --- India GST Component Verification ---
-        _has_cgst = tf.get("has_cgst", False)
-        _has_sgst = tf.get("has_sgst", False)
-        _has_igst = tf.get("has_igst", False)
-        _cgst_amt = _normalize_amount_str(tf.get("cgst_amount"))
-        _sgst_amt = _normalize_amount_str(tf.get("sgst_amount"))
-        _igst_amt = _normalize_amount_str(tf.get("igst_amount"))
-        _cess_amt = _normalize_amount_str(tf.get("cess_amount"))
-        _is_indian = tf.get("is_indian_receipt", False)
-
-        if _is_indian or _geo == "IN":
-            # Check 1: CGST should equal SGST (intra-state supply)
-            if (_cgst_amt is not None and _cgst_amt > 0
-                    and _sgst_amt is not None and _sgst_amt > 0):
-                _cgst_sgst_diff = abs(_cgst_amt - _sgst_amt)
-                # Allow ₹0.50 tolerance for rounding
-                if _cgst_sgst_diff > max(0.50, _cgst_amt * 0.02):
+    if rule_ctx.should_run("GROUP_5F_TAX"):
+        _tax_inputs = rule_ctx.inputs("GROUP_5F_TAX")
+        try:
+            _tax_val = _normalize_amount_str(tf.get("tax_amount"))
+            _subtotal_val = _normalize_amount_str(tf.get("subtotal"))
+            _total_val = _normalize_amount_str(tf.get("total_amount"))
+            _geo = tf.get("geo_country_guess", "").upper()
+
+            # --- India GST Component Verification ---
+            _has_cgst = tf.get("has_cgst", False)
+            _has_sgst = tf.get("has_sgst", False)
+            _has_igst = tf.get("has_igst", False)
+            _cgst_amt = _normalize_amount_str(tf.get("cgst_amount"))
+            _sgst_amt = _normalize_amount_str(tf.get("sgst_amount"))
+            _igst_amt = _normalize_amount_str(tf.get("igst_amount"))
+            _cess_amt = _normalize_amount_str(tf.get("cess_amount"))
+            _is_indian = tf.get("is_indian_receipt", False)
+
+            if _is_indian or _geo == "IN":
+                # Check 1: CGST should equal SGST (intra-state supply)
+                if (_cgst_amt is not None and _cgst_amt > 0
+                        and _sgst_amt is not None and _sgst_amt > 0):
+                    _cgst_sgst_diff = abs(_cgst_amt - _sgst_amt)
+                    # Allow ₹0.50 tolerance for rounding
+                    if _cgst_sgst_diff > max(0.50, _cgst_amt * 0.02):
+                        score += emit_event(
+                            events=events,
+                            reasons=reasons,
+                            rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                            severity="CRITICAL",
+                            weight=0.18,
+                            message=f"CGST ({_cgst_amt}) ≠ SGST ({_sgst_amt}) — must be equal for intra-state",
+                            evidence={
+                                "regime": "IN_GST",
+                                "check": "cgst_equals_sgst",
+                                "cgst_amount": _cgst_amt,
+                                "sgst_amount": _sgst_amt,
+                                "difference": round(_cgst_sgst_diff, 2),
+                                "geo_country": _geo,
+                            },
+                            reason_text=(
+                                f"💰 Tax Math Error (India GST): CGST ₹{_cgst_amt:.2f} ≠ "
+                                f"SGST ₹{_sgst_amt:.2f}. For intra-state supply, CGST and "
+                                f"SGST must be equal. Difference: ₹{_cgst_sgst_diff:.2f}."
+                            ),
+                        )
+
+                # Check 2: CGST + SGST (+ CESS) should sum to total tax
+                _component_sum = 0.0
+                _components_present = []
+                if _cgst_amt is not None and _cgst_amt > 0:
+                    _component_sum += _cgst_amt
+                    _components_present.append(f"CGST={_cgst_amt}")
+                if _sgst_amt is not None and _sgst_amt > 0:
+                    _component_sum += _sgst_amt
+                    _components_present.append(f"SGST={_sgst_amt}")
+                if _igst_amt is not None and _igst_amt > 0:
+                    _component_sum += _igst_amt
+                    _components_present.append(f"IGST={_igst_amt}")
+                if _cess_amt is not None and _cess_amt > 0:
+                    _component_sum += _cess_amt
+                    _components_present.append(f"CESS={_cess_amt}")
+
+                if _component_sum > 0 and _tax_val is not None and _tax_val > 0:
+                    _tax_diff = abs(_component_sum - _tax_val)
+                    # Allow 2% tolerance or ₹1.00 for rounding
+                    _tolerance = max(1.0, _tax_val * 0.02)
+                    if _tax_diff > _tolerance:
+                        score += emit_event(
+                            events=events,
+                            reasons=reasons,
+                            rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                            severity="WARNING",
+                            weight=0.12,
+                            message=f"Tax components ({_component_sum:.2f}) ≠ total tax ({_tax_val:.2f})",
+                            evidence={
+                                "regime": "IN_GST",
+                                "check": "components_sum_to_total",
+                                "component_sum": round(_component_sum, 2),
+                                "total_tax": _tax_val,
+                                "difference": round(_tax_diff, 2),
+                                "components": _components_present,
+                                "geo_country": _geo,
+                            },
+                            reason_text=(
+                                f"💰 Tax Sum Mismatch (India GST): Components "
+                                f"({' + '.join(_components_present)} = ₹{_component_sum:.2f}) "
+                                f"≠ total tax ₹{_tax_val:.2f}. "
+                                f"Difference: ₹{_tax_diff:.2f}."
+                            ),
+                        )
+
+                # Check 3: CGST+SGST and IGST should not both be present
+                # (one is intra-state, the other inter-state — mutually exclusive)
+                if ((_has_cgst or _has_sgst) and _has_igst
+                        and _cgst_amt and _cgst_amt > 0
+                        and _igst_amt and _igst_amt > 0):
                     score += emit_event(
                         events=events,
                         reasons=reasons,
                         rule_id="R7D_TAX_COMPONENT_VERIFICATION",
                         severity="CRITICAL",
-                        weight=0.18,
-                        message=f"CGST ({_cgst_amt}) ≠ SGST ({_sgst_amt}) — must be equal for intra-state",
+                        weight=0.20,
+                        message="Both CGST/SGST and IGST present — mutually exclusive",
                         evidence={
                             "regime": "IN_GST",
-                            "check": "cgst_equals_sgst",
+                            "check": "mutual_exclusion",
+                            "has_cgst_sgst": True,
+                            "has_igst": True,
                             "cgst_amount": _cgst_amt,
                             "sgst_amount": _sgst_amt,
-                            "difference": round(_cgst_sgst_diff, 2),
+                            "igst_amount": _igst_amt,
                             "geo_country": _geo,
                         },
                         reason_text=(
-                            f"💰 Tax Math Error (India GST): CGST ₹{_cgst_amt:.2f} ≠ "
-                            f"SGST ₹{_sgst_amt:.2f}. For intra-state supply, CGST and "
-                            f"SGST must be equal. Difference: ₹{_cgst_sgst_diff:.2f}."
+                            f"💰 Tax Logic Error (India GST): Both CGST/SGST "
+                            f"(intra-state) and IGST (inter-state) are present. "
+                            f"These are mutually exclusive — a transaction is either "
+                            f"intra-state or inter-state, never both."
                         ),
                     )
 
-            # Check 2: CGST + SGST (+ CESS) should sum to total tax
-            _component_sum = 0.0
-            _components_present = []
-            if _cgst_amt is not None and _cgst_amt > 0:
-                _component_sum += _cgst_amt
-                _components_present.append(f"CGST={_cgst_amt}")
-            if _sgst_amt is not None and _sgst_amt > 0:
-                _component_sum += _sgst_amt
-                _components_present.append(f"SGST={_sgst_amt}")
-            if _igst_amt is not None and _igst_amt > 0:
-                _component_sum += _igst_amt
-                _components_present.append(f"IGST={_igst_amt}")
-            if _cess_amt is not None and _cess_amt > 0:
-                _component_sum += _cess_amt
-                _components_present.append(f"CESS={_cess_amt}")
-
-            if _component_sum > 0 and _tax_val is not None and _tax_val > 0:
-                _tax_diff = abs(_component_sum - _tax_val)
-                # Allow 2% tolerance or ₹1.00 for rounding
-                _tolerance = max(1.0, _tax_val * 0.02)
-                if _tax_diff > _tolerance:
-                    score += emit_event(
-                        events=events,
-                        reasons=reasons,
-                        rule_id="R7D_TAX_COMPONENT_VERIFICATION",
-                        severity="WARNING",
-                        weight=0.12,
-                        message=f"Tax components ({_component_sum:.2f}) ≠ total tax ({_tax_val:.2f})",
-                        evidence={
-                            "regime": "IN_GST",
-                            "check": "components_sum_to_total",
-                            "component_sum": round(_component_sum, 2),
-                            "total_tax": _tax_val,
-                            "difference": round(_tax_diff, 2),
-                            "components": _components_present,
-                            "geo_country": _geo,
-                        },
-                        reason_text=(
-                            f"💰 Tax Sum Mismatch (India GST): Components "
-                            f"({' + '.join(_components_present)} = ₹{_component_sum:.2f}) "
-                            f"≠ total tax ₹{_tax_val:.2f}. "
-                            f"Difference: ₹{_tax_diff:.2f}."
-                        ),
-                    )
+                # Check 4: Verify tax rate is a valid GST slab
+                # Valid Indian GST rates: 0%, 5%, 12%, 18%, 28% (half-rate for CGST/SGST)
+                if _subtotal_val and _subtotal_val > 0 and _component_sum > 0:
+                    _effective_rate = round((_component_sum / _subtotal_val) * 100, 1)
+                    _VALID_GST_SLABS = [0, 5, 12, 18, 28]
+                    _closest_slab = min(_VALID_GST_SLABS, key=lambda s: abs(s - _effective_rate))
+                    _slab_diff = abs(_effective_rate - _closest_slab)
+                    if _slab_diff > 2.0:  # More than 2% away from any valid slab
+                        score += emit_event(
+                            events=events,
+                            reasons=reasons,
+                            rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                            severity="INFO",
+                            weight=0.06,
+                            message=f"Effective GST rate {_effective_rate:.1f}% not near any standard slab",
+                            evidence={
+                                "regime": "IN_GST",
+                                "check": "valid_slab",
+                                "effective_rate_pct": _effective_rate,
+                                "closest_slab": _closest_slab,
+                                "slab_difference": round(_slab_diff, 1),
+                                "valid_slabs": _VALID_GST_SLABS,
+                                "geo_country": _geo,
+                            },
+                            reason_text=(
+                                f"💰 Non-Standard GST Rate: Effective rate {_effective_rate:.1f}% "
+                                f"is not near any standard Indian GST slab "
+                                f"({', '.join(str(s) + '%' for s in _VALID_GST_SLABS)}). "
+                                f"Closest: {_closest_slab}%."
+                            ),
+                        )
 
-            # Check 3: CGST+SGST and IGST should not both be present
-            # (one is intra-state, the other inter-state — mutually exclusive)
-            if ((_has_cgst or _has_sgst) and _has_igst
-                    and _cgst_amt and _cgst_amt > 0
-                    and _igst_amt and _igst_amt > 0):
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R7D_TAX_COMPONENT_VERIFICATION",
-                    severity="CRITICAL",
-                    weight=0.20,
-                    message="Both CGST/SGST and IGST present — mutually exclusive",
-                    evidence={
-                        "regime": "IN_GST",
-                        "check": "mutual_exclusion",
-                        "has_cgst_sgst": True,
-                        "has_igst": True,
-                        "cgst_amount": _cgst_amt,
-                        "sgst_amount": _sgst_amt,
-                        "igst_amount": _igst_amt,
-                        "geo_country": _geo,
-                    },
-                    reason_text=(
-                        f"💰 Tax Logic Error (India GST): Both CGST/SGST "
-                        f"(intra-state) and IGST (inter-state) are present. "
-                        f"These are mutually exclusive — a transaction is either "
-                        f"intra-state or inter-state, never both."
-                    ),
+            # --- Canada GST/HST/PST Verification ---
+            elif _geo == "CA":
+                _ca_gst = None
+                _ca_pst = None
+                _ca_hst = None
+                _ft_lower_ca = _tax_inputs["full_text_lower"]
+                _ca_lines = lf.get("lines", []) or (_ft_lower_ca.split("\n") if _ft_lower_ca else [])
+                for _cl in _ca_lines:
+                    _cll = _cl.lower().strip()
+                    if re.search(r"\bgst\b", _cll) and not re.search(r"\bhst\b", _cll):
+                        _m = re.search(r"[\d,]+\.\d{2}", _cl)
+                        if _m:
+                            _ca_gst = _normalize_amount_str(_m.group(0))
+                    elif re.search(r"\bpst\b|\bqst\b|\brst\b", _cll):
+                        _m = re.search(r"[\d,]+\.\d{2}", _cl)
+                        if _m:
+                            _ca_pst = _normalize_amount_str(_m.group(0))
+                    elif re.search(r"\bhst\b", _cll):
+                        _m = re.search(r"[\d,]+\.\d{2}", _cl)
+                        if _m:
+                            _ca_hst = _normalize_amount_str(_m.group(0))
+
+                # If GST + PST both present, they should sum to total tax
+                if (_ca_gst is not None and _ca_gst > 0
+                        and _ca_pst is not None and _ca_pst > 0
+                        and _tax_val is not None and _tax_val > 0):
+                    _ca_sum = _ca_gst + _ca_pst
+                    _ca_diff = abs(_ca_sum - _tax_val)
+                    if _ca_diff > max(0.50, _tax_val * 0.03):
+                        score += emit_event(
+                            events=events,
+                            reasons=reasons,
+                            rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                            severity="WARNING",
+                            weight=0.12,
+                            message=f"GST ({_ca_gst:.2f}) + PST ({_ca_pst:.2f}) ≠ total tax ({_tax_val:.2f})",
+                            evidence={
+                                "regime": "CA_GST_PST",
+                                "check": "components_sum_to_total",
+                                "gst_amount": _ca_gst,
+                                "pst_amount": _ca_pst,
+                                "component_sum": round(_ca_sum, 2),
+                                "total_tax": _tax_val,
+                                "difference": round(_ca_diff, 2),
+                                "geo_country": "CA",
+                            },
+                            reason_text=(
+                                f"💰 Tax Sum Mismatch (Canada): GST ${_ca_gst:.2f} + "
+                                f"PST ${_ca_pst:.2f} = ${_ca_sum:.2f} ≠ total tax "
+                                f"${_tax_val:.2f}. Difference: ${_ca_diff:.2f}."
+                            ),
+                        )
+
+            # --- EU/UK VAT Component Verification ---
+            # EU countries commonly show multiple VAT rates on a single receipt
+            # (e.g. Germany: 7% reduced + 19% standard). Each must be from the
+            # country's valid set, and they must sum to total tax.
+            elif _geo in ("GB", "DE", "FR", "IT", "ES", "NL", "BE", "AT", "PT",
+                           "IE", "SE", "DK", "FI", "NO", "PL", "CZ", "GR", "HU",
+                           "RO", "CH"):
+                # Valid VAT rate sets per country (standard + reduced + zero)
+                _EU_VAT_RATES = {
+                    "GB": [0, 5, 20],
+                    "DE": [0, 7, 19],
+                    "FR": [0, 2.1, 5.5, 10, 20],
+                    "IT": [0, 4, 5, 10, 22],
+                    "ES": [0, 4, 10, 21],
+                    "NL": [0, 9, 21],
+                    "BE": [0, 6, 12, 21],
+                    "AT": [0, 10, 13, 20],
+                    "PT": [0, 6, 13, 23],
+                    "IE": [0, 9, 13.5, 23],
+                    "SE": [0, 6, 12, 25],
+                    "DK": [0, 25],
+                    "FI": [0, 10, 14, 24],
+                    "NO": [0, 12, 15, 25],
+                    "PL": [0, 5, 8, 23],
+                    "CZ": [0, 12, 21],
+                    "GR": [0, 6, 13, 24],
+                    "HU": [0, 5, 18, 27],
+                    "RO": [0, 5, 9, 19],
+                    "CH": [0, 2.5, 3.7, 7.7],  # Not EU but often grouped
+                }
+                _valid_rates = _EU_VAT_RATES.get(_geo, [])
+
+                # Extract VAT component lines: "VAT 19%: €5.70" or "MwSt 7%  2.10"
+                _vat_line_re = re.compile(
+                    r"\b(?:vat|mwst|tva|iva|btw|moms|alv|ust|fpa|afa|áfa|dph)"
+                    r"\s*(?:@\s*)?(\d+(?:[.,]\d+)?)\s*%"
+                    r".*?([\d,]+[.,]\d{2})",
+                    re.IGNORECASE,
                 )
+                _eu_components = []
+                _eu_ocr_lines = lf.get("lines", []) or []
+                for _el in _eu_ocr_lines:
+                    _em = _vat_line_re.search(_el)
+                    if _em:
+                        _rate_str = _em.group(1).replace(",", ".")
+                        _amt_val = _normalize_amount_str(_em.group(2))
+                        try:
+                            _rate_val = float(_rate_str)
+                        except (ValueError, TypeError):
+                            continue
+                        if _amt_val is not None and _amt_val > 0:
+                            _eu_components.append((_rate_val, _amt_val))
+
+                # Check 1: Each extracted VAT rate should be from the valid set
+                if _eu_components and _valid_rates:
+                    for _rate, _amt in _eu_components:
+                        _closest = min(_valid_rates, key=lambda r: abs(r - _rate))
+                        if abs(_rate - _closest) > 1.0:
+                            score += emit_event(
+                                events=events,
+                                reasons=reasons,
+                                rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                                severity="WARNING",
+                                weight=0.10,
+                                message=f"VAT rate {_rate}% is not valid for {_geo}",
+                                evidence={
+                                    "regime": "EU_VAT",
+                                    "check": "valid_vat_rate",
+                                    "detected_rate": _rate,
+                                    "valid_rates": _valid_rates,
+                                    "closest_valid": _closest,
+                                    "geo_country": _geo,
+                                },
+                                reason_text=(
+                                    f"💰 Invalid VAT Rate ({_geo}): {_rate}% is not a valid "
+                                    f"VAT rate. Valid rates: "
+                                    f"{', '.join(str(r) + '%' for r in _valid_rates)}."
+                                ),
+                            )
+                            break  # One invalid rate is enough
+
+                # Check 2: VAT components should sum to total tax
+                if len(_eu_components) >= 2 and _tax_val is not None and _tax_val > 0:
+                    _eu_sum = sum(a for _, a in _eu_components)
+                    _eu_diff = abs(_eu_sum - _tax_val)
+                    if _eu_diff > max(0.50, _tax_val * 0.03):
+                        _eu_desc = [f"{r}%={a:.2f}" for r, a in _eu_components]
+                        score += emit_event(
+                            events=events,
+                            reasons=reasons,
+                            rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                            severity="WARNING",
+                            weight=0.12,
+                            message=f"VAT components ({_eu_sum:.2f}) ≠ total tax ({_tax_val:.2f})",
+                            evidence={
+                                "regime": "EU_VAT",
+                                "check": "components_sum_to_total",
+                                "components": _eu_desc,
+                                "component_sum": round(_eu_sum, 2),
+                                "total_tax": _tax_val,
+                                "difference": round(_eu_diff, 2),
+                                "geo_country": _geo,
+                            },
+                            reason_text=(
+                                f"💰 VAT Sum Mismatch ({_geo}): Components "
+                                f"({' + '.join(_eu_desc)} = {_eu_sum:.2f}) ≠ total tax "
+                                f"{_tax_val:.2f}. Difference: {_eu_diff:.2f}."
+                            ),
+                        )
 
-            # Check 4: Verify tax rate is a valid GST slab
-            # Valid Indian GST rates: 0%, 5%, 12%, 18%, 28% (half-rate for CGST/SGST)
-            if _subtotal_val and _subtotal_val > 0 and _component_sum > 0:
-                _effective_rate = round((_component_sum / _subtotal_val) * 100, 1)
-                _VALID_GST_SLABS = [0, 5, 12, 18, 28]
-                _closest_slab = min(_VALID_GST_SLABS, key=lambda s: abs(s - _effective_rate))
-                _slab_diff = abs(_effective_rate - _closest_slab)
-                if _slab_diff > 2.0:  # More than 2% away from any valid slab
-                    score += emit_event(
-                        events=events,
-                        reasons=reasons,
-                        rule_id="R7D_TAX_COMPONENT_VERIFICATION",
-                        severity="INFO",
-                        weight=0.06,
-                        message=f"Effective GST rate {_effective_rate:.1f}% not near any standard slab",
-                        evidence={
-                            "regime": "IN_GST",
-                            "check": "valid_slab",
-                            "effective_rate_pct": _effective_rate,
-                            "closest_slab": _closest_slab,
-                            "slab_difference": round(_slab_diff, 1),
-                            "valid_slabs": _VALID_GST_SLABS,
-                            "geo_country": _geo,
-                        },
-                        reason_text=(
-                            f"💰 Non-Standard GST Rate: Effective rate {_effective_rate:.1f}% "
-                            f"is not near any standard Indian GST slab "
-                            f"({', '.join(str(s) + '%' for s in _VALID_GST_SLABS)}). "
-                            f"Closest: {_closest_slab}%."
-                        ),
-                    )
+            # --- Gulf VAT Verification (AE/SA/OM/BH/QA/KW) ---
+            # Single-rate VAT regimes: verify tax = rate% × base
+            elif _geo in ("AE", "SA", "OM", "BH", "QA", "KW"):
+                _GULF_VAT_RATES = {
+                    "AE": 5.0, "SA": 15.0, "OM": 5.0, "BH": 10.0,
+                    "QA": 0.0, "KW": 0.0,
+                }
+                _expected_rate = _GULF_VAT_RATES.get(_geo, 0.0)
+                _base = _subtotal_val
+                if _base is None and _total_val is not None and _tax_val is not None:
+                    _base = _total_val - _tax_val
+
+                if (_expected_rate > 0 and _tax_val is not None and _tax_val > 0
+                        and _base is not None and _base > 0):
+                    _expected_tax = round(_base * _expected_rate / 100.0, 2)
+                    _gulf_diff = abs(_tax_val - _expected_tax)
+                    # Tolerance: 2% of expected or 0.50, whichever is larger
+                    _gulf_tol = max(0.50, _expected_tax * 0.02)
+                    if _gulf_diff > _gulf_tol:
+                        score += emit_event(
+                            events=events,
+                            reasons=reasons,
+                            rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                            severity="WARNING",
+                            weight=0.12,
+                            message=f"VAT {_expected_rate}% × base {_base:.2f} = {_expected_tax:.2f}, but tax shows {_tax_val:.2f}",
+                            evidence={
+                                "regime": "GULF_VAT",
+                                "check": "rate_times_base",
+                                "expected_rate": _expected_rate,
+                                "base_amount": round(_base, 2),
+                                "expected_tax": _expected_tax,
+                                "actual_tax": _tax_val,
+                                "difference": round(_gulf_diff, 2),
+                                "geo_country": _geo,
+                            },
+                            reason_text=(
+                                f"💰 VAT Math Error ({_geo}): {_expected_rate}% × "
+                                f"base {_base:.2f} = {_expected_tax:.2f}, but receipt "
+                                f"shows tax {_tax_val:.2f}. Difference: {_gulf_diff:.2f}."
+                            ),
+                        )
 
-        # --- Canada GST/HST/PST Verification ---
-        elif _geo == "CA":
-            _ca_gst = None
-            _ca_pst = None
-            _ca_hst = None
-            _ca_lines = lf.get("lines", []) or (_full_text_lower.split("\n") if _full_text_lower else [])
-            for _cl in _ca_lines:
-                _cll = _cl.lower().strip()
-                if re.search(r"\bgst\b", _cll) and not re.search(r"\bhst\b", _cll):
-                    _m = re.search(r"[\d,]+\.\d{2}", _cl)
-                    if _m:
-                        _ca_gst = _normalize_amount_str(_m.group(0))
-                elif re.search(r"\bpst\b|\bqst\b|\brst\b", _cll):
-                    _m = re.search(r"[\d,]+\.\d{2}", _cl)
-                    if _m:
-                        _ca_pst = _normalize_amount_str(_m.group(0))
-                elif re.search(r"\bhst\b", _cll):
-                    _m = re.search(r"[\d,]+\.\d{2}", _cl)
-                    if _m:
-                        _ca_hst = _normalize_amount_str(_m.group(0))
-
-            # If GST + PST both present, they should sum to total tax
-            if (_ca_gst is not None and _ca_gst > 0
-                    and _ca_pst is not None and _ca_pst > 0
-                    and _tax_val is not None and _tax_val > 0):
-                _ca_sum = _ca_gst + _ca_pst
-                _ca_diff = abs(_ca_sum - _tax_val)
-                if _ca_diff > max(0.50, _tax_val * 0.03):
-                    score += emit_event(
-                        events=events,
-                        reasons=reasons,
-                        rule_id="R7D_TAX_COMPONENT_VERIFICATION",
-                        severity="WARNING",
-                        weight=0.12,
-                        message=f"GST ({_ca_gst:.2f}) + PST ({_ca_pst:.2f}) ≠ total tax ({_tax_val:.2f})",
-                        evidence={
-                            "regime": "CA_GST_PST",
-                            "check": "components_sum_to_total",
-                            "gst_amount": _ca_gst,
-                            "pst_amount": _ca_pst,
-                            "component_sum": round(_ca_sum, 2),
-                            "total_tax": _tax_val,
-                            "difference": round(_ca_diff, 2),
-                            "geo_country": "CA",
-                        },
-                        reason_text=(
-                            f"💰 Tax Sum Mismatch (Canada): GST ${_ca_gst:.2f} + "
-                            f"PST ${_ca_pst:.2f} = ${_ca_sum:.2f} ≠ total tax "
-                            f"${_tax_val:.2f}. Difference: ${_ca_diff:.2f}."
-                        ),
-                    )
+            # --- Australia GST Verification ---
+            # GST is exactly 10%; verify tax = 10% × base
+            elif _geo == "AU":
+                _base = _subtotal_val
+                if _base is None and _total_val is not None and _tax_val is not None:
+                    _base = _total_val - _tax_val
+                if (_tax_val is not None and _tax_val > 0
+                        and _base is not None and _base > 0):
+                    _au_expected = round(_base * 0.10, 2)
+                    _au_diff = abs(_tax_val - _au_expected)
+                    if _au_diff > max(0.50, _au_expected * 0.02):
+                        score += emit_event(
+                            events=events,
+                            reasons=reasons,
+                            rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                            severity="WARNING",
+                            weight=0.10,
+                            message=f"GST 10% × base {_base:.2f} = {_au_expected:.2f}, but tax shows {_tax_val:.2f}",
+                            evidence={
+                                "regime": "AU_GST",
+                                "check": "rate_times_base",
+                                "expected_rate": 10.0,
+                                "base_amount": round(_base, 2),
+                                "expected_tax": _au_expected,
+                                "actual_tax": _tax_val,
+                                "difference": round(_au_diff, 2),
+                                "geo_country": "AU",
+                            },
+                            reason_text=(
+                                f"💰 GST Math Error (Australia): 10% × base "
+                                f"${_base:.2f} = ${_au_expected:.2f}, but receipt shows "
+                                f"tax ${_tax_val:.2f}. Difference: ${_au_diff:.2f}."
+                            ),
+                        )
 
-        # --- EU/UK VAT Component Verification ---
-        # EU countries commonly show multiple VAT rates on a single receipt
-        # (e.g. Germany: 7% reduced + 19% standard). Each must be from the
-        # country's valid set, and they must sum to total tax.
-        elif _geo in ("GB", "DE", "FR", "IT", "ES", "NL", "BE", "AT", "PT",
-                       "IE", "SE", "DK", "FI", "NO", "PL", "CZ", "GR", "HU",
-                       "RO", "CH"):
-            # Valid VAT rate sets per country (standard + reduced + zero)
-            _EU_VAT_RATES = {
-                "GB": [0, 5, 20],
-                "DE": [0, 7, 19],
-                "FR": [0, 2.1, 5.5, 10, 20],
-                "IT": [0, 4, 5, 10, 22],
-                "ES": [0, 4, 10, 21],
-                "NL": [0, 9, 21],
-                "BE": [0, 6, 12, 21],
-                "AT": [0, 10, 13, 20],
-                "PT": [0, 6, 13, 23],
-                "IE": [0, 9, 13.5, 23],
-                "SE": [0, 6, 12, 25],
-                "DK": [0, 25],
-                "FI": [0, 10, 14, 24],
-                "NO": [0, 12, 15, 25],
-                "PL": [0, 5, 8, 23],
-                "CZ": [0, 12, 21],
-                "GR": [0, 6, 13, 24],
-                "HU": [0, 5, 18, 27],
-                "RO": [0, 5, 9, 19],
-                "CH": [0, 2.5, 3.7, 7.7],  # Not EU but often grouped
-            }
-            _valid_rates = _EU_VAT_RATES.get(_geo, [])
+            # --- US Multi-Component Tax Verification ---
+            # US can have state + county + city taxes
+            elif _geo == "US":
+                _us_lines = lf.get("lines", []) or []
+                _us_tax_re = re.compile(
+                    r"\b(state\s+tax|county\s+tax|city\s+tax|local\s+tax"
+                    r"|sales\s+tax|tax)\b.*?([\d,]+[.,]\d{2})",
+                    re.IGNORECASE,
+                )
+                _us_components = []
+                for _ul in _us_lines:
+                    _um = _us_tax_re.search(_ul)
+                    if _um:
+                        _uv = _normalize_amount_str(_um.group(2))
+                        if _uv is not None and _uv > 0:
+                            _us_components.append((_um.group(1).strip(), _uv))
+
+                if len(_us_components) >= 2 and _tax_val is not None and _tax_val > 0:
+                    _us_sum = sum(v for _, v in _us_components)
+                    _us_diff = abs(_us_sum - _tax_val)
+                    if _us_diff > max(0.50, _tax_val * 0.03):
+                        _us_desc = [f"{n}={v:.2f}" for n, v in _us_components]
+                        score += emit_event(
+                            events=events,
+                            reasons=reasons,
+                            rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                            severity="WARNING",
+                            weight=0.10,
+                            message=f"Tax components ({_us_sum:.2f}) ≠ total tax ({_tax_val:.2f})",
+                            evidence={
+                                "regime": "US_SALES_TAX",
+                                "check": "components_sum_to_total",
+                                "components": _us_desc,
+                                "component_sum": round(_us_sum, 2),
+                                "total_tax": _tax_val,
+                                "difference": round(_us_diff, 2),
+                                "geo_country": "US",
+                            },
+                            reason_text=(
+                                f"💰 Tax Sum Mismatch (US): Components "
+                                f"({' + '.join(_us_desc)} = ${_us_sum:.2f}) ≠ total tax "
+                                f"${_tax_val:.2f}. Difference: ${_us_diff:.2f}."
+                            ),
+                        )
 
-            # Extract VAT component lines: "VAT 19%: €5.70" or "MwSt 7%  2.10"
-            _vat_line_re = re.compile(
-                r"\b(?:vat|mwst|tva|iva|btw|moms|alv|ust|fpa|afa|áfa|dph)"
-                r"\s*(?:@\s*)?(\d+(?:[.,]\d+)?)\s*%"
-                r".*?([\d,]+[.,]\d{2})",
-                re.IGNORECASE,
-            )
-            _eu_components = []
-            _eu_ocr_lines = lf.get("lines", []) or []
-            for _el in _eu_ocr_lines:
-                _em = _vat_line_re.search(_el)
-                if _em:
-                    _rate_str = _em.group(1).replace(",", ".")
-                    _amt_val = _normalize_amount_str(_em.group(2))
-                    try:
-                        _rate_val = float(_rate_str)
-                    except (ValueError, TypeError):
-                        continue
-                    if _amt_val is not None and _amt_val > 0:
-                        _eu_components.append((_rate_val, _amt_val))
-
-            # Check 1: Each extracted VAT rate should be from the valid set
-            if _eu_components and _valid_rates:
-                for _rate, _amt in _eu_components:
-                    _closest = min(_valid_rates, key=lambda r: abs(r - _rate))
-                    if abs(_rate - _closest) > 1.0:
+            # --- General: Multi-line tax component sum verification ---
+            # Fallback for any geo not handled above
+            elif _tax_val is not None and _tax_val > 0:
+                _gen_tax_lines = lf.get("lines", []) or []
+                _gen_components = []
+                _TAX_LINE_RE = re.compile(
+                    r"\b(vat|tax|hst|gst|pst|qst|service\s+tax|sales\s+tax|excise)"
+                    r"\b.*?([\d,]+\.\d{2})",
+                    re.IGNORECASE,
+                )
+                for _gl in _gen_tax_lines:
+                    _gm = _TAX_LINE_RE.search(_gl)
+                    if _gm:
+                        _gv = _normalize_amount_str(_gm.group(2))
+                        if _gv is not None and _gv > 0:
+                            _gen_components.append((_gm.group(1).strip(), _gv))
+
+                if len(_gen_components) >= 2:
+                    _gen_sum = sum(v for _, v in _gen_components)
+                    _gen_diff = abs(_gen_sum - _tax_val)
+                    _gen_tol = max(1.0, _tax_val * 0.03)
+                    if _gen_diff > _gen_tol:
+                        _comp_desc = [f"{n}={v:.2f}" for n, v in _gen_components]
                         score += emit_event(
                             events=events,
                             reasons=reasons,
                             rule_id="R7D_TAX_COMPONENT_VERIFICATION",
                             severity="WARNING",
                             weight=0.10,
-                            message=f"VAT rate {_rate}% is not valid for {_geo}",
+                            message=f"Tax components sum ({_gen_sum:.2f}) ≠ total tax ({_tax_val:.2f})",
                             evidence={
-                                "regime": "EU_VAT",
-                                "check": "valid_vat_rate",
-                                "detected_rate": _rate,
-                                "valid_rates": _valid_rates,
-                                "closest_valid": _closest,
+                                "regime": "GENERAL",
+                                "check": "components_sum_to_total",
+                                "components": _comp_desc,
+                                "component_sum": round(_gen_sum, 2),
+                                "total_tax": _tax_val,
+                                "difference": round(_gen_diff, 2),
                                 "geo_country": _geo,
                             },
                             reason_text=(
-                                f"💰 Invalid VAT Rate ({_geo}): {_rate}% is not a valid "
-                                f"VAT rate. Valid rates: "
-                                f"{', '.join(str(r) + '%' for r in _valid_rates)}."
+                                f"💰 Tax Sum Mismatch: Components "
+                                f"({' + '.join(_comp_desc)} = {_gen_sum:.2f}) ≠ "
+                                f"total tax {_tax_val:.2f}. "
+                                f"Difference: {_gen_diff:.2f}."
                             ),
                         )
-                        break  # One invalid rate is enough
-
-            # Check 2: VAT components should sum to total tax
-            if len(_eu_components) >= 2 and _tax_val is not None and _tax_val > 0:
-                _eu_sum = sum(a for _, a in _eu_components)
-                _eu_diff = abs(_eu_sum - _tax_val)
-                if _eu_diff > max(0.50, _tax_val * 0.03):
-                    _eu_desc = [f"{r}%={a:.2f}" for r, a in _eu_components]
-                    score += emit_event(
-                        events=events,
-                        reasons=reasons,
-                        rule_id="R7D_TAX_COMPONENT_VERIFICATION",
-                        severity="WARNING",
-                        weight=0.12,
-                        message=f"VAT components ({_eu_sum:.2f}) ≠ total tax ({_tax_val:.2f})",
-                        evidence={
-                            "regime": "EU_VAT",
-                            "check": "components_sum_to_total",
-                            "components": _eu_desc,
-                            "component_sum": round(_eu_sum, 2),
-                            "total_tax": _tax_val,
-                            "difference": round(_eu_diff, 2),
-                            "geo_country": _geo,
-                        },
-                        reason_text=(
-                            f"💰 VAT Sum Mismatch ({_geo}): Components "
-                            f"({' + '.join(_eu_desc)} = {_eu_sum:.2f}) ≠ total tax "
-                            f"{_tax_val:.2f}. Difference: {_eu_diff:.2f}."
-                        ),
-                    )
 
-        # --- Gulf VAT Verification (AE/SA/OM/BH/QA/KW) ---
-        # Single-rate VAT regimes: verify tax = rate% × base
-        elif _geo in ("AE", "SA", "OM", "BH", "QA", "KW"):
-            _GULF_VAT_RATES = {
-                "AE": 5.0, "SA": 15.0, "OM": 5.0, "BH": 10.0,
-                "QA": 0.0, "KW": 0.0,
-            }
-            _expected_rate = _GULF_VAT_RATES.get(_geo, 0.0)
-            _base = _subtotal_val
-            if _base is None and _total_val is not None and _tax_val is not None:
-                _base = _total_val - _tax_val
-
-            if (_expected_rate > 0 and _tax_val is not None and _tax_val > 0
-                    and _base is not None and _base > 0):
-                _expected_tax = round(_base * _expected_rate / 100.0, 2)
-                _gulf_diff = abs(_tax_val - _expected_tax)
-                # Tolerance: 2% of expected or 0.50, whichever is larger
-                _gulf_tol = max(0.50, _expected_tax * 0.02)
-                if _gulf_diff > _gulf_tol:
+            # --- Universal: Rate × Base math verification ---
+            # If OCR captured a tax rate (e.g. "Tax 9%: 90.00"), verify the math
+            # regardless of geo. This catches edits where someone changed the amount
+            # but forgot to adjust the percentage or vice versa.
+            # Runs for all geos as a secondary check (non-exclusive with above).
+            _ocr_rate_re = re.compile(
+                r"\b(?:tax|vat|gst|hst|mwst|tva|iva|btw)\s*"
+                r"(?:@\s*)?(\d+(?:[.,]\d+)?)\s*%"
+                r".*?([\d,]+[.,]\d{2})",
+                re.IGNORECASE,
+            )
+            _base_for_math = _subtotal_val
+            if _base_for_math is None and _total_val is not None and _tax_val is not None:
+                _base_for_math = _total_val - _tax_val
+            if _base_for_math is not None and _base_for_math > 0:
+                _rate_lines = lf.get("lines", []) or []
+                for _rl in _rate_lines:
+                    _rm = _ocr_rate_re.search(_rl)
+                    if _rm:
+                        try:
+                            _ocr_rate = float(_rm.group(1).replace(",", "."))
+                            _ocr_amt = _normalize_amount_str(_rm.group(2))
+                        except (ValueError, TypeError):
+                            continue
+                        if _ocr_rate > 0 and _ocr_amt is not None and _ocr_amt > 0:
+                            _calc_amt = round(_base_for_math * _ocr_rate / 100.0, 2)
+                            _math_diff = abs(_ocr_amt - _calc_amt)
+                            _math_tol = max(1.0, _calc_amt * 0.03)
+                            if _math_diff > _math_tol:
+                                score += emit_event(
+                                    events=events,
+                                    reasons=reasons,
+                                    rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                                    severity="WARNING",
+                                    weight=0.10,
+                                    message=f"Tax {_ocr_rate}% × {_base_for_math:.2f} = {_calc_amt:.2f}, but line shows {_ocr_amt:.2f}",
+                                    evidence={
+                                        "regime": "UNIVERSAL",
+                                        "check": "rate_times_base",
+                                        "ocr_rate_pct": _ocr_rate,
+                                        "base_amount": round(_base_for_math, 2),
+                                        "calculated_tax": _calc_amt,
+                                        "line_tax_amount": _ocr_amt,
+                                        "difference": round(_math_diff, 2),
+                                        "geo_country": _geo,
+                                    },
+                                    reason_text=(
+                                        f"💰 Tax Math Error: {_ocr_rate}% × "
+                                        f"{_base_for_math:.2f} = {_calc_amt:.2f}, "
+                                        f"but receipt shows {_ocr_amt:.2f}. "
+                                        f"Difference: {_math_diff:.2f}."
+                                    ),
+                                )
+                                break  # One math error is enough
+
+        except Exception as e:
+            logger.warning(f"R7D_TAX_COMPONENT_VERIFICATION check failed: {e}")
+
+    rule_laps.mark("GROUP_5H_GSTIN")
+    # ---------------------------------------------------------------------------
+    # RULE GROUP 5H: GSTIN / Tax Registration Validation (India-specific)
+    # ---------------------------------------------------------------------------
+    # Expert insight: Indian GSTIN is 15 chars: 2-digit state code + 10-char PAN
+    # + 1 entity code + 1 Z + 1 check digit. Fake receipts often have malformed GSTINs.
+    # VAT TIN is 11 digits for older registrations.
+    if rule_ctx.should_run("GROUP_5H_GSTIN"):
+        try:
+            _geo = str(tf.get("geo_country_guess") or "").upper()
+            _geo_conf_gstin = float(tf.get("geo_confidence") or 0)
+
+            if _geo == "IN" and _geo_conf_gstin >= 0.5:
+                _ft = full_text or ""
+                # Also check VLM-extracted GSTIN
+                _vlm_ext = tf.get("vlm_extraction") or {}
+                _vlm_gstin = ""
+                if isinstance(_vlm_ext, dict):
+                    _vlm_gstin = str(_vlm_ext.get("gstin") or "")
+
+                # Find all GSTIN-like patterns in text (strict regex for well-formed)
+                _gstin_candidates = re.findall(r"\b(\d{2}[A-Z]{5}\d{4}[A-Z]\d[A-Z\d][A-Z\d])\b", _ft.upper())
+                # Looser extraction: alphanumeric strings near GSTIN/GST keywords (~15 chars)
+                _gstin_context_matches = re.findall(
+                    r"(?:GSTIN|GST\s*(?:NO|NUMBER|REG|ID))[:\s]*([A-Z0-9]{13,17})\b",
+                    _ft.upper(),
+                )
+                for _gcm in _gstin_context_matches:
+                    if _gcm not in _gstin_candidates:
+                        _gstin_candidates.append(_gcm)
+                if _vlm_gstin and len(_vlm_gstin) >= 15:
+                    _vlm_gstin_clean = _vlm_gstin.upper().replace(" ", "")
+                    if _vlm_gstin_clean not in _gstin_candidates:
+                        _gstin_candidates.append(_vlm_gstin_clean)
+
+                _gstin_issues = []
+                for _gstin in set(_gstin_candidates):
+                    if len(_gstin) != 15:
+                        _gstin_issues.append({"gstin": _gstin, "issue": "wrong_length", "length": len(_gstin)})
+                        continue
+                    _state_code = _gstin[:2]
+                    # Valid Indian state codes: 01-38 (including union territories)
+                    try:
+                        _sc = int(_state_code)
+                        if _sc < 1 or _sc > 38:
+                            _gstin_issues.append({"gstin": _gstin, "issue": "invalid_state_code", "state_code": _state_code})
+                    except ValueError:
+                        _gstin_issues.append({"gstin": _gstin, "issue": "non_numeric_state_code", "state_code": _state_code})
+
+                    # Check PAN structure (chars 3-12): AAAAA0000A
+                    _pan = _gstin[2:12]
+                    if not re.match(r"^[A-Z]{5}\d{4}[A-Z]$", _pan):
+                        _gstin_issues.append({"gstin": _gstin, "issue": "invalid_pan_format", "pan": _pan})
+
+                    # 13th char must be a digit (1-9) or Z for entity code
+                    _entity = _gstin[12]
+                    if _entity not in "123456789Z":
+                        _gstin_issues.append({"gstin": _gstin, "issue": "invalid_entity_code", "char": _entity})
+
+                    # 14th char is typically Z
+                    if _gstin[13] != "Z":
+                        _gstin_issues.append({"gstin": _gstin, "issue": "missing_z_at_pos14", "char": _gstin[13]})
+
+                # Also cross-check state code against address
+                _vlm_addr = str(tf.get("vlm_address") or "").lower()
+                _pin_code = str(tf.get("pin_code") or "")
+                if _gstin_candidates and _pin_code and len(_pin_code) >= 6:
+                    _pin_state = _pin_code[:2]  # First 2 digits of PIN indicate postal circle
+                    for _gstin in set(_gstin_candidates):
+                        if len(_gstin) >= 2:
+                            _gstin_state = _gstin[:2]
+                            # Map GSTIN state codes to PIN postal circles (approximate)
+                            _GSTIN_TO_PIN_MAP = {
+                                "36": ["50"],  # Telangana → 50xxxx
+                                "37": ["51", "52", "53"],  # Andhra Pradesh → 51-53
+                                "29": ["56", "57", "58"],  # Karnataka → 56-58
+                                "33": ["60", "61", "62", "63", "64"],  # Tamil Nadu → 60-64
+                                "27": ["40", "41", "42", "43", "44"],  # Maharashtra → 40-44
+                                "07": ["11"],  # Delhi → 11xxxx
+                            }
+                            _expected_pins = _GSTIN_TO_PIN_MAP.get(_gstin_state, [])
+                            if _expected_pins and _pin_state not in _expected_pins:
+                                _gstin_issues.append({
+                                    "gstin": _gstin, "issue": "state_pin_mismatch",
+                                    "gstin_state_code": _gstin_state,
+                                    "pin_prefix": _pin_state,
+                                    "expected_pin_prefixes": _expected_pins,
+                                })
+
+                if _gstin_issues:
+                    _worst = _gstin_issues[0]
+                    _sev = "CRITICAL" if _worst["issue"] in ("invalid_pan_format", "invalid_state_code", "state_pin_mismatch") else "WARNING"
+                    _wt = 0.15 if _sev == "CRITICAL" else 0.08
                     score += emit_event(
                         events=events,
                         reasons=reasons,
-                        rule_id="R7D_TAX_COMPONENT_VERIFICATION",
-                        severity="WARNING",
-                        weight=0.12,
-                        message=f"VAT {_expected_rate}% × base {_base:.2f} = {_expected_tax:.2f}, but tax shows {_tax_val:.2f}",
+                        rule_id="R_GSTIN_FORMAT",
+                        severity=_sev,
+                        weight=_wt,
+                        message=f"GSTIN format issue: {_worst['issue']} ({_worst.get('gstin', '')[:15]})",
                         evidence={
-                            "regime": "GULF_VAT",
-                            "check": "rate_times_base",
-                            "expected_rate": _expected_rate,
-                            "base_amount": round(_base, 2),
-                            "expected_tax": _expected_tax,
-                            "actual_tax": _tax_val,
-                            "difference": round(_gulf_diff, 2),
-                            "geo_country": _geo,
+                            "issues": _gstin_issues[:3],
+                            "gstin_candidates": list(set(_gstin_candidates))[:3],
                         },
                         reason_text=(
-                            f"💰 VAT Math Error ({_geo}): {_expected_rate}% × "
-                            f"base {_base:.2f} = {_expected_tax:.2f}, but receipt "
-                            f"shows tax {_tax_val:.2f}. Difference: {_gulf_diff:.2f}."
+                            f"🔢 GSTIN Validation: {_worst['issue'].replace('_', ' ').title()} detected in "
+                            f"GSTIN '{_worst.get('gstin', '')}'. Indian GSTIN must be 15 characters: "
+                            f"2-digit state code + 10-char PAN + entity code + Z + check digit. "
+                            f"Invalid GSTIN strongly suggests a fabricated document."
                         ),
                     )
-
-        # --- Australia GST Verification ---
-        # GST is exactly 10%; verify tax = 10% × base
-        elif _geo == "AU":
-            _base = _subtotal_val
-            if _base is None and _total_val is not None and _tax_val is not None:
-                _base = _total_val - _tax_val
-            if (_tax_val is not None and _tax_val > 0
-                    and _base is not None and _base > 0):
-                _au_expected = round(_base * 0.10, 2)
-                _au_diff = abs(_tax_val - _au_expected)
-                if _au_diff > max(0.50, _au_expected * 0.02):
-                    score += emit_event(
+                elif _gstin_candidates:
+                    # GSTIN found and valid — emit info
+                    emit_event(
                         events=events,
                         reasons=reasons,
-                        rule_id="R7D_TAX_COMPONENT_VERIFICATION",
-                        severity="WARNING",
-                        weight=0.10,
-                        message=f"GST 10% × base {_base:.2f} = {_au_expected:.2f}, but tax shows {_tax_val:.2f}",
-                        evidence={
-                            "regime": "AU_GST",
-                            "check": "rate_times_base",
-                            "expected_rate": 10.0,
-                            "base_amount": round(_base, 2),
-                            "expected_tax": _au_expected,
-                            "actual_tax": _tax_val,
-                            "difference": round(_au_diff, 2),
-                            "geo_country": "AU",
-                        },
-                        reason_text=(
-                            f"💰 GST Math Error (Australia): 10% × base "
-                            f"${_base:.2f} = ${_au_expected:.2f}, but receipt shows "
-                            f"tax ${_tax_val:.2f}. Difference: ${_au_diff:.2f}."
-                        ),
+                        rule_id="R_GSTIN_FORMAT",
+                        severity="INFO",
+                        weight=0.0,
+                        message=f"GSTIN validated: {list(set(_gstin_candidates))[0][:15]}",
+                        evidence={"gstin_candidates": list(set(_gstin_candidates))[:3], "valid": True},
                     )
+        except Exception as e:
+            logger.warning(f"R_GSTIN_FORMAT check failed: {e}")
 
-        # --- US Multi-Component Tax Verification ---
-        # US can have state + county + city taxes
-        elif _geo == "US":
-            _us_lines = lf.get("lines", []) or []
-            _us_tax_re = re.compile(
-                r"\b(state\s+tax|county\s+tax|city\s+tax|local\s+tax"
-                r"|sales\s+tax|tax)\b.*?([\d,]+[.,]\d{2})",
-                re.IGNORECASE,
+    rule_laps.mark("GROUP_5I_NO_ELECTRONIC_ID")
+    # ---------------------------------------------------------------------------
+    # RULE GROUP 5I: No Electronic ID Detection (Handwritten / Manual Receipts)
+    # ---------------------------------------------------------------------------
+    # Expert insight: Legitimate modern receipts have POS terminal IDs, transaction
+    # numbers, barcodes, QR codes, or electronic receipt numbers. Handwritten bills
+    # that lack ANY electronic identifier are trivially easy to fabricate.
+    if rule_ctx.should_run("GROUP_5I_NO_ELECTRONIC_ID"):
+        try:
+            _ft_lower = rule_ctx.inputs("GROUP_5I_NO_ELECTRONIC_ID")["full_text_lower"]
+            _is_handwritten = any(
+                e.get("rule_id") == "R_HANDWRITTEN_RECEIPT"
+                for e in events
+                if isinstance(e, dict) and e.get("weight", 0) > 0
             )
-            _us_components = []
-            for _ul in _us_lines:
-                _um = _us_tax_re.search(_ul)
-                if _um:
-                    _uv = _normalize_amount_str(_um.group(2))
-                    if _uv is not None and _uv > 0:
-                        _us_components.append((_um.group(1).strip(), _uv))
-
-            if len(_us_components) >= 2 and _tax_val is not None and _tax_val > 0:
-                _us_sum = sum(v for _, v in _us_components)
-                _us_diff = abs(_us_sum - _tax_val)
-                if _us_diff > max(0.50, _tax_val * 0.03):
-                    _us_desc = [f"{n}={v:.2f}" for n, v in _us_components]
-                    score += emit_event(
-                        events=events,
-                        reasons=reasons,
-                        rule_id="R7D_TAX_COMPONENT_VERIFICATION",
-                        severity="WARNING",
-                        weight=0.10,
-                        message=f"Tax components ({_us_sum:.2f}) ≠ total tax ({_tax_val:.2f})",
-                        evidence={
-                            "regime": "US_SALES_TAX",
-                            "check": "components_sum_to_total",
-                            "components": _us_desc,
-                            "component_sum": round(_us_sum, 2),
-                            "total_tax": _tax_val,
-                            "difference": round(_us_diff, 2),
-                            "geo_country": "US",
-                        },
-                        reason_text=(
-                            f"💰 Tax Sum Mismatch (US): Components "
-                            f"({' + '.join(_us_desc)} = ${_us_sum:.2f}) ≠ total tax "
-                            f"${_tax_val:.2f}. Difference: ${_us_diff:.2f}."
-                        ),
-                    )
+            _doc_sub = str(legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or "").upper()
 
-        # --- General: Multi-line tax component sum verification ---
-        # Fallback for any geo not handled above
-        elif _tax_val is not None and _tax_val > 0:
-            _gen_tax_lines = lf.get("lines", []) or []
-            _gen_components = []
-            _TAX_LINE_RE = re.compile(
-                r"\b(vat|tax|hst|gst|pst|qst|service\s+tax|sales\s+tax|excise)"
-                r"\b.*?([\d,]+\.\d{2})",
-                re.IGNORECASE,
+            # Only check for transaction-type documents (not invoices which may be typed)
+            _is_transactional = _doc_sub in (
+                "FUEL", "POS_RETAIL", "POS_RESTAURANT", "POS_GROCERY",
+                "RECEIPT", "TAXI", "AUTO_RICKSHAW", "PARKING",
             )
-            for _gl in _gen_tax_lines:
-                _gm = _TAX_LINE_RE.search(_gl)
-                if _gm:
-                    _gv = _normalize_amount_str(_gm.group(2))
-                    if _gv is not None and _gv > 0:
-                        _gen_components.append((_gm.group(1).strip(), _gv))
-
-            if len(_gen_components) >= 2:
-                _gen_sum = sum(v for _, v in _gen_components)
-                _gen_diff = abs(_gen_sum - _tax_val)
-                _gen_tol = max(1.0, _tax_val * 0.03)
-                if _gen_diff > _gen_tol:
-                    _comp_desc = [f"{n}={v:.2f}" for n, v in _gen_components]
+
+            if _is_transactional:
+                _electronic_patterns = [
+                    r"\b(transaction|trans|txn)\s*[#:]?\s*\d{4,}", # Transaction ID
+                    r"\b(invoice|inv|bill)\s*[#:]?\s*\d{4,}",     # Invoice/bill number
+                    r"\b(receipt|rcpt)\s*[#:]?\s*\d{4,}",          # Receipt number
+                    r"\b(terminal|tid|mid)\s*[#:]?\s*\d{3,}",     # Terminal/MID
+                    r"\bpos\s*[#:]?\s*\d{2,}",                     # POS number
+                    r"\b(auth|approval)\s*[#:]?\s*\d{4,}",        # Authorization code
+                    r"\b(barcode|qr\s*code|upi)\b",               # Digital identifiers
+                    r"\bref\s*[#:]?\s*\d{4,}",                    # Reference number
+                    r"\b\d{4}\s*\*{4,}\s*\d{4}\b",                # Card number pattern
+                ]
+
+                _has_electronic_id = False
+                for pat in _electronic_patterns:
+                    if re.search(pat, _ft_lower):
+                        _has_electronic_id = True
+                        break
+
+                # Also check VLM extraction for receipt_number
+                _vlm_ext_eid = tf.get("vlm_extraction") or {}
+                if isinstance(_vlm_ext_eid, dict):
+                    _vlm_rcpt_no = _vlm_ext_eid.get("receipt_number")
+                    if _vlm_rcpt_no and str(_vlm_rcpt_no).strip():
+                        _has_electronic_id = True
+
+                if not _has_electronic_id:
+                    _eid_weight = 0.10 if _is_handwritten else 0.05
+                    _eid_severity = "WARNING" if _is_handwritten else "INFO"
                     score += emit_event(
                         events=events,
                         reasons=reasons,
-                        rule_id="R7D_TAX_COMPONENT_VERIFICATION",
-                        severity="WARNING",
-                        weight=0.10,
-                        message=f"Tax components sum ({_gen_sum:.2f}) ≠ total tax ({_tax_val:.2f})",
+                        rule_id="R_NO_ELECTRONIC_ID",
+                        severity=_eid_severity,
+                        weight=_eid_weight,
+                        message=f"No electronic transaction ID, POS terminal number, or receipt number found",
                         evidence={
-                            "regime": "GENERAL",
-                            "check": "components_sum_to_total",
-                            "components": _comp_desc,
-                            "component_sum": round(_gen_sum, 2),
-                            "total_tax": _tax_val,
-                            "difference": round(_gen_diff, 2),
-                            "geo_country": _geo,
+                            "doc_subtype": _doc_sub,
+                            "is_handwritten": _is_handwritten,
+                            "has_electronic_id": False,
+                            "patterns_checked": len(_electronic_patterns),
                         },
                         reason_text=(
-                            f"💰 Tax Sum Mismatch: Components "
-                            f"({' + '.join(_comp_desc)} = {_gen_sum:.2f}) ≠ "
-                            f"total tax {_tax_val:.2f}. "
-                            f"Difference: {_gen_diff:.2f}."
+                            f"🔖 No Electronic ID: This {_doc_sub.lower()} receipt has no transaction number, "
+                            f"POS terminal ID, authorization code, or other electronic identifier. "
+                            f"{'Combined with handwritten text, this strongly suggests a manually fabricated document.' if _is_handwritten else 'Modern legitimate receipts typically include at least one electronic identifier.'}"
                         ),
                     )
+        except Exception as e:
+            logger.warning(f"R_NO_ELECTRONIC_ID check failed: {e}")
 
-        # --- Universal: Rate × Base math verification ---
-        # If OCR captured a tax rate (e.g. "Tax 9%: 90.00"), verify the math
-        # regardless of geo. This catches edits where someone changed the amount
-        # but forgot to adjust the percentage or vice versa.
-        # Runs for all geos as a secondary check (non-exclusive with above).
-        _ocr_rate_re = re.compile(
-            r"\b(?:tax|vat|gst|hst|mwst|tva|iva|btw)\s*"
-            r"(?:@\s*)?(\d+(?:[.,]\d+)?)\s*%"
-            r".*?([\d,]+[.,]\d{2})",
-            re.IGNORECASE,
-        )
-        _base_for_math = _subtotal_val
-        if _base_for_math is None and _total_val is not None and _tax_val is not None:
-            _base_for_math = _total_val - _tax_val
-        if _base_for_math is not None and _base_for_math > 0:
-            _rate_lines = lf.get("lines", []) or []
-            for _rl in _rate_lines:
-                _rm = _ocr_rate_re.search(_rl)
-                if _rm:
-                    try:
-                        _ocr_rate = float(_rm.group(1).replace(",", "."))
-                        _ocr_amt = _normalize_amount_str(_rm.group(2))
-                    except (ValueError, TypeError):
-                        continue
-                    if _ocr_rate > 0 and _ocr_amt is not None and _ocr_amt > 0:
-                        _calc_amt = round(_base_for_math * _ocr_rate / 100.0, 2)
-                        _math_diff = abs(_ocr_amt - _calc_amt)
-                        _math_tol = max(1.0, _calc_amt * 0.03)
-                        if _math_diff > _math_tol:
+    rule_laps.mark("GROUP_5J_PIN_CITY")
+    # ---------------------------------------------------------------------------
+    # RULE GROUP 5J: PIN Code ↔ City Cross-Validation (India-specific)
+    # ---------------------------------------------------------------------------
+    # Expert insight: Indian PIN codes map to specific postal circles/cities.
+    # A PIN that doesn't match the stated city suggests fabrication.
+    if rule_ctx.should_run("GROUP_5J_PIN_CITY"):
+        try:
+            _geo_pin = str(tf.get("geo_country_guess") or "").upper()
+            if _geo_pin == "IN":
+                _pin = str(tf.get("pin_code") or "").strip()
+                _vlm_addr_pin = str(tf.get("vlm_address") or "").lower()
+                _city = str(tf.get("city") or "").lower().strip()
+
+                # Also extract PIN from VLM address if not from features
+                if not _pin and _vlm_addr_pin:
+                    _pin_match = re.search(r"\b(\d{6})\b", _vlm_addr_pin)
+                    if _pin_match:
+                        _pin = _pin_match.group(1)
+
+                if _pin and len(_pin) == 6 and _pin.isdigit():
+                    _pin_prefix = _pin[:3]  # First 3 digits = postal district
+
+                    # Map of PIN prefixes to expected cities/areas
+                    _PIN_CITY_MAP = {
+                        "500": ["hyderabad", "secunderabad", "telangana"],
+                        "501": ["hyderabad", "medchal", "telangana"],
+                        "400": ["mumbai", "thane", "maharashtra"],
+                        "110": ["delhi", "new delhi"],
+                        "560": ["bangalore", "bengaluru", "karnataka"],
+                        "600": ["chennai", "tamil nadu"],
+                        "700": ["kolkata", "west bengal"],
+                        "411": ["pune", "maharashtra"],
+                        "380": ["ahmedabad", "gujarat"],
+                        "302": ["jaipur", "rajasthan"],
+                        "226": ["lucknow", "uttar pradesh"],
+                        "201": ["noida", "ghaziabad", "uttar pradesh"],
+                        "122": ["gurgaon", "gurugram", "haryana"],
+                        "160": ["chandigarh", "punjab"],
+                        "682": ["kochi", "cochin", "ernakulam", "kerala"],
+                        "695": ["trivandrum", "thiruvananthapuram", "kerala"],
+                    }
+
+                    _expected_cities = _PIN_CITY_MAP.get(_pin_prefix, [])
+                    if _expected_cities:
+                        # Check if city or VLM address mentions any expected city
+                        _addr_text = _city + " " + _vlm_addr_pin
+                        _city_match = any(c in _addr_text for c in _expected_cities)
+
+                        if not _city_match:
                             score += emit_event(
                                 events=events,
                                 reasons=reasons,
-                                rule_id="R7D_TAX_COMPONENT_VERIFICATION",
+                                rule_id="R_PIN_CITY_MISMATCH",
                                 severity="WARNING",
-                                weight=0.10,
-                                message=f"Tax {_ocr_rate}% × {_base_for_math:.2f} = {_calc_amt:.2f}, but line shows {_ocr_amt:.2f}",
+                                weight=0.08,
+                                message=f"PIN code {_pin} doesn't match stated city/address",
                                 evidence={
-                                    "regime": "UNIVERSAL",
-                                    "check": "rate_times_base",
-                                    "ocr_rate_pct": _ocr_rate,
-                                    "base_amount": round(_base_for_math, 2),
-                                    "calculated_tax": _calc_amt,
-                                    "line_tax_amount": _ocr_amt,
-                                    "difference": round(_math_diff, 2),
-                                    "geo_country": _geo,
+                                    "pin_code": _pin,
+                                    "pin_prefix": _pin_prefix,
+                                    "expected_cities": _expected_cities,
+                                    "detected_city": _city or "(none)",
+                                    "vlm_address_snippet": _vlm_addr_pin[:80],
                                 },
                                 reason_text=(
-                                    f"💰 Tax Math Error: {_ocr_rate}% × "
-                                    f"{_base_for_math:.2f} = {_calc_amt:.2f}, "
-                                    f"but receipt shows {_ocr_amt:.2f}. "
-                                    f"Difference: {_math_diff:.2f}."
+                                    f"📮 PIN-City Mismatch: PIN code {_pin} (prefix {_pin_prefix}) "
+                                    f"maps to {'/'.join(_expected_cities[:3])}, but the address doesn't "
+                                    f"mention any of these locations. This suggests the PIN code or "
+                                    f"address may be fabricated."
                                 ),
                             )
-                            break  # One math error is enough
-
-    except Exception as e:
-        logger.warning(f"R7D_TAX_COMPONENT_VERIFICATION check failed: {e}")
-
-    # ---------------------------------------------------------------------------
-    # RULE GROUP 5H: GSTIN / Tax Registration Validation (India-specific)
-    # ---------------------------------------------------------------------------
-    # Expert insight: Indian GSTIN is 15 chars: 2-digit state code + 10-char PAN
-    # + 1 entity code + 1 Z + 1 check digit. Fake receipts often have malformed GSTINs.
-    # VAT TIN is 11 digits for older registrations.
-    try:
-        _geo = str(tf.get("geo_country_guess") or "").upper()
-        _geo_conf_gstin = float(tf.get("geo_confidence") or 0)
-
-        if _geo == "IN" and _geo_conf_gstin >= 0.5:
-            _ft = full_text or ""
-            # Also check VLM-extracted GSTIN
-            _vlm_ext = tf.get("vlm_extraction") or {}
-            _vlm_gstin = ""
-            if isinstance(_vlm_ext, dict):
-                _vlm_gstin = str(_vlm_ext.get("gstin") or "")
-
-            # Find all GSTIN-like patterns in text (strict regex for well-formed)
-            _gstin_candidates = re.findall(r"\b(\d{2}[A-Z]{5}\d{4}[A-Z]\d[A-Z\d][A-Z\d])\b", _ft.upper())
-            # Looser extraction: alphanumeric strings near GSTIN/GST keywords (~15 chars)
-            _gstin_context_matches = re.findall(
-                r"(?:GSTIN|GST\s*(?:NO|NUMBER|REG|ID))[:\s]*([A-Z0-9]{13,17})\b",
-                _ft.upper(),
-            )
-            for _gcm in _gstin_context_matches:
-                if _gcm not in _gstin_candidates:
-                    _gstin_candidates.append(_gcm)
-            if _vlm_gstin and len(_vlm_gstin) >= 15:
-                _vlm_gstin_clean = _vlm_gstin.upper().replace(" ", "")
-                if _vlm_gstin_clean not in _gstin_candidates:
-                    _gstin_candidates.append(_vlm_gstin_clean)
-
-            _gstin_issues = []
-            for _gstin in set(_gstin_candidates):
-                if len(_gstin) != 15:
-                    _gstin_issues.append({"gstin": _gstin, "issue": "wrong_length", "length": len(_gstin)})
-                    continue
-                _state_code = _gstin[:2]
-                # Valid Indian state codes: 01-38 (including union territories)
-                try:
-                    _sc = int(_state_code)
-                    if _sc < 1 or _sc > 38:
-                        _gstin_issues.append({"gstin": _gstin, "issue": "invalid_state_code", "state_code": _state_code})
-                except ValueError:
-                    _gstin_issues.append({"gstin": _gstin, "issue": "non_numeric_state_code", "state_code": _state_code})
-
-                # Check PAN structure (chars 3-12): AAAAA0000A
-                _pan = _gstin[2:12]
-                if not re.match(r"^[A-Z]{5}\d{4}[A-Z]$", _pan):
-                    _gstin_issues.append({"gstin": _gstin, "issue": "invalid_pan_format", "pan": _pan})
-
-                # 13th char must be a digit (1-9) or Z for entity code
-                _entity = _gstin[12]
-                if _entity not in "123456789Z":
-                    _gstin_issues.append({"gstin": _gstin, "issue": "invalid_entity_code", "char": _entity})
-
-                # 14th char is typically Z
-                if _gstin[13] != "Z":
-                    _gstin_issues.append({"gstin": _gstin, "issue": "missing_z_at_pos14", "char": _gstin[13]})
-
-            # Also cross-check state code against address
-            _vlm_addr = str(tf.get("vlm_address") or "").lower()
-            _pin_code = str(tf.get("pin_code") or "")
-            if _gstin_candidates and _pin_code and len(_pin_code) >= 6:
-                _pin_state = _pin_code[:2]  # First 2 digits of PIN indicate postal circle
-                for _gstin in set(_gstin_candidates):
-                    if len(_gstin) >= 2:
-                        _gstin_state = _gstin[:2]
-                        # Map GSTIN state codes to PIN postal circles (approximate)
-                        _GSTIN_TO_PIN_MAP = {
-                            "36": ["50"],  # Telangana → 50xxxx
-                            "37": ["51", "52", "53"],  # Andhra Pradesh → 51-53
-                            "29": ["56", "57", "58"],  # Karnataka → 56-58
-                            "33": ["60", "61", "62", "63", "64"],  # Tamil Nadu → 60-64
-                            "27": ["40", "41", "42", "43", "44"],  # Maharashtra → 40-44
-                            "07": ["11"],  # Delhi → 11xxxx
-                        }
-                        _expected_pins = _GSTIN_TO_PIN_MAP.get(_gstin_state, [])
-                        if _expected_pins and _pin_state not in _expected_pins:
-                            _gstin_issues.append({
-                                "gstin": _gstin, "issue": "state_pin_mismatch",
-                                "gstin_state_code": _gstin_state,
-                                "pin_prefix": _pin_state,
-                                "expected_pin_prefixes": _expected_pins,
-                            })
-
-            if _gstin_issues:
-                _worst = _gstin_issues[0]
-                _sev = "CRITICAL" if _worst["issue"] in ("invalid_pan_format", "invalid_state_code", "state_pin_mismatch") else "WARNING"
-                _wt = 0.15 if _sev == "CRITICAL" else 0.08
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_GSTIN_FORMAT",
-                    severity=_sev,
-                    weight=_wt,
-                    message=f"GSTIN format issue: {_worst['issue']} ({_worst.get('gstin', '')[:15]})",
-                    evidence={
-                        "issues": _gstin_issues[:3],
-                        "gstin_candidates": list(set(_gstin_candidates))[:3],
-                    },
-                    reason_text=(
-                        f"🔢 GSTIN Validation: {_worst['issue'].replace('_', ' ').title()} detected in "
-                        f"GSTIN '{_worst.get('gstin', '')}'. Indian GSTIN must be 15 characters: "
-                        f"2-digit state code + 10-char PAN + entity code + Z + check digit. "
-                        f"Invalid GSTIN strongly suggests a fabricated document."
-                    ),
-                )
-            elif _gstin_candidates:
-                # GSTIN found and valid — emit info
-                emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_GSTIN_FORMAT",
-                    severity="INFO",
-                    weight=0.0,
-                    message=f"GSTIN validated: {list(set(_gstin_candidates))[0][:15]}",
-                    evidence={"gstin_candidates": list(set(_gstin_candidates))[:3], "valid": True},
-                )
-    except Exception as e:
-        logger.warning(f"R_GSTIN_FORMAT check failed: {e}")
-
-    # ---------------------------------------------------------------------------
-    # RULE GROUP 5I: No Electronic ID Detection (Handwritten / Manual Receipts)
-    # ---------------------------------------------------------------------------
-    # Expert insight: Legitimate modern receipts have POS terminal IDs, transaction
-    # numbers, barcodes, QR codes, or electronic receipt numbers. Handwritten bills
-    # that lack ANY electronic identifier are trivially easy to fabricate.
-    try:
-        _ft_lower = (full_text or "").lower()
-        _is_handwritten = any(
-            e.get("rule_id") == "R_HANDWRITTEN_RECEIPT"
-            for e in events
-            if isinstance(e, dict) and e.get("weight", 0) > 0
-        )
-        _doc_sub = str(legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or "").upper()
-
-        # Only check for transaction-type documents (not invoices which may be typed)
-        _is_transactional = _doc_sub in (
-            "FUEL", "POS_RETAIL", "POS_RESTAURANT", "POS_GROCERY",
-            "RECEIPT", "TAXI", "AUTO_RICKSHAW", "PARKING",
-        )
-
-        if _is_transactional:
-            _electronic_patterns = [
-                r"\b(transaction|trans|txn)\s*[#:]?\s*\d{4,}", # Transaction ID
-                r"\b(invoice|inv|bill)\s*[#:]?\s*\d{4,}",     # Invoice/bill number
-                r"\b(receipt|rcpt)\s*[#:]?\s*\d{4,}",          # Receipt number
-                r"\b(terminal|tid|mid)\s*[#:]?\s*\d{3,}",     # Terminal/MID
-                r"\bpos\s*[#:]?\s*\d{2,}",                     # POS number
-                r"\b(auth|approval)\s*[#:]?\s*\d{4,}",        # Authorization code
-                r"\b(barcode|qr\s*code|upi)\b",               # Digital identifiers
-                r"\bref\s*[#:]?\s*\d{4,}",                    # Reference number
-                r"\b\d{4}\s*\*{4,}\s*\d{4}\b",                # Card number pattern
-            ]
-
-            _has_electronic_id = False
-            for pat in _electronic_patterns:
-                if re.search(pat, _ft_lower):
-                    _has_electronic_id = True
-                    break
-
-            # Also check VLM extraction for receipt_number
-            _vlm_ext_eid = tf.get("vlm_extraction") or {}
-            if isinstance(_vlm_ext_eid, dict):
-                _vlm_rcpt_no = _vlm_ext_eid.get("receipt_number")
-                if _vlm_rcpt_no and str(_vlm_rcpt_no).strip():
-                    _has_electronic_id = True
-
-            if not _has_electronic_id:
-                _eid_weight = 0.10 if _is_handwritten else 0.05
-                _eid_severity = "WARNING" if _is_handwritten else "INFO"
-                score += emit_event(
-                    events=events,
-                    reasons=reasons,
-                    rule_id="R_NO_ELECTRONIC_ID",
-                    severity=_eid_severity,
-                    weight=_eid_weight,
-                    message=f"No electronic transaction ID, POS terminal number, or receipt number found",
-                    evidence={
-                        "doc_subtype": _doc_sub,
-                        "is_handwritten": _is_handwritten,
-                        "has_electronic_id": False,
-                        "patterns_checked": len(_electronic_patterns),
-                    },
-                    reason_text=(
-                        f"🔖 No Electronic ID: This {_doc_sub.lower()} receipt has no transaction number, "
-                        f"POS terminal ID, authorization code, or other electronic identifier. "
-                        f"{'Combined with handwritten text, this strongly suggests a manually fabricated document.' if _is_handwritten else 'Modern legitimate receipts typically include at least one electronic identifier.'}"
-                    ),
-                )
-    except Exception as e:
-        logger.warning(f"R_NO_ELECTRONIC_ID check failed: {e}")
-
-    # ---------------------------------------------------------------------------
-    # RULE GROUP 5J: PIN Code ↔ City Cross-Validation (India-specific)
-    # ---------------------------------------------------------------------------
-    # Expert insight: Indian PIN codes map to specific postal circles/cities.
-    # A PIN that doesn't match the stated city suggests fabrication.
-    try:
-        _geo_pin = str(tf.get("geo_country_guess") or "").upper()
-        if _geo_pin == "IN":
-            _pin = str(tf.get("pin_code") or "").strip()
-            _vlm_addr_pin = str(tf.get("vlm_address") or "").lower()
-            _city = str(tf.get("city") or "").lower().strip()
-
-            # Also extract PIN from VLM address if not from features
-            if not _pin and _vlm_addr_pin:
-                _pin_match = re.search(r"\b(\d{6})\b", _vlm_addr_pin)
-                if _pin_match:
-                    _pin = _pin_match.group(1)
-
-            if _pin and len(_pin) == 6 and _pin.isdigit():
-                _pin_prefix = _pin[:3]  # First 3 digits = postal district
-
-                # Map of PIN prefixes to expected cities/areas
-                _PIN_CITY_MAP = {
-                    "500": ["hyderabad", "secunderabad", "telangana"],
-                    "501": ["hyderabad", "medchal", "telangana"],
-                    "400": ["mumbai", "thane", "maharashtra"],
-                    "110": ["delhi", "new delhi"],
-                    "560": ["bangalore", "bengaluru", "karnataka"],
-                    "600": ["chennai", "tamil nadu"],
-                    "700": ["kolkata", "west bengal"],
-                    "411": ["pune", "maharashtra"],
-                    "380": ["ahmedabad", "gujarat"],
-                    "302": ["jaipur", "rajasthan"],
-                    "226": ["lucknow", "uttar pradesh"],
-                    "201": ["noida", "ghaziabad", "uttar pradesh"],
-                    "122": ["gurgaon", "gurugram", "haryana"],
-                    "160": ["chandigarh", "punjab"],
-                    "682": ["kochi", "cochin", "ernakulam", "kerala"],
-                    "695": ["trivandrum", "thiruvananthapuram", "kerala"],
-                }
-
-                _expected_cities = _PIN_CITY_MAP.get(_pin_prefix, [])
-                if _expected_cities:
-                    # Check if city or VLM address mentions any expected city
-                    _addr_text = _city + " " + _vlm_addr_pin
-                    _city_match = any(c in _addr_text for c in _expected_cities)
-
-                    if not _city_match:
-                        score += emit_event(
-                            events=events,
-                            reasons=reasons,
-                            rule_id="R_PIN_CITY_MISMATCH",
-                            severity="WARNING",
-                            weight=0.08,
-                            message=f"PIN code {_pin} doesn't match stated city/address",
-                            evidence={
-                                "pin_code": _pin,
-                                "pin_prefix": _pin_prefix,
-                                "expected_cities": _expected_cities,
-                                "detected_city": _city or "(none)",
-                                "vlm_address_snippet": _vlm_addr_pin[:80],
-                            },
-                            reason_text=(
-                                f"📮 PIN-City Mismatch: PIN code {_pin} (prefix {_pin_prefix}) "
-                                f"maps to {'/'.join(_expected_cities[:3])}, but the address doesn't "
-                                f"mention any of these locations. This suggests the PIN code or "
-                                f"address may be fabricated."
-                            ),
-                        )
-    except Exception as e:
-        logger.warning(f"R_PIN_CITY_MISMATCH check failed: {e}")
+        except Exception as e:
+            logger.warning(f"R_PIN_CITY_MISMATCH check failed: {e}")
 
+    rule_laps.mark("GROUP_6_LEARNED")
     # ---------------------------------------------------------------------------
     # RULE GROUP 6: Apply learned rules from feedback
     # ---------------------------------------------------------------------------
@@ -6214,6 +6510,7 @@ def _score_and_explain(
             # Reduce confidence factor due to system error
             conf_factor = max(0.5, conf_factor * 0.8)
 
+    rule_laps.mark("R10_TEMPLATE_QUALITY")
     # ---------------------------------------------------------------------------
     # R10: Template Quality Cluster (TQC)
     # ---------------------------------------------------------------------------
@@ -6249,8 +6546,8 @@ def _score_and_explain(
     """
     # Hard gates (matrix keys are doc SUBTYPES)
     doc_family = legacy_doc_profile.get("family", "").upper()
-    r10_subtype = str(legacy_doc_profile.get("subtype") or tf.get("doc_subtype_guess") or "UNKNOWN").upper()
-    execution_mode = get_execution_mode("R10_TEMPLATE_QUALITY", r10_subtype)
+    r10_subtype = rule_ctx.inputs("R10_TEMPLATE_QUALITY")["doc_subtype_for_matrix"]
+    execution_mode = rule_ctx.execution_mode("R10_TEMPLATE_QUALITY")
     
     if execution_mode == ExecutionMode.FORBIDDEN:
         logger.debug(f"R10_TEMPLATE_QUALITY skipped: {r10_subtype} forbidden")
@@ -6330,23 +6627,12 @@ def _score_and_explain(
                     reason_text="📝 Template Quality: Document contains formatting or spelling anomalies.",
                 )
 
+    rule_laps.mark("finalize")
     # ---------------------------------------------------------------------------
     # Final label determination (single source of truth)
     # ---------------------------------------------------------------------------
     score = max(0.0, min(1.0, float(score)))
-    has_hard_fail = any(e.severity == "HARD_FAIL" for e in events)
-    critical_count = sum(1 for e in events if e.severity == "CRITICAL")
-    
-    if has_hard_fail:
-        label = "fake"
-    elif critical_count >= 2:
-        label = "fake"
-    elif score >= 0.70:
-        label = "fake"
-    elif score >= 0.35:
-        label = "suspicious"
-    else:
-        label = "real"
+    label = _label_from_score(score, [e.severity for e in events])
     
     # Extract full geo profile for ensemble audit trail
     geo_profile_debug = {
@@ -6365,6 +6651,7 @@ def _score_and_explain(
     # Populate top-level tags for analytics/querying/audit
     currency_symbols = tf.get("currency_symbols") or []
     detected_currency = currency_symbols[0] if currency_symbols else None
+    rule_laps.stop()
 
     return ReceiptDecision(
         score=score,
@@ -6388,6 +6675,7 @@ def _score_and_explain(
         debug={
             "doc_profile": geo_profile_debug,
             "vision_assessment": vision_assessment or {},
+            "timings": rule_laps.timer.summary(),
         },
     )
 
@@ -6403,6 +6691,7 @@ def analyze_receipt(
     extracted_date: str = None,
     apply_learned: bool = True,
     vision_assessment: Optional[Dict[str, Any]] = None,
+    deadline: Optional[float] = None,
 ) -> ReceiptDecision:
     """
     Main entry point for receipt analysis.
@@ -6414,19 +6703,271 @@ def analyze_receipt(
         extracted_date: Optional pre-extracted date from other engines
         apply_learned: Whether to apply learned rules from feedback
         vision_assessment: Optional vision veto payload from vision_llm (e.g., {"visual_integrity": "clean|suspicious|tampered", "confidence": 0..1, "observable_reasons": [...]})
+        deadline: Optional absolute time.monotonic() deadline (see app.pipelines.deadline);
+            optional stages are skipped/truncated to meet it. Defaults to ANALYZE_DEADLINE_S.
         
     Returns:
         ReceiptDecision with label, score, reasons, and audit events
     """
+    if deadline is None:
+        deadline = deadline_in(ANALYZE_DEADLINE_S)
+    with request_timer(name=os.path.basename(str(file_path))) as timer, \
+            track_circuit_skips() as circuit_skips, \
+            request_deadline(deadline) as deadline_skips:
+        features, decision = _analyze_receipt_timed(
+            timer,
+            file_path,
+            extracted_total=extracted_total,
+            extracted_merchant=extracted_merchant,
+            extracted_date=extracted_date,
+            apply_learned=apply_learned,
+            vision_assessment=vision_assessment,
+            circuit_skips=circuit_skips,
+            deadline_skips=deadline_skips,
+        )
+
+    return _finalize_analysis(timer, features, decision, file_path)
+
+
+def _finalize_analysis(timer, features: ReceiptFeatures, decision: ReceiptDecision, file_path: str) -> ReceiptDecision:
+    """Persist the feature snapshot and attach timings/trace to decision.debug."""
+    if decision.debug is None:
+        decision.debug = {}
+
+    # Persist features so rule/policy changes can be re-scored without OCR/VLM
+    from app.repository.feature_store import FEATURE_SNAPSHOTS_ENABLED
+    if FEATURE_SNAPSHOTS_ENABLED:
+        try:
+            from app.repository.feature_store import get_feature_store
+            with timer.stage("pipeline.feature_snapshot", "pipeline"):
+                decision.debug["features_id"] = get_feature_store().save_features(
+                    features, source=str(file_path), decision=decision,
+                    vision_assessment=decision.debug.get("vision_assessment") or None,
+                )
+        except Exception as e:
+            logger.warning("Feature snapshot persistence failed (non-fatal): %s", e)
+
+    attach_timings(decision.debug, timer)
+    trace_path = maybe_export_trace(timer, tag=os.path.basename(str(file_path)))
+    if trace_path:
+        decision.debug["trace_path"] = trace_path
+    return decision
+
+
+def _analyze_receipt_timed(
+    timer,
+    file_path: str,
+    extracted_total: str = None,
+    extracted_merchant: str = None,
+    extracted_date: str = None,
+    apply_learned: bool = True,
+    vision_assessment: Optional[Dict[str, Any]] = None,
+    circuit_skips: Optional[List[Dict[str, str]]] = None,
+    deadline_skips: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[ReceiptFeatures, ReceiptDecision]:
+    """
+    analyze_receipt body; each pipeline stage is recorded on `timer`.
+
+    `circuit_skips` collects LLM/VLM calls rejected by an open Ollama circuit
+    breaker during this request, `deadline_skips` the stages skipped or
+    truncated to meet the request deadline; both are audited by
+    _score_and_explain.
+    """
+    from app.pipelines.cascade import ANALYSIS_CASCADE
+    if ANALYSIS_CASCADE:
+        return _analyze_receipt_cascade(
+            timer,
+            file_path,
+            extracted_total=extracted_total,
+            extracted_merchant=extracted_merchant,
+            extracted_date=extracted_date,
+            apply_learned=apply_learned,
+            vision_assessment=vision_assessment,
+            circuit_skips=circuit_skips,
+            deadline_skips=deadline_skips,
+        )
+
+    features = _build_receipt_features(
+        timer,
+        file_path,
+        extracted_total=extracted_total,
+        extracted_merchant=extracted_merchant,
+        extracted_date=extracted_date,
+    )
+    _apply_vision_extract(timer, features, file_path)
+    _apply_duplicate_check(timer, features, file_path)
+    
+    if circuit_skips:
+        features.text_features["llm_circuit_skips"] = list(circuit_skips)
+    if deadline_skips:
+        features.text_features["deadline_skips"] = list(deadline_skips)
+    
+    # 6. Run rule-based analysis
+    with timer.stage("pipeline.rules", "pipeline"):
+        decision = _score_and_explain(features, apply_learned=apply_learned, vision_assessment=vision_assessment)
+    return features, decision
+
+
+def _analyze_receipt_cascade(
+    timer,
+    file_path: str,
+    extracted_total: str = None,
+    extracted_merchant: str = None,
+    extracted_date: str = None,
+    apply_learned: bool = True,
+    vision_assessment: Optional[Dict[str, Any]] = None,
+    circuit_skips: Optional[List[Dict[str, str]]] = None,
+    deadline_skips: Optional[List[Dict[str, Any]]] = None,
+    raw=None,
+    first_tier: Optional[int] = None,
+    trail: Optional[List[Dict[str, Any]]] = None,
+    last_tier: Optional[int] = None,
+    stage_results: Optional[Dict[str, Any]] = None,
+) -> Tuple[ReceiptFeatures, ReceiptDecision]:
+    """
+    analyze_receipt body with the cost-aware cascade (app.pipelines.cascade).
+
+    OCR runs once; features are rebuilt from the same raw receipt at each
+    tier so the stages enabled at that tier see it. Outputs of the expensive
+    stages (forensics, semantic verification, LLM classifier, vision
+    fallback) are carried across tiers in `stage_results`, so each runs at
+    most once per receipt. Tier runs are passed to
+    _score_and_explain in text_features["analysis_cascade"] and recorded as
+    CASCADE_TIER audit events.
+
+    Provisional decisions split the cascade in two: `last_tier` stops before
+    escalating past it and records the escalation still owed in
+    decision.debug["cascade"]["pending_escalation"]; a later call resumes it
+    with the same `raw` receipt, `first_tier` = the pending tier and the
+    `trail` of tiers already run (and the same `stage_results`).
+    """
+    from app.pipelines.cascade import (
+        CASCADE_VISION_VETO,
+        TIER_NAMES,
+        TIER_RULES,
+        carry_stage_results,
+        escalation_target,
+        execution_tier,
+        stage_enabled,
+    )
+    from app.pipelines.deadline import note_skip, remaining, stage_allowed
+
+    if raw is None:
+        raw = _ingest_receipt(timer, file_path)
+    is_pdf = os.path.splitext(str(file_path))[1].lower() == ".pdf"
+    trail = list(trail or [])
+    tier = TIER_RULES if first_tier is None else first_tier
+    pending_escalation = None
+    stage_results = {} if stage_results is None else stage_results
+    while True:
+        with execution_tier(tier) as deferred, carry_stage_results(stage_results), \
+                timer.stage(f"pipeline.cascade.{TIER_NAMES[tier]}", "pipeline"):
+            features = _features_from_raw(
+                timer,
+                raw,
+                extracted_total=extracted_total,
+                extracted_merchant=extracted_merchant,
+                extracted_date=extracted_date,
+            )
+            if stage_enabled("vision_extract"):
+                _apply_vision_extract(timer, features, file_path)
+            # Re-registers the fingerprint (keyed by file_path) with VLM-merged fields
+            _apply_duplicate_check(timer, features, file_path)
+
+            assessment = vision_assessment
+            if (assessment is None and CASCADE_VISION_VETO and not is_pdf
+                    and stage_enabled("vision_assessment") and stage_allowed("vision_assessment")):
+                try:
+                    from app.pipelines.vision_llm import build_vision_assessment
+                    with timer.stage("pipeline.vision_assessment", "pipeline"):
+                        assessment = build_vision_assessment(file_path)
+                except Exception as e:
+                    logger.warning("Cascade vision assessment failed (non-fatal): %s", e)
+
+            if circuit_skips:
+                features.text_features["llm_circuit_skips"] = list(circuit_skips)
+            if deadline_skips:
+                features.text_features["deadline_skips"] = list(deadline_skips)
+            features.text_features["analysis_cascade"] = {
+                "tier": tier,
+                "tier_name": TIER_NAMES[tier],
+                "previous": list(trail),
+            }
+            with timer.stage("pipeline.rules", "pipeline"):
+                decision = _score_and_explain(features, apply_learned=apply_learned, vision_assessment=assessment)
+
+        target, reasons = escalation_target(decision, features.text_features, tier, deferred)
+        if not reasons:
+            break
+        left = remaining()
+        if left is not None and left <= 0:
+            note_skip(f"cascade.{TIER_NAMES[target]}", escalation_reasons=reasons)
+            logger.info("Cascade: deadline spent, not escalating past tier %d", tier)
+            break
+        trail.append({
+            "tier": tier,
+            "tier_name": TIER_NAMES[tier],
+            "label": decision.label,
+            "score": round(float(decision.score), 4),
+            "escalated_to": target,
+            "reasons": reasons,
+            "deferred_stages": list(deferred),
+        })
+        if last_tier is not None and tier >= last_tier:
+            pending_escalation = {"tier": target, "reasons": reasons}
+            break
+        logger.info("Cascade: escalating %s from tier %d to %d (%s)",
+                    os.path.basename(str(file_path)), tier, target, ", ".join(reasons))
+        tier = target
+
+    if decision.debug is None:
+        decision.debug = {}
+    decision.debug["cascade"] = {"final_tier": tier, "tiers": trail}
+    if pending_escalation is not None:
+        decision.debug["cascade"]["pending_escalation"] = pending_escalation
+    return features, decision
+
+
+def _build_receipt_features(
+    timer,
+    file_path: str,
+    extracted_total: str = None,
+    extracted_merchant: str = None,
+    extracted_date: str = None,
+) -> ReceiptFeatures:
+    """Pipeline stages 1-4: ingest + OCR, build features, merge other engines' fields."""
+    raw = _ingest_receipt(timer, file_path)
+    return _features_from_raw(
+        timer,
+        raw,
+        extracted_total=extracted_total,
+        extracted_merchant=extracted_merchant,
+        extracted_date=extracted_date,
+    )
+
+
+def _ingest_receipt(timer, file_path: str):
+    """Pipeline stages 1-2: ingest the receipt file and run OCR."""
     # 1. Create ReceiptInput from file path
     from app.schemas.receipt import ReceiptInput
     receipt_input = ReceiptInput(file_path=file_path)
     
     # 2. Ingest the receipt file and run OCR with preprocessing
-    raw = ingest_and_ocr(receipt_input, preprocess=True)
-    
+    with timer.stage("pipeline.ingest_ocr", "pipeline"):
+        return ingest_and_ocr(receipt_input, preprocess=True)
+
+
+def _features_from_raw(
+    timer,
+    raw,
+    extracted_total: str = None,
+    extracted_merchant: str = None,
+    extracted_date: str = None,
+) -> ReceiptFeatures:
+    """Pipeline stages 3-4: build features, merge other engines' fields."""
     # 3. Build features from the raw receipt data
-    features = build_features(raw)
+    with timer.stage("pipeline.build_features", "pipeline"):
+        features = build_features(raw)
     
     # 4. If we have extracted data from other engines, enhance the features
     if extracted_total:
@@ -6435,32 +6976,41 @@ def analyze_receipt(
         features.text_features["merchant_candidate"] = extracted_merchant
     if extracted_date:
         features.text_features["date_extracted"] = extracted_date
-    
-    # 5. Run Vision LLM structured extraction and merge into features
+    return features
+
+
+def _apply_vision_extract(timer, features: ReceiptFeatures, file_path: str) -> None:
+    """Pipeline stage 5: Vision LLM structured extraction merged into text_features."""
+    if not stage_allowed("vision_extract"):
+        features.text_features["vlm_extraction"] = {"success": False, "skipped": "deadline"}
+        return
     try:
-        from app.pipelines.vision_extract import extract_receipt_fields, merge_vlm_into_features
-        vlm_data = extract_receipt_fields(file_path)
-        features.text_features = merge_vlm_into_features(vlm_data, features.text_features)
+        with timer.stage("pipeline.vision_extract", "pipeline"):
+            from app.pipelines.vision_extract import extract_receipt_fields, merge_vlm_into_features
+            vlm_data = extract_receipt_fields(file_path)
+            features.text_features = merge_vlm_into_features(vlm_data, features.text_features)
     except Exception as e:
         logger.warning("Vision LLM extraction failed (non-fatal): %s", e)
         features.text_features["vlm_extraction"] = {"success": False, "error": str(e)}
-    
-    # 5.5 Duplicate detection (fingerprint-based)
+
+
+def _apply_duplicate_check(timer, features: ReceiptFeatures, file_path: str) -> None:
+    """Pipeline stage 5.5: fingerprint-based duplicate detection (registers the fingerprint)."""
+    if not stage_allowed("duplicate_check"):
+        return
     try:
-        from app.pipelines.receipt_duplicates import check_duplicate
-        tf = features.text_features
-        dup_result = check_duplicate(
-            file_path=file_path,
-            merchant=tf.get("merchant_candidate") or tf.get("merchant_name"),
-            receipt_date=tf.get("receipt_date"),
-            total_amount=tf.get("total_amount"),
-            currency=(tf.get("currency_symbols") or [None])[0],
-            geo=tf.get("geo_country_guess"),
-        )
-        features.text_features["duplicate_check"] = dup_result
+        with timer.stage("pipeline.duplicate_check", "pipeline"):
+            from app.pipelines.receipt_duplicates import check_duplicate
+            tf = features.text_features
+            dup_result = check_duplicate(
+                file_path=file_path,
+                merchant=tf.get("merchant_candidate") or tf.get("merchant_name"),
+                receipt_date=tf.get("receipt_date"),
+                total_amount=tf.get("total_amount"),
+                currency=(tf.get("currency_symbols") or [None])[0],
+                geo=tf.get("geo_country_guess"),
+            )
+            features.text_features["duplicate_check"] = dup_result
     except Exception as e:
         logger.warning("Duplicate detection failed (non-fatal): %s", e)
-    
-    # 6. Run rule-based analysis
-    return _score_and_explain(features, apply_learned=apply_learned, vision_assessment=vision_assessment)
     
\ No newline at end of file
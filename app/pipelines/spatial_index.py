@@ -0,0 +1,143 @@
+# app/pipelines/spatial_index.py
+"""
+Per-document spatial index over token boxes.
+
+Layout heuristics that look for a token's neighbours (the label left of an
+amount, contact details a few lines around a merchant name) used to scan
+every token of the document for every token they examined, which is
+quadratic in document length. SpatialIndex buckets tokens once into a
+uniform grid of `cell_size`-point cells (each box is registered in every
+cell it overlaps) and by line index, so each query only touches nearby
+cells or lines:
+
+    index = doc.spatial_index()                    # or SpatialIndex(tokens)
+    index.left_of(x, y, max_dy=15)                 # same row, to the left
+    index.above(x0, x1, y, max_distance=40)        # overlapping columns above
+    index.within_radius(x, y, 30)                  # box within 30pt of a point
+    index.in_region(x0, y0, x1, y1, tolerance=10)  # box inside a rectangle
+    index.on_lines(first, last)                    # by line index
+
+Queries return token positions (indices into `tokens`) in document order,
+so callers that keep the first best match behave exactly as a full scan.
+Tokens without coordinates are reachable through on_lines() only.
+"""
+
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+MAX_CELLS_PER_BOX = 64
+
+
+def _box(token: Any) -> Optional[Tuple[float, float, float, float]]:
+    x0, y0 = getattr(token, "x0", None), getattr(token, "y0", None)
+    x1, y1 = getattr(token, "x1", None), getattr(token, "y1", None)
+    if x0 is None or y0 is None or x1 is None or y1 is None:
+        return None
+    if not all(math.isfinite(v) for v in (x0, y0, x1, y1)):
+        return None
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+class SpatialIndex:
+    """Uniform-grid and line index over a document's tokens."""
+
+    def __init__(self, tokens: Sequence[Any], cell_size: float = 50.0):
+        self.tokens: List[Any] = list(tokens)
+        self.cell_size = float(cell_size)
+        self.boxes: List[Optional[Tuple[float, float, float, float]]] = [_box(t) for t in self.tokens]
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._lines: Dict[int, List[int]] = defaultdict(list)
+        # Boxes spanning too many cells are checked by every query instead
+        self._large: List[int] = []
+        for pos, (token, box) in enumerate(zip(self.tokens, self.boxes)):
+            line = getattr(token, "line_idx", None)
+            if line is not None:
+                self._lines[line].append(pos)
+            if box is None:
+                continue
+            cx0, cy0 = self._cell(box[0]), self._cell(box[1])
+            cx1, cy1 = self._cell(box[2]), self._cell(box[3])
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > MAX_CELLS_PER_BOX:
+                self._large.append(pos)
+                continue
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self._cells[(cx, cy)].append(pos)
+        if self._cells:
+            xs = [c[0] for c in self._cells]
+            ys = [c[1] for c in self._cells]
+            self._extent = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            self._extent = (0, 0, -1, -1)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def _cell(self, v: float) -> int:
+        return math.floor(v / self.cell_size)
+
+    def _candidates(self, x0: float, y0: float, x1: float, y1: float) -> List[int]:
+        """Positions of boxes registered in cells overlapping the rectangle (document order)."""
+        ex0, ey0, ex1, ey1 = self._extent
+        cx0 = max(self._cell(x0) if x0 > -math.inf else ex0, ex0)
+        cy0 = max(self._cell(y0) if y0 > -math.inf else ey0, ey0)
+        cx1 = min(self._cell(x1) if x1 < math.inf else ex1, ex1)
+        cy1 = min(self._cell(y1) if y1 < math.inf else ey1, ey1)
+        found: Set[int] = set(self._large)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                found.update(self._cells.get((cx, cy), ()))
+        return sorted(found)
+
+    # -- queries -------------------------------------------------------------
+
+    def on_lines(self, first: int, last: int) -> List[int]:
+        """Tokens whose line_idx is in [first, last]."""
+        if last - first + 1 > len(self._lines):
+            found = [p for line, ps in self._lines.items() if first <= line <= last for p in ps]
+        else:
+            found = [p for line in range(first, last + 1) for p in self._lines.get(line, ())]
+        return sorted(found)
+
+    def left_of(self, x: float, y: float, max_dy: float) -> List[int]:
+        """Tokens ending left of `x` (x1 < x) with vertical center within `max_dy` of `y`."""
+        hits = []
+        for pos in self._candidates(-math.inf, y - max_dy, x, y + max_dy):
+            token = self.tokens[pos]
+            if token.x1 < x and abs((token.y0 + token.y1) / 2 - y) < max_dy:
+                hits.append(pos)
+        return hits
+
+    def above(self, x0: float, x1: float, y: float, max_distance: float) -> List[int]:
+        """Tokens overlapping columns [x0, x1] whose bottom is at most `max_distance` above `y`."""
+        hits = []
+        for pos in self._candidates(x0, y - max_distance, x1, y):
+            bx0, by0, bx1, by1 = self.boxes[pos]
+            if by1 <= y and y - by1 <= max_distance and bx1 >= x0 and bx0 <= x1:
+                hits.append(pos)
+        return hits
+
+    def within_radius(self, x: float, y: float, radius: float) -> List[int]:
+        """Tokens whose box is within `radius` of the point (x, y)."""
+        hits = []
+        for pos in self._candidates(x - radius, y - radius, x + radius, y + radius):
+            bx0, by0, bx1, by1 = self.boxes[pos]
+            dx = max(bx0 - x, 0.0, x - bx1)
+            dy = max(by0 - y, 0.0, y - by1)
+            if dx * dx + dy * dy <= radius * radius:
+                hits.append(pos)
+        return hits
+
+    def in_region(self, x0: float, y0: float, x1: float, y1: float, tolerance: float = 0.0) -> List[int]:
+        """Tokens lying inside the rectangle grown by `tolerance` (as is_token_in_region)."""
+        rx0, ry0, rx1, ry1 = x0 - tolerance, y0 - tolerance, x1 + tolerance, y1 + tolerance
+        hits = []
+        for pos in self._candidates(rx0, ry0, rx1, ry1):
+            token = self.tokens[pos]
+            if token.x0 >= rx0 and token.x1 <= rx1 and token.y0 >= ry0 and token.y1 <= ry1:
+                hits.append(pos)
+        return hits
+
+    def tokens_at(self, positions: Iterable[int]) -> List[Any]:
+        return [self.tokens[p] for p in positions]
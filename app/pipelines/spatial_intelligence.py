@@ -14,9 +14,15 @@ by considering visual layout, not just text sequence.
 import re
 import logging
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple, Set
 from enum import Enum
 
+import numpy as np
+
+from app.pipelines.spatial_index import SpatialIndex
+from app.pipelines.token_geometry import TokenGeometry
+
 logger = logging.getLogger(__name__)
 
 
@@ -1059,10 +1065,25 @@ def extract_amount_from_text(text: str) -> Optional[float]:
     return max(amounts) if amounts else None
 
 
+@lru_cache(maxsize=4096)
+def _label_forms(text: str) -> Tuple[str, str]:
+    """Token text as compared against label sets: (cleaned, spacing-normalized)."""
+    text_lower = text.lower().strip()
+    text_clean = re.sub(r'[:\s]+$', '', text_lower)
+    # Also try normalizing spaced-out text
+    return text_clean, normalize_spaced_text(text_clean).lower()
+
+
+# Labels further than this many lines from an amount only match on the same row
+_LABEL_LINE_WINDOW = 3
+_LABEL_ROW_DY = 15
+
+
 def find_label_for_amount(
     amount_token: Any,
     all_tokens: List[Any],
     label_set: Set[str],
+    index: Optional[SpatialIndex] = None,
 ) -> Tuple[Optional[str], float]:
     """
     Find a label associated with an amount token.
@@ -1073,6 +1094,9 @@ def find_label_for_amount(
     3. In the same row (similar y-coordinate)
     4. Within ±3 lines (for column layouts where labels and amounts are on different rows)
     
+    With a SpatialIndex of `all_tokens`, only tokens within ±3 lines or on
+    the same row are examined instead of the whole document.
+    
     Returns:
         Tuple of (label_text, distance)
     """
@@ -1083,15 +1107,19 @@ def find_label_for_amount(
     amount_y = amount_token.center_y if hasattr(amount_token, 'center_y') else None
     amount_x = amount_token.x0 if hasattr(amount_token, 'x0') else None
     
+    if index is not None:
+        positions = set(index.on_lines(amount_line - _LABEL_LINE_WINDOW, amount_line + _LABEL_LINE_WINDOW))
+        if amount_y and amount_x:
+            positions.update(index.left_of(amount_x, amount_y, _LABEL_ROW_DY))
+        candidates = index.tokens_at(sorted(positions))
+    else:
+        candidates = all_tokens
+    
     best_label = None
     best_distance = float('inf')
     
-    for token in all_tokens:
-        text_lower = token.text.lower().strip()
-        text_clean = re.sub(r'[:\s]+$', '', text_lower)
-        
-        # Also try normalizing spaced-out text
-        text_normalized = normalize_spaced_text(text_clean).lower()
+    for token in candidates:
+        text_clean, text_normalized = _label_forms(token.text)
         
         if text_clean not in label_set and text_normalized not in label_set:
             continue
@@ -1124,7 +1152,7 @@ def find_label_for_amount(
         # Same row (similar y-coordinate) - for column layouts
         elif amount_y and hasattr(token, 'center_y') and token.center_y:
             y_diff = abs(amount_y - token.center_y)
-            if y_diff < 15:  # Within 15 points vertically
+            if y_diff < _LABEL_ROW_DY:  # Within 15 points vertically
                 if amount_x and hasattr(token, 'x1') and token.x1:
                     if token.x1 < amount_x:
                         distance = amount_x - token.x1
@@ -1176,6 +1204,9 @@ def extract_amounts_with_spatial_intelligence(
     
     # Step 1: Find all amount candidates
     amount_candidates: List[AmountCandidate] = []
+    # Neighbourhood lookups for label matching
+    index = SpatialIndex(tokens)
+    max_line = max((t.line_idx for t in tokens), default=0)
     
     for token in tokens:
         text = token.text.strip()
@@ -1224,7 +1255,7 @@ def extract_amounts_with_spatial_intelligence(
             (TAX_LABELS, "tax"),
             (DISCOUNT_LABELS, "discount"),
         ]:
-            label, distance = find_label_for_amount(token, tokens, label_set)
+            label, distance = find_label_for_amount(token, tokens, label_set, index=index)
             if label and distance < 200:  # Within reasonable distance
                 candidate.label = label
                 candidate.label_distance = distance
@@ -1235,7 +1266,6 @@ def extract_amounts_with_spatial_intelligence(
         
         # Position-based hints
         if hasattr(token, 'line_idx'):
-            max_line = max((t.line_idx for t in tokens), default=0)
             # Amounts near bottom are more likely totals
             if token.line_idx > max_line * 0.7:
                 if candidate.amount_type == "unknown":
@@ -2077,7 +2107,7 @@ class FontMetrics:
     inter_word_gaps: List[float] = field(default_factory=list)
 
 
-def detect_font_inconsistencies(tokens: List[Any]) -> List[FraudSignal]:
+def detect_font_inconsistencies(tokens: List[Any], geometry: Optional[TokenGeometry] = None) -> List[FraudSignal]:
     """
     Detect font inconsistencies using token geometry analysis.
     
@@ -2092,35 +2122,29 @@ def detect_font_inconsistencies(tokens: List[Any]) -> List[FraudSignal]:
     
     Args:
         tokens: List of tokens with bounding box coordinates
+        geometry: Prebuilt TokenGeometry of `tokens` (e.g. LayoutDocument.geometry())
         
     Returns:
         List of FraudSignal objects for detected font anomalies
     """
     signals = []
     
-    if not tokens or len(tokens) < 5:
-        return signals
-    
-    # Filter tokens with valid coordinates
-    valid_tokens = [
-        t for t in tokens 
-        if hasattr(t, 'x0') and hasattr(t, 'y0') and hasattr(t, 'x1') and hasattr(t, 'y1')
-        and t.x0 is not None and t.y0 is not None and t.x1 is not None and t.y1 is not None
-        and hasattr(t, 'text') and t.text and len(t.text.strip()) > 0
-    ]
-    
-    if len(valid_tokens) < 5:
+    if geometry is None and (not tokens or len(tokens) < 5):
         return signals
     
     # ==========================================================================
-    # 1. Group tokens by line (using y-position clustering)
+    # 1. Coordinates as arrays, tokens grouped by line (y-position clustering)
     # ==========================================================================
-    lines = _group_tokens_into_lines(valid_tokens)
+    # Only tokens with valid coordinates and text
+    geom = geometry if geometry is not None else TokenGeometry.from_tokens(tokens)
+    
+    if len(geom) < 5:
+        return signals
     
     # ==========================================================================
     # 2. Analyze baseline alignment within each line
     # ==========================================================================
-    baseline_anomalies = _detect_baseline_misalignment(lines)
+    baseline_anomalies = _detect_baseline_misalignment(geom)
     if baseline_anomalies:
         signals.append(FraudSignal(
             signal_id="BASELINE_MISALIGNMENT",
@@ -2137,7 +2161,7 @@ def detect_font_inconsistencies(tokens: List[Any]) -> List[FraudSignal]:
     # ==========================================================================
     # 3. Analyze height variation within lines
     # ==========================================================================
-    height_anomalies = _detect_height_variation_in_lines(lines)
+    height_anomalies = _detect_height_variation_in_lines(geom)
     if height_anomalies:
         signals.append(FraudSignal(
             signal_id="INTRA_LINE_HEIGHT_VARIATION",
@@ -2154,7 +2178,7 @@ def detect_font_inconsistencies(tokens: List[Any]) -> List[FraudSignal]:
     # ==========================================================================
     # 4. Analyze character density (chars per unit width)
     # ==========================================================================
-    density_anomalies = _detect_char_density_anomalies(valid_tokens)
+    density_anomalies = _detect_char_density_anomalies(geom)
     if density_anomalies:
         signals.append(FraudSignal(
             signal_id="CHARACTER_DENSITY_ANOMALY",
@@ -2171,7 +2195,7 @@ def detect_font_inconsistencies(tokens: List[Any]) -> List[FraudSignal]:
     # ==========================================================================
     # 5. Analyze OCR confidence patterns
     # ==========================================================================
-    confidence_anomalies = _detect_confidence_clustering(valid_tokens)
+    confidence_anomalies = _detect_confidence_clustering(geom)
     if confidence_anomalies:
         signals.append(FraudSignal(
             signal_id="OCR_CONFIDENCE_ANOMALY",
@@ -2188,7 +2212,7 @@ def detect_font_inconsistencies(tokens: List[Any]) -> List[FraudSignal]:
     # ==========================================================================
     # 6. Analyze inter-word spacing within lines
     # ==========================================================================
-    spacing_anomalies = _detect_spacing_anomalies(lines)
+    spacing_anomalies = _detect_spacing_anomalies(geom)
     if spacing_anomalies:
         severity = "high" if len(spacing_anomalies) > 2 else "medium"
         signals.append(FraudSignal(
@@ -2206,7 +2230,7 @@ def detect_font_inconsistencies(tokens: List[Any]) -> List[FraudSignal]:
     # ==========================================================================
     # 7. Detect aspect ratio anomalies (width/height ratio)
     # ==========================================================================
-    aspect_anomalies = _detect_aspect_ratio_anomalies(valid_tokens)
+    aspect_anomalies = _detect_aspect_ratio_anomalies(geom)
     if aspect_anomalies:
         signals.append(FraudSignal(
             signal_id="ASPECT_RATIO_ANOMALY",
@@ -2223,7 +2247,7 @@ def detect_font_inconsistencies(tokens: List[Any]) -> List[FraudSignal]:
     # ==========================================================================
     # 8. Detect vertical position discontinuities
     # ==========================================================================
-    vertical_jumps = _detect_vertical_discontinuities(lines)
+    vertical_jumps = _detect_vertical_discontinuities(geom)
     if vertical_jumps:
         signals.append(FraudSignal(
             signal_id="VERTICAL_POSITION_DISCONTINUITY",
@@ -2248,37 +2272,16 @@ def _group_tokens_into_lines(tokens: List[Any], tolerance: float = 5.0) -> Dict[
     """
     if not tokens:
         return {}
-    
-    # Sort by vertical position
-    sorted_tokens = sorted(tokens, key=lambda t: (t.y0 + t.y1) / 2)
-    
-    lines = {}
-    current_line = [sorted_tokens[0]]
-    line_idx = 0
-    current_y = (sorted_tokens[0].y0 + sorted_tokens[0].y1) / 2
-    
-    for token in sorted_tokens[1:]:
-        token_y = (token.y0 + token.y1) / 2
-        
-        # Check if token is on the same line (within tolerance)
-        if abs(token_y - current_y) <= tolerance:
-            current_line.append(token)
-        else:
-            # Save current line and start new one
-            if len(current_line) >= 2:  # Only keep lines with 2+ tokens
-                lines[line_idx] = sorted(current_line, key=lambda t: t.x0)  # Sort by x position
-                line_idx += 1
-            current_line = [token]
-            current_y = token_y
-    
-    # Don't forget the last line
-    if len(current_line) >= 2:
-        lines[line_idx] = sorted(current_line, key=lambda t: t.x0)
-    
-    return lines
+    return TokenGeometry(tokens, line_tolerance=tolerance).lines()
+
 
+def _mean_std(values: np.ndarray) -> Tuple[float, float]:
+    """Mean and population standard deviation."""
+    avg = values.sum() / len(values)
+    return float(avg), float((((values - avg) ** 2).sum() / len(values)) ** 0.5)
 
-def _detect_baseline_misalignment(lines: Dict[int, List[Any]], threshold: float = 3.0) -> List[Dict]:
+
+def _detect_baseline_misalignment(geom: TokenGeometry, threshold: float = 3.0) -> List[Dict]:
     """
     Detect lines where tokens have misaligned baselines.
     
@@ -2286,39 +2289,39 @@ def _detect_baseline_misalignment(lines: Dict[int, List[Any]], threshold: float
     all text should share approximately the same baseline.
     """
     anomalies = []
+    if not geom.line_count:
+        return anomalies
     
-    for line_idx, tokens in lines.items():
-        if len(tokens) < 3:
-            continue
-        
-        baselines = [t.y1 for t in tokens]
-        avg_baseline = sum(baselines) / len(baselines)
-        
-        # Find tokens that deviate significantly from average baseline
-        deviations = []
-        for i, token in enumerate(tokens):
-            deviation = abs(token.y1 - avg_baseline)
-            if deviation > threshold:
-                deviations.append({
-                    "text": token.text[:20],
-                    "deviation": round(deviation, 2),
-                    "expected_baseline": round(avg_baseline, 2),
-                    "actual_baseline": round(token.y1, 2),
+    baselines = geom.y1[geom.order]
+    avg_baseline = geom.line_sums(baselines) / np.maximum(geom.line_sizes, 1)
+    deviation = np.abs(baselines - avg_baseline[geom.line_of])
+    misaligned = deviation > threshold
+    misaligned_count = geom.line_sums(misaligned.astype(np.float64))
+    
+    # If more than 15% of tokens have baseline issues, flag the line
+    flagged = (geom.line_sizes >= 3) & (misaligned_count >= 1) & (misaligned_count / np.maximum(geom.line_sizes, 1) >= 0.15)
+    for line_idx in np.flatnonzero(flagged):
+        start, end = geom.line_starts[line_idx], geom.line_starts[line_idx + 1]
+        examples = []
+        for pos in range(start, end):
+            if misaligned[pos] and len(examples) < 2:
+                examples.append({
+                    "text": geom.tokens[geom.order[pos]].text[:20],
+                    "deviation": round(float(deviation[pos]), 2),
+                    "expected_baseline": round(float(avg_baseline[line_idx]), 2),
+                    "actual_baseline": round(float(baselines[pos]), 2),
                 })
-        
-        # If more than 20% of tokens have baseline issues, flag the line
-        if len(deviations) >= 1 and len(deviations) / len(tokens) >= 0.15:
-            anomalies.append({
-                "line_idx": line_idx,
-                "token_count": len(tokens),
-                "misaligned_count": len(deviations),
-                "examples": deviations[:2],
-            })
+        anomalies.append({
+            "line_idx": int(line_idx),
+            "token_count": int(geom.line_sizes[line_idx]),
+            "misaligned_count": int(misaligned_count[line_idx]),
+            "examples": examples,
+        })
     
     return anomalies
 
 
-def _detect_height_variation_in_lines(lines: Dict[int, List[Any]], cv_threshold: float = 0.25) -> List[Dict]:
+def _detect_height_variation_in_lines(geom: TokenGeometry, cv_threshold: float = 0.25) -> List[Dict]:
     """
     Detect lines with abnormal height variation.
     
@@ -2326,47 +2329,42 @@ def _detect_height_variation_in_lines(lines: Dict[int, List[Any]], cv_threshold:
     should have CV < 0.15. Higher values indicate mixed fonts.
     """
     anomalies = []
+    if not geom.line_count:
+        return anomalies
     
-    for line_idx, tokens in lines.items():
-        if len(tokens) < 3:
-            continue
-        
-        heights = [abs(t.y1 - t.y0) for t in tokens if abs(t.y1 - t.y0) > 0]
-        if len(heights) < 3:
-            continue
-        
-        avg_height = sum(heights) / len(heights)
-        if avg_height == 0:
-            continue
-        
-        # Calculate standard deviation
-        variance = sum((h - avg_height) ** 2 for h in heights) / len(heights)
-        std_dev = variance ** 0.5
-        cv = std_dev / avg_height
-        
-        if cv > cv_threshold:
-            # Find the outlier tokens
-            outliers = []
-            for token in tokens:
-                h = abs(token.y1 - token.y0)
-                if h > 0 and abs(h - avg_height) > std_dev * 1.5:
-                    outliers.append({
-                        "text": token.text[:20],
-                        "height": round(h, 2),
-                        "avg_height": round(avg_height, 2),
-                    })
-            
-            anomalies.append({
-                "line_idx": line_idx,
-                "cv": round(cv, 3),
-                "avg_height": round(avg_height, 2),
-                "outliers": outliers[:2],
-            })
+    heights = geom.height[geom.order]
+    has_height = heights > 0
+    counts = geom.line_sums(has_height.astype(np.float64))
+    usable = (geom.line_sizes >= 3) & (counts >= 3)
+    avg_height = geom.line_sums(heights, has_height) / np.maximum(counts, 1)
+    variance = geom.line_sums((heights - avg_height[geom.line_of]) ** 2, has_height) / np.maximum(counts, 1)
+    std_dev = variance ** 0.5
+    cv = np.divide(std_dev, avg_height, out=np.zeros_like(std_dev), where=avg_height > 0)
+    
+    for line_idx in np.flatnonzero(usable & (avg_height > 0) & (cv > cv_threshold)):
+        start, end = geom.line_starts[line_idx], geom.line_starts[line_idx + 1]
+        avg, std = avg_height[line_idx], std_dev[line_idx]
+        # Find the outlier tokens
+        outliers = []
+        for pos in range(start, end):
+            h = heights[pos]
+            if h > 0 and abs(h - avg) > std * 1.5 and len(outliers) < 2:
+                outliers.append({
+                    "text": geom.tokens[geom.order[pos]].text[:20],
+                    "height": round(float(h), 2),
+                    "avg_height": round(float(avg), 2),
+                })
+        anomalies.append({
+            "line_idx": int(line_idx),
+            "cv": round(float(cv[line_idx]), 3),
+            "avg_height": round(float(avg), 2),
+            "outliers": outliers,
+        })
     
     return anomalies
 
 
-def _detect_char_density_anomalies(tokens: List[Any], z_threshold: float = 2.5) -> List[Dict]:
+def _detect_char_density_anomalies(geom: TokenGeometry, z_threshold: float = 2.5) -> List[Dict]:
     """
     Detect tokens with abnormal character density (chars per unit width).
     
@@ -2375,41 +2373,29 @@ def _detect_char_density_anomalies(tokens: List[Any], z_threshold: float = 2.5)
     """
     anomalies = []
     
-    # Calculate char density for each token
-    densities = []
-    for token in tokens:
-        width = abs(token.x1 - token.x0)
-        if width > 0 and len(token.text.strip()) >= 2:
-            density = len(token.text.strip()) / width
-            densities.append((token, density))
-    
-    if len(densities) < 10:
+    idx = np.flatnonzero((geom.width > 0) & (geom.text_len >= 2))
+    if len(idx) < 10:
         return anomalies
     
-    # Calculate mean and std dev
-    density_values = [d[1] for d in densities]
-    avg_density = sum(density_values) / len(density_values)
-    variance = sum((d - avg_density) ** 2 for d in density_values) / len(density_values)
-    std_dev = variance ** 0.5
-    
+    densities = geom.text_len[idx] / geom.width[idx]
+    avg_density, std_dev = _mean_std(densities)
     if std_dev == 0:
         return anomalies
     
     # Find outliers using z-score
-    for token, density in densities:
-        z_score = abs(density - avg_density) / std_dev
-        if z_score > z_threshold:
-            anomalies.append({
-                "text": token.text[:20],
-                "density": round(density, 4),
-                "avg_density": round(avg_density, 4),
-                "z_score": round(z_score, 2),
-            })
+    z_scores = np.abs(densities - avg_density) / std_dev
+    for i in np.flatnonzero(z_scores > z_threshold):
+        anomalies.append({
+            "text": geom.tokens[idx[i]].text[:20],
+            "density": round(float(densities[i]), 4),
+            "avg_density": round(avg_density, 4),
+            "z_score": round(float(z_scores[i]), 2),
+        })
     
     return anomalies
 
 
-def _detect_confidence_clustering(tokens: List[Any], threshold: float = 0.7) -> List[Dict]:
+def _detect_confidence_clustering(geom: TokenGeometry, threshold: float = 0.7) -> List[Dict]:
     """
     Detect tokens with significantly lower OCR confidence.
     
@@ -2418,36 +2404,26 @@ def _detect_confidence_clustering(tokens: List[Any], threshold: float = 0.7) ->
     """
     anomalies = []
     
-    # Get tokens with confidence scores
-    tokens_with_conf = [
-        t for t in tokens 
-        if hasattr(t, 'confidence') and t.confidence is not None
-    ]
-    
-    if len(tokens_with_conf) < 5:
+    idx = np.flatnonzero(~np.isnan(geom.conf))
+    if len(idx) < 5:
         return anomalies
     
-    # Calculate average confidence
-    confidences = [t.confidence for t in tokens_with_conf]
-    avg_conf = sum(confidences) / len(confidences)
+    confidences = geom.conf[idx]
+    avg_conf = float(confidences.sum() / len(confidences))
     
-    # Find tokens with significantly lower confidence
-    for token in tokens_with_conf:
-        # Token confidence is much lower than average
-        if token.confidence < threshold and token.confidence < avg_conf * 0.8:
-            # Skip very short tokens (often noise)
-            if len(token.text.strip()) < 2:
-                continue
-            anomalies.append({
-                "text": token.text[:20],
-                "confidence": round(token.confidence, 3),
-                "avg_confidence": round(avg_conf, 3),
-            })
+    # Token confidence is much lower than average; very short tokens are often noise
+    low = (confidences < threshold) & (confidences < avg_conf * 0.8) & (geom.text_len[idx] >= 2)
+    for i in np.flatnonzero(low):
+        anomalies.append({
+            "text": geom.tokens[idx[i]].text[:20],
+            "confidence": round(float(confidences[i]), 3),
+            "avg_confidence": round(avg_conf, 3),
+        })
     
     return anomalies
 
 
-def _detect_spacing_anomalies(lines: Dict[int, List[Any]], z_threshold: float = 2.5) -> List[Dict]:
+def _detect_spacing_anomalies(geom: TokenGeometry, z_threshold: float = 2.5) -> List[Dict]:
     """
     Detect lines with abnormal inter-word spacing.
     
@@ -2455,62 +2431,47 @@ def _detect_spacing_anomalies(lines: Dict[int, List[Any]], z_threshold: float =
     gaps often indicate manual text placement or editing.
     """
     anomalies = []
+    if len(geom.order) < 2:
+        return anomalies
     
-    # Collect all inter-word gaps across lines
-    all_gaps = []
-    line_gaps = {}
-    
-    for line_idx, tokens in lines.items():
-        if len(tokens) < 3:
-            continue
-        
-        gaps = []
-        for i in range(len(tokens) - 1):
-            gap = tokens[i + 1].x0 - tokens[i].x1
-            if gap > 0:  # Only positive gaps (tokens not overlapping)
-                gaps.append(gap)
-                all_gaps.append(gap)
-        
-        if gaps:
-            line_gaps[line_idx] = gaps
-    
+    # Gap between each token and the next one on the same line
+    gaps = geom.x0[geom.order[1:]] - geom.x1[geom.order[:-1]]
+    gap_line = geom.line_of[:-1]
+    # Only positive gaps (tokens not overlapping) on lines of 3+ tokens
+    counted = (geom.line_of[1:] == gap_line) & (gaps > 0) & (geom.line_sizes[gap_line] >= 3)
+    all_gaps = gaps[counted]
     if len(all_gaps) < 10:
         return anomalies
     
     # Calculate global statistics
-    avg_gap = sum(all_gaps) / len(all_gaps)
-    variance = sum((g - avg_gap) ** 2 for g in all_gaps) / len(all_gaps)
-    std_dev = variance ** 0.5
-    
+    avg_gap, std_dev = _mean_std(all_gaps)
     if std_dev == 0:
         return anomalies
     
-    # Check each line for abnormal spacing
-    for line_idx, gaps in line_gaps.items():
-        # Calculate line's average gap
-        line_avg = sum(gaps) / len(gaps)
-        
-        # Check for excessive gaps (potential manual spacing)
-        excessive_gaps = [g for g in gaps if g > avg_gap + z_threshold * std_dev]
-        
-        # Check for high variance within line
-        line_variance = sum((g - line_avg) ** 2 for g in gaps) / len(gaps) if gaps else 0
-        line_std = line_variance ** 0.5
-        line_cv = line_std / line_avg if line_avg > 0 else 0
-        
-        if excessive_gaps or line_cv > 0.5:
-            anomalies.append({
-                "line_idx": line_idx,
-                "excessive_gaps": len(excessive_gaps),
-                "max_gap": round(max(gaps), 2) if gaps else 0,
-                "avg_gap": round(line_avg, 2),
-                "cv": round(line_cv, 3),
-            })
+    lines = gap_line[counted]
+    n_gaps = np.bincount(lines, minlength=geom.line_count)
+    line_avg = np.bincount(lines, weights=all_gaps, minlength=geom.line_count) / np.maximum(n_gaps, 1)
+    line_var = np.bincount(lines, weights=(all_gaps - line_avg[lines]) ** 2, minlength=geom.line_count) / np.maximum(n_gaps, 1)
+    line_std = line_var ** 0.5
+    line_cv = np.divide(line_std, line_avg, out=np.zeros_like(line_std), where=line_avg > 0)
+    # Excessive gaps (potential manual spacing)
+    excessive = np.bincount(lines, weights=(all_gaps > avg_gap + z_threshold * std_dev), minlength=geom.line_count)
+    max_gap = np.zeros(geom.line_count)
+    np.maximum.at(max_gap, lines, all_gaps)
+    
+    for line_idx in np.flatnonzero((n_gaps > 0) & ((excessive > 0) | (line_cv > 0.5))):
+        anomalies.append({
+            "line_idx": int(line_idx),
+            "excessive_gaps": int(excessive[line_idx]),
+            "max_gap": round(float(max_gap[line_idx]), 2),
+            "avg_gap": round(float(line_avg[line_idx]), 2),
+            "cv": round(float(line_cv[line_idx]), 3),
+        })
     
     return anomalies
 
 
-def _detect_aspect_ratio_anomalies(tokens: List[Any], z_threshold: float = 2.5) -> List[Dict]:
+def _detect_aspect_ratio_anomalies(geom: TokenGeometry, z_threshold: float = 2.5) -> List[Dict]:
     """
     Detect tokens with abnormal aspect ratios (width/height).
     
@@ -2518,44 +2479,31 @@ def _detect_aspect_ratio_anomalies(tokens: List[Any], z_threshold: float = 2.5)
     """
     anomalies = []
     
-    # Calculate aspect ratio for each token (only tokens with reasonable size)
-    ratios = []
-    for token in tokens:
-        width = abs(token.x1 - token.x0)
-        height = abs(token.y1 - token.y0)
-        
-        if height > 2 and width > 2 and len(token.text.strip()) >= 2:
-            # Normalize by character count for fair comparison
-            ratio = (width / len(token.text.strip())) / height
-            ratios.append((token, ratio))
-    
-    if len(ratios) < 10:
+    # Only tokens with reasonable size
+    idx = np.flatnonzero((geom.height > 2) & (geom.width > 2) & (geom.text_len >= 2))
+    if len(idx) < 10:
         return anomalies
     
-    # Calculate statistics
-    ratio_values = [r[1] for r in ratios]
-    avg_ratio = sum(ratio_values) / len(ratio_values)
-    variance = sum((r - avg_ratio) ** 2 for r in ratio_values) / len(ratio_values)
-    std_dev = variance ** 0.5
-    
+    # Normalize by character count for fair comparison
+    ratios = (geom.width[idx] / geom.text_len[idx]) / geom.height[idx]
+    avg_ratio, std_dev = _mean_std(ratios)
     if std_dev == 0:
         return anomalies
     
     # Find outliers
-    for token, ratio in ratios:
-        z_score = abs(ratio - avg_ratio) / std_dev
-        if z_score > z_threshold:
-            anomalies.append({
-                "text": token.text[:20],
-                "aspect_ratio": round(ratio, 3),
-                "avg_ratio": round(avg_ratio, 3),
-                "z_score": round(z_score, 2),
-            })
+    z_scores = np.abs(ratios - avg_ratio) / std_dev
+    for i in np.flatnonzero(z_scores > z_threshold):
+        anomalies.append({
+            "text": geom.tokens[idx[i]].text[:20],
+            "aspect_ratio": round(float(ratios[i]), 3),
+            "avg_ratio": round(avg_ratio, 3),
+            "z_score": round(float(z_scores[i]), 2),
+        })
     
     return anomalies
 
 
-def _detect_vertical_discontinuities(lines: Dict[int, List[Any]], z_threshold: float = 2.5) -> List[Dict]:
+def _detect_vertical_discontinuities(geom: TokenGeometry, z_threshold: float = 2.5) -> List[Dict]:
     """
     Detect irregular vertical spacing between lines.
     
@@ -2563,45 +2511,30 @@ def _detect_vertical_discontinuities(lines: Dict[int, List[Any]], z_threshold: f
     """
     anomalies = []
     
-    if len(lines) < 4:
+    if geom.line_count < 4:
         return anomalies
     
-    # Calculate line positions (average y of each line)
-    line_positions = []
-    for line_idx in sorted(lines.keys()):
-        tokens = lines[line_idx]
-        avg_y = sum((t.y0 + t.y1) / 2 for t in tokens) / len(tokens)
-        line_positions.append((line_idx, avg_y))
-    
-    # Calculate line spacings
-    spacings = []
-    for i in range(len(line_positions) - 1):
-        spacing = line_positions[i + 1][1] - line_positions[i][1]
-        if spacing > 0:
-            spacings.append((line_positions[i][0], line_positions[i + 1][0], spacing))
-    
-    if len(spacings) < 3:
+    # Line positions (average vertical center of each line) and spacings
+    positions = geom.line_sums(geom.center_y[geom.order]) / geom.line_sizes
+    spacing = np.diff(positions)
+    upper = np.flatnonzero(spacing > 0)
+    if len(upper) < 3:
         return anomalies
     
-    # Calculate statistics
-    spacing_values = [s[2] for s in spacings]
-    avg_spacing = sum(spacing_values) / len(spacing_values)
-    variance = sum((s - avg_spacing) ** 2 for s in spacing_values) / len(spacing_values)
-    std_dev = variance ** 0.5
-    
+    spacings = spacing[upper]
+    avg_spacing, std_dev = _mean_std(spacings)
     if std_dev == 0:
         return anomalies
     
     # Find outliers
-    for line1, line2, spacing in spacings:
-        z_score = abs(spacing - avg_spacing) / std_dev
-        if z_score > z_threshold:
-            anomalies.append({
-                "between_lines": f"{line1}-{line2}",
-                "spacing": round(spacing, 2),
-                "avg_spacing": round(avg_spacing, 2),
-                "z_score": round(z_score, 2),
-            })
+    z_scores = np.abs(spacings - avg_spacing) / std_dev
+    for i in np.flatnonzero(z_scores > z_threshold):
+        anomalies.append({
+            "between_lines": f"{upper[i]}-{upper[i] + 1}",
+            "spacing": round(float(spacings[i]), 2),
+            "avg_spacing": round(avg_spacing, 2),
+            "z_score": round(float(z_scores[i]), 2),
+        })
     
     return anomalies
 
@@ -3183,10 +3116,14 @@ def run_fraud_detection(
     receipt_date: Optional[str] = None,
     page_width: float = 612,
     page_height: float = 792,
+    geometry: Optional[TokenGeometry] = None,
 ) -> Dict[str, Any]:
     """
     Run comprehensive fraud detection on a document.
     
+    `geometry` is an optional prebuilt TokenGeometry of `tokens` for the
+    font-inconsistency detectors (e.g. LayoutDocument.geometry()).
+    
     Returns:
         Dict with signals, risk_score, risk_level, and summary.
     """
@@ -3212,7 +3149,7 @@ def run_fraud_detection(
     all_signals.extend(detect_address_anomalies(tokens=tokens))
     
     # Font inconsistencies (geometry-based detection)
-    all_signals.extend(detect_font_inconsistencies(tokens=tokens))
+    all_signals.extend(detect_font_inconsistencies(tokens=tokens, geometry=geometry))
     
     # Calculate risk score
     severity_weights = {"critical": 1.0, "high": 0.7, "medium": 0.4, "low": 0.15}
@@ -9,6 +9,7 @@ RULE_ID: R10_TEMPLATE_QUALITY
 """
 
 import unicodedata
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional, Any
 
 
@@ -207,6 +208,117 @@ def levenshtein_distance(s1: str, s2: str) -> int:
     return previous_row[-1]
 
 
+# =============================================================================
+# Typo Index (symmetric deletion, SymSpell-style)
+# =============================================================================
+# Every string within edit distance 2 of a keyword shares at least one
+# "deletion variant" (the string with up to 2 characters removed) with it.
+# Indexing the keyword deletions once per language turns the per-token
+# Levenshtein scan into a handful of dict lookups; candidates are then
+# confirmed with levenshtein_distance so evidence stays exact.
+
+TYPO_MAX_EDIT_DISTANCE = 2
+
+
+def _deletion_variants(word: str, max_distance: int = TYPO_MAX_EDIT_DISTANCE) -> set:
+    """Return ``word`` plus every string obtained by deleting up to N characters."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for w in frontier:
+            for i in range(len(w)):
+                next_frontier.add(w[:i] + w[i + 1:])
+        next_frontier -= variants
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+
+class TypoIndex:
+    """
+    Precomputed per-language lookup structure for keyword typo detection.
+
+    Attributes:
+        lang: Language code the index was built for
+        keywords: (keyword, normalized keyword) pairs in SEMANTIC_KEYWORDS_BY_LANG order
+        patterns: (correct, typo_variant, correct_norm, typo_norm, edit_distance)
+            tuples in COMMON_TYPO_PATTERNS order
+    """
+
+    def __init__(self, lang: str):
+        self.lang = lang
+        self.keywords: List[Tuple[str, str]] = [
+            (kw, normalize_text(kw)) for kw in SEMANTIC_KEYWORDS_BY_LANG.get(lang, ())
+        ]
+        self.patterns: List[Tuple[str, str, str, str, int]] = []
+        for correct, typo_variant in COMMON_TYPO_PATTERNS.get(lang, ()):
+            correct_norm = normalize_text(correct)
+            typo_norm = normalize_text(typo_variant)
+            self.patterns.append((
+                correct, typo_variant, correct_norm, typo_norm,
+                levenshtein_distance(typo_norm, correct_norm),
+            ))
+
+        self._deletes: Dict[str, set] = {}
+        for _, kw_norm in self.keywords:
+            for variant in _deletion_variants(kw_norm):
+                self._deletes.setdefault(variant, set()).add(kw_norm)
+
+        lengths = [len(kw_norm) for _, kw_norm in self.keywords] or [0]
+        self._min_len = min(lengths) - TYPO_MAX_EDIT_DISTANCE
+        self._max_len = max(lengths) + TYPO_MAX_EDIT_DISTANCE
+
+    def near_keywords(self, token: str) -> Dict[str, int]:
+        """
+        Find normalized keywords within edit distance 1-2 of ``token``.
+
+        Returns:
+            Mapping of normalized keyword -> edit distance (exact matches excluded)
+        """
+        if not (self._min_len <= len(token) <= self._max_len):
+            return {}
+
+        candidates: set = set()
+        for variant in _deletion_variants(token):
+            hits = self._deletes.get(variant)
+            if hits:
+                candidates |= hits
+
+        matches = {}
+        for kw_norm in candidates:
+            distance = levenshtein_distance(token, kw_norm)
+            if 1 <= distance <= TYPO_MAX_EDIT_DISTANCE:
+                matches[kw_norm] = distance
+        return matches
+
+    def match_tokens(self, tokens: List[str]) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        Match every token against the keyword index in one pass.
+
+        Each distinct token is looked up once; the result keeps one entry
+        per token occurrence, in token order.
+
+        Returns:
+            Mapping of normalized keyword -> [(token, edit_distance), ...]
+        """
+        per_token: Dict[str, Dict[str, int]] = {}
+        by_keyword: Dict[str, List[Tuple[str, int]]] = {}
+        for token in tokens:
+            matches = per_token.get(token)
+            if matches is None:
+                matches = per_token[token] = self.near_keywords(token)
+            for kw_norm, distance in matches.items():
+                by_keyword.setdefault(kw_norm, []).append((token, distance))
+        return by_keyword
+
+
+@lru_cache(maxsize=None)
+def get_typo_index(lang: str) -> TypoIndex:
+    """Return the (cached) typo index for a language."""
+    return TypoIndex(lang)
+
+
 # =============================================================================
 # S1: Keyword Typo Detector (Language-Gated)
 # =============================================================================
@@ -243,28 +355,23 @@ def detect_keyword_typos(tf: Dict[str, Any], lang: Optional[str]) -> Tuple[float
     tokens = re.findall(r'\b\w+\b', text_normalized)
     tokens_set = set(tokens)  # For faster lookup
     
+    index = get_typo_index(lang)
     typos = []
     
     # Phase 1: Check known typo patterns (fast path)
-    if lang in COMMON_TYPO_PATTERNS:
-        for correct, typo_variant in COMMON_TYPO_PATTERNS[lang]:
-            correct_normalized = normalize_text(correct)
-            typo_normalized = normalize_text(typo_variant)
-            
-            # If typo variant is present but correct form is not
-            if typo_normalized in tokens_set and correct_normalized not in text_normalized:
-                typos.append({
-                    "expected": correct,
-                    "found": typo_variant,
-                    "edit_distance": levenshtein_distance(typo_normalized, correct_normalized),
-                    "pattern_match": True,  # Known typo pattern
-                })
-    
-    # Phase 2: Levenshtein distance for unknown typos (slower path)
-    for keyword in keywords:
-        # Normalize keyword for comparison
-        keyword_normalized = normalize_text(keyword)
-        
+    for correct, typo_variant, correct_normalized, typo_normalized, distance in index.patterns:
+        # If typo variant is present but correct form is not
+        if typo_normalized in tokens_set and correct_normalized not in text_normalized:
+            typos.append({
+                "expected": correct,
+                "found": typo_variant,
+                "edit_distance": distance,
+                "pattern_match": True,  # Known typo pattern
+            })
+    
+    # Phase 2: Near-matches for unknown typos via the deletion index
+    near_matches = None
+    for keyword, keyword_normalized in index.keywords:
         # Skip if exact keyword is present (normalized comparison)
         if keyword_normalized in text_normalized:
             continue
@@ -278,22 +385,17 @@ def detect_keyword_typos(tf: Dict[str, Any], lang: Optional[str]) -> Tuple[float
         if keyword_normalized[:prefix_len] not in text_normalized:
             continue
         
-        # Look for near-matches in tokens
-        for token in tokens:
-            # Only check tokens of similar length
-            if abs(len(token) - len(keyword_normalized)) > 2:
-                continue
-            
-            distance = levenshtein_distance(token, keyword_normalized)
-            
-            # Edit distance of 1 or 2 = likely typo
-            if distance in (1, 2):
-                typos.append({
-                    "expected": keyword,  # Show original keyword with accents
-                    "found": token,
-                    "edit_distance": distance,
-                    "pattern_match": False,  # Discovered via Levenshtein
-                })
+        # Edit distance of 1 or 2 = likely typo (computed once for all tokens)
+        if near_matches is None:
+            near_matches = index.match_tokens(tokens)
+        
+        for token, distance in near_matches.get(keyword_normalized, ()):
+            typos.append({
+                "expected": keyword,  # Show original keyword with accents
+                "found": token,
+                "edit_distance": distance,
+                "pattern_match": False,  # Discovered via edit distance
+            })
     
     if not typos:
         return 0.0, None
@@ -0,0 +1,117 @@
+# app/pipelines/token_geometry.py
+"""
+Struct-of-arrays view of layout tokens for geometry-based detectors.
+
+The font-inconsistency detectors in spatial_intelligence used to walk Python
+token objects, recomputing centers, heights and widths and re-sorting lines
+in every detector. TokenGeometry reads the coordinates once into NumPy arrays
+(x0, y0, x1, y1, conf, text length) and groups the tokens into lines once;
+the detectors then work on whole arrays, with per-line statistics computed as
+segment sums (np.bincount over line ids), so dense multi-page documents with
+thousands of tokens stay fast.
+
+    geom = TokenGeometry.from_tokens(doc.tokens)   # or doc.geometry()
+    geom.line_tokens(i)                            # tokens of line i, left to right
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class TokenGeometry:
+    """
+    Coordinates of tokens with a bounding box and non-blank text, as arrays.
+
+    Attributes (all indexed like `tokens`):
+        x0, y0, x1, y1: box edges
+        conf: OCR confidence (NaN where the token has none)
+        text_len: length of the stripped token text
+    Line grouping (see group_lines):
+        order: token indices line by line, left to right within a line
+        line_starts: offset of each line in `order` (plus a final end offset)
+        line_of: line id of each position in `order`
+    """
+
+    def __init__(self, tokens: Sequence[Any], line_tolerance: float = 5.0, _rows: Optional[list] = None):
+        self.tokens: List[Any] = list(tokens)
+        if _rows is None:
+            _rows = [
+                (t.x0, t.y0, t.x1, t.y1, getattr(t, "confidence", None), len(t.text.strip()))
+                for t in self.tokens
+            ]
+        rows = np.array(_rows, dtype=np.float64).reshape(len(self.tokens), 6)
+        # None confidences become NaN
+        self.x0, self.y0, self.x1, self.y1, self.conf = rows[:, :5].T
+        self.text_len = rows[:, 5].astype(np.int64)
+        self.width = np.abs(self.x1 - self.x0)
+        self.height = np.abs(self.y1 - self.y0)
+        self.center_y = (self.y0 + self.y1) / 2
+        self.group_lines(line_tolerance)
+
+    @classmethod
+    def from_tokens(cls, tokens: Sequence[Any], line_tolerance: float = 5.0) -> "TokenGeometry":
+        """Geometry of the tokens that have all four coordinates and non-blank text."""
+        kept, rows = [], []
+        for t in tokens:
+            x0, y0 = getattr(t, "x0", None), getattr(t, "y0", None)
+            x1, y1 = getattr(t, "x1", None), getattr(t, "y1", None)
+            text = getattr(t, "text", None)
+            if x0 is None or y0 is None or x1 is None or y1 is None or not text:
+                continue
+            text_len = len(text.strip())
+            if text_len:
+                kept.append(t)
+                rows.append((x0, y0, x1, y1, getattr(t, "confidence", None), text_len))
+        return cls(kept, line_tolerance, _rows=rows)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts) - 1
+
+    def group_lines(self, tolerance: float = 5.0) -> None:
+        """
+        Cluster tokens into lines by vertical center.
+
+        Tokens sorted by center y join the current line while within
+        `tolerance` of the center of the token that started it. Lines with a
+        single token are dropped; tokens within a line are ordered by x0.
+        """
+        by_y = np.argsort(self.center_y, kind="stable")
+        centers = self.center_y[by_y].tolist()
+        # Positions in by_y where a new line starts
+        starts = [0] if centers else []
+        anchor = centers[0] if centers else 0.0
+        for i in range(1, len(centers)):
+            if abs(centers[i] - anchor) > tolerance:
+                starts.append(i)
+                anchor = centers[i]
+        sizes = np.diff(np.array(starts + [len(centers)], dtype=np.int64))
+        line_of_sorted = np.repeat(np.arange(len(sizes)), sizes)
+        # Lines with a single token are dropped
+        keep = sizes[line_of_sorted] >= 2
+        members, member_line = by_y[keep], line_of_sorted[keep]
+        # Group by line, then left to right (stable: ties keep the y order)
+        self.order = members[np.lexsort((self.x0[members], member_line))]
+        kept_sizes = sizes[sizes >= 2]
+        self.line_starts = np.concatenate(([0], np.cumsum(kept_sizes))).astype(np.int64)
+        self.line_sizes = kept_sizes
+        self.line_of = np.repeat(np.arange(self.line_count), self.line_sizes)
+
+    def line_tokens(self, line: int) -> List[Any]:
+        """Tokens of `line`, left to right."""
+        idx = self.order[self.line_starts[line]:self.line_starts[line + 1]]
+        return [self.tokens[i] for i in idx]
+
+    def lines(self) -> Dict[int, List[Any]]:
+        """{line id: tokens left to right} for every line."""
+        return {i: self.line_tokens(i) for i in range(self.line_count)}
+
+    def line_sums(self, values: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Per-line sums of `values` (given in `order`), optionally only where `mask`."""
+        if mask is not None:
+            values = np.where(mask, values, 0.0)
+        return np.bincount(self.line_of, weights=values, minlength=self.line_count)
@@ -0,0 +1,252 @@
+# app/pipelines/vision_combined.py
+"""
+Combined multi-task Vision LLM prompt.
+
+One `/analyze/hybrid` used to send the same image to the VLM up to four times:
+structured extraction (vision_extract.extract_receipt_fields), forensic claims
+and visual-integrity assessment (vision_llm.build_vision_assessment), and the
+OCR fallback (ocr_fallback.extract_fields_with_vision). Each call re-encoded and
+re-uploaded the image and paid prefill again.
+
+This module asks for all three in ONE request with one JSON schema:
+
+{
+  "extraction":   {...vision_extract fields...},
+  "forensics":    {"is_suspicious", "confidence", "claims", "overall_assessment"},
+  "authenticity": {"visual_integrity", "confidence", "observable_reasons"}
+}
+
+and fans the parsed sections out to the existing contracts, so
+merge_vlm_into_features and the veto-safe visual_integrity dict are unchanged.
+
+Results are memoized per image content (sha256 of the encoded payload) with
+single-flight semantics: when the rules engine and the vision engine run in
+parallel threads on the same upload, the second caller waits for the first
+call instead of issuing its own. Failed calls are not memoized, so callers
+fall back to the original single-task prompts.
+
+build_vision_assessment and the OCR fallback only use the combined result
+when their own model (VISION_MODEL by default) is VISION_COMBINED_MODEL;
+otherwise they make their single-task calls on their own model, so the
+forensic veto never silently runs on a different VLM. vision_extract then
+sends its own single-task extraction prompt too: with no other caller to
+share it, the combined call would only add forensic output and a lossless
+payload to the extraction.
+
+Configuration:
+- VISION_COMBINED_PROMPT   (default true)
+- VISION_COMBINED_MODEL    (default VISION_EXTRACT_MODEL)
+- VISION_COMBINED_TIMEOUT  (default 180s)
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.pipelines.vision_extract import (
+    VISION_EXTRACT_MODEL,
+    _encode_image_with_meta,
+    _parse_json_response,
+    _query_ollama_vision_b64,
+)
+from app.pipelines.vision_payload import forensic_policy_for_model
+
+logger = logging.getLogger(__name__)
+
+VISION_COMBINED_ENABLED = os.getenv("VISION_COMBINED_PROMPT", "true").lower() == "true"
+VISION_COMBINED_MODEL = os.getenv("VISION_COMBINED_MODEL", VISION_EXTRACT_MODEL)
+VISION_COMBINED_TIMEOUT = int(os.getenv("VISION_COMBINED_TIMEOUT", "180"))
+
+# Bump when the schema below changes so memoized results are not reused
+COMBINED_PROMPT_VERSION = "1"
+
+COMBINED_PROMPT = """You are a forensic document examiner. Look at this receipt/invoice image carefully and do THREE tasks at once.
+
+Return ONE JSON object with exactly these three top-level keys:
+
+{
+  "extraction": {
+    "merchant_name": "business name exactly as printed",
+    "address": "full address if visible",
+    "phone": "phone number if visible",
+    "receipt_date": "date on the receipt (MM/DD/YY or as printed)",
+    "receipt_time": "time if visible",
+    "items": [{"qty": 1, "name": "item name", "price": 0.00}],
+    "subtotal": null,
+    "tax": null,
+    "total": null,
+    "currency_symbol": "$",
+    "payment_method": "cash/card/debit/credit",
+    "card_last4": "last 4 digits if visible",
+    "card_type": "VISA/MASTERCARD/DEBIT etc",
+    "card_entry_method": "CHIP/SWIPE/TAP",
+    "card_transaction_date": "date on card transaction if different from receipt date",
+    "receipt_number": "receipt or transaction number if visible",
+    "status": "APPROVED/DECLINED if visible",
+    "fuel_type": "petrol/diesel/premium if this is a fuel receipt",
+    "quantity_litres": null,
+    "rate_per_litre": null,
+    "vehicle_number": "vehicle/registration number if visible",
+    "gstin": "GSTIN number if visible (Indian tax ID)",
+    "vat_tin": "VAT TIN number if visible"
+  },
+  "forensics": {
+    "is_suspicious": true/false,
+    "confidence": 0.0-1.0,
+    "claims": [
+      {
+        "claim_id": "VCLM_XXX",
+        "category": "spacing|typography|alignment|editing_artifact|quality|layout|watermark",
+        "observable_claim": "short, specific, visually verifiable claim",
+        "severity": "HARD_FAIL|CRITICAL|WARNING|INFO",
+        "confidence": 0.0-1.0,
+        "where": {
+          "region": "merchant|date|items|subtotal|tax|total|footer|unknown",
+          "notes": "where in the receipt this is observed"
+        },
+        "evidence": {
+          "visual_cue": "what you saw (e.g., halos, blur, inconsistent stroke width)",
+          "comparison": "what it should look like vs what it looks like",
+          "alt_explanations": ["scanner noise", "low resolution", "photo angle"],
+          "why_alt_less_likely": "one sentence"
+        }
+      }
+    ],
+    "overall_assessment": "one concise sentence"
+  },
+  "authenticity": {
+    "visual_integrity": "clean" | "suspicious" | "tampered",
+    "confidence": 0.0-1.0,
+    "observable_reasons": ["reason 1", "reason 2", ...]
+  }
+}
+
+Extraction rules:
+- Use null for any field that is NOT visible or unclear.
+- For prices, use numeric values (e.g., 18.98 not "$18.98").
+- Read the EXACT text from the image, do not guess or infer.
+- If you see multiple dates (e.g., receipt date vs card transaction date), report BOTH.
+
+Forensics rules:
+- Provide 0..8 claims. Each claim must be observable in the image and specific
+  (e.g., "text baseline wobble in totals area", "edge halos around edited numbers").
+- If image quality is too low to judge a category, do not invent claims; set claims=[] and lower confidence.
+- PAY SPECIAL ATTENTION TO SPACING anomalies (excessive spaces, inconsistent gaps, manual-looking placement).
+
+Authenticity rules:
+- "clean": no observable signs of tampering; "suspicious": some cues, not definitive;
+  "tampered": clear signs of editing, forgery, or digital alteration.
+- Only judge what you can SEE. Do NOT decide if the receipt is "real" or "authentic" overall.
+
+Return ONLY the JSON object, no other text."""
+
+
+class _Pending:
+    """Single-flight slot: the first caller fills it, later callers wait on it."""
+
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+
+_MEMO_MAX = 64
+_memo: "OrderedDict[str, _Pending]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _memo_key(image_b64: str, model: str) -> str:
+    digest = hashlib.sha256(image_b64.encode("utf-8")).hexdigest()
+    return f"{model}:{COMBINED_PROMPT_VERSION}:{digest}"
+
+
+def parse_combined_response(text: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Parse a combined response into {"extraction", "forensics", "authenticity"}.
+
+    Returns None when the output is not JSON or has no usable section, so the
+    caller falls back to the single-task prompts.
+    """
+    data = _parse_json_response(text or "")
+    if not data:
+        return None
+    sections = {
+        key: data.get(key) if isinstance(data.get(key), dict) else None
+        for key in ("extraction", "forensics", "authenticity")
+    }
+    if not any(sections.values()):
+        return None
+    return sections
+
+
+def analyze_image_b64_combined(
+    image_b64: str,
+    model: str = VISION_COMBINED_MODEL,
+    timeout: int = VISION_COMBINED_TIMEOUT,
+) -> Optional[Dict[str, Any]]:
+    """
+    Run the combined prompt on a base64 image (memoized, single-flight).
+
+    Returns {"extraction", "forensics", "authenticity", "latency_s", "model"}
+    or None on failure. analyze_image_combined adds "payload" (see
+    app.pipelines.vision_payload).
+    """
+    key = _memo_key(image_b64, model)
+    with _memo_lock:
+        slot = _memo.get(key)
+        owner = slot is None
+        if owner:
+            slot = _Pending()
+            _memo[key] = slot
+            while len(_memo) > _MEMO_MAX:
+                _memo.popitem(last=False)
+        else:
+            _memo.move_to_end(key)
+
+    if not owner:
+        slot.event.wait(timeout)
+        return slot.result
+
+    try:
+        start = time.time()
+        raw = _query_ollama_vision_b64(image_b64, COMBINED_PROMPT, model, timeout)
+        sections = parse_combined_response(raw) if raw else None
+        if sections is None:
+            if raw:
+                logger.warning("Combined vision prompt: could not parse JSON from response: %s", raw[:200])
+        else:
+            sections["latency_s"] = round(time.time() - start, 2)
+            sections["model"] = model
+            slot.result = sections
+    finally:
+        if slot.result is None:
+            with _memo_lock:
+                if _memo.get(key) is slot:
+                    del _memo[key]
+        slot.event.set()
+    return slot.result
+
+
+def analyze_image_combined(image_path: str, model: str = VISION_COMBINED_MODEL) -> Optional[Dict[str, Any]]:
+    """Encode an image file (PDF: first page) and run the combined prompt."""
+    try:
+        # Lossless by default: the same payload carries the forensic task
+        image_b64, payload_meta = _encode_image_with_meta(image_path, model, forensic_policy_for_model(model))
+    except Exception as e:
+        logger.warning("Combined vision prompt failed (encode): %s", e)
+        return None
+    result = analyze_image_b64_combined(image_b64, model=model)
+    if result is not None:
+        result.setdefault("payload", payload_meta)
+    return result
+
+
+def clear_combined_memo() -> None:
+    """Drop memoized combined results (tests)."""
+    with _memo_lock:
+        _memo.clear()
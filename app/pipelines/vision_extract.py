@@ -18,12 +18,19 @@ Model selection: Prefer llama3.2-vision for speed, qwen2.5vl for accuracy.
 
 import json
 import base64
+import contextvars
 import logging
 import os
 import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
 
+from app.pipelines.deadline import stage_allowed
+from app.pipelines.ollama_client import CircuitOpenError, get_ollama_client
+from app.pipelines.vision_payload import encode_image_file, encode_pil_image, policy_for_model
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -31,6 +38,10 @@ VISION_EXTRACT_ENABLED = os.getenv("VISION_EXTRACT_ENABLED", "true").lower() ==
 VISION_EXTRACT_MODEL = os.getenv("VISION_EXTRACT_MODEL", "qwen2.5vl:32b")
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 VISION_EXTRACT_TIMEOUT = int(os.getenv("VISION_EXTRACT_TIMEOUT", "120"))
+# Concurrent PDF page requests (the Ollama client's per-model semaphore still applies)
+VISION_EXTRACT_PAGE_WORKERS = int(os.getenv("VISION_EXTRACT_PAGE_WORKERS", os.getenv("OLLAMA_MAX_CONCURRENCY", "2")))
+# Stop consuming PDF pages once the summary page (total plus subtotal/tax) has been extracted
+VISION_EXTRACT_EARLY_STOP = os.getenv("VISION_EXTRACT_EARLY_STOP", "true").lower() == "true"
 
 # The structured extraction prompt
 EXTRACTION_PROMPT = """Look at this receipt/invoice image carefully and extract ALL visible information into JSON format.
@@ -110,25 +121,16 @@ def _pdf_pages_to_images(pdf_path: str, dpi: int = 200) -> List:
 
 
 def _pil_image_to_base64(img) -> str:
-    """Convert a PIL Image to base64-encoded JPEG string."""
-    import io
-    img_rgb = img.convert("RGB")
-    buf = io.BytesIO()
-    img_rgb.save(buf, format="JPEG", quality=92)
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
+    """Convert a PIL Image to a base64-encoded JPEG under the extraction payload policy."""
+    return encode_pil_image(img, policy_for_model(VISION_EXTRACT_MODEL))[0]
 
 
-def _encode_image(image_path: str) -> str:
-    """Encode image file to base64, converting non-standard formats (HEIF/HEVC) to JPEG.
+def _encode_image_with_meta(image_path: str, model: str = VISION_EXTRACT_MODEL, policy=None):
+    """Encode an image file (PDF: first page) under `policy` (default: the model's payload policy).
     
-    Ollama only accepts JPEG/PNG/GIF/WEBP. iPhone photos are often HEIF despite
-    having a .jpg extension. We detect this and convert through PIL.
-    
-    For PDFs, converts the first page to an image.
+    Returns (base64, payload metadata). See app.pipelines.vision_payload.
     """
-    import io
-    from PIL import Image as PILImage
-    
+    policy = policy or policy_for_model(model)
     ext = os.path.splitext(image_path)[1].lower()
     
     # Handle PDFs: convert first page to image
@@ -136,26 +138,21 @@ def _encode_image(image_path: str) -> str:
         pages = _pdf_pages_to_images(image_path, dpi=200)
         if not pages:
             raise ValueError(f"PDF has no pages: {image_path}")
-        return _pil_image_to_base64(pages[0])
+        return encode_pil_image(pages[0], policy)
     
-    try:
-        # Try PIL first — handles HEIF (via pillow-heif), TIFF, BMP, etc.
-        try:
-            from pillow_heif import register_heif_opener
-            register_heif_opener()
-        except ImportError:
-            pass
-        
-        img = PILImage.open(image_path)
-        img.load()
-        img = img.convert("RGB")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=92)
-        return base64.b64encode(buf.getvalue()).decode("utf-8")
-    except Exception:
-        # Fallback: send raw bytes (works for standard JPEG/PNG)
-        with open(image_path, "rb") as f:
-            return base64.b64encode(f.read()).decode("utf-8")
+    # PIL handles HEIF (via pillow-heif), TIFF, BMP, etc.; raw bytes otherwise
+    return encode_image_file(image_path, policy)
+
+
+def _encode_image(image_path: str) -> str:
+    """Encode image file to base64, converting non-standard formats (HEIF/HEVC) to JPEG.
+    
+    Ollama only accepts JPEG/PNG/GIF/WEBP. iPhone photos are often HEIF despite
+    having a .jpg extension. We detect this and convert through PIL.
+    
+    For PDFs, converts the first page to an image.
+    """
+    return _encode_image_with_meta(image_path)[0]
 
 
 def _query_ollama_vision(image_path: str, prompt: str, model: str, timeout: int) -> Optional[str]:
@@ -171,20 +168,16 @@ def _query_ollama_vision(image_path: str, prompt: str, model: str, timeout: int)
 def _query_ollama_vision_b64(image_b64: str, prompt: str, model: str, timeout: int) -> Optional[str]:
     """Query Ollama vision model with pre-encoded base64 image data."""
     try:
-        resp = requests.post(
-            f"{OLLAMA_URL}/api/generate",
-            json={
-                "model": model,
-                "prompt": prompt,
-                "images": [image_b64],
-                "stream": False,
-                "options": {"temperature": 0.1},
-            },
+        return get_ollama_client(OLLAMA_URL).generate(
+            model,
+            prompt,
+            images=[image_b64],
+            options={"temperature": 0.1},
             timeout=timeout,
         )
-        resp.raise_for_status()
-        result = resp.json()
-        return result.get("response", "")
+    except CircuitOpenError:
+        logger.info("Vision extraction skipped: circuit_open (model=%s)", model)
+        return None
     except requests.exceptions.ConnectionError:
         logger.warning("Vision extraction: Ollama not reachable at %s", OLLAMA_URL)
         return None
@@ -284,12 +277,127 @@ def _merge_multi_page_results(page_results: List[Dict[str, Any]]) -> Dict[str, A
     return merged
 
 
+def _extract_page(page_img, page_index: int, num_pages: int, max_pages: int) -> Optional[Dict[str, Any]]:
+    """Run the extraction prompt on one PDF page image. Returns parsed JSON or None."""
+    page_b64 = _pil_image_to_base64(page_img)
+    page_prompt = EXTRACTION_PROMPT
+    if max_pages > 1:
+        page_prompt = f"[Page {page_index+1} of {num_pages}]\n\n" + EXTRACTION_PROMPT
+    
+    raw_response = _query_ollama_vision_b64(
+        page_b64, page_prompt, VISION_EXTRACT_MODEL, VISION_EXTRACT_TIMEOUT
+    )
+    if not raw_response:
+        return None
+    parsed = _parse_json_response(raw_response)
+    if parsed:
+        logger.info("Vision extraction page %d/%d: merchant=%s, total=%s",
+                    page_index + 1, max_pages, parsed.get("merchant_name"), parsed.get("total"))
+    return parsed
+
+
+def _is_totals_page(page_data: Optional[Dict[str, Any]]) -> bool:
+    """True for a summary page: a total alongside subtotal or tax.
+    
+    A bare total is not enough - multi-page invoices often print a
+    carry-forward total at the foot of every page.
+    """
+    if not page_data or page_data.get("total") is None:
+        return False
+    return page_data.get("subtotal") is not None or page_data.get("tax") is not None
+
+
+def _extract_pages_concurrently(pages: List, max_pages: int):
+    """
+    Query the VLM for up to `max_pages` PDF pages through a bounded pool.
+    
+    Requests still pass through the shared Ollama client, so the per-model
+    semaphore caps how many actually run at once. Pages are consumed in order;
+    once the summary page (see _is_totals_page) has been consumed, no further
+    pages are submitted and queued ones are cancelled. Pages already in flight
+    are awaited and kept, since they may still carry items or a later total
+    that _merge_multi_page_results must see.
+    
+    Returns (page_results in page order, per-page latencies in seconds with
+    None for skipped/cancelled pages).
+    """
+    latencies: List[Optional[float]] = [None] * max_pages
+    results: List[Optional[Dict[str, Any]]] = [None] * max_pages
+    stop = threading.Event()
+    
+    def _timed(i):
+        # A page picked up by a worker after the stop is not sent to the VLM
+        if stop.is_set():
+            return None
+        t0 = time.time()
+        try:
+            return _extract_page(pages[i], i, len(pages), max_pages)
+        finally:
+            latencies[i] = round(time.time() - t0, 2)
+    
+    if max_pages == 1:
+        results[0] = _timed(0)
+        return [r for r in results if r], latencies
+    
+    workers = max(1, min(max_pages, VISION_EXTRACT_PAGE_WORKERS))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vlm-page")
+    futures = {}
+    out_of_budget = False
+    
+    def _submit(i):
+        # Pages past the first stop being submitted once the request
+        # deadline is too close (app.pipelines.deadline)
+        nonlocal out_of_budget
+        if out_of_budget:
+            return
+        if i > 0 and not stage_allowed("vision_extract_page"):
+            out_of_budget = True
+            logger.info("Vision extraction: deadline reached, truncating at page %d/%d", i, max_pages)
+            return
+        # Copy the context so the deadline / skip collectors follow the call
+        futures[i] = executor.submit(contextvars.copy_context().run, _timed, i)
+    
+    try:
+        # Sliding window: keep `workers` pages in flight, submit the next page
+        # only as earlier ones are consumed, so an early stop wastes little
+        for i in range(workers):
+            _submit(i)
+        for i in range(max_pages):
+            if i not in futures:
+                break
+            try:
+                results[i] = futures.pop(i).result()
+            except Exception as e:
+                logger.warning("Vision extraction page %d failed: %s", i + 1, e)
+            if VISION_EXTRACT_EARLY_STOP and i + 1 < max_pages and _is_totals_page(results[i]):
+                logger.info("Vision extraction: totals found on page %d/%d, skipping remaining pages",
+                            i + 1, max_pages)
+                break
+            if i + workers < max_pages:
+                _submit(i + workers)
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    # Look-ahead pages that were already running when the loop stopped
+    for i, future in futures.items():
+        if future.cancelled():
+            continue
+        try:
+            results[i] = future.result()
+        except Exception as e:
+            logger.warning("Vision extraction page %d failed: %s", i + 1, e)
+    
+    return [r for r in results if r], latencies
+
+
 def extract_receipt_fields(image_path: str) -> Dict[str, Any]:
     """
     Extract structured receipt fields from an image or PDF using Vision LLM.
     
-    For PDFs, converts each page to an image and sends to VLM separately,
-    then merges results (items concatenated, totals from last page).
+    For PDFs, converts each page to an image and sends pages to the VLM
+    concurrently, then merges results (items concatenated, totals from last
+    page). Per-page latencies are reported in _vlm_meta.page_latencies_s.
     
     Returns a dict with extracted fields, plus metadata:
     {
@@ -309,6 +417,11 @@ def extract_receipt_fields(image_path: str) -> Dict[str, Any]:
         logger.info("Vision extraction disabled (VISION_EXTRACT_ENABLED=false)")
         return {"_vlm_meta": {"success": False, "reason": "disabled"}}
     
+    if get_ollama_client(OLLAMA_URL).circuit_open(VISION_EXTRACT_MODEL):
+        logger.info("Vision extraction skipped: circuit_open")
+        return {"_vlm_meta": {"success": False, "reason": "circuit_open", "skipped": "circuit_open",
+                              "latency_s": 0.0}}
+    
     ext = os.path.splitext(image_path)[1].lower()
     is_pdf = ext in PDF_EXTS
     
@@ -329,29 +442,14 @@ def extract_receipt_fields(image_path: str) -> Dict[str, Any]:
         
         # Limit to first 5 pages to avoid excessive VLM calls
         max_pages = min(len(pages), 5)
-        page_results = []
-        
-        for i in range(max_pages):
-            page_b64 = _pil_image_to_base64(pages[i])
-            page_prompt = EXTRACTION_PROMPT
-            if max_pages > 1:
-                page_prompt = f"[Page {i+1} of {len(pages)}]\n\n" + EXTRACTION_PROMPT
-            
-            raw_response = _query_ollama_vision_b64(
-                page_b64, page_prompt, VISION_EXTRACT_MODEL, VISION_EXTRACT_TIMEOUT
-            )
-            if raw_response:
-                parsed = _parse_json_response(raw_response)
-                if parsed:
-                    page_results.append(parsed)
-                    logger.info("Vision extraction page %d/%d: merchant=%s, total=%s",
-                                i + 1, max_pages, parsed.get("merchant_name"), parsed.get("total"))
+        page_results, page_latencies = _extract_pages_concurrently(pages, max_pages)
         
         latency = time.time() - start
         
         if not page_results:
             return {"_vlm_meta": {"success": False, "reason": "all_pages_failed", "latency_s": latency,
-                                  "num_pages": len(pages), "pages_attempted": max_pages}}
+                                  "num_pages": len(pages), "pages_attempted": max_pages,
+                                  "page_latencies_s": page_latencies}}
         
         merged = _merge_multi_page_results(page_results)
         merged["_vlm_meta"] = {
@@ -361,6 +459,9 @@ def extract_receipt_fields(image_path: str) -> Dict[str, Any]:
             "source": "pdf",
             "num_pages": len(pages),
             "pages_extracted": len(page_results),
+            "page_latencies_s": page_latencies,
+            "pages_skipped": sum(1 for lat in page_latencies if lat is None),
+            "payload_policy": policy_for_model(VISION_EXTRACT_MODEL).to_dict(),
         }
         
         logger.info(
@@ -370,10 +471,42 @@ def extract_receipt_fields(image_path: str) -> Dict[str, Any]:
         )
         return merged
     
-    # Standard image path
-    raw_response = _query_ollama_vision(
-        image_path, EXTRACTION_PROMPT, VISION_EXTRACT_MODEL, VISION_EXTRACT_TIMEOUT
+    # Standard image path: combined extract+forensics+authenticity prompt first
+    # when build_vision_assessment / the OCR fallback will reuse that call (their
+    # VISION_MODEL is the combined model), single-task prompt otherwise
+    from app.pipelines.vision_combined import (
+        VISION_COMBINED_ENABLED,
+        VISION_COMBINED_MODEL,
+        analyze_image_combined,
     )
+    from app.pipelines.vision_llm import DEFAULT_VISION_MODEL
+    if VISION_COMBINED_ENABLED and DEFAULT_VISION_MODEL == VISION_COMBINED_MODEL:
+        combined = analyze_image_combined(image_path)
+        if combined and combined.get("extraction"):
+            parsed = dict(combined["extraction"])
+            parsed["_vlm_meta"] = {
+                "model": VISION_COMBINED_MODEL,
+                "latency_s": round(time.time() - start, 2),
+                "success": True,
+                "source": "image",
+                "prompt": "combined",
+                "payload": combined.get("payload"),
+            }
+            logger.info(
+                "Vision extraction succeeded (combined prompt): merchant=%s, total=%s, date=%s (%.1fs)",
+                parsed.get("merchant_name"), parsed.get("total"), parsed.get("receipt_date"),
+                time.time() - start,
+            )
+            return parsed
+    
+    try:
+        image_b64, payload_meta = _encode_image_with_meta(image_path)
+        raw_response = _query_ollama_vision_b64(
+            image_b64, EXTRACTION_PROMPT, VISION_EXTRACT_MODEL, VISION_EXTRACT_TIMEOUT
+        )
+    except Exception as e:
+        logger.warning("Vision extraction failed (encode): %s", e)
+        raw_response = None
     
     latency = time.time() - start
     
@@ -392,6 +525,7 @@ def extract_receipt_fields(image_path: str) -> Dict[str, Any]:
         "latency_s": round(latency, 2),
         "success": True,
         "source": "image",
+        "payload": payload_meta,
     }
     
     logger.info(
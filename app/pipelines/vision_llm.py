@@ -28,6 +28,14 @@ from typing import Dict, List, Optional, Any
 from PIL import Image
 import io
 
+from app.pipelines.ollama_client import CircuitOpenError, get_ollama_client
+from app.pipelines.vision_payload import (
+    VisionPayloadPolicy,
+    encode_image_file,
+    forensic_policy_for_model,
+    policy_for_model,
+)
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -40,10 +48,11 @@ logger.info(
 )
 
 
-def encode_image_to_base64(image_path: str) -> str:
-    """Encode image to base64 for Ollama API."""
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+def encode_image_to_base64(
+    image_path: str, model: Optional[str] = None, policy: Optional[VisionPayloadPolicy] = None
+) -> str:
+    """Encode image to base64 for Ollama API (cropped/downscaled per the model's payload policy)."""
+    return encode_image_file(image_path, policy or policy_for_model(model or DEFAULT_VISION_MODEL))[0]
 
 
 def query_vision_model(
@@ -51,7 +60,8 @@ def query_vision_model(
     prompt: str,
     model: str = DEFAULT_VISION_MODEL,
     temperature: float = 0.3,
-    timeout: int = 300
+    timeout: int = 300,
+    policy: Optional[VisionPayloadPolicy] = None
 ) -> str:
     """
     Query Ollama vision model with an image and prompt.
@@ -62,34 +72,27 @@ def query_vision_model(
         model: Ollama model name
         temperature: Sampling temperature (0.0-1.0)
         timeout: Request timeout in seconds
+        policy: Payload policy (default: the model's lossy extraction policy)
     
     Returns:
         Model response as string
     """
     try:
         # Encode image
-        image_b64 = encode_image_to_base64(image_path)
+        image_b64 = encode_image_to_base64(image_path, model, policy)
         
-        # Prepare request
-        url = OLLAMA_API_URL
-        payload = {
-            "model": model,
-            "prompt": prompt,
-            "images": [image_b64],
-            "stream": False,
-            "options": {
-                "temperature": temperature
-            }
-        }
-        
-        # Make request
-        response = requests.post(url, json=payload, timeout=timeout)
-        response.raise_for_status()
-        
-        # Parse response
-        result = response.json()
-        return result.get("response", "")
+        # Pooled keep-alive request (per-model concurrency limit)
+        return get_ollama_client().generate(
+            model,
+            prompt,
+            images=[image_b64],
+            options={"temperature": temperature},
+            timeout=timeout,
+        )
         
+    except CircuitOpenError as e:
+        logger.info("Vision model skipped: circuit_open (%s)", e)
+        return ""
     except requests.exceptions.Timeout:
         logger.warning("Vision model timeout after %ds. Try increasing timeout or using a smaller model.", timeout)
         return ""
@@ -216,14 +219,18 @@ Rules:
 
 Only return the JSON, no other text."""
 
-    response = query_vision_model(image_path, prompt, model, temperature=0.2)
+    response = query_vision_model(image_path, prompt, model, temperature=0.2, policy=forensic_policy_for_model(model))
 
     # Parse JSON
     data = _extract_json_object(response)
     if data is None:
         return {"is_suspicious": False, "confidence": 0.0, "claims": [], "overall_assessment": "no JSON found"}
 
-    # Normalize/defensive defaults (models sometimes omit fields)
+    return _normalize_fraud_detection(data)
+
+
+def _normalize_fraud_detection(data: Any) -> Dict[str, Any]:
+    """Defensive defaults for a forensic-claims result (models sometimes omit fields)."""
     if not isinstance(data, dict):
         return {
             "is_suspicious": False,
@@ -265,6 +272,7 @@ Only return the JSON, no other text."""
 
     return data
         
+
 def detect_fraud_indicators_with_vision_old(image_path: str, model: str = DEFAULT_VISION_MODEL) -> Dict[str, Any]:
     """
     Ask vision model to detect fraud indicators.
@@ -304,7 +312,7 @@ Respond in JSON format:
 
 Only return the JSON, no other text."""
 
-    response = query_vision_model(image_path, prompt, model, temperature=0.2)
+    response = query_vision_model(image_path, prompt, model, temperature=0.2, policy=forensic_policy_for_model(model))
     
     # Parse JSON
     try:
@@ -353,22 +361,26 @@ Rules:
 - Do NOT output any field except those in the schema above.
 Only return the JSON, no other text."""
 
-    response = query_vision_model(image_path, prompt, model, temperature=0.1)
+    response = query_vision_model(image_path, prompt, model, temperature=0.1, policy=forensic_policy_for_model(model))
     
     data = _extract_json_object(response)
     if data is not None:
-        # Defensive normalization
-        if not isinstance(data, dict):
-            data = {}
-        data.setdefault("visual_integrity", "suspicious")
-        data.setdefault("confidence", 0.0)
-        data.setdefault("observable_reasons", [])
-        return data
+        return _normalize_authenticity(data)
 
     logger.warning("Vision LLM response has no JSON: %s", response[:200])
     return {"visual_integrity": "suspicious", "confidence": 0.0, "observable_reasons": []}
 
 
+def _normalize_authenticity(data: Any) -> Dict[str, Any]:
+    """Defensive defaults for a visual-integrity result."""
+    if not isinstance(data, dict):
+        data = {}
+    data.setdefault("visual_integrity", "suspicious")
+    data.setdefault("confidence", 0.0)
+    data.setdefault("observable_reasons", [])
+    return data
+
+
 # --- Convenience wrapper for pipeline: returns visual_integrity/confidence/claims/raw ---
 def run_vision_authenticity(image_path: str, model: str = DEFAULT_VISION_MODEL) -> Dict[str, Any]:
     """
@@ -504,6 +516,13 @@ def compare_with_ocr_features(vision_results: Dict, ocr_features: Dict) -> Dict[
     return comparison
 
 
+def vision_assessment_available(model: str = DEFAULT_VISION_MODEL) -> bool:
+    """False while the Ollama circuit for `model` (the only model build_vision_assessment uses) is open."""
+    if not USE_OLLAMA:
+        return True
+    return not get_ollama_client().circuit_open(model)
+
+
 def build_vision_assessment(image_path: str, model: str = DEFAULT_VISION_MODEL) -> Dict[str, Any]:
     """
     CANONICAL VISION VETO FUNCTION.
@@ -529,11 +548,52 @@ def build_vision_assessment(image_path: str, model: str = DEFAULT_VISION_MODEL)
     """
     logger.info("Building vision assessment (veto-only): %s", Path(image_path).name)
     
-    # Run forensic fraud detection (the good part of this file)
-    fraud = detect_fraud_indicators_with_vision(image_path, model)
+    fraud = auth = payload = None
+    prompt_mode = "separate"
+    
+    from app.pipelines.vision_combined import (
+        VISION_COMBINED_ENABLED,
+        VISION_COMBINED_MODEL,
+        analyze_image_combined,
+    )
+    
+    # Fast-fail: Ollama down/overloaded -> skip instead of waiting out timeouts.
+    # Same failure default as a timeout/unparseable response ("suspicious",
+    # confidence 0.0): an image the VLM never looked at is never reported clean.
+    if not vision_assessment_available(model):
+        logger.info("Vision assessment skipped: circuit_open")
+        return {
+            "visual_integrity": "suspicious",
+            "confidence": 0.0,
+            "observable_reasons": [],
+            "skipped": "circuit_open",
+            "raw": {"skipped": "circuit_open", "hard_fail_claims": []},
+        }
     
-    # Run authenticity assessment (for audit context only, NOT for decision)
-    auth = assess_receipt_authenticity(image_path, model)
+    # Combined extract+forensics+authenticity prompt: one VLM round-trip shared
+    # with vision_extract (memoized per image), falls back to the two calls below.
+    # Only when the caller's model is the combined model: the veto always runs
+    # on the model it was asked to use.
+    if VISION_COMBINED_ENABLED and USE_OLLAMA and model == VISION_COMBINED_MODEL:
+        combined = analyze_image_combined(image_path, model=model)
+        if combined and combined.get("forensics"):
+            fraud = _normalize_fraud_detection(dict(combined["forensics"]))
+            auth = _normalize_authenticity(dict(combined.get("authenticity") or {}))
+            prompt_mode = "combined"
+            payload = combined.get("payload")
+    
+    if fraud is None:
+        # Run forensic fraud detection (the good part of this file)
+        fraud = detect_fraud_indicators_with_vision(image_path, model)
+        
+        # Run authenticity assessment (for audit context only, NOT for decision)
+        auth = assess_receipt_authenticity(image_path, model)
+        
+        # Memoized: same payload both calls above sent
+        try:
+            payload = encode_image_file(image_path, forensic_policy_for_model(model))[1]
+        except Exception:
+            payload = None
     
     # Extract HARD_FAIL claims (these are the veto triggers)
     hard_fail_claims = [
@@ -581,6 +641,8 @@ def build_vision_assessment(image_path: str, model: str = DEFAULT_VISION_MODEL)
             "fraud_detection": fraud,
             "authenticity_assessment": auth,
             "hard_fail_claims": hard_fail_claims,
+            "prompt_mode": prompt_mode,
+            "payload": payload,
         },
     }
 
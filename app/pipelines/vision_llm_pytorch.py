@@ -19,6 +19,9 @@ from PIL import Image
 from transformers import AutoProcessor, LlavaForConditionalGeneration
 import os
 
+from app.pipelines.model_registry import get_model_registry, register_model
+from app.pipelines.model_server import model_server_enabled, open_image, remote_call
+
 
 class VisionLLMPyTorch:
     """
@@ -93,7 +96,7 @@ class VisionLLMPyTorch:
             Generated text response
         """
         # Load and process image
-        image = Image.open(image_path).convert("RGB")
+        image = open_image(image_path).convert("RGB")
         
         # Format prompt for LLaVA
         conversation = [
@@ -165,6 +168,23 @@ def get_vision_model() -> VisionLLMPyTorch:
     return _vision_model
 
 
+def _unload_vision_model(model: VisionLLMPyTorch) -> None:
+    global _vision_model
+    if _vision_model is model:
+        _vision_model = None
+
+
+register_model("vision_pytorch", get_vision_model, _unload_vision_model)
+
+
+def generate_pytorch(image_path: str, prompt: str, **kwargs) -> str:
+    """Generate with the global model, or on the model server when MODEL_SERVER_SOCKET is set."""
+    if model_server_enabled():
+        return remote_call("vision_pytorch", image_path, prompt=prompt, **kwargs)
+    with get_model_registry().acquire("vision_pytorch") as model:
+        return model.generate(image_path, prompt, **kwargs)
+
+
 def extract_receipt_data_pytorch(image_path: str) -> Dict[str, Any]:
     """
     Extract structured data from receipt using PyTorch Vision LLM.
@@ -187,8 +207,7 @@ def extract_receipt_data_pytorch(image_path: str) -> Dict[str, Any]:
 
 Only return the JSON, no other text."""
     
-    model = get_vision_model()
-    response = model.generate(image_path, prompt, temperature=0.2)
+    response = generate_pytorch(image_path, prompt, temperature=0.2)
     
     # Parse JSON response
     try:
@@ -246,8 +265,7 @@ Respond in JSON format:
 
 Only return the JSON, no other text."""
     
-    model = get_vision_model()
-    response = model.generate(image_path, prompt, temperature=0.2)
+    response = generate_pytorch(image_path, prompt, temperature=0.2)
     
     # Parse JSON
     try:
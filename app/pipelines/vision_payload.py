@@ -0,0 +1,301 @@
+# app/pipelines/vision_payload.py
+"""
+Vision LLM image payload policy.
+
+Phone photos are often 12+ MP and 200-DPI PDF pages are ~1700x2200; VLM
+prefill time and request size grow with pixel count while extraction and
+forensic accuracy plateau well below that. Every image sent to a VLM
+(vision_llm, vision_extract, vision_combined) is prepared here:
+
+- auto-crop to the detected receipt bounds (photo of a receipt on a table)
+- downscale to a max long edge and/or a per-model visual-token budget
+- optional grayscale (thermal receipts carry no colour information)
+- JPEG quality tuning
+
+Forensic calls (build_vision_assessment's fraud/authenticity prompts and the
+combined prompt that carries forensics) look for editing artefacts - halos,
+re-compression blocks, resampled glyphs - that cropping, downscaling and a
+JPEG re-encode would destroy. They use forensic_policy_for_model(), which is
+lossless (original file bytes; PNG for rendered PDF pages) unless
+VISION_FORENSIC_PAYLOAD_POLICY opts them into the lossy policy.
+
+Encoded payloads are memoized per document (path + mtime + size + policy),
+so the extraction, forensic and fallback calls on one upload encode once.
+The policy applied and the resulting size are returned as metadata and
+recorded in _vlm_meta / the vision assessment's raw section, so latency vs.
+accuracy can be benchmarked per policy.
+
+Configuration:
+- VISION_MAX_LONG_EDGE       (default 1600, 0 = no limit)
+- VISION_MAX_VISUAL_TOKENS   (default 0 = no budget) visual tokens per image
+- VISION_GRAYSCALE           (default false)
+- VISION_JPEG_QUALITY        (default 85)
+- VISION_AUTO_CROP           (default true)
+- VISION_PAYLOAD_OVERRIDES   JSON {model_prefix: {field: value}}, e.g.
+                             '{"llama3.2-vision": {"max_long_edge": 1120}}'
+- VISION_FORENSIC_PAYLOAD_POLICY  (default false) apply the lossy policy above
+                             to forensic calls too
+"""
+
+import base64
+import copy
+import io
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VISION_MAX_LONG_EDGE = int(os.getenv("VISION_MAX_LONG_EDGE", "1600"))
+VISION_MAX_VISUAL_TOKENS = int(os.getenv("VISION_MAX_VISUAL_TOKENS", "0"))
+VISION_GRAYSCALE = os.getenv("VISION_GRAYSCALE", "false").lower() == "true"
+VISION_JPEG_QUALITY = int(os.getenv("VISION_JPEG_QUALITY", "85"))
+VISION_AUTO_CROP = os.getenv("VISION_AUTO_CROP", "true").lower() == "true"
+VISION_PAYLOAD_OVERRIDES = os.getenv("VISION_PAYLOAD_OVERRIDES", "")
+VISION_FORENSIC_PAYLOAD_POLICY = os.getenv("VISION_FORENSIC_PAYLOAD_POLICY", "false").lower() == "true"
+
+# Pixels covered by one visual token, by model family (prefix match).
+# Qwen2.5-VL: 14px patches merged 2x2; LLaVA-style CLIP: 14px patches;
+# Llama 3.2 Vision tiles at 560px (1601 tokens per tile).
+_TOKEN_PIXELS = {
+    "qwen": 28 * 28,
+    "llava": 14 * 14,
+    "llama3.2-vision": (560 * 560) // 1601,
+    "gemma3": (896 * 896) // 256,
+}
+_DEFAULT_TOKEN_PIXELS = 28 * 28
+
+# Auto-crop: border/background difference threshold and minimum gain
+_CROP_DIFF_THRESHOLD = 40
+_CROP_MIN_AREA_GAIN = 0.10
+_CROP_PAD_FRAC = 0.02
+
+
+@dataclass(frozen=True)
+class VisionPayloadPolicy:
+    """How an image is prepared before being sent to a VLM."""
+
+    max_long_edge: int = VISION_MAX_LONG_EDGE
+    max_pixels: int = 0
+    grayscale: bool = VISION_GRAYSCALE
+    jpeg_quality: int = VISION_JPEG_QUALITY
+    auto_crop: bool = VISION_AUTO_CROP
+    # Send the image as-is: original file bytes, or PNG for in-memory images;
+    # the fields above are ignored
+    lossless: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _parse_overrides(raw: str) -> Dict[str, Dict[str, Any]]:
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        logger.warning("Invalid VISION_PAYLOAD_OVERRIDES (%s); ignoring", e)
+        return {}
+
+
+_OVERRIDES = _parse_overrides(VISION_PAYLOAD_OVERRIDES)
+
+
+def _match_prefix(model: str, table: Dict[str, Any]) -> Optional[Any]:
+    name = (model or "").lower()
+    best = None
+    for prefix in table:
+        if name.startswith(prefix.lower()) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return table[best] if best is not None else None
+
+
+def policy_for_model(model: Optional[str] = None) -> VisionPayloadPolicy:
+    """Default policy, with the model's visual-token budget and env overrides applied."""
+    policy = VisionPayloadPolicy()
+    if VISION_MAX_VISUAL_TOKENS > 0:
+        token_px = _match_prefix(model or "", _TOKEN_PIXELS) or _DEFAULT_TOKEN_PIXELS
+        policy = replace(policy, max_pixels=VISION_MAX_VISUAL_TOKENS * token_px)
+    override = _match_prefix(model or "", _OVERRIDES)
+    if override:
+        fields = {k: v for k, v in override.items() if k in VisionPayloadPolicy.__dataclass_fields__}
+        policy = replace(policy, **fields)
+    return policy
+
+
+LOSSLESS_POLICY = VisionPayloadPolicy(lossless=True)
+
+
+def forensic_policy_for_model(model: Optional[str] = None) -> VisionPayloadPolicy:
+    """Policy for forensic/authenticity calls: lossless unless VISION_FORENSIC_PAYLOAD_POLICY."""
+    return policy_for_model(model) if VISION_FORENSIC_PAYLOAD_POLICY else LOSSLESS_POLICY
+
+
+def _receipt_bounds(img) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Bounding box of the document against a uniform background, or None.
+
+    The background level is the median of the border pixels; anything that
+    differs from it by more than _CROP_DIFF_THRESHOLD is foreground.
+    """
+    from PIL import Image, ImageChops, ImageFilter
+
+    gray = img.convert("L")
+    # Work on a small copy: bounds only need to be approximate
+    scale = max(gray.size) / 512.0
+    small = gray.resize((max(1, int(gray.width / scale)), max(1, int(gray.height / scale)))) if scale > 1 else gray
+    w, h = small.size
+    if w < 16 or h < 16:
+        return None
+
+    px = small.load()
+    border = [px[x, 0] for x in range(w)] + [px[x, h - 1] for x in range(w)]
+    border += [px[0, y] for y in range(h)] + [px[w - 1, y] for y in range(h)]
+    border.sort()
+    bg = border[len(border) // 2]
+
+    diff = ImageChops.difference(small, Image.new("L", small.size, bg))
+    mask = diff.filter(ImageFilter.MedianFilter(5)).point(lambda p: 255 if p > _CROP_DIFF_THRESHOLD else 0)
+    bbox = mask.getbbox()
+    if not bbox:
+        return None
+
+    s = scale if scale > 1 else 1.0
+    left, top, right, bottom = (int(v * s) for v in bbox)
+    pad_x = int(img.width * _CROP_PAD_FRAC)
+    pad_y = int(img.height * _CROP_PAD_FRAC)
+    box = (
+        max(0, left - pad_x), max(0, top - pad_y),
+        min(img.width, right + pad_x), min(img.height, bottom + pad_y),
+    )
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    if area >= img.width * img.height * (1 - _CROP_MIN_AREA_GAIN):
+        return None
+    # Don't crop to a sliver (stray mark on a blank scan)
+    if (box[2] - box[0]) < img.width * 0.2 or (box[3] - box[1]) < img.height * 0.2:
+        return None
+    return box
+
+
+def prepare_image(img, policy: VisionPayloadPolicy):
+    """Apply crop / downscale / grayscale. Returns (image, metadata)."""
+    from PIL import Image
+
+    meta: Dict[str, Any] = {"orig_size": [img.width, img.height], "cropped": False}
+
+    if policy.auto_crop:
+        try:
+            box = _receipt_bounds(img)
+        except Exception as e:
+            logger.debug("Receipt auto-crop failed: %s", e)
+            box = None
+        if box:
+            img = img.crop(box)
+            meta["cropped"] = True
+            meta["crop_box"] = list(box)
+
+    scale = 1.0
+    long_edge = max(img.width, img.height)
+    if policy.max_long_edge and long_edge > policy.max_long_edge:
+        scale = policy.max_long_edge / long_edge
+    if policy.max_pixels and img.width * img.height * scale * scale > policy.max_pixels:
+        scale = (policy.max_pixels / float(img.width * img.height)) ** 0.5
+    if scale < 1.0:
+        size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+        img = img.resize(size, Image.LANCZOS)
+
+    img = img.convert("L") if policy.grayscale else img.convert("RGB")
+    meta["sent_size"] = [img.width, img.height]
+    return img, meta
+
+
+def encode_pil_image(img, policy: Optional[VisionPayloadPolicy] = None) -> Tuple[str, Dict[str, Any]]:
+    """Prepare and JPEG-encode a PIL image. Returns (base64, metadata)."""
+    policy = policy or VisionPayloadPolicy()
+    buf = io.BytesIO()
+    if policy.lossless:
+        meta = {"orig_size": [img.width, img.height], "cropped": False, "sent_size": [img.width, img.height]}
+        img.save(buf, format="PNG")
+    else:
+        prepared, meta = prepare_image(img, policy)
+        prepared.save(buf, format="JPEG", quality=policy.jpeg_quality)
+    data = buf.getvalue()
+    meta["bytes"] = len(data)
+    meta["policy"] = policy.to_dict()
+    return base64.b64encode(data).decode("utf-8"), meta
+
+
+def _open_image(image_path: str):
+    from PIL import Image, ImageOps
+
+    try:
+        from pillow_heif import register_heif_opener
+        register_heif_opener()
+    except ImportError:
+        pass
+
+    img = Image.open(image_path)
+    img.load()
+    # Phone photos: honour EXIF orientation before cropping/resizing
+    return ImageOps.exif_transpose(img)
+
+
+_MEMO_MAX = 32
+_memo: "OrderedDict[tuple, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def encode_image_file(
+    image_path: str,
+    policy: Optional[VisionPayloadPolicy] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Encode an image file for a VLM under `policy` (memoized per document).
+
+    Files PIL cannot open, and every file under a lossless policy, are sent
+    as raw bytes (metadata has passthrough=True). The metadata dict is a copy
+    per call; callers may modify it.
+    """
+    policy = policy or VisionPayloadPolicy()
+    try:
+        st = os.stat(image_path)
+        key = (os.path.abspath(image_path), st.st_mtime_ns, st.st_size, policy)
+    except OSError:
+        key = None
+
+    if key is not None:
+        with _memo_lock:
+            hit = _memo.get(key)
+            if hit is not None:
+                _memo.move_to_end(key)
+                return hit[0], copy.deepcopy(hit[1])
+
+    result = None
+    if not policy.lossless:
+        try:
+            result = encode_pil_image(_open_image(image_path), policy)
+        except Exception as e:
+            logger.debug("Vision payload: PIL could not open %s (%s); sending raw bytes", image_path, e)
+    if result is None:
+        with open(image_path, "rb") as f:
+            data = f.read()
+        result = (base64.b64encode(data).decode("utf-8"),
+                  {"passthrough": True, "bytes": len(data), "policy": policy.to_dict()})
+
+    if key is not None:
+        with _memo_lock:
+            _memo[key] = result
+            while len(_memo) > _MEMO_MAX:
+                _memo.popitem(last=False)
+    return result[0], copy.deepcopy(result[1])
+
+
+def clear_payload_memo() -> None:
+    """Drop memoized payloads (tests)."""
+    with _memo_lock:
+        _memo.clear()
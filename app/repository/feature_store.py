@@ -0,0 +1,348 @@
+"""
+Feature snapshot storage for fast re-scoring.
+
+Every analysis can persist its ReceiptFeatures so rule/policy/profile changes
+can be backtested by re-running only the rule engine (see
+app.pipelines.rescore) instead of OCR + Vision LLM.
+
+Snapshots are zlib-compressed JSON with an explicit schema version.
+SQLite only: snapshots are a local backtesting artifact, not production state.
+
+Snapshots hold the full text features (OCR text, names, addresses), so they
+are opt-in, written outside the source tree to a directory only this user
+can read, and pruned by age and row count after every
+_PRUNE_EVERY saves.
+
+Configuration:
+- FEATURE_SNAPSHOTS_ENABLED        (default false) persist from analyze_receipt
+- FEATURE_SNAPSHOT_DB              (default <user data dir>/feature_snapshots.db,
+                                   see app.utils.cache_dir)
+- FEATURE_SNAPSHOT_MAX_ROWS        (default 50000, 0 = unlimited) newest kept
+- FEATURE_SNAPSHOT_MAX_AGE_DAYS    (default 30, 0 = unlimited)
+"""
+
+import json
+import os
+import sqlite3
+import uuid
+import zlib
+from contextlib import contextmanager
+from dataclasses import asdict, is_dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.schemas.receipt import ReceiptDecision, ReceiptFeatures, SignalV1
+from app.utils.cache_dir import user_data_dir
+
+FEATURE_SNAPSHOTS_ENABLED = os.getenv("FEATURE_SNAPSHOTS_ENABLED", "false").lower() == "true"
+FEATURE_SNAPSHOT_DB = os.getenv("FEATURE_SNAPSHOT_DB") or str(user_data_dir("feature_snapshots.db"))
+FEATURE_SNAPSHOT_MAX_ROWS = int(os.getenv("FEATURE_SNAPSHOT_MAX_ROWS", "50000"))
+FEATURE_SNAPSHOT_MAX_AGE_DAYS = float(os.getenv("FEATURE_SNAPSHOT_MAX_AGE_DAYS", "30"))
+
+# Retention is enforced every this many saves (and when a store is opened)
+_PRUNE_EVERY = 100
+
+# Bump when the serialized layout of ReceiptFeatures changes incompatibly.
+SNAPSHOT_SCHEMA_VERSION = 1
+
+_DATETIME_TAG = "__datetime__"
+_DATE_TAG = "__date__"
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Convert feature values to JSON-safe structures (lossless for dates)."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, datetime):
+        return {_DATETIME_TAG: value.isoformat()}
+    if isinstance(value, date):
+        return {_DATE_TAG: value.isoformat()}
+    if hasattr(value, "model_dump"):
+        return _to_jsonable(value.model_dump())
+    if is_dataclass(value) and not isinstance(value, type):
+        return _to_jsonable(asdict(value))
+    if hasattr(value, "item"):
+        # numpy scalars
+        try:
+            return value.item()
+        except Exception:
+            pass
+    if isinstance(value, bytes):
+        return None
+    return str(value)
+
+
+def _from_jsonable(value: Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1:
+            if _DATETIME_TAG in value:
+                return datetime.fromisoformat(value[_DATETIME_TAG])
+            if _DATE_TAG in value:
+                return date.fromisoformat(value[_DATE_TAG])
+        return {k: _from_jsonable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_from_jsonable(v) for v in value]
+    return value
+
+
+def encode_features(features: ReceiptFeatures, vision_assessment: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Serialize ReceiptFeatures to a compact, versioned blob.
+
+    `vision_assessment` is the vision veto input the decision was scored
+    with; it is not part of the features but a re-score needs it.
+    """
+    payload = {
+        "schema_version": SNAPSHOT_SCHEMA_VERSION,
+        "file_features": _to_jsonable(features.file_features),
+        "text_features": _to_jsonable(features.text_features),
+        "layout_features": _to_jsonable(features.layout_features),
+        "forensic_features": _to_jsonable(features.forensic_features),
+        "document_intent": _to_jsonable(features.document_intent),
+        "signals": _to_jsonable(features.signals),
+        "signal_version": features.signal_version,
+        "vision_assessment": _to_jsonable(vision_assessment) if vision_assessment else None,
+    }
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return zlib.compress(raw, 6)
+
+
+def decode_features(blob: bytes) -> ReceiptFeatures:
+    """Inverse of encode_features (features only)."""
+    return decode_snapshot(blob)[0]
+
+
+def decode_snapshot(blob: bytes) -> Tuple[ReceiptFeatures, Optional[Dict[str, Any]]]:
+    """Inverse of encode_features: (features, vision_assessment or None)."""
+    payload = json.loads(zlib.decompress(blob).decode("utf-8"))
+    version = payload.get("schema_version")
+    if version != SNAPSHOT_SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported feature snapshot schema_version={version} "
+            f"(expected {SNAPSHOT_SCHEMA_VERSION})"
+        )
+    signals = {}
+    for name, sig in (payload.get("signals") or {}).items():
+        try:
+            signals[name] = SignalV1(**sig)
+        except Exception:
+            signals[name] = sig
+    features = ReceiptFeatures(
+        file_features=_from_jsonable(payload.get("file_features") or {}),
+        text_features=_from_jsonable(payload.get("text_features") or {}),
+        layout_features=_from_jsonable(payload.get("layout_features") or {}),
+        forensic_features=_from_jsonable(payload.get("forensic_features") or {}),
+        document_intent=_from_jsonable(payload.get("document_intent") or {}),
+        signals=signals,
+        signal_version=payload.get("signal_version") or "v1",
+    )
+    vision_assessment = payload.get("vision_assessment")
+    return features, (_from_jsonable(vision_assessment) if vision_assessment else None)
+
+
+class FeatureSnapshotStore:
+    """
+    SQLite-backed store of ReceiptFeatures snapshots.
+
+    Each row keeps the original label/score so re-scores can be diffed
+    against the decision that was actually returned.
+    """
+
+    def __init__(
+        self,
+        db_path: str = FEATURE_SNAPSHOT_DB,
+        max_rows: int = FEATURE_SNAPSHOT_MAX_ROWS,
+        max_age_days: float = FEATURE_SNAPSHOT_MAX_AGE_DAYS,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self._saves = 0
+        self._init_db()
+        self.prune()
+
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feature_snapshots (
+                    features_id TEXT PRIMARY KEY,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    source TEXT,
+                    schema_version INTEGER NOT NULL,
+                    rule_version TEXT,
+                    engine_version TEXT,
+                    label TEXT,
+                    score REAL,
+                    payload BLOB NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_feature_snapshots_created "
+                "ON feature_snapshots(created_at)"
+            )
+
+    def save_features(
+        self,
+        features: ReceiptFeatures,
+        source: Optional[str] = None,
+        decision: Optional[ReceiptDecision] = None,
+        features_id: Optional[str] = None,
+        vision_assessment: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Persist a snapshot (and the vision veto input it was scored with); returns its features_id."""
+        features_id = features_id or str(uuid.uuid4())
+        with self._get_connection() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO feature_snapshots
+                (features_id, source, schema_version, rule_version, engine_version, label, score, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    features_id,
+                    source,
+                    SNAPSHOT_SCHEMA_VERSION,
+                    getattr(decision, "rule_version", None),
+                    getattr(decision, "engine_version", None),
+                    getattr(decision, "label", None),
+                    getattr(decision, "score", None),
+                    sqlite3.Binary(encode_features(features, vision_assessment)),
+                ),
+            )
+        self._saves += 1
+        if self._saves % _PRUNE_EVERY == 0:
+            self.prune()
+        return features_id
+
+    def prune(self) -> int:
+        """Apply the retention policy (max age, then max rows); returns rows deleted."""
+        deleted = 0
+        with self._get_connection() as conn:
+            if self.max_age_days > 0:
+                deleted += conn.execute(
+                    "DELETE FROM feature_snapshots WHERE created_at < datetime('now', ?)",
+                    (f"-{self.max_age_days} days",),
+                ).rowcount
+            if self.max_rows > 0:
+                deleted += conn.execute(
+                    """
+                    DELETE FROM feature_snapshots WHERE rowid NOT IN (
+                        SELECT rowid FROM feature_snapshots
+                        ORDER BY created_at DESC, rowid DESC LIMIT ?
+                    )
+                    """,
+                    (self.max_rows,),
+                ).rowcount
+        return deleted
+
+    def load_features(self, features_id: str) -> Optional[ReceiptFeatures]:
+        """Load one snapshot's features (None if unknown)."""
+        snapshot = self.load_snapshot(features_id)
+        return snapshot[0] if snapshot else None
+
+    def load_snapshot(self, features_id: str) -> Optional[Tuple[ReceiptFeatures, Optional[Dict[str, Any]]]]:
+        """Load (features, vision_assessment) for one snapshot (None if unknown)."""
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT payload FROM feature_snapshots WHERE features_id = ?",
+                (features_id,),
+            ).fetchone()
+        return decode_snapshot(row["payload"]) if row else None
+
+    def get_snapshot_meta(self, features_id: str) -> Optional[Dict[str, Any]]:
+        """Row metadata (no payload) for one snapshot."""
+        with self._get_connection() as conn:
+            row = conn.execute(
+                """
+                SELECT features_id, created_at, source, schema_version,
+                       rule_version, engine_version, label, score
+                FROM feature_snapshots WHERE features_id = ?
+                """,
+                (features_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def iter_snapshots(
+        self,
+        features_ids: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 500,
+    ) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        """
+        Yield (meta, payload_blob) pairs, newest first.
+
+        Payloads are returned still compressed so callers can ship them to
+        worker processes without a decode/encode round-trip.
+        """
+        cols = "features_id, created_at, source, schema_version, rule_version, engine_version, label, score, payload"
+        with self._get_connection() as conn:
+            if features_ids is not None:
+                ids = list(features_ids)
+                for i in range(0, len(ids), batch_size):
+                    chunk = ids[i:i + batch_size]
+                    marks = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT {cols} FROM feature_snapshots WHERE features_id IN ({marks})",
+                        chunk,
+                    ).fetchall()
+                    by_id = {r["features_id"]: r for r in rows}
+                    for fid in chunk:
+                        row = by_id.get(fid)
+                        if row is not None:
+                            yield self._split_row(row)
+            else:
+                query = f"SELECT {cols} FROM feature_snapshots ORDER BY created_at DESC, rowid DESC"
+                params: Tuple[Any, ...] = ()
+                if limit is not None:
+                    query += " LIMIT ?"
+                    params = (int(limit),)
+                for row in conn.execute(query, params):
+                    yield self._split_row(row)
+
+    @staticmethod
+    def _split_row(row) -> Tuple[Dict[str, Any], bytes]:
+        meta = {k: row[k] for k in row.keys() if k != "payload"}
+        return meta, row["payload"]
+
+    def list_ids(self, limit: int = 100, offset: int = 0) -> List[str]:
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                "SELECT features_id FROM feature_snapshots ORDER BY created_at DESC, rowid DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [r["features_id"] for r in rows]
+
+    def count(self) -> int:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM feature_snapshots").fetchone()[0]
+
+
+# Global instance
+_feature_store: Optional[FeatureSnapshotStore] = None
+
+
+def get_feature_store() -> FeatureSnapshotStore:
+    """Get global feature snapshot store instance."""
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = FeatureSnapshotStore()
+    return _feature_store
@@ -7,6 +7,7 @@ Set DATABASE_URL env var for PostgreSQL, otherwise falls back to SQLite.
 import os
 import sqlite3
 import json
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Dict, Any
@@ -52,6 +53,9 @@ class FeedbackStore:
         if not self.use_pg:
             self.db_path = Path(db_path)
             self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Last learned-rules version seen by this process (see get_rules_version)
+        self._rules_version: Optional[int] = None
+        self._rules_version_read_at = 0.0
         self._init_db()
 
     @contextmanager
@@ -169,6 +173,17 @@ class FeedbackStore:
             )
         """)
 
+        # Learned rules version counter (bumped on every rule write)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS learned_rules_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute(
+            "INSERT OR IGNORE INTO learned_rules_meta (key, value) VALUES ('rules_version', 0)"
+        )
+
         # Accuracy tracking table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS accuracy_metrics (
@@ -232,6 +247,16 @@ class FeedbackStore:
                 auto_learned BOOLEAN DEFAULT TRUE
             )
         """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS learned_rules_meta (
+                key TEXT PRIMARY KEY,
+                value BIGINT NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute(
+            "INSERT INTO learned_rules_meta (key, value) VALUES ('rules_version', 0) "
+            "ON CONFLICT (key) DO NOTHING"
+        )
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS accuracy_metrics (
                 metric_id SERIAL PRIMARY KEY,
@@ -454,8 +479,59 @@ class FeedbackStore:
                         created_at, last_updated, enabled, auto_learned
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, params)
-            
+
+            self._bump_rules_version(cursor)
             return rule.rule_id
+
+    def _bump_rules_version(self, cursor) -> int:
+        """Increment the learned-rules version inside the caller's transaction."""
+        cursor.execute(self._sql(
+            "UPDATE learned_rules_meta SET value = value + 1 WHERE key = ?"
+        ), ("rules_version",))
+        version = self._read_rules_version(cursor)
+        self._rules_version = version
+        self._rules_version_read_at = time.monotonic()
+        return version
+
+    def _read_rules_version(self, cursor) -> int:
+        cursor.execute(self._sql(
+            "SELECT value FROM learned_rules_meta WHERE key = ?"
+        ), ("rules_version",))
+        row = cursor.fetchone()
+        return int(row["value"]) if row else 0
+
+    def bump_rules_version(self) -> int:
+        """
+        Invalidate compiled learned-rule caches without writing a rule.
+
+        save_learned_rule() already bumps the version; use this after bulk
+        operations that bypass it.
+        """
+        with self._get_connection() as conn:
+            return self._bump_rules_version(self._cursor(conn))
+
+    def get_rules_version(self, max_age_seconds: float = 0.0) -> int:
+        """
+        Get the monotonically increasing learned-rules version.
+
+        Args:
+            max_age_seconds: Reuse the last version read by this process for
+                up to this long instead of querying the database. Writes made
+                through this store are always visible immediately; writes from
+                other processes are picked up once the value expires.
+        """
+        if (
+            self._rules_version is not None
+            and max_age_seconds > 0
+            and time.monotonic() - self._rules_version_read_at < max_age_seconds
+        ):
+            return self._rules_version
+
+        with self._get_connection() as conn:
+            version = self._read_rules_version(self._cursor(conn))
+        self._rules_version = version
+        self._rules_version_read_at = time.monotonic()
+        return version
     
     def get_learned_rules(self, enabled_only: bool = True) -> List[LearningRule]:
         """Get all learned rules."""
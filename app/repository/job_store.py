@@ -0,0 +1,142 @@
+"""
+Shared store for provisional analysis jobs.
+
+Provisional jobs (app.pipelines.provisional) are finalized on a background
+thread of the API worker that accepted the upload, but GET /jobs/{id} and
+its SSE stream can land on any of the gunicorn workers. Every state change
+of a job is written through to this SQLite table so all workers on the host
+can serve it; the owning worker still answers from memory.
+
+Rows hold the job summary, its published events and the final decision as
+JSON, and are pruned PROVISIONAL_JOB_TTL_S after the job finished (or, for
+jobs whose worker died before finishing, after it was created).
+
+Configuration:
+- PROVISIONAL_JOB_STORE  (default sqlite) "memory" keeps jobs per-process
+                         (single API worker only)
+- PROVISIONAL_JOB_DB     (default <user cache dir>/provisional_jobs.db,
+                         see app.utils.cache_dir)
+- PROVISIONAL_JOB_TTL_S  (default 900) how long finished jobs stay queryable
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.utils.cache_dir import user_cache_dir
+
+PROVISIONAL_JOB_STORE = os.getenv("PROVISIONAL_JOB_STORE", "sqlite").lower()
+PROVISIONAL_JOB_DB = os.getenv("PROVISIONAL_JOB_DB") or str(user_cache_dir("provisional_jobs.db"))
+PROVISIONAL_JOB_TTL_S = float(os.getenv("PROVISIONAL_JOB_TTL_S", "900"))
+
+
+class JobStore:
+    """SQLite-backed table of provisional jobs, shared by all workers on the host."""
+
+    def __init__(self, db_path: str = PROVISIONAL_JOB_DB, ttl_s: float = PROVISIONAL_JOB_TTL_S):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self.ttl_s = ttl_s
+        self._init_db()
+
+    @contextmanager
+    def _get_connection(self):
+        # Several worker processes write concurrently; wait for the lock
+        conn = sqlite3.connect(str(self.db_path), timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS provisional_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    finished_at REAL,
+                    summary TEXT NOT NULL,
+                    events TEXT NOT NULL,
+                    decision TEXT
+                )
+            """)
+
+    def save(
+        self,
+        job_id: str,
+        status: str,
+        created_at: float,
+        finished_at: Optional[float],
+        summary: Dict[str, Any],
+        events: List[Any],
+        decision: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Insert or replace the current state of a job."""
+        with self._get_connection() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO provisional_jobs
+                (job_id, status, created_at, finished_at, summary, events, decision)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job_id,
+                    status,
+                    created_at,
+                    finished_at,
+                    json.dumps(summary, default=str),
+                    json.dumps(events, default=str),
+                    json.dumps(decision, default=str) if decision is not None else None,
+                ),
+            )
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """State of one job as saved (None if unknown or expired)."""
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM provisional_jobs WHERE job_id = ? AND COALESCE(finished_at, created_at) >= ?",
+                (job_id, time.time() - self.ttl_s),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["job_id"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "finished_at": row["finished_at"],
+            "summary": json.loads(row["summary"]),
+            "events": [tuple(e) for e in json.loads(row["events"])],
+            "decision": json.loads(row["decision"]) if row["decision"] else None,
+        }
+
+    def prune(self) -> int:
+        """Delete jobs past their TTL; returns rows deleted."""
+        with self._get_connection() as conn:
+            return conn.execute(
+                "DELETE FROM provisional_jobs WHERE COALESCE(finished_at, created_at) < ?",
+                (time.time() - self.ttl_s,),
+            ).rowcount
+
+
+_job_store: Optional[JobStore] = None
+
+
+def get_job_store() -> Optional[JobStore]:
+    """Global shared job store (None when PROVISIONAL_JOB_STORE=memory)."""
+    global _job_store
+    if PROVISIONAL_JOB_STORE == "memory":
+        return None
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
@@ -10,10 +10,24 @@ from .address_metrics import (
     reset_global_metrics,
     record_address_features,
 )
+from .timings import (
+    RequestTimer,
+    StageLaps,
+    current_timer,
+    request_timer,
+    get_global_histograms,
+    reset_global_histograms as reset_global_timing_histograms,
+)
 
 __all__ = [
     "AddressMetrics",
     "get_global_metrics",
     "reset_global_metrics",
     "record_address_features",
+    "RequestTimer",
+    "StageLaps",
+    "current_timer",
+    "request_timer",
+    "get_global_histograms",
+    "reset_global_timing_histograms",
 ]
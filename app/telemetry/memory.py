@@ -0,0 +1,53 @@
+"""
+Per-process memory breakdown.
+
+RSS alone over-counts pre-forked workers: pages loaded by the master before
+fork (reference data, models) are shared copy-on-write. /proc/self/smaps_rollup
+splits resident memory into what the process shares and what is private
+(USS), plus its proportional share (PSS) - the sum of PSS over workers is the
+pod's real footprint. Elsewhere only RSS is reported.
+"""
+
+import os
+from typing import Dict
+
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "uss",
+    "Private_Dirty": "uss",
+}
+
+
+def process_memory() -> Dict[str, float]:
+    """{"rss", "pss", "uss", "shared"} in MB for this process (only "rss" off Linux)."""
+    try:
+        totals = {"rss": 0.0, "pss": 0.0, "uss": 0.0, "shared": 0.0}
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                name = _SMAPS_FIELDS.get(key)
+                if name:
+                    totals[name] += int(rest.split()[0]) / 1024  # kB -> MB
+        return {k: round(v, 1) for k, v in totals.items()}
+    except (OSError, ValueError, IndexError):
+        pass
+    import resource
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {"rss": round(peak / scale, 1)}
+
+
+def render_prometheus() -> str:
+    """Worker memory gauges (labelled by pid) in Prometheus text format."""
+    pid = os.getpid()
+    lines = [
+        "# HELP verireceipt_process_memory_mb Resident memory of this worker by kind (rss/pss/uss/shared)",
+        "# TYPE verireceipt_process_memory_mb gauge",
+    ]
+    for kind, mb in sorted(process_memory().items()):
+        lines.append(f'verireceipt_process_memory_mb{{pid="{pid}",kind="{kind}"}} {mb}')
+    return "\n".join(lines) + "\n"
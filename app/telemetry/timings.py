@@ -0,0 +1,274 @@
+"""
+Stage Timings and Latency Histograms
+
+Always-on, low-overhead profiling for the receipt pipeline.
+
+Design Philosophy:
+- Monotonic clock (perf_counter_ns); one tuple append + one histogram bucket
+  increment per stage, nothing else on the hot path
+- Per-request spans are attached to ReceiptDecision.debug["timings"]
+- Process-wide histograms are exposed in Prometheus text format (/metrics)
+- Chrome trace JSON (chrome://tracing, Perfetto) is only serialized on export
+
+Usage:
+    from app.telemetry.timings import request_timer, StageLaps
+
+    with request_timer() as timer:
+        with timer.stage("pipeline.ocr"):
+            ...
+        laps = StageLaps("rules")
+        laps.mark("GROUP_1")       # closes the previous lap, opens a new one
+        ...
+        laps.stop()
+
+    timer.summary()            # {"pipeline.ocr": 12.3, "rules.GROUP_1": 0.4, ...}
+    timer.to_chrome_trace()    # {"traceEvents": [...]}
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Directory for per-request Chrome trace export (unset = no export)
+TRACE_DIR = os.getenv("VERIRECEIPT_TRACE_DIR", "")
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class StageHistograms:
+    """
+    Process-wide latency histograms keyed by stage name.
+
+    Thread-safe; observation cost is a bisect and two additions.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # stage -> [bucket counts..., +Inf count], sum, count
+        self._counts: Dict[str, List[int]] = {}
+        self._sums: Dict[str, float] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        idx = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self._counts.get(stage)
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+                self._counts[stage] = counts
+                self._sums[stage] = 0.0
+            counts[idx] += 1
+            self._sums[stage] += seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage count, sum (seconds) and non-cumulative bucket counts."""
+        with self._lock:
+            return {
+                stage: {
+                    "count": sum(counts),
+                    "sum": self._sums[stage],
+                    "buckets": list(counts),
+                }
+                for stage, counts in self._counts.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+    def render_prometheus(self, metric: str = "verireceipt_stage_duration_seconds") -> str:
+        """Render all histograms in Prometheus text exposition format."""
+        out = [
+            f"# HELP {metric} Wall time spent per pipeline stage / rule group.",
+            f"# TYPE {metric} histogram",
+        ]
+        for stage, data in sorted(self.snapshot().items()):
+            label = stage.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, n in zip(self.buckets, data["buckets"]):
+                cumulative += n
+                out.append(f'{metric}_bucket{{stage="{label}",le="{bound:g}"}} {cumulative}')
+            out.append(f'{metric}_bucket{{stage="{label}",le="+Inf"}} {data["count"]}')
+            out.append(f'{metric}_sum{{stage="{label}"}} {data["sum"]:.6f}')
+            out.append(f'{metric}_count{{stage="{label}"}} {data["count"]}')
+        return "\n".join(out) + "\n"
+
+
+_global_histograms = StageHistograms()
+
+
+def get_global_histograms() -> StageHistograms:
+    """Get the process-wide stage histograms."""
+    return _global_histograms
+
+
+def reset_global_histograms() -> None:
+    """Reset the process-wide stage histograms."""
+    _global_histograms.reset()
+
+
+class RequestTimer:
+    """
+    Collects stage spans for a single request.
+
+    Spans are (name, category, start_ns, duration_ns, thread_id) and are also
+    fed into the process-wide histograms as they are recorded.
+    """
+
+    def __init__(self, name: str = "request", histograms: Optional[StageHistograms] = None):
+        self.name = name
+        self.histograms = histograms if histograms is not None else _global_histograms
+        self.origin_ns = time.perf_counter_ns()
+        self.spans: List[Tuple[str, str, int, int, int]] = []
+
+    def record(self, name: str, start_ns: int, end_ns: int, category: str = "stage") -> None:
+        duration_ns = end_ns - start_ns
+        self.spans.append((name, category, start_ns, duration_ns, threading.get_ident()))
+        self.histograms.observe(name, duration_ns / 1e9)
+
+    @contextmanager
+    def stage(self, name: str, category: str = "stage") -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter_ns(), category)
+
+    def summary(self) -> Dict[str, float]:
+        """Milliseconds per stage (repeated stages are summed), in first-seen order."""
+        totals: Dict[str, float] = {}
+        for name, _cat, _start, dur, _tid in self.spans:
+            totals[name] = totals.get(name, 0.0) + dur / 1e6
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace-event JSON ("X" complete events, microsecond units)."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin_ns) / 1000.0,
+                "dur": dur / 1000.0,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, category, start, dur, tid in self.spans
+        ]
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"request": self.name},
+        }
+
+    def export_chrome_trace(self, path: str) -> str:
+        """Write the Chrome trace JSON to `path` and return it."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+
+_current_timer: ContextVar[Optional[RequestTimer]] = ContextVar("verireceipt_request_timer", default=None)
+
+
+def current_timer() -> Optional[RequestTimer]:
+    """The RequestTimer active in this context, if any."""
+    return _current_timer.get()
+
+
+@contextmanager
+def request_timer(name: str = "request") -> Iterator[RequestTimer]:
+    """
+    Activate a RequestTimer for the current context.
+
+    Nested calls reuse the outer timer, so an entry point called from another
+    entry point contributes to the caller's trace.
+    """
+    existing = _current_timer.get()
+    if existing is not None:
+        yield existing
+        return
+    timer = RequestTimer(name)
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+class StageLaps:
+    """
+    Sequential lap timer for long functions split into labelled sections.
+
+    `mark(label)` closes the running lap and opens `<prefix>.<label>`; `stop()`
+    closes the last one. Laps go to the active RequestTimer, or to a private
+    one when the function is called outside a request.
+    """
+
+    __slots__ = ("prefix", "timer", "_label", "_start")
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.timer = current_timer() or RequestTimer(prefix)
+        self._label: Optional[str] = None
+        self._start = 0
+
+    def mark(self, label: str) -> None:
+        now = time.perf_counter_ns()
+        if self._label is not None:
+            self.timer.record(self._label, self._start, now, self.prefix)
+        self._label = f"{self.prefix}.{label}"
+        self._start = now
+
+    def stop(self) -> None:
+        if self._label is not None:
+            self.timer.record(self._label, self._start, time.perf_counter_ns(), self.prefix)
+            self._label = None
+
+
+def attach_timings(debug: Dict[str, Any], timer: RequestTimer) -> Dict[str, float]:
+    """
+    Merge `timer`'s stage summary into debug["timings"].
+
+    Timings already there (e.g. rule-group laps recorded on a private timer
+    when scoring ran outside the request context) are kept; stages present
+    in both take the request timer's value.
+    """
+    timings = dict(debug.get("timings") or {})
+    timings.update(timer.summary())
+    debug["timings"] = timings
+    return timings
+
+
+def maybe_export_trace(timer: RequestTimer, tag: str = "") -> Optional[str]:
+    """
+    Export a Chrome trace when VERIRECEIPT_TRACE_DIR is set.
+
+    Returns the written path, or None when export is disabled or fails.
+    """
+    if not TRACE_DIR:
+        return None
+    try:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        safe_tag = "".join(c if c.isalnum() or c in "-_." else "_" for c in tag)[:80]
+        fname = f"trace_{time.strftime('%Y%m%dT%H%M%S')}_{os.getpid()}_{id(timer):x}"
+        if safe_tag:
+            fname += f"_{safe_tag}"
+        return timer.export_chrome_trace(os.path.join(TRACE_DIR, fname + ".json"))
+    except Exception as e:
+        logger.warning(f"Chrome trace export failed: {e}")
+        return None
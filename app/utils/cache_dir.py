@@ -0,0 +1,34 @@
+"""
+Per-user locations for generated files.
+
+Caches and other artifacts the service writes at runtime must not land in
+the source tree (where they get committed or baked into images). Defaults
+follow the XDG base directories:
+
+- user_cache_dir()  $VERIRECEIPT_CACHE_DIR, else $XDG_CACHE_HOME/verireceipt
+                    (~/.cache/verireceipt)
+- user_data_dir()   $VERIRECEIPT_DATA_DIR, else $XDG_DATA_HOME/verireceipt
+                    (~/.local/share/verireceipt)
+
+Each module still has its own *_PATH / *_DIR setting that overrides these.
+"""
+
+import os
+from pathlib import Path
+
+
+def _base(override: str, xdg: str, fallback: str) -> Path:
+    root = os.getenv(override)
+    if root:
+        return Path(root).expanduser()
+    return Path(os.getenv(xdg) or Path.home() / fallback) / "verireceipt"
+
+
+def user_cache_dir(*parts: str) -> Path:
+    """Cache directory (safe to delete); `parts` are joined below it."""
+    return _base("VERIRECEIPT_CACHE_DIR", "XDG_CACHE_HOME", ".cache").joinpath(*parts)
+
+
+def user_data_dir(*parts: str) -> Path:
+    """Data directory for files worth keeping; `parts` are joined below it."""
+    return _base("VERIRECEIPT_DATA_DIR", "XDG_DATA_HOME", ".local/share").joinpath(*parts)
@@ -0,0 +1,113 @@
+"""
+On-disk cache for data compiled from resource files.
+
+Language packs and domain packs are YAML parsed (pure-Python safe_load),
+validated and merged in every process at startup, a cost that grows with
+each pack added. load_compiled() runs that build once and pickles the
+result next to a fingerprint of its sources; later loads with unchanged
+sources are one unpickle:
+
+    packs = load_compiled("domainpacks", files, build, version=1)
+
+The fingerprint hashes each source file's name and contents (not mtimes, so
+a fresh checkout still hits), the caller's `version` (bump it when the build
+logic or the pickled classes change) and the Python version. Any edit to a
+source file yields a new fingerprint and an automatic rebuild; an unreadable
+or incompatible cache file is rebuilt too.
+
+Cache files are unpickled, so they are only read from a directory private to
+this user (created 0700) and only if this user owns them and nobody else can
+write them; anything else is ignored and rebuilt.
+
+Configuration:
+- COMPILED_CACHE_ENABLED  (default true)
+- COMPILED_CACHE_DIR      (default <user cache dir>/compiled, see app.utils.cache_dir)
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Iterable, Union
+
+from app.utils.cache_dir import user_cache_dir
+
+logger = logging.getLogger(__name__)
+
+COMPILED_CACHE_ENABLED = os.getenv("COMPILED_CACHE_ENABLED", "true").lower() == "true"
+COMPILED_CACHE_DIR = os.getenv("COMPILED_CACHE_DIR") or str(user_cache_dir("compiled"))
+
+
+def source_fingerprint(sources: Iterable[Union[str, Path]], version: Any = 1) -> str:
+    """Hash of the sources' names and contents, `version` and the Python version."""
+    h = hashlib.sha256()
+    h.update(f"{version}|{sys.version_info[:2]}".encode())
+    for path in sorted(Path(p) for p in sources):
+        h.update(path.name.encode() + b"\0")
+        h.update(hashlib.sha256(path.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def _trusted(path: Path) -> bool:
+    """True if `path` and its directory are owned by us and not writable by others."""
+    if not hasattr(os, "getuid"):
+        return True
+    try:
+        for p in (path.parent, path):
+            st = p.stat()
+            if st.st_uid != os.getuid() or st.st_mode & 0o022:
+                return False
+    except OSError:
+        return False
+    return True
+
+
+def load_compiled(
+    name: str,
+    sources: Iterable[Union[str, Path]],
+    build: Callable[[], Any],
+    version: Any = 1,
+    cache_dir: Union[str, Path, None] = None,
+) -> Any:
+    """
+    Return build()'s result for `sources`, from the cache when they are unchanged.
+
+    The result must be picklable. Cache write failures are logged and ignored.
+    """
+    if not COMPILED_CACHE_ENABLED:
+        return build()
+    sources = list(sources)
+    root = Path(cache_dir or COMPILED_CACHE_DIR)
+    path = root / f"{name}-{source_fingerprint(sources, version)[:20]}.pkl"
+
+    if path.exists() and not _trusted(path):
+        logger.warning("Ignoring compiled cache %s: not private to this user", path)
+    elif path.exists():
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning("Ignoring unreadable compiled cache %s: %s", path, e)
+
+    value = build()
+    tmp = None
+    try:
+        root.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=root, prefix=f".{name}-", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        tmp = None
+        # Drop artifacts built from older versions of the sources
+        for stale in root.glob(f"{name}-*.pkl"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+    except Exception as e:
+        logger.warning("Could not write compiled cache %s: %s", path, e)
+    finally:
+        if tmp is not None:
+            Path(tmp).unlink(missing_ok=True)
+    return value
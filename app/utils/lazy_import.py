@@ -0,0 +1,65 @@
+"""
+Lazy imports for heavy optional dependencies.
+
+torch, transformers, easyocr, pytesseract (which pulls in pandas), PyMuPDF
+and cv2 together dominate `import app.api.main`. Modules that need them
+declare availability with module_available() (a find_spec lookup, no
+import) and bind the module with lazy_import(), which imports it on first
+attribute access:
+
+    HAS_TESSERACT = module_available("pytesseract")
+    pytesseract = lazy_import("pytesseract")
+    ...
+    pytesseract.image_to_string(img)   # imported here, once
+
+tests/test_import_time.py keeps these out of the API import path.
+"""
+
+import importlib
+import importlib.util
+from functools import lru_cache
+from typing import Any
+
+
+@lru_cache(maxsize=None)
+def module_available(name: str) -> bool:
+    """True if `name` can be imported (checked without importing it)."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access."""
+
+    __slots__ = ("_lazy_name", "_lazy_module")
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_module", None)
+
+    def _load(self):
+        module = self._lazy_module
+        if module is None:
+            module = importlib.import_module(self._lazy_name)
+            object.__setattr__(self, "_lazy_module", module)
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module {self._lazy_name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Module proxy for `name`; the import happens on first use."""
+    return LazyModule(name)
@@ -0,0 +1,143 @@
+# app/warmup.py
+"""
+Pre-fork warm-up of reference data and models.
+
+Everything the pipeline otherwise loads lazily on the first request - language
+packs, domain packs, document templates, the geo tables, the PIN code
+database, the fastText language-ID model and the MODEL_WARMUP models - is
+loaded here, in the server master before it forks workers (gunicorn.conf.py
+with preload_app). Workers then share those pages copy-on-write instead of
+each building its own copy.
+
+Python's cyclic GC writes to every tracked object's header when it runs,
+which would copy the shared pages into each worker. warmup() therefore runs
+with GC disabled and ends with gc.freeze(), moving everything loaded so far
+into the permanent generation the collector never touches; workers re-enable
+GC after fork.
+
+    python -m app.warmup        # load everything, print timings and memory
+"""
+
+import gc
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.telemetry.memory import process_memory
+
+logger = logging.getLogger(__name__)
+
+
+def _langpacks() -> Dict[str, Any]:
+    from app.pipelines.features import _get_lang_system
+    from app.pipelines.geo_detection import _get_lang_components
+
+    from app.pipelines.language_id import _bucket_table
+
+    lang_system = _get_lang_system()
+    _get_lang_components()
+    # Code point lookup tables for script detection
+    lang_system["detector"]._lookup_table()
+    _bucket_table()
+    return {"packs": len(lang_system["loader"].get_available_packs())}
+
+
+def _domainpacks() -> Dict[str, Any]:
+    from app.pipelines.domain_validation import _load_domainpacks
+
+    return {"packs": len(_load_domainpacks())}
+
+
+def _templates() -> Dict[str, Any]:
+    from app.pipelines.templates.registry import get_registry
+
+    return {"templates": get_registry().count()}
+
+
+def _geo() -> Dict[str, Any]:
+    from app.geo.db import load_geo_snapshot
+
+    return load_geo_snapshot()
+
+
+def _pin_codes() -> Dict[str, Any]:
+    from app.validation.data_loader import get_database
+
+    return {"pin_codes": len(get_database().pin_codes)}
+
+
+def _fasttext() -> Dict[str, Any]:
+    from app.pipelines.language_id import _load_fasttext_model
+
+    return {"loaded": _load_fasttext_model() is not None}
+
+
+# Components in load order: (name, loader returning a small summary)
+COMPONENTS: List[tuple] = [
+    ("langpacks", _langpacks),
+    ("domainpacks", _domainpacks),
+    ("templates", _templates),
+    ("geo", _geo),
+    ("pin_codes", _pin_codes),
+    ("fasttext", _fasttext),
+]
+
+
+def _timed(fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        result = {"ok": True, **fn()}
+    except Exception as e:
+        logger.warning("Warm-up step failed: %s", e)
+        result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def warmup(models: Optional[List[str]] = None, freeze: bool = True) -> Dict[str, Any]:
+    """
+    Load reference data and `models` (default MODEL_WARMUP) in this process.
+
+    Models are skipped when a model server hosts them (MODEL_SERVER_SOCKET).
+    Failures are reported per component, never raised: a missing optional
+    dependency (e.g. fastText) just leaves that component lazy. With `freeze`
+    the loaded objects are moved out of the GC's reach (see module docstring)
+    and GC stays disabled; the caller re-enables it (in the workers, after
+    fork).
+
+    Returns {"components": {name: {...}}, "models": {...}, "seconds",
+    "memory": process_memory(), "gc_frozen": count}.
+    """
+    from app.pipelines.model_registry import MODEL_WARMUP, get_model_registry, parse_warmup
+    from app.pipelines.model_server import model_server_enabled
+
+    gc.disable()
+    start = time.perf_counter()
+    components = {name: _timed(fn) for name, fn in COMPONENTS}
+    names = parse_warmup(MODEL_WARMUP) if models is None else models
+    if model_server_enabled():
+        # Models live in the model server; loading them here would duplicate them
+        names = []
+    model_results = get_model_registry().warmup(names) if names else {}
+
+    if freeze:
+        # Collect garbage left by loading first so it is not frozen too
+        gc.collect()
+        gc.freeze()
+    else:
+        gc.enable()
+    report = {
+        "components": components,
+        "models": model_results,
+        "seconds": round(time.perf_counter() - start, 2),
+        "memory": process_memory(),
+        "gc_frozen": gc.get_freeze_count(),
+    }
+    logger.info("Warm-up finished in %.1fs: %s", report["seconds"], report["memory"])
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(warmup(), indent=2, default=str))
@@ -6,6 +6,8 @@ Supports dual-mode image extraction:
 - Mode B: Render page and crop image regions (reliable fallback)
 """
 
+from __future__ import annotations
+
 import io
 import re
 import hashlib
@@ -13,11 +15,11 @@ from typing import Optional, List, Dict, Any, Tuple
 from dataclasses import dataclass, field
 from pathlib import Path
 
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
+from app.utils.lazy_import import lazy_import, module_available
+
+# PyMuPDF and OpenCV are imported on first use
+PYMUPDF_AVAILABLE = module_available("fitz")
+fitz = lazy_import("fitz")  # PyMuPDF
 
 try:
     from PIL import Image
@@ -32,12 +34,10 @@ try:
 except ImportError:
     IMAGEHASH_AVAILABLE = False
 
-try:
-    import cv2
-    import numpy as np
-    OPENCV_AVAILABLE = True
-except ImportError:
-    OPENCV_AVAILABLE = False
+OPENCV_AVAILABLE = module_available("cv2") and module_available("numpy")
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+if not OPENCV_AVAILABLE:
     print("⚠️ OpenCV not available - advanced image detection disabled")
 
 
@@ -1,42 +1,34 @@
 #!/usr/bin/env python
-"""Pre-load all models to avoid meta tensor issues"""
+"""
+Pre-load (and download) models through the model registry.
+
+This runs in its own process, so it only fills the Hugging Face / EasyOCR
+caches; to warm the server process itself set MODEL_WARMUP (see
+app/pipelines/model_registry.py).
+
+Usage:
+    python preload_models.py                 # all models
+    python preload_models.py layoutlm donut
+"""
 
 import sys
 import os
 sys.path.insert(0, os.path.dirname(__file__))
 
+from app.pipelines.model_registry import get_model_registry, parse_warmup
+
 print("=" * 60)
 print("Pre-loading VeriReceipt Models")
 print("=" * 60)
 
-# Pre-load DONUT
-print("\n1. Loading DONUT...")
-try:
-    from app.pipelines.donut_extractor import get_donut_extractor
-    extractor = get_donut_extractor()
-    extractor.load_model()  # Force load
-    print("✅ DONUT loaded successfully")
-except Exception as e:
-    print(f"❌ DONUT failed: {e}")
-
-# Pre-load Donut-Receipt
-print("\n2. Loading Donut-Receipt...")
-try:
-    from app.models.donut_receipt import DonutReceiptModel
-    model = DonutReceiptModel()
-    print("✅ Donut-Receipt loaded successfully")
-except Exception as e:
-    print(f"❌ Donut-Receipt failed: {e}")
-
-# Pre-load LayoutLM
-print("\n3. Loading LayoutLM...")
-try:
-    from app.pipelines.layoutlm_extractor import get_layoutlm_extractor
-    extractor = get_layoutlm_extractor()
-    extractor.load_model()  # Force load
-    print("✅ LayoutLM loaded successfully")
-except Exception as e:
-    print(f"❌ LayoutLM failed: {e}")
+names = sys.argv[1:] or parse_warmup("all")
+registry = get_model_registry()
+for name, result in registry.warmup(names).items():
+    if result == "ok":
+        mb = registry.status()["models"][name]["resident_mb"]
+        print(f"✅ {name} loaded (~{mb:.0f} MB)")
+    else:
+        print(f"❌ {name} failed: {result}")
 
 print("\n" + "=" * 60)
 print("Model pre-loading complete!")
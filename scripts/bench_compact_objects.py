@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Objects and bytes per document for LayoutToken and RuleEvent.
+
+Builds a synthetic 3-page invoice (OCR tokens, PyMuPDF tokens with font
+metadata, rule events with evidence) with the current slotted classes and
+with copies of the former plain dataclasses, and reports for each:
+
+- objects: live memory blocks allocated per document (tracemalloc; one per
+           object, plus one per materialized __dict__ / metadata dict)
+- bytes:   bytes of those blocks
+- build:   time to build one document
+
+Usage:
+    python scripts/bench_compact_objects.py
+    python scripts/bench_compact_objects.py --tokens 1500 --events 300 --json
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.pipelines.layout_tokens import LayoutToken
+from app.pipelines.rules import RuleEvent
+
+
+@dataclass
+class LegacyLayoutToken:
+    text: str
+    x0: Optional[float] = None
+    y0: Optional[float] = None
+    x1: Optional[float] = None
+    y1: Optional[float] = None
+    page: int = 0
+    source: str = "unknown"
+    line_idx: int = 0
+    confidence: Optional[float] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class LegacyRuleEvent:
+    rule_id: str
+    severity: str
+    weight: float
+    raw_weight: float
+    message: str
+    evidence: Dict[str, Any]
+
+
+# Shared inputs so only the token/event objects themselves are measured
+WORDS = [f"word{i}" for i in range(64)]
+FONTS = [{"font": "Helvetica", "size": 9.0 + i % 3} for i in range(3)]
+EVIDENCE = [{"confidence_factor": 1.0, "raw_weight": 0.1, "applied_weight": 0.1} for _ in range(8)]
+
+
+def build_document(token_cls, event_cls, n_tokens: int, n_events: int, pdf_share: float):
+    n_pdf = int(n_tokens * pdf_share)
+    tokens = []
+    for i in range(n_tokens):
+        x0, y0 = float(i % 12 * 45), float(i // 12 * 14)
+        if i < n_pdf:
+            tokens.append(token_cls(
+                text=WORDS[i % 64], x0=x0, y0=y0, x1=x0 + 40.0, y1=y0 + 11.0,
+                page=i * 3 // n_tokens, source="pymupdf", line_idx=i // 12,
+                metadata=dict(FONTS[i % 3]),
+            ))
+        else:
+            tokens.append(token_cls(
+                text=WORDS[i % 64], x0=x0, y0=y0, x1=x0 + 40.0, y1=y0 + 11.0,
+                page=i * 3 // n_tokens, source="easyocr", line_idx=i // 12,
+                confidence=0.9,
+            ))
+    events = [
+        event_cls(
+            rule_id=f"R{i % 40}", severity="WARNING", weight=0.1, raw_weight=0.1,
+            message="synthetic", evidence=dict(EVIDENCE[i % 8]),
+        )
+        for i in range(n_events)
+    ]
+    return tokens, events
+
+
+def measure(token_cls, event_cls, args) -> Dict[str, float]:
+    build = lambda: build_document(token_cls, event_cls, args.tokens, args.events, args.pdf_share)
+    build()  # warm caches (interned strings, small ints)
+
+    gc.collect()
+    tracemalloc.start()
+    doc = build()
+    stats = tracemalloc.take_snapshot().statistics("filename")
+    tracemalloc.stop()
+    del doc
+    objects = sum(s.count for s in stats)
+    size = sum(s.size for s in stats)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        build()
+    build_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    return {"objects": objects, "bytes": size, "build_ms": round(build_ms, 2)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=3000, help="tokens per document (default 3000)")
+    parser.add_argument("--events", type=int, default=300, help="rule events per document (default 300)")
+    parser.add_argument("--pdf-share", type=float, default=0.3, help="fraction of tokens with font metadata")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = {
+        "before": measure(LegacyLayoutToken, LegacyRuleEvent, args),
+        "after": measure(LayoutToken, RuleEvent, args),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{args.tokens} tokens ({args.pdf_share:.0%} with metadata), {args.events} events per document")
+    print(f"{'':8} {'objects':>10} {'bytes':>12} {'build ms':>10}")
+    for label, r in results.items():
+        print(f"{label:8} {r['objects']:>10} {r['bytes']:>12} {r['build_ms']:>10}")
+    b, a = results["before"], results["after"]
+    print(f"{'saved':8} {b['objects'] - a['objects']:>10} {b['bytes'] - a['bytes']:>12}"
+          f" {b['build_ms'] - a['build_ms']:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Export the LayoutLM / DONUT extractors to ONNX for the ONNX Runtime backend.
+
+Writes <out-dir>/<model slug>/fp32 and, unless --no-quantize, a dynamically
+int8-quantized copy in <out-dir>/<model slug>/int8 (loaded by default when
+EXTRACTOR_BACKEND=onnx, see app/pipelines/onnx_backend.py).
+
+Requires: pip install 'optimum[exporters,onnxruntime]'
+
+Usage:
+    python scripts/export_onnx.py --engine layoutlm donut
+    python scripts/export_onnx.py --engine donut --no-quantize
+    python scripts/export_onnx.py --engine layoutlm --out-dir /models/onnx
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.pipelines.donut_extractor import DONUT_MODEL_NAME
+from app.pipelines.layoutlm_extractor import LAYOUTLM_MODEL_NAME
+from app.pipelines.onnx_backend import ENGINE_TASKS, ONNX_MODEL_DIR, export_model
+
+MODEL_NAMES = {"layoutlm": LAYOUTLM_MODEL_NAME, "donut": DONUT_MODEL_NAME}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export extractors to ONNX (optionally int8)")
+    parser.add_argument("--engine", nargs="+", choices=sorted(ENGINE_TASKS), default=sorted(ENGINE_TASKS))
+    parser.add_argument("--out-dir", default=ONNX_MODEL_DIR, help="Export root (default: ONNX_MODEL_DIR)")
+    parser.add_argument("--no-quantize", action="store_true", help="Only write the fp32 export")
+    args = parser.parse_args()
+
+    results = {}
+    for engine in args.engine:
+        model_name = MODEL_NAMES[engine]
+        print(f"Exporting {engine} ({model_name}) -> {args.out_dir}", file=sys.stderr)
+        start = time.perf_counter()
+        try:
+            paths = export_model(engine, model_name, root=args.out_dir, quantize=not args.no_quantize)
+        except ImportError as e:
+            print(f"❌ {e} (pip install 'optimum[exporters,onnxruntime]')", file=sys.stderr)
+            return 1
+        paths["seconds"] = round(time.perf_counter() - start, 1)
+        results[engine] = paths
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Parity and latency/memory check: ONNX Runtime vs PyTorch extractors.
+
+Each backend runs in its own subprocess (so peak RSS is per backend) over the
+same fixture images:
+
+- DONUT:    merchant / total / date from extract_receipt_data must match
+- LayoutLM: token predictions must agree on >= --min-agreement of tokens
+
+Exits 1 on any parity mismatch. Needs the ONNX export
+(scripts/export_onnx.py) and torch + optimum[onnxruntime].
+
+Usage:
+    python scripts/onnx_parity_bench.py data/raw/*.jpg
+    python scripts/onnx_parity_bench.py data/raw/*.jpg --engine donut --bench --repeat 5
+    python scripts/onnx_parity_bench.py data/raw/*.jpg --json > parity.json
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.pipelines.onnx_backend import PARITY_FIELDS, field_parity, token_agreement
+
+BACKENDS = ("torch", "onnx")
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_worker(engine: str, backend: str, images, repeat: int) -> dict:
+    """Load one engine on one backend and run every image `repeat` times."""
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    if engine == "donut":
+        from app.pipelines.donut_extractor import DonutExtractor
+
+        extractor = DonutExtractor(backend=backend)
+
+        def run(path):
+            data = extractor.extract_receipt_data(path)
+            return {name: data.get(name) for name in PARITY_FIELDS}
+    else:
+        from PIL import Image
+
+        from app.pipelines.layoutlm_extractor import LayoutLMExtractor
+
+        extractor = LayoutLMExtractor(backend=backend)
+
+        def run(path):
+            return {"predictions": extractor.predict(extractor.encode(Image.open(path).convert("RGB")))}
+
+    extractor.load_model()
+    if extractor.backend != backend:
+        raise RuntimeError(f"{engine}: asked for {backend}, loaded {extractor.backend}")
+    load_s = time.perf_counter() - start
+    rss_loaded = _rss_mb()
+
+    outputs, latencies = {}, []
+    for path in images:
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            outputs[path] = run(path)
+            latencies.append((time.perf_counter() - t0) * 1000)
+    return {
+        "engine": engine,
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "rss_model_mb": round(rss_loaded - rss_before, 1),
+        "peak_rss_mb": round(_rss_mb(), 1),
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 1),
+            "p95": round(_percentile(latencies, 0.95), 1),
+            "mean": round(statistics.fmean(latencies), 1),
+        },
+        "outputs": outputs,
+    }
+
+
+def _spawn(engine: str, backend: str, images, repeat: int) -> dict:
+    cmd = [sys.executable, __file__, "--worker", engine, backend, "--repeat", str(repeat), *images]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{engine}/{backend} worker failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(engine: str, reference: dict, candidate: dict, min_agreement: float) -> dict:
+    files = {}
+    for path, ref in reference["outputs"].items():
+        cand = candidate["outputs"].get(path, {})
+        if engine == "donut":
+            files[path] = field_parity(ref, cand)
+        else:
+            agreement = token_agreement(ref["predictions"], cand.get("predictions", []))
+            files[path] = {"match": agreement >= min_agreement, "agreement": round(agreement, 4)}
+    return {"match": all(f["match"] for f in files.values()), "files": files}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="ONNX vs PyTorch extractor parity / benchmark")
+    parser.add_argument("images", nargs="+", help="Fixture receipt images")
+    parser.add_argument("--engine", nargs="+", choices=["layoutlm", "donut"], default=["layoutlm", "donut"])
+    parser.add_argument("--bench", action="store_true", help="Print latency / memory per backend")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per image (latency samples)")
+    parser.add_argument("--min-agreement", type=float, default=0.99, help="LayoutLM token agreement")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--worker", nargs=2, metavar=("ENGINE", "BACKEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        engine, backend = args.worker
+        print(json.dumps(run_worker(engine, backend, args.images, args.repeat)))
+        return 0
+
+    report = {}
+    for engine in args.engine:
+        runs = {backend: _spawn(engine, backend, args.images, args.repeat) for backend in BACKENDS}
+        parity = compare(engine, runs["torch"], runs["onnx"], args.min_agreement)
+        report[engine] = {
+            "parity": parity,
+            "bench": {b: {k: v for k, v in r.items() if k != "outputs"} for b, r in runs.items()},
+        }
+
+    ok = all(r["parity"]["match"] for r in report.values())
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+        return 0 if ok else 1
+
+    for engine, r in report.items():
+        mismatched = [p for p, f in r["parity"]["files"].items() if not f["match"]]
+        status = "✅ parity" if not mismatched else f"❌ {len(mismatched)} mismatched"
+        print(f"{engine}: {status} ({len(r['parity']['files'])} images)")
+        for path in mismatched:
+            print(f"   {path}: {r['parity']['files'][path]}")
+        if args.bench:
+            for backend, b in r["bench"].items():
+                lat = b["latency_ms"]
+                print(
+                    f"   {backend:5s} load {b['load_s']:.1f}s  p50 {lat['p50']:.0f}ms  p95 {lat['p95']:.0f}ms  "
+                    f"model RSS {b['rss_model_mb']:.0f}MB  peak RSS {b['peak_rss_mb']:.0f}MB"
+                )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
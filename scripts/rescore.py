@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Re-score stored feature snapshots with the current rule engine.
+
+Skips OCR and Vision LLM entirely: only `_score_and_explain` runs on the
+features persisted by analyze_receipt (FEATURE_SNAPSHOTS_ENABLED=true; stored
+in FEATURE_SNAPSHOT_DB, see app/repository/feature_store.py).
+
+Usage:
+    python scripts/rescore.py                         # all snapshots
+    python scripts/rescore.py --ids <id1> <id2>
+    python scripts/rescore.py --limit 5000 --workers 8
+    python scripts/rescore.py --policy policy.json --changed-only
+    python scripts/rescore.py --json > results.json
+
+policy.json example:
+    {"fake_threshold": 0.65, "weight_overrides": {"R_ROUND_TOTAL": 0.02},
+     "disabled_rules": ["R_STRUCTURE_ORDER"], "apply_learned": true}
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.pipelines.rescore import RescorePolicy, rescore_many, summarize_rescore
+from app.repository.feature_store import FEATURE_SNAPSHOT_DB, FeatureSnapshotStore
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Re-score stored feature snapshots")
+    parser.add_argument("--db", default=FEATURE_SNAPSHOT_DB, help="Feature snapshot database")
+    parser.add_argument("--ids", nargs="*", help="features_id values to re-score (default: all)")
+    parser.add_argument("--limit", type=int, default=None, help="Max snapshots (newest first)")
+    parser.add_argument("--policy", help="Path to a JSON RescorePolicy")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPUs-1, max 8)")
+    parser.add_argument("--changed-only", action="store_true", help="Only print receipts whose label changed")
+    parser.add_argument("--json", action="store_true", help="Emit JSON instead of a table")
+    args = parser.parse_args()
+
+    policy = RescorePolicy()
+    if args.policy:
+        with open(args.policy, "r", encoding="utf-8") as f:
+            policy = RescorePolicy.from_dict(json.load(f))
+
+    store = FeatureSnapshotStore(args.db)
+    start = time.time()
+    results = rescore_many(
+        features_ids=args.ids or None,
+        policy=policy,
+        store=store,
+        limit=args.limit,
+        workers=args.workers,
+    )
+    elapsed = time.time() - start
+    summary = summarize_rescore(results)
+    summary["elapsed_s"] = round(elapsed, 3)
+
+    shown = [r for r in results if r.changed or r.error] if args.changed_only else results
+
+    if args.json:
+        print(json.dumps({"summary": summary, "results": [r.to_dict() for r in shown]}, indent=2))
+        return 0
+
+    for r in shown:
+        prev = f"{r.previous_label or '-'}({r.previous_score if r.previous_score is not None else '-'})"
+        mark = "  *" if r.changed else ""
+        err = f"  ERROR: {r.error}" if r.error else ""
+        print(f"{r.features_id}  {prev:>22} -> {r.label}({r.score:.3f}){mark}{err}")
+
+    print("=" * 60)
+    print(f"Re-scored {summary['total']} snapshots in {summary['elapsed_s']}s "
+          f"({summary['changed']} changed, {summary['errors']} errors)")
+    print(f"Labels: {summary['labels']}")
+    if summary["transitions"]:
+        print(f"Transitions: {summary['transitions']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+#!/bin/bash
+# Start the shared model server, then N API workers that use it.
+#
+#   API_WORKERS=4 PORT=8000 scripts/serve_with_model_server.sh
+#
+# Heavy models (LayoutLM, DONUT, Donut-Receipt, PyTorch vision LLM, EasyOCR)
+# load once in the model server; API workers talk to it over
+# MODEL_SERVER_SOCKET (see app/pipelines/model_server.py).
+
+set -e
+
+export MODEL_SERVER_SOCKET="${MODEL_SERVER_SOCKET:-/tmp/verireceipt-models.sock}"
+
+python3 -m app.pipelines.model_server --socket "$MODEL_SERVER_SOCKET" &
+MODEL_SERVER_PID=$!
+trap 'kill $MODEL_SERVER_PID 2>/dev/null' EXIT
+
+# Wait for the socket before accepting traffic
+for _ in $(seq 1 100); do
+    [ -S "$MODEL_SERVER_SOCKET" ] && break
+    sleep 0.1
+done
+
+# Pre-forked workers share the reference data warmed up in the gunicorn
+# master (gunicorn.conf.py, app/warmup.py)
+gunicorn app.api.main:app -c gunicorn.conf.py
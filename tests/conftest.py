@@ -0,0 +1,22 @@
+"""
+Shared pytest fixtures.
+
+Pipelines that apply learned rules open the global FeedbackStore, whose
+default SQLite file is the tracked data/feedback.db; every test gets its own
+empty store under tmp_path instead, so the suite never writes to (or
+migrates) the checked-in database.
+"""
+
+import pytest
+
+from app.repository import feedback_store
+
+
+@pytest.fixture(autouse=True)
+def isolated_feedback_store(monkeypatch, tmp_path):
+    if feedback_store.USE_POSTGRES:
+        yield None
+        return
+    store = feedback_store.FeedbackStore(db_path=str(tmp_path / "feedback.db"))
+    monkeypatch.setattr(feedback_store, "_feedback_store", store)
+    yield store
@@ -0,0 +1,56 @@
+"""
+Slotted LayoutToken / RuleEvent keep the dataclass behaviour they replaced.
+"""
+
+from dataclasses import asdict
+
+from app.pipelines.layout_tokens import LayoutToken
+from app.pipelines.rules import RuleEvent, _emit_event
+
+
+def test_layout_token_is_slotted():
+    tok = LayoutToken("Total", 1.0, 2.0, 3.0, 4.0, page=1, source="easyocr", confidence=0.9)
+    assert not hasattr(tok, "__dict__")
+    assert tok._metadata is None
+
+
+def test_layout_token_metadata_allocated_lazily():
+    tok = LayoutToken("Total")
+    assert tok.metadata == {}
+    tok.metadata["font"] = "Helvetica"
+    assert tok.metadata == {"font": "Helvetica"}
+
+    tok.metadata = {"size": 9}
+    assert tok.metadata == {"size": 9}
+
+
+def test_layout_token_to_dict_matches_dataclass_asdict():
+    tok = LayoutToken("Total", 1.0, 2.0, 3.0, 4.0, source="pymupdf", line_idx=3,
+                      metadata={"font": "Helvetica", "size": 9.0})
+    assert tok.to_dict() == {
+        "text": "Total", "x0": 1.0, "y0": 2.0, "x1": 3.0, "y1": 4.0, "page": 0,
+        "source": "pymupdf", "line_idx": 3, "confidence": None,
+        "metadata": {"font": "Helvetica", "size": 9.0},
+    }
+    assert LayoutToken("x").to_dict()["metadata"] == {}
+
+
+def test_layout_token_eq_and_repr():
+    assert LayoutToken("a", 1.0) == LayoutToken("a", 1.0, metadata={})
+    assert LayoutToken("a", 1.0) != LayoutToken("a", 2.0)
+    assert repr(LayoutToken("a")) == (
+        "LayoutToken(text='a', x0=None, y0=None, x1=None, y1=None, page=0, "
+        "source='unknown', line_idx=0, confidence=None, metadata={})"
+    )
+
+
+def test_rule_event_is_slotted_and_asdict_unchanged():
+    events = []
+    _emit_event(events, None, "R1", "warning", 0.2, "msg", {"k": 1})
+    ev = events[0]
+    assert isinstance(ev, RuleEvent)
+    assert not hasattr(ev, "__dict__")
+    assert asdict(ev) == {
+        "rule_id": "R1", "severity": "WARNING", "weight": 0.2, "raw_weight": 0.2, "message": "msg",
+        "evidence": {"k": 1, "confidence_factor": 1.0, "raw_weight": 0.2, "applied_weight": 0.2},
+    }
@@ -0,0 +1,97 @@
+"""
+Tests for the compiled resource cache (app.utils.compiled_cache).
+
+Covers:
+- cache hits skip the build; editing a source rebuilds and drops the stale artifact
+- unreadable cache files are rebuilt
+- language packs loaded from the cache match a fresh YAML load
+"""
+
+import shutil
+
+import pytest
+
+from app.utils import compiled_cache
+from app.utils.compiled_cache import load_compiled, source_fingerprint
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "src" / "pack.yaml"
+    path.parent.mkdir()
+    path.write_text("id: a\n")
+    return path
+
+
+def _builder(path, calls):
+    def build():
+        calls.append(1)
+        return {"text": path.read_text()}
+    return build
+
+
+def test_hit_and_rebuild_on_change(tmp_path, source):
+    calls = []
+    cache = tmp_path / "cache"
+    first = load_compiled("packs", [source], _builder(source, calls), cache_dir=cache)
+    again = load_compiled("packs", [source], _builder(source, calls), cache_dir=cache)
+    assert first == again == {"text": "id: a\n"}
+    assert len(calls) == 1
+
+    source.write_text("id: b\n")
+    changed = load_compiled("packs", [source], _builder(source, calls), cache_dir=cache)
+    assert changed == {"text": "id: b\n"}
+    assert len(calls) == 2
+    assert len(list(cache.glob("packs-*.pkl"))) == 1
+
+
+def test_version_changes_fingerprint(source):
+    assert source_fingerprint([source], version=1) != source_fingerprint([source], version=2)
+
+
+def test_corrupt_cache_is_rebuilt(tmp_path, source):
+    calls = []
+    cache = tmp_path / "cache"
+    load_compiled("packs", [source], _builder(source, calls), cache_dir=cache)
+    next(cache.glob("packs-*.pkl")).write_bytes(b"not a pickle")
+    assert load_compiled("packs", [source], _builder(source, calls), cache_dir=cache) == {"text": "id: a\n"}
+    assert len(calls) == 2
+
+
+def test_langpacks_from_cache_match_yaml(tmp_path, monkeypatch):
+    from app.pipelines.lang import LangPackLoader
+
+    langpack_dir = tmp_path / "langpacks"
+    shutil.copytree("resources/langpacks", langpack_dir)
+    monkeypatch.setattr(compiled_cache, "COMPILED_CACHE_DIR", str(tmp_path / "cache"))
+
+    built = LangPackLoader(str(langpack_dir))
+    built.load_all()
+    cached = LangPackLoader(str(langpack_dir))
+    cached.load_all()
+
+    assert list((tmp_path / "cache").glob("langpacks-*.pkl"))
+    assert cached.get_available_packs() == built.get_available_packs()
+    for pack_id in built.get_available_packs():
+        assert cached.get_pack(pack_id) == built.get_pack(pack_id)
+    en = cached._packs["en"]
+    assert en.compiled_patterns.keys() == built._packs["en"].compiled_patterns.keys()
+
+
+def test_cache_writable_by_others_is_ignored(tmp_path, source):
+    calls = []
+    cache = tmp_path / "cache"
+    load_compiled("packs", [source], _builder(source, calls), cache_dir=cache)
+    artifact = next(cache.glob("packs-*.pkl"))
+    assert cache.stat().st_mode & 0o077 == 0
+    artifact.chmod(0o666)
+    assert load_compiled("packs", [source], _builder(source, calls), cache_dir=cache) == {"text": "id: a\n"}
+    assert len(calls) == 2
+
+
+def test_default_dir_is_outside_the_source_tree(tmp_path, monkeypatch):
+    from app.utils.cache_dir import user_cache_dir
+
+    monkeypatch.delenv("VERIRECEIPT_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert user_cache_dir("compiled") == tmp_path / "verireceipt" / "compiled"
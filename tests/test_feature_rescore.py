@@ -0,0 +1,152 @@
+"""
+Tests for feature snapshots and fast re-scoring.
+
+Covers:
+- Lossless encode/decode of ReceiptFeatures (dates, signals)
+- Snapshot store round-trip and batch iteration order
+- rescore() parity with a direct _score_and_explain call
+- Policy overrides (thresholds, disabled rules) and summaries
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.pipelines.rescore import (
+    RescorePolicy,
+    rescore,
+    rescore_many,
+    summarize_rescore,
+)
+from app.pipelines.rules import _score_and_explain
+from app.repository.feature_store import (
+    FeatureSnapshotStore,
+    decode_features,
+    encode_features,
+)
+from app.schemas.receipt import ReceiptFeatures, SignalV1
+
+
+def _features(total=10.0):
+    return ReceiptFeatures(
+        file_features={"source_type": "pdf", "creation_date": datetime(2024, 1, 2, 3, 4, 5)},
+        text_features={
+            "doc_class": "POS_RETAIL",
+            "doc_subtype_guess": "POS_RETAIL",
+            "doc_profile_confidence": 0.8,
+            "merchant_candidate": "Test Store",
+            "has_any_amount": True,
+            "total_line_present": True,
+            "total_amount": total,
+            "currency_symbols": ["$"],
+        },
+        layout_features={"lines": ["Test Store", f"TOTAL {total:.2f}"], "num_lines": 2},
+        forensic_features={},
+        signals={
+            "addr.structure": SignalV1(name="addr.structure", status="NOT_TRIGGERED", confidence=0.5),
+        },
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeatureSnapshotStore(str(tmp_path / "snapshots.db"))
+
+
+def test_encode_decode_roundtrip():
+    features = _features()
+    restored = decode_features(encode_features(features))
+    assert restored.text_features == features.text_features
+    assert restored.file_features["creation_date"] == datetime(2024, 1, 2, 3, 4, 5)
+    assert isinstance(restored.signals["addr.structure"], SignalV1)
+
+
+def test_rescore_matches_direct_scoring(store):
+    features = _features()
+    original = _score_and_explain(features, apply_learned=False)
+    fid = store.save_features(features, source="r.pdf", decision=original)
+
+    decision = rescore(fid, policy=RescorePolicy(apply_learned=False), store=store)
+    assert decision.label == original.label
+    assert decision.score == original.score
+    assert [e["rule_id"] for e in decision.events] == [e["rule_id"] for e in original.events]
+    assert decision.debug["features_id"] == fid
+
+
+def test_rescore_unknown_id_raises(store):
+    with pytest.raises(KeyError):
+        rescore("missing", store=store)
+
+
+def test_policy_thresholds_and_disabled_rules(store):
+    features = _features()
+    original = _score_and_explain(features, apply_learned=False)
+    fid = store.save_features(features, decision=original)
+
+    strict = RescorePolicy(apply_learned=False, fake_threshold=0.0, suspicious_threshold=0.0)
+    assert rescore(fid, policy=strict, store=store).label == "fake"
+
+    fired = {e["rule_id"] for e in original.events if e.get("weight")}
+    relaxed = RescorePolicy(apply_learned=False, disabled_rules=sorted(fired))
+    relaxed_decision = rescore(fid, policy=relaxed, store=store)
+    assert not fired & {e["rule_id"] for e in relaxed_decision.events}
+    assert relaxed_decision.score <= original.score
+
+
+def test_rescore_many_preserves_order_and_summarizes(store):
+    ids = [store.save_features(_features(total=t), decision=None) for t in (5.0, 7.0, 9.0)]
+    results = rescore_many(ids[::-1], policy=RescorePolicy(apply_learned=False), store=store, workers=1)
+    assert [r.features_id for r in results] == ids[::-1]
+    summary = summarize_rescore(results)
+    assert summary["total"] == 3
+    assert summary["errors"] == 0
+    assert sum(summary["labels"].values()) == 3
+
+
+def test_overrides_apply_before_clamping(store):
+    features = _features()
+    fid = store.save_features(features, decision=None)
+
+    # R10_TOO_FEW_LINES at 2.0 pushes the raw score past 1.0; disabling
+    # R_NO_ELECTRONIC_ID must not pull the clamped score back below 1.0
+    heavy = {"R10_TOO_FEW_LINES": 2.0}
+    both = RescorePolicy(apply_learned=False, weight_overrides=heavy, disabled_rules=["R_NO_ELECTRONIC_ID"])
+    decision = rescore(fid, policy=both, store=store)
+    assert decision.score == 1.0
+    assert not any("No Electronic ID" in r for r in decision.reasons)
+    assert any("Too Few Lines" in r for r in decision.reasons)
+    event = next(e for e in decision.events if e["rule_id"] == "R10_TOO_FEW_LINES")
+    assert event["raw_weight"] == 2.0
+
+
+def test_rescore_keeps_vision_veto(store):
+    features = _features()
+    tampered = {"visual_integrity": "tampered", "confidence": 0.9, "observable_reasons": ["halo around total"]}
+    original = _score_and_explain(features, apply_learned=False, vision_assessment=tampered)
+    assert original.label == "fake"
+    fid = store.save_features(features, decision=original, vision_assessment=tampered)
+
+    decision = rescore(fid, policy=RescorePolicy(apply_learned=False), store=store)
+    assert decision.label == "fake"
+    assert "V1_VISION_TAMPERED" in {e["rule_id"] for e in decision.events}
+    (result,) = rescore_many([fid], policy=RescorePolicy(apply_learned=False), store=store, workers=1)
+    assert result.label == "fake"
+
+
+def test_retention_by_rows_and_age(tmp_path):
+    capped = FeatureSnapshotStore(str(tmp_path / "rows.db"), max_rows=2, max_age_days=0)
+    ids = [capped.save_features(_features(total=t)) for t in (1.0, 2.0, 3.0)]
+    assert capped.prune() == 1
+    assert capped.list_ids() == ids[:0:-1]
+
+    aged = FeatureSnapshotStore(str(tmp_path / "age.db"), max_rows=0, max_age_days=1)
+    old_id = aged.save_features(_features())
+    new_id = aged.save_features(_features())
+    with aged._get_connection() as conn:
+        conn.execute(
+            "UPDATE feature_snapshots SET created_at = datetime('now', '-3 days') WHERE features_id = ?",
+            (old_id,),
+        )
+    assert aged.prune() == 1
+    assert aged.list_ids() == [new_id]
+
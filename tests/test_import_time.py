@@ -0,0 +1,84 @@
+"""
+Cold-start budget for the API (`import app.api.main`).
+
+Covers:
+- heavy optional dependencies are not imported at startup
+- `python -X importtime` cumulative time for app.api.main stays within
+  IMPORT_TIME_BUDGET_S (default 2.5s; best of two runs)
+- lazy_import proxies import on first attribute access
+"""
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from app.utils.lazy_import import lazy_import, module_available
+
+PROJECT_ROOT = Path(__file__).parent.parent
+IMPORT_TIME_BUDGET_S = float(os.getenv("IMPORT_TIME_BUDGET_S", "2.5"))
+
+HEAVY_MODULES = (
+    "torch", "transformers", "easyocr", "cv2", "fasttext", "sklearn",
+    "pytesseract", "pandas", "fitz", "onnxruntime", "optimum",
+)
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=120,
+    )
+
+
+def test_heavy_modules_not_imported_at_startup():
+    proc = _run(
+        "import sys, app.api.main\n"
+        f"print('LOADED:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    loaded = re.search(r"^LOADED:(.*)$", proc.stdout, re.M).group(1)
+    assert loaded == "", f"imported at startup: {loaded}"
+
+
+def _import_seconds() -> float:
+    proc = _run("import app.api.main", "-X", "importtime")
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| app\.api\.main$", proc.stderr, re.M)
+    assert match, "app.api.main missing from -X importtime output"
+    return int(match.group(1)) / 1e6
+
+
+def test_api_import_time_budget():
+    seconds = min(_import_seconds() for _ in range(2))
+    assert seconds <= IMPORT_TIME_BUDGET_S, (
+        f"import app.api.main took {seconds:.2f}s (budget {IMPORT_TIME_BUDGET_S}s); "
+        "run `python -X importtime -c 'import app.api.main'` to find the regression"
+    )
+
+
+def test_lazy_import():
+    assert module_available("json")
+    assert not module_available("no_such_module_for_tests")
+
+    proxy = lazy_import("colorsys")
+    sys.modules.pop("colorsys", None)
+    assert "not loaded" in repr(proxy)
+    assert proxy.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "colorsys" in sys.modules
+
+
+def test_onnx_backend_does_not_import_optimum(tmp_path):
+    # Stand-ins that fail if imported: only their presence may be checked
+    for name in ("onnxruntime", "optimum"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "__init__.py").write_text(f"raise ImportError('{name} imported at startup')\n")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), str(PROJECT_ROOT)]))
+    proc = subprocess.run(
+        [sys.executable, "-c", "import app.api.main\n"
+         "from app.pipelines import onnx_backend\nprint('AVAILABLE:', onnx_backend.ONNX_AVAILABLE)"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=120, env=env,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    assert "AVAILABLE: True" in proc.stdout
@@ -0,0 +1,59 @@
+"""
+Tests for the persistent LLM/VLM response cache.
+"""
+
+import time
+
+from app.pipelines.llm_cache import LLMResponseCache, make_cache_key
+
+
+def test_key_depends_on_image_prompt_model_and_options():
+    base = {"model": "m", "prompt": "p", "images": ["aaa"], "options": {"temperature": 0.1}, "stream": False}
+    key = make_cache_key("/api/generate", base)
+    assert key == make_cache_key("/api/generate", dict(base, stream=True))
+    assert key != make_cache_key("/api/generate", dict(base, images=["bbb"]))
+    assert key != make_cache_key("/api/generate", dict(base, prompt="q"))
+    assert key != make_cache_key("/api/generate", dict(base, model="n"))
+    assert key != make_cache_key("/api/generate", dict(base, options={"temperature": 0.2}))
+    assert key != make_cache_key("/api/chat", base)
+    assert make_cache_key("/api/generate", base, model_digest="sha256:a") != make_cache_key(
+        "/api/generate", base, model_digest="sha256:b"
+    )
+
+
+def test_get_put_and_hit_rate(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "c.db"))
+    assert cache.get("k") is None
+    cache.put("k", {"response": "hello"}, model="m")
+    assert cache.get("k") == {"response": "hello"}
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_lru_eviction_keeps_recent_entries(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "c.db"), max_bytes=200)
+    for i in range(3):
+        cache.put(f"k{i}", {"response": "x" * 50})
+        time.sleep(0.01)
+    cache.get("k0")  # refresh k0 so k1 becomes least recently used
+    cache.put("k3", {"response": "x" * 50})
+    assert cache.get("k1") is None
+    assert cache.get("k0") is not None
+    assert cache.get("k3") is not None
+    assert cache.get_stats()["evictions"] >= 1
+    assert cache.get_stats()["bytes"] <= 200
+
+
+def test_ttl_expiry(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "c.db"), ttl_seconds=0.01)
+    cache.put("k", {"response": "old"})
+    time.sleep(0.05)
+    assert cache.get("k") is None
+
+
+def test_survives_reopen(tmp_path):
+    path = str(tmp_path / "c.db")
+    LLMResponseCache(path).put("k", {"response": "persisted"})
+    reopened = LLMResponseCache(path)
+    assert reopened.get("k") == {"response": "persisted"}
+    assert reopened.get_stats()["bytes"] > 0
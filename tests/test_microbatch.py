@@ -0,0 +1,84 @@
+"""
+Tests for the in-process micro-batching queue (app.pipelines.microbatch).
+
+Covers:
+- concurrent submissions grouped into batches up to max_batch_size
+- per-request futures get their own result, in order
+- a failing batch fails every future in it
+- LayoutLM padding/stacking matches single-image inputs (needs torch)
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.pipelines.microbatch import MicroBatcher
+
+
+def test_concurrent_requests_batched():
+    seen = []
+
+    def process(items):
+        seen.append(list(items))
+        time.sleep(0.02)
+        return [x * 10 for x in items]
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_s=0.05)
+    results = {}
+    barrier = threading.Barrier(8)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.submit(i).result(timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close(timeout=5)
+
+    assert results == {i: i * 10 for i in range(8)}
+    assert all(len(b) <= 4 for b in seen)
+    assert len(seen) < 8
+    stats = batcher.get_stats()
+    assert stats["items"] == 8 and stats["max_batch"] > 1
+
+
+def test_single_request_not_delayed_past_max_wait():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=8, max_wait_s=0.01)
+    start = time.monotonic()
+    assert batcher.submit("x").result(timeout=5) == "x"
+    assert time.monotonic() - start < 1.0
+    batcher.close(timeout=5)
+    with pytest.raises(RuntimeError):
+        batcher.submit("y")
+
+
+def test_batch_failure_propagates_to_each_future():
+    def process(items):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher(process, max_batch_size=2, max_wait_s=0.05)
+    futures = [batcher.submit(i) for i in range(2)]
+    for fut in futures:
+        with pytest.raises(ValueError):
+            fut.result(timeout=5)
+    assert batcher.get_stats()["errors"] >= 1
+    batcher.close(timeout=5)
+
+
+def test_layoutlm_pad_and_stack():
+    torch = pytest.importorskip("torch")
+    from app.pipelines.layoutlm_extractor import _pad_and_stack
+
+    a = {"input_ids": torch.tensor([[5, 6, 7]]), "attention_mask": torch.ones(1, 3, dtype=torch.long),
+         "bbox": torch.ones(1, 3, 4, dtype=torch.long), "pixel_values": torch.zeros(1, 3, 4, 4)}
+    b = {"input_ids": torch.tensor([[8]]), "attention_mask": torch.ones(1, 1, dtype=torch.long),
+         "bbox": torch.ones(1, 1, 4, dtype=torch.long), "pixel_values": torch.ones(1, 3, 4, 4)}
+    batch = _pad_and_stack([a, b], pad_token_id=1)
+    assert batch["input_ids"].tolist() == [[5, 6, 7], [8, 1, 1]]
+    assert batch["attention_mask"].tolist() == [[1, 1, 1], [1, 0, 0]]
+    assert batch["bbox"].shape == (2, 3, 4) and batch["bbox"][1, 1:].sum() == 0
+    assert batch["pixel_values"].shape == (2, 3, 4, 4)
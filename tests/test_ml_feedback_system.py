@@ -26,8 +26,11 @@ from app.models.feedback import (
 )
 from app.repository.feedback_store import FeedbackStore
 from app.pipelines.learning import (
+    CompiledLearnedRules,
     learn_from_feedback,
     apply_learned_rules,
+    get_compiled_learned_rules,
+    invalidate_learned_rules_cache,
     _extract_pattern_from_indicator,
 )
 
@@ -323,6 +326,65 @@ class TestApplyLearnedRules:
         print(f"  [PASS] No rules → zero adjustment")
 
 
+    def test_compiled_rules_reused_until_version_bump(self, fresh_store, monkeypatch):
+        """Compiled rules are cached and rebuilt only after a rule write."""
+        monkeypatch.setattr(
+            "app.pipelines.learning.get_feedback_store", lambda: fresh_store
+        )
+        invalidate_learned_rules_cache()
+
+        rule = LearningRule(
+            rule_id="lr_test_cache",
+            rule_type="spacing_threshold",
+            pattern="consecutive_spaces",
+            action="lower_threshold",
+            confidence_adjustment=0.15,
+            learned_from_feedback_count=2,
+            auto_learned=True,
+        )
+        fresh_store.save_learned_rule(rule)
+        features = {"forensic_features": {"has_excessive_spacing": True, "max_consecutive_spaces": 9}}
+
+        first = get_compiled_learned_rules()
+        calls = []
+        original = fresh_store.get_learned_rules
+        monkeypatch.setattr(
+            fresh_store, "get_learned_rules",
+            lambda enabled_only=True: calls.append(enabled_only) or original(enabled_only=enabled_only),
+        )
+
+        assert apply_learned_rules(features)[0] == pytest.approx(0.15)
+        assert get_compiled_learned_rules() is first
+        assert calls == [], "Unchanged rules version must not reload rules"
+
+        # Disabling the rule (as the toggle endpoint does) bumps the version
+        rule.enabled = False
+        fresh_store.save_learned_rule(rule)
+        score_adj, triggered = apply_learned_rules(features)
+        assert calls == [True]
+        assert score_adj == 0.0 and triggered == []
+        assert get_compiled_learned_rules().version > first.version
+
+    def test_compiled_rules_dedupe_and_drop_unmatchable(self, fresh_store):
+        """Duplicate (type, pattern) rules and unknown patterns are compiled out."""
+        rules = [
+            LearningRule(rule_id="a", rule_type="user_identified_pattern", pattern="invalid_phone",
+                         action="flag_suspicious", confidence_adjustment=0.10),
+            LearningRule(rule_id="b", rule_type="user_identified_pattern", pattern="invalid_phone",
+                         action="flag_suspicious", confidence_adjustment=0.30),
+            LearningRule(rule_id="c", rule_type="user_identified_pattern", pattern="font_inconsistencies",
+                         action="flag_suspicious", confidence_adjustment=0.30),
+            LearningRule(rule_id="d", rule_type="merchant_pattern", pattern="Starbucks",
+                         action="validate_merchant", confidence_adjustment=0.0),
+        ]
+        compiled = CompiledLearnedRules(rules)
+        assert [r.rule_id for r, _ in compiled.matchers] == ["a"]
+
+        score_adj, triggered = compiled.apply({"text_features": {"has_phone": False}})
+        assert score_adj == pytest.approx(0.10)
+        assert len(triggered) == 1 and "invalid_phone" in triggered[0]
+
+
 # =============================================================================
 # Test 4: Pattern Extraction
 # =============================================================================
@@ -0,0 +1,108 @@
+"""
+Tests for model lifecycle management (app.pipelines.model_registry).
+
+Covers:
+- on-demand loading, reuse and resident-memory accounting
+- LRU eviction under the memory budget, never evicting models in use
+- background warm-up gating ready()
+"""
+
+import threading
+
+import pytest
+
+from app.pipelines.model_registry import ModelRegistry, parse_warmup
+
+
+class FakeMemory:
+    """RSS that grows by each model's size while it is loaded."""
+
+    def __init__(self):
+        self.mb = 100.0
+
+    def __call__(self):
+        return self.mb
+
+
+@pytest.fixture
+def memory():
+    return FakeMemory()
+
+
+def _register(registry, memory, name, size_mb, log):
+    def load():
+        memory.mb += size_mb
+        log.append(("load", name))
+        return {"name": name}
+
+    def unload(obj):
+        memory.mb -= size_mb
+        log.append(("unload", name))
+
+    registry.register(name, load, unload)
+
+
+def test_load_once_and_measure(memory):
+    log = []
+    registry = ModelRegistry(budget_mb=0, measure=memory)
+    _register(registry, memory, "a", 300, log)
+    assert registry.get("a") == {"name": "a"}
+    assert registry.get("a") is registry.get("a")
+    assert log == [("load", "a")]
+    status = registry.status()
+    assert status["models"]["a"]["resident_mb"] == 300
+    assert status["resident_mb"] == 300
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_lru_eviction_under_budget(memory):
+    log = []
+    registry = ModelRegistry(budget_mb=700, measure=memory)
+    for name in ("a", "b", "c"):
+        _register(registry, memory, name, 300, log)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # b is now least recently used
+    registry.get("c")
+    assert ("unload", "b") in log and ("unload", "a") not in log
+    assert registry.total_resident_mb() == 600
+    assert registry.status()["models"]["b"]["evictions"] == 1
+    # Evicted models reload on demand
+    registry.get("b")
+    assert log[-2:] == [("load", "b"), ("unload", "a")]
+
+
+def test_in_use_models_are_not_evicted(memory):
+    log = []
+    registry = ModelRegistry(budget_mb=400, measure=memory)
+    _register(registry, memory, "a", 300, log)
+    _register(registry, memory, "b", 300, log)
+    with registry.acquire("a"):
+        registry.get("b")  # over budget, but a is in use
+        assert not registry.unload("a")
+    assert ("unload", "a") not in log
+    assert registry.total_resident_mb() == 600
+
+
+def test_warmup_gates_ready(memory):
+    release = threading.Event()
+    registry = ModelRegistry(measure=memory)
+    registry.register("slow", lambda: release.wait(5) and "model")
+    registry.register("broken", lambda: 1 / 0)
+    assert registry.ready()
+
+    registry.start_warmup(["slow", "broken"])
+    assert not registry.ready()
+    release.set()
+    assert registry.wait_ready(5)
+    warmup = registry.status()["warmup"]
+    assert warmup["results"]["slow"] == "ok"
+    assert warmup["results"]["broken"].startswith("ZeroDivisionError")
+    assert registry.status()["models"]["broken"]["error"].startswith("ZeroDivisionError")
+
+
+def test_parse_warmup():
+    assert parse_warmup("") == []
+    assert parse_warmup(" layoutlm, easyocr ") == ["layoutlm", "easyocr"]
+    assert "donut" in parse_warmup("all")
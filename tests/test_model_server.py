@@ -0,0 +1,108 @@
+"""
+Tests for the local model server (app.pipelines.model_server).
+
+Covers:
+- images reach the server through shared memory, pixel-identical
+- the client unlinks its shared-memory block after each call
+- remote errors surface as ModelServerError; unknown ops are rejected
+- extractors route to the server only when MODEL_SERVER_SOCKET is set
+"""
+
+import threading
+from multiprocessing import shared_memory
+
+import pytest
+from PIL import Image
+
+from app.pipelines import model_server
+from app.pipelines.model_server import ModelServer, ModelServerClient, ModelServerError
+
+
+def _describe(image, scale=1):
+    return {"size": list(image.size), "mode": image.mode, "sum": sum(image.tobytes()) * scale}
+
+
+def _fail(image):
+    raise ValueError("model exploded")
+
+
+@pytest.fixture
+def server(tmp_path):
+    seen = []
+
+    def record(image):
+        seen.append(image)
+        return {"ok": True}
+
+    ops = {"describe": (_describe, False), "fail": (_fail, True), "record": (record, True)}
+    srv = ModelServer(str(tmp_path / "models.sock"), ops=ops)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, seen
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_image_round_trip(server, tmp_path):
+    srv, _ = server
+    client = ModelServerClient(srv.socket_path)
+    image = Image.new("RGB", (31, 17), (10, 20, 30))
+    image.putpixel((3, 4), (255, 0, 0))
+
+    assert client.call("describe", image) == _describe(image)
+    assert client.call("describe", image, scale=2)["sum"] == 2 * _describe(image)["sum"]
+
+    # Paths are decoded on the client; palette images are sent as RGB
+    path = tmp_path / "r.png"
+    image.convert("P").save(path)
+    result = client.call("describe", str(path))
+    assert result["mode"] == "RGB" and result["size"] == [31, 17]
+
+
+def test_shared_memory_released(server, monkeypatch):
+    srv, seen = server
+    created = []
+    real_share = model_server._share_image
+
+    def share(image):
+        shm, ref = real_share(image)
+        created.append(ref["shm"])
+        return shm, ref
+
+    monkeypatch.setattr(model_server, "_share_image", share)
+    client = ModelServerClient(srv.socket_path)
+    client.call("record", Image.new("L", (8, 8), 7))
+    assert seen[0].tobytes() == bytes([7]) * 64
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=created[0])
+
+
+def test_errors(server, tmp_path):
+    srv, _ = server
+    client = ModelServerClient(srv.socket_path)
+    with pytest.raises(ModelServerError, match="model exploded"):
+        client.call("fail", Image.new("RGB", (2, 2)))
+    with pytest.raises(ModelServerError, match="unknown op"):
+        client.call("nope")
+    # The connection stays usable after a failed op
+    assert client.ping()["stats"] == {"calls": 1, "errors": 1}
+
+    with pytest.raises(ModelServerError, match="unreachable"):
+        ModelServerClient(str(tmp_path / "missing.sock")).call("describe")
+
+
+def test_extractor_routing(server, monkeypatch):
+    from app.pipelines import layoutlm_extractor
+
+    srv, _ = server
+    monkeypatch.setattr(model_server, "MODEL_SERVER_SOCKET", "")
+    assert not model_server.model_server_enabled()
+
+    srv.ops["layoutlm"] = (lambda image, method="simple": {"method": method, "size": list(image.size)}, False)
+    monkeypatch.setattr(model_server, "MODEL_SERVER_SOCKET", srv.socket_path)
+    assert model_server.model_server_enabled()
+    result = layoutlm_extractor.extract_receipt_with_layoutlm(Image.new("RGB", (5, 6)), method="full")
+    assert result == {"method": "full", "size": [5, 6]}
+
+    monkeypatch.setattr(model_server, "_serving", True)
+    assert not model_server.model_server_enabled()
@@ -0,0 +1,267 @@
+"""
+Tests for the shared pooled Ollama client.
+
+Runs against a tiny in-process HTTP server standing in for Ollama:
+- generate/chat payload + response shape
+- per-model concurrency limit
+- retry on 503, no retry on read timeout
+- queue-wait histogram + counters
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.pipelines.ollama_client import OllamaClient
+from app.telemetry.timings import get_global_histograms
+
+
+class _FakeOllama:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_next = 0
+        self.delay = 0.0
+        self.requests = []
+        self.digest = "sha256:aaa"
+
+
+@pytest.fixture
+def fake_ollama():
+    state = _FakeOllama()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            payload = {"models": [{"name": "m", "model": "m", "digest": state.digest}]}
+            data = json.dumps(payload).encode()
+            self.send_response(200 if self.path == "/api/tags" else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with state.lock:
+                state.requests.append((self.path, body))
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                fail = state.fail_next > 0
+                if fail:
+                    state.fail_next -= 1
+            time.sleep(state.delay)
+            with state.lock:
+                state.in_flight -= 1
+            if fail:
+                payload, code = {"error": "busy"}, 503
+            elif self.path == "/api/chat":
+                payload, code = {"message": {"role": "assistant", "content": "ok-chat"}}, 200
+            else:
+                payload, code = {"response": f"ok:{body['prompt']}"}, 200
+            data = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_generate_and_chat(fake_ollama):
+    client = OllamaClient(fake_ollama.url)
+    assert client.generate("m", "hi", images=["abc"], options={"temperature": 0.1}) == "ok:hi"
+    path, body = fake_ollama.requests[-1]
+    assert path == "/api/generate"
+    assert body["images"] == ["abc"] and body["stream"] is False
+    assert client.chat(model="m", messages=[{"role": "user", "content": "x"}])["message"]["content"] == "ok-chat"
+
+
+def test_per_model_concurrency_limit(fake_ollama):
+    fake_ollama.delay = 0.05
+    client = OllamaClient(fake_ollama.url, max_concurrency=2)
+    threads = [threading.Thread(target=client.generate, args=("m", str(i))) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert fake_ollama.max_in_flight <= 2
+    stats = client.get_stats()["m"]
+    assert stats["calls"] == 6 and stats["in_flight"] == 0 and stats["waiting"] == 0
+    assert get_global_histograms().snapshot()["ollama.queue_wait.m"]["count"] >= 6
+
+
+def test_retries_busy_then_succeeds(fake_ollama):
+    fake_ollama.fail_next = 1
+    client = OllamaClient(fake_ollama.url, max_retries=1, retry_backoff=0.0)
+    assert client.generate("m", "again") == "ok:again"
+    assert client.get_stats()["m"]["retries"] == 1
+
+
+def test_read_timeout_not_retried(fake_ollama):
+    fake_ollama.delay = 0.3
+    client = OllamaClient(fake_ollama.url, max_retries=3, retry_backoff=0.0)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.generate("m", "slow", timeout=0.05)
+    stats = client.get_stats()["m"]
+    assert stats["timeouts"] == 1 and stats["retries"] == 0 and stats["errors"] == 1
+
+
+def test_cache_hit_skips_server(fake_ollama, tmp_path):
+    from app.pipelines.llm_cache import LLMResponseCache
+
+    client = OllamaClient(fake_ollama.url, cache=LLMResponseCache(str(tmp_path / "c.db")))
+    assert client.generate("m", "cached", images=["img"]) == "ok:cached"
+    assert client.generate("m", "cached", images=["img"]) == "ok:cached"
+    assert client.generate("m", "cached", images=["img"], cache=False) == "ok:cached"
+    assert len(fake_ollama.requests) == 2
+    assert client.cache.get_stats()["hits"] == 1
+
+
+def test_cache_misses_after_model_repull(fake_ollama, tmp_path, monkeypatch):
+    from app.pipelines import ollama_client
+    from app.pipelines.llm_cache import LLMResponseCache
+
+    client = OllamaClient(fake_ollama.url, cache=LLMResponseCache(str(tmp_path / "c.db")))
+    client.generate("m", "p")
+    client.generate("m", "p")
+    assert len(fake_ollama.requests) == 1
+
+    # Same tag, new weights
+    fake_ollama.digest = "sha256:bbb"
+    monkeypatch.setattr(ollama_client, "OLLAMA_DIGEST_TTL", 0.0)
+    client.generate("m", "p")
+    assert len(fake_ollama.requests) == 2
+
+    # Unknown model digest: not cached at all
+    client.generate("other", "p")
+    client.generate("other", "p")
+    assert len(fake_ollama.requests) == 4
+
+
+def test_circuit_opens_and_fails_fast(fake_ollama):
+    from app.pipelines.ollama_client import CircuitOpenError, track_circuit_skips
+
+    fake_ollama.fail_next = 10
+    client = OllamaClient(fake_ollama.url, max_retries=0)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.generate("m", "x", cache=False)
+    assert client.circuit_open("m")
+
+    sent = len(fake_ollama.requests)
+    with track_circuit_skips() as skips:
+        with pytest.raises(CircuitOpenError):
+            client.generate("m", "x", cache=False)
+    assert len(fake_ollama.requests) == sent
+    assert skips == [{"model": "m", "endpoint": "generate", "reason": "circuit_open"}]
+    assert client.get_stats()["m"]["circuit_rejected"] == 1
+    assert not client.circuit_open("other")
+
+
+def test_half_open_trial_closes_circuit(fake_ollama):
+    fake_ollama.fail_next = 1
+    client = OllamaClient(fake_ollama.url, max_retries=0)
+    client.breaker("m").failure_threshold = 1
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.generate("m", "x", cache=False)
+    assert client.breaker("m").state == "open"
+
+    client.breaker("m").reset_timeout = 0.0
+    assert client.generate("m", "ok", cache=False) == "ok:ok"
+    assert client.breaker("m").state == "closed"
+
+
+def test_health_probe_marks_host_down():
+    from app.pipelines.ollama_client import CircuitOpenError
+
+    client = OllamaClient("http://127.0.0.1:9", connect_timeout=0.2)
+    assert client.probe(timeout=0.2) is False
+    assert client.circuit_open("m")
+    start = time.time()
+    with pytest.raises(CircuitOpenError):
+        client.generate("m", "x")
+    assert time.time() - start < 0.1
+
+
+def test_circuit_skip_emits_audit_event():
+    from app.pipelines.rules import _score_and_explain
+    from app.schemas.receipt import ReceiptFeatures
+
+    features = ReceiptFeatures(
+        file_features={"source_type": "image"},
+        text_features={
+            "merchant_candidate": "Test Store",
+            "total_amount": 10.0,
+            "llm_circuit_skips": [{"model": "m", "endpoint": "generate", "reason": "circuit_open"}],
+        },
+        layout_features={"lines": ["Test Store", "TOTAL 10.00"]},
+        forensic_features={},
+    )
+    decision = _score_and_explain(
+        features, apply_learned=False, vision_assessment={"skipped": "circuit_open", "confidence": 0.0}
+    )
+    event = next(e for e in decision.events if e["rule_id"] == "LLM_SKIPPED_CIRCUIT_OPEN")
+    assert event["severity"] == "INFO" and event["weight"] == 0.0
+    stages = [s["stage"] for s in event["evidence"]["skipped"]]
+    assert stages == ["vision_assessment", "ollama.generate"]
+
+
+def test_deadline_truncates_timeout_without_tripping_breaker(fake_ollama):
+    from app.pipelines.deadline import deadline_in, request_deadline
+
+    fake_ollama.delay = 1.0
+    client = OllamaClient(fake_ollama.url, max_retries=0)
+    client.breaker("m").failure_threshold = 1
+    start = time.time()
+    with request_deadline(deadline_in(0.6)) as skips:
+        with pytest.raises(requests.exceptions.Timeout):
+            client.generate("m", "slow", timeout=60, cache=False)
+    assert time.time() - start < 0.9
+    assert skips[0]["stage"] == "ollama.generate" and skips[0]["reason"] == "truncated"
+    assert client.breaker("m").state == "closed"
+
+
+def test_spent_deadline_skips_call(fake_ollama):
+    from app.pipelines.deadline import deadline_in, request_deadline
+    from app.pipelines.ollama_client import DeadlineExceededError
+
+    client = OllamaClient(fake_ollama.url)
+    with request_deadline(deadline_in(0.01)) as skips:
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceededError):
+            client.generate("m", "x", cache=False)
+    assert fake_ollama.requests == []
+    assert skips[0]["reason"] == "deadline"
+    assert client.get_stats()["m"]["deadline_skipped"] == 1
+
+
+def test_circuit_open_assessment_is_not_clean(monkeypatch):
+    from app.pipelines import vision_llm
+
+    class OpenClient(OllamaClient):
+        def circuit_open(self, model):
+            return True
+
+    monkeypatch.setattr(vision_llm, "USE_OLLAMA", True)
+    monkeypatch.setattr(vision_llm, "get_ollama_client", lambda url=None: OpenClient("http://x"))
+    assessment = vision_llm.build_vision_assessment("r.jpg")
+    assert assessment["visual_integrity"] == "suspicious"
+    assert assessment["confidence"] == 0.0
+    assert assessment["skipped"] == "circuit_open"
@@ -0,0 +1,75 @@
+"""
+Tests for the ONNX Runtime extractor backend (app.pipelines.onnx_backend).
+
+Covers:
+- backend selection and export paths
+- onnx_ready falls back to torch when the export is missing
+- parity helpers used by scripts/onnx_parity_bench.py
+- DONUT torch vs ONNX parity on fixtures (needs torch, optimum and the export)
+"""
+
+from pathlib import Path
+
+import pytest
+
+from app.pipelines import onnx_backend
+
+
+def test_backend_for(monkeypatch):
+    monkeypatch.setattr(onnx_backend, "_BACKENDS", {"layoutlm": "onnx", "donut": "torch"})
+    assert onnx_backend.backend_for("layoutlm") == "onnx"
+    assert onnx_backend.backend_for("donut") == "torch"
+    monkeypatch.setattr(onnx_backend, "_BACKENDS", {"layoutlm": "bogus"})
+    assert onnx_backend.backend_for("layoutlm") == "torch"
+
+
+def test_onnx_model_path(tmp_path):
+    path = onnx_backend.onnx_model_path("naver-clova-ix/donut-base", quantized=True, root=str(tmp_path))
+    assert path == tmp_path / "naver-clova-ix--donut-base" / "int8"
+    assert onnx_backend.onnx_model_path("m", quantized=False, root=str(tmp_path)).name == "fp32"
+
+
+def test_onnx_ready_requires_export(monkeypatch, tmp_path):
+    monkeypatch.setattr(onnx_backend, "ONNX_MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(onnx_backend, "ONNX_QUANTIZED", True)
+    monkeypatch.setattr(onnx_backend, "ONNX_AVAILABLE", True)
+    monkeypatch.setattr(onnx_backend, "_BACKENDS", {"donut": "onnx"})
+    assert not onnx_backend.onnx_ready("donut", "org/model")
+    onnx_backend.onnx_model_path("org/model").mkdir(parents=True)
+    assert onnx_backend.onnx_ready("donut", "org/model")
+    assert not onnx_backend.onnx_ready("donut", "org/model", backend="torch")
+    monkeypatch.setattr(onnx_backend, "ONNX_AVAILABLE", False)
+    assert not onnx_backend.onnx_ready("donut", "org/model")
+
+
+def test_field_parity():
+    ref = {"merchant": "ACME  Store", "total": 12.499999, "date": "2024-01-02"}
+    assert onnx_backend.field_parity(ref, {"merchant": "acme store", "total": 12.5, "date": "2024-01-02"})["match"]
+    result = onnx_backend.field_parity(ref, {"merchant": "ACME Store", "total": 13.0, "date": None})
+    assert not result["match"]
+    assert set(result["diffs"]) == {"total", "date"}
+
+
+def test_token_agreement():
+    assert onnx_backend.token_agreement([], []) == 1.0
+    assert onnx_backend.token_agreement([1, 2, 3, 4], [1, 2, 3, 4]) == 1.0
+    assert onnx_backend.token_agreement([1, 2, 3, 4], [1, 2, 3]) == 0.75
+
+
+def test_donut_onnx_parity():
+    pytest.importorskip("torch")
+    pytest.importorskip("optimum.onnxruntime")
+    from app.pipelines.donut_extractor import DONUT_MODEL_NAME, DonutExtractor
+
+    if not onnx_backend.onnx_model_path(DONUT_MODEL_NAME).is_dir():
+        pytest.skip("no DONUT ONNX export (scripts/export_onnx.py --engine donut)")
+    images = sorted(str(p) for p in Path("data/raw").glob("*.jpg"))[:3]
+    if not images:
+        pytest.skip("no image fixtures in data/raw")
+
+    reference, candidate = DonutExtractor(backend="torch"), DonutExtractor(backend="onnx")
+    for path in images:
+        result = onnx_backend.field_parity(
+            reference.extract_receipt_data(path), candidate.extract_receipt_data(path)
+        )
+        assert result["match"], (path, result["diffs"])
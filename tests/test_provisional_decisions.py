@@ -0,0 +1,251 @@
+"""
+Tests for provisional-then-final decisions (app.pipelines.provisional).
+
+OCR / feature building and the VLM stages are replaced by stubs; covers:
+- the deterministic final_may_differ rule
+- provisional decision returned first, final published on the job
+- immediate final decision when no VLM stage would run
+- OCR vision fallback deferred to the background half
+- jobs readable from another API worker through the shared job store
+- request deadline and analysis cascade applied to both halves
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.pipelines import cascade, deadline, provisional, rules
+from app.repository import job_store
+from app.schemas.receipt import ReceiptDecision
+
+
+def _decision(label="real", score=0.1):
+    return ReceiptDecision(label=label, score=score, reasons=[])
+
+
+@pytest.fixture(autouse=True)
+def tmp_job_store(monkeypatch, tmp_path):
+    store = job_store.JobStore(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(job_store, "PROVISIONAL_JOB_STORE", "sqlite")
+    monkeypatch.setattr(job_store, "_job_store", store)
+    return store
+
+
+@pytest.fixture
+def stub_pipeline(monkeypatch):
+    """Rules label = "fake" once VLM-merged fields are present, "real" before."""
+    release = threading.Event()
+    calls = []
+
+    def features_from_raw(timer, raw, **kw):
+        # Stands in for the OCR vision fallback gate in build_features
+        if not raw.needs_fallback:
+            pass
+        elif not cascade.stage_enabled("vision_fallback"):
+            cascade.note_deferred("vision_fallback")
+        else:
+            calls.append("vision_fallback")
+        return SimpleNamespace(text_features={})
+
+    def vision_extract(timer, features, file_path):
+        release.wait(5)
+        calls.append("vision_extract")
+        features.text_features["vlm_merged"] = True
+
+    def dup_check(timer, features, file_path):
+        calls.append("duplicate_check")
+
+    def score(features, apply_learned=True, vision_assessment=None):
+        merged = features.text_features.get("vlm_merged")
+        return _decision("fake" if merged else "real", 0.9 if merged else 0.1)
+
+    raw = SimpleNamespace(needs_fallback=False)
+    monkeypatch.setattr(provisional, "_ingest_receipt",
+                        lambda timer, path: calls.append("build") or raw)
+    monkeypatch.setattr(provisional, "_features_from_raw", features_from_raw)
+    monkeypatch.setattr(provisional, "_apply_vision_extract", vision_extract)
+    monkeypatch.setattr(provisional, "_apply_duplicate_check", dup_check)
+    monkeypatch.setattr(provisional, "_score_and_explain", score)
+    monkeypatch.setattr(provisional, "_finalize_analysis", lambda timer, f, d, p: d)
+    return release, calls, raw
+
+
+def test_final_may_differ_rule():
+    real = _decision("real")
+    assert provisional.final_may_differ(real, []) == (False, [])
+    assert provisional.final_may_differ(real, ["vision_assessment"]) == (True, ["vision_veto_pending"])
+    # The veto can only move a decision to fake
+    assert provisional.final_may_differ(_decision("fake", 0.9), ["vision_assessment"]) == (False, [])
+    may, reasons = provisional.final_may_differ(_decision("fake", 0.9), ["vision_extract", "duplicate_check"])
+    assert may and reasons == ["vlm_field_merge_pending", "duplicate_check_pending"]
+    assert provisional.final_may_differ(real, ["vision_fallback"]) == (True, ["vision_fallback_pending"])
+
+
+def test_provisional_then_final(stub_pipeline, monkeypatch):
+    release, calls, _ = stub_pipeline
+    monkeypatch.setattr(provisional, "pending_vlm_stages", lambda *a, **k: ["vision_extract"])
+    finals = []
+
+    job = provisional.analyze_receipt_provisional("r.jpg", on_final=finals.append)
+    assert job.status == "provisional"
+    assert job.provisional.label == "real" and job.provisional.finalized is False
+    assert job.may_differ and job.differ_reasons == ["vlm_field_merge_pending", "duplicate_check_pending"]
+    assert job.provisional.debug["provisional"]["job_id"] == job.job_id
+    assert provisional.get_job(job.job_id) is job
+    # Duplicate check deferred until the VLM fields are merged
+    assert calls == ["build"]
+
+    release.set()
+    events = [event for event, _ in job.iter_events(timeout=5)]
+    assert events == ["provisional", "final"]
+    assert job.wait(5) and finals == [job]
+    assert calls == ["build", "vision_extract", "duplicate_check"]
+    assert job.final.label == "fake" and job.final.finalized is True
+    assert job.label_changed is True
+    assert job.final.debug["provisional"]["provisional_label"] == "real"
+    assert job.summary()["status"] == "final"
+
+
+def test_finalization_error_published(stub_pipeline, monkeypatch):
+    release, _, _ = stub_pipeline
+    release.set()
+    monkeypatch.setattr(provisional, "pending_vlm_stages", lambda *a, **k: ["vision_extract"])
+
+    def boom(timer, features, file_path):
+        raise RuntimeError("vlm down")
+
+    monkeypatch.setattr(provisional, "_apply_vision_extract", boom)
+    job = provisional.analyze_receipt_provisional("r.jpg")
+    assert job.wait(5)
+    assert job.status == "error" and "vlm down" in job.error
+    assert job.decision() is job.provisional
+    assert [event for event, _ in job.iter_events(timeout=1)] == ["provisional", "error"]
+
+
+def test_nothing_pending_is_final_immediately(monkeypatch):
+    monkeypatch.setattr(provisional, "pending_vlm_stages", lambda *a, **k: [])
+    monkeypatch.setattr(provisional, "analyze_receipt", lambda path, **kw: _decision("suspicious", 0.5))
+
+    job = provisional.analyze_receipt_provisional("r.jpg")
+    assert job.done and job.status == "final"
+    assert job.final is job.provisional and job.final.finalized is True
+    assert job.may_differ is False
+    assert [event for event, _ in job.iter_events(timeout=1)] == ["final"]
+
+
+def test_vision_fallback_deferred_to_background(stub_pipeline, monkeypatch):
+    release, calls, raw = stub_pipeline
+    release.set()
+    raw.needs_fallback = True
+    monkeypatch.setattr(provisional, "pending_vlm_stages", lambda *a, **k: ["vision_fallback"])
+
+    job = provisional.analyze_receipt_provisional("r.jpg")
+    assert job.differ_reasons == ["vision_fallback_pending", "duplicate_check_pending"]
+    assert job.wait(5) and job.status == "final"
+    # No fallback call before the provisional decision; the background makes it once
+    assert calls == ["build", "vision_fallback", "duplicate_check"]
+
+
+def test_vision_fallback_not_needed_is_final_immediately(stub_pipeline, monkeypatch):
+    _, calls, _ = stub_pipeline
+    monkeypatch.setattr(provisional, "pending_vlm_stages", lambda *a, **k: ["vision_fallback"])
+
+    job = provisional.analyze_receipt_provisional("r.jpg")
+    assert job.done and job.status == "final" and job.may_differ is False
+    assert calls == ["build", "duplicate_check"]
+
+
+def test_job_served_by_another_worker(stub_pipeline, monkeypatch):
+    release, _, _ = stub_pipeline
+    monkeypatch.setattr(provisional, "pending_vlm_stages", lambda *a, **k: ["vision_extract"])
+    job = provisional.analyze_receipt_provisional("r.jpg")
+
+    # Another worker process: its in-memory job table does not have the job
+    monkeypatch.setattr(provisional, "_jobs", {})
+    other = provisional.get_job(job.job_id)
+    assert isinstance(other, provisional.StoredJob)
+    assert other.status == "provisional" and not other.done
+    assert other.final_decision() is None
+
+    release.set()
+    assert job.wait(5)
+    other = provisional.get_job(job.job_id)
+    assert other.done and other.summary()["label"] == "fake"
+    assert other.final_decision()["label"] == "fake"
+    assert [event for event, _ in other.events()] == ["provisional", "final"]
+    assert provisional.get_job("unknown") is None
+
+
+def test_deadline_applies_to_background_stages(stub_pipeline, monkeypatch):
+    release, _, _ = stub_pipeline
+    release.set()
+    monkeypatch.setattr(provisional, "pending_vlm_stages",
+                        lambda *a, **k: ["vision_extract", "vision_assessment"])
+    seen = {}
+
+    def vision_extract(timer, features, file_path):
+        seen["extract"] = deadline.remaining()
+
+    def build_vision_assessment(path):
+        # runs on its own thread; the deadline must follow it there
+        seen["assessment"] = deadline.remaining()
+        return {"visual_integrity": "clean", "confidence": 0.9}
+
+    from app.pipelines import vision_llm
+    monkeypatch.setattr(provisional, "_apply_vision_extract", vision_extract)
+    monkeypatch.setattr(vision_llm, "build_vision_assessment", build_vision_assessment)
+
+    job = provisional.analyze_receipt_provisional("r.jpg", deadline=deadline.deadline_in(60))
+    assert job.wait(5) and job.status == "final"
+    assert 0 < seen["extract"] <= 60
+    assert 0 < seen["assessment"] <= 60
+
+
+@pytest.fixture
+def stub_cascade(monkeypatch):
+    """Cascade score depends on the tier the features were built at."""
+    calls = []
+    scores = {}
+    monkeypatch.setattr(cascade, "ANALYSIS_CASCADE", True)
+    monkeypatch.setattr(cascade, "CASCADE_VISION_VETO", False)
+    monkeypatch.setattr(provisional, "_ingest_receipt", lambda timer, path: calls.append("ocr") or "raw")
+    monkeypatch.setattr(provisional, "_finalize_analysis", lambda timer, f, d, p: d)
+
+    def features_from_raw(timer, raw, **kw):
+        calls.append(f"features@{cascade.current_tier()}")
+        return SimpleNamespace(text_features={"ocr_confidence": 0.9})
+
+    def score(features, apply_learned=True, vision_assessment=None):
+        label, value = scores[features.text_features["analysis_cascade"]["tier"]]
+        return _decision(label, value)
+
+    monkeypatch.setattr(rules, "_features_from_raw", features_from_raw)
+    monkeypatch.setattr(rules, "_apply_vision_extract", lambda *a: calls.append("vision_extract"))
+    monkeypatch.setattr(rules, "_apply_duplicate_check", lambda *a: None)
+    monkeypatch.setattr(rules, "_score_and_explain", score)
+    return calls, scores
+
+
+def test_cascade_clear_cut_is_final_at_rules_tier(stub_cascade):
+    calls, scores = stub_cascade
+    scores[0] = ("real", 0.05)
+    job = provisional.analyze_receipt_provisional("r.jpg")
+    assert job.done and job.final.label == "real" and job.may_differ is False
+    assert calls == ["ocr", "features@0"]
+
+
+def test_cascade_escalation_finishes_in_background(stub_cascade):
+    calls, scores = stub_cascade
+    scores.update({0: ("suspicious", 0.5), 1: ("suspicious", 0.55), 2: ("fake", 0.9)})
+    job = provisional.analyze_receipt_provisional("r.jpg")
+    assert job.provisional.label == "suspicious"
+    assert job.differ_reasons == ["cascade_escalation_pending"]
+    assert job.provisional.debug["provisional"]["cascade_escalation"]["tier"] == 1
+
+    assert job.wait(5) and job.status == "final"
+    # OCR once, then the same tiers a synchronous cascade would run
+    assert calls == ["ocr", "features@0", "features@1", "features@2", "vision_extract"]
+    assert job.final.label == "fake"
+    assert [t["tier"] for t in job.final.debug["cascade"]["tiers"]] == [0, 1]
+    assert job.final.debug["cascade"]["final_tier"] == 2
@@ -0,0 +1,66 @@
+"""
+Tests for end-to-end request deadlines (app.pipelines.deadline).
+
+Covers:
+- stage budget checks and skip collection
+- nested deadlines (the earlier one wins)
+- skipped stages audited as DEADLINE_STAGE_SKIPPED
+"""
+
+import time
+
+from app.pipelines import deadline
+from app.pipelines.deadline import clamp_timeout, deadline_in, remaining, request_deadline, stage_allowed
+
+
+def test_no_deadline_allows_everything():
+    assert remaining() is None
+    assert stage_allowed("vision_extract")
+    assert clamp_timeout(60) == 60
+    assert deadline_in(0) is None and deadline_in(None) is None
+
+
+def test_stage_skipped_when_budget_too_small(monkeypatch):
+    monkeypatch.setitem(deadline.STAGE_MIN_BUDGET_S, "vision_extract", 4.0)
+    monkeypatch.setitem(deadline.STAGE_MIN_BUDGET_S, "image_forensics", 0.5)
+    with request_deadline(deadline_in(2.0)) as skips:
+        assert stage_allowed("image_forensics")
+        assert not stage_allowed("vision_extract")
+        assert 0 < clamp_timeout(60) <= 2.0
+    assert [s["stage"] for s in skips] == ["vision_extract"]
+    assert skips[0]["min_budget_s"] == 4.0
+    assert remaining() is None
+
+
+def test_nested_deadline_earlier_wins():
+    with request_deadline(deadline_in(10)) as outer:
+        with request_deadline(deadline_in(60)) as inner:
+            assert remaining() <= 10
+            assert inner is outer
+        with request_deadline(deadline_in(0.01)):
+            time.sleep(0.02)
+            assert not stage_allowed("llm_classifier")
+        assert remaining() > 5
+    assert [s["stage"] for s in outer] == ["llm_classifier"]
+
+
+def test_deadline_skips_emit_audit_event():
+    from app.pipelines.rules import _score_and_explain
+    from app.schemas.receipt import ReceiptFeatures
+
+    features = ReceiptFeatures(
+        file_features={"source_type": "image"},
+        text_features={
+            "merchant_candidate": "Test Store",
+            "total_amount": 10.0,
+            "vlm_extraction": {"success": False, "skipped": "deadline"},
+            "deadline_skips": [{"stage": "semantic_verification", "reason": "deadline", "remaining_s": 0.4}],
+        },
+        layout_features={"lines": ["Test Store", "TOTAL 10.00"]},
+        forensic_features={},
+    )
+    decision = _score_and_explain(features, apply_learned=False)
+    event = next(e for e in decision.events if e["rule_id"] == "DEADLINE_STAGE_SKIPPED")
+    assert event["severity"] == "INFO" and event["weight"] == 0.0
+    stages = [s["stage"] for s in event["evidence"]["skipped"]]
+    assert stages == ["semantic_verification", "vision_extract"]
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the declarative rule registry.
+
+Covers lazy/memoized shared inputs, declared-input views, matrix-gated
+execution modes and pre-evaluation skipping of rule groups whose rules are
+all disabled.
+"""
+
+import dataclasses
+
+import pytest
+
+import app.pipelines.rules  # noqa: F401  (registers rule specs + inputs)
+from app.pipelines import doc_profiles
+from app.pipelines.doc_profiles import DocumentProfile, get_profile_for_doc_class
+from app.pipelines.rule_family_matrix import RULE_FAMILY_MATRIX, ExecutionMode, get_execution_mode
+from app.pipelines.rule_registry import (
+    INPUT_PROVIDERS,
+    RULE_REGISTRY,
+    RuleContext,
+    RuleSpec,
+    register_rule,
+    rule_input,
+)
+from app.pipelines.rules import _score_and_explain
+from app.schemas.receipt import ReceiptFeatures
+
+
+def _features(text_features=None):
+    return ReceiptFeatures(
+        file_features={},
+        text_features=text_features or {},
+        layout_features={"lines": ["STORE", "TOTAL 10.00"]},
+        forensic_features={},
+    )
+
+
+def test_every_matrix_rule_is_registered_with_matrix_key():
+    for rule_id in RULE_FAMILY_MATRIX:
+        spec = RULE_REGISTRY.get(rule_id)
+        assert spec is not None, rule_id
+        assert spec.matrix_key in INPUT_PROVIDERS
+
+
+@pytest.mark.parametrize("subtype", ["POS_RESTAURANT", "TAX_INVOICE", "CREDIT_NOTE", "UNKNOWN"])
+def test_execution_mode_matches_matrix(subtype):
+    ctx = RuleContext(_features({"doc_subtype_guess": subtype}))
+    ctx.set("legacy_doc_profile", {"family": "TRANSACTIONAL", "subtype": subtype})
+    for rule_id in ("R7_TOTAL_MISMATCH", "R7B_INVOICE_TOTAL_RECONCILIATION", "R10_TEMPLATE_QUALITY"):
+        assert ctx.execution_mode(rule_id) == get_execution_mode(rule_id, subtype)
+
+
+def test_declared_inputs_have_providers():
+    for spec in RULE_REGISTRY.values():
+        for name in spec.inputs:
+            assert name in INPUT_PROVIDERS, (spec.rule_id, name)
+
+
+def test_inputs_view_is_lazy_and_declared_only():
+    ctx = RuleContext(_features())
+    view = ctx.inputs("GROUP_5D_SCREENSHOT")
+    assert set(view) == {"full_text", "full_text_lower"}
+    assert not ctx.has("full_text_lower")
+    assert view["full_text_lower"] == "store\ntotal 10.00"
+    assert ctx.has("full_text_lower")
+    with pytest.raises(KeyError):
+        view["legacy_doc_profile"]
+    # The matrix key is readable alongside the declared inputs
+    assert "doc_subtype_for_matrix" in ctx.inputs("R7_TOTAL_MISMATCH")
+
+
+def test_unregistered_rules_run_in_block_mode():
+    ctx = RuleContext(_features())
+    assert ctx.execution_mode("R_SOMETHING_NEW") == ExecutionMode.BLOCK
+    assert ctx.should_run("R_SOMETHING_NEW") is True
+
+
+def test_inputs_are_evaluated_once():
+    calls = []
+
+    @rule_input("_test_counter")
+    def _counter(ctx):
+        calls.append(1)
+        return len(calls)
+
+    try:
+        ctx = RuleContext(_features())
+        assert ctx.get("_test_counter") == 1
+        assert ctx.get("_test_counter") == 1
+        assert len(calls) == 1
+    finally:
+        INPUT_PROVIDERS.pop("_test_counter", None)
+
+
+def test_full_text_falls_back_to_layout_lines():
+    ctx = RuleContext(_features())
+    assert ctx.get("full_text") == "STORE\nTOTAL 10.00"
+    assert ctx.get("full_text_lower") == "store\ntotal 10.00"
+
+
+def test_group_skipped_when_all_emitted_rules_disabled():
+    profile = DocumentProfile(
+        doc_class="TEST",
+        risk_model="fraud_detection",
+        disabled_rules=["R_ROUND_TOTAL"],
+    )
+    ctx = RuleContext(_features(), profile)
+    assert ctx.should_run("GROUP_5B3_ROUND_TOTAL") is False
+    assert ctx.skipped["GROUP_5B3_ROUND_TOTAL"] == "all_rules_disabled"
+    assert ctx.should_run("GROUP_5B4_QTY_RATE") is True
+
+
+def test_default_profiles_run_every_group():
+    ctx = RuleContext(_features(), get_profile_for_doc_class("POS_RECEIPT"))
+    for rule_id in RULE_REGISTRY:
+        if rule_id.startswith("GROUP_"):
+            assert ctx.should_run(rule_id) is True, rule_id
+
+
+def test_group_skipped_when_profile_gate_rejects_emitted_rule():
+    # should_apply_rule gates beyond disabled_rules (apply_date_gap_rules)
+    register_rule(RuleSpec("GROUP_TEST_DATE_GAP", "test", emits=("R16_SUSPICIOUS_DATE_GAP",)))
+    try:
+        ctx = RuleContext(_features(), get_profile_for_doc_class("COMMERCIAL_INVOICE"))
+        assert ctx.should_run("GROUP_TEST_DATE_GAP") is False
+        assert ctx.skipped["GROUP_TEST_DATE_GAP"] == "all_rules_disabled"
+    finally:
+        RULE_REGISTRY.pop("GROUP_TEST_DATE_GAP", None)
+
+
+def test_group_skipped_when_matrix_forbids_emitted_rule():
+    register_rule(RuleSpec("GROUP_TEST_R10", "test", emits=("R10_TEMPLATE_QUALITY",)))
+    try:
+        ctx = RuleContext(_features())
+        ctx.set("doc_subtype_for_matrix", "SHIPPING_BILL")
+        assert get_execution_mode("R10_TEMPLATE_QUALITY", "SHIPPING_BILL") == ExecutionMode.FORBIDDEN
+        assert ctx.should_run("GROUP_TEST_R10") is False
+    finally:
+        RULE_REGISTRY.pop("GROUP_TEST_R10", None)
+
+
+def _pos_features():
+    return ReceiptFeatures(
+        file_features={"source_type": "image"},
+        text_features={
+            "doc_class": "POS_RECEIPT",
+            "doc_subtype_guess": "POS_RETAIL",
+            "merchant_candidate": "Test Store",
+            "has_any_amount": True,
+            "total_line_present": True,
+            "total_amount": 10.0,
+        },
+        layout_features={
+            "lines": ["Test Store", "Receipt # 104522", "Milk 4.00", "Bread 6.00", "TOTAL 10.00"],
+            "num_lines": 5,
+        },
+        forensic_features={},
+    )
+
+
+def test_profile_disabled_groups_never_build_inputs(monkeypatch):
+    computed = []
+    provider = INPUT_PROVIDERS["full_text_lower"]
+    monkeypatch.setitem(INPUT_PROVIDERS, "full_text_lower", lambda ctx: computed.append(1) or provider(ctx))
+
+    baseline = _score_and_explain(_pos_features(), apply_learned=False)
+    assert computed  # the screenshot / tax / e-ID groups read it by default
+
+    # Every group that reads full_text_lower is switched off by the profile
+    profile = dataclasses.replace(
+        get_profile_for_doc_class("POS_RECEIPT"),
+        disabled_rules=["R_SCREENSHOT_DETECTED", "R7D_TAX_COMPONENT_VERIFICATION", "R_NO_ELECTRONIC_ID"],
+    )
+    monkeypatch.setattr(doc_profiles, "get_profile_for_doc_class", lambda doc_class: profile)
+    computed.clear()
+    gated = _score_and_explain(_pos_features(), apply_learned=False)
+
+    assert computed == []
+    assert gated.reasons == baseline.reasons
+    assert gated.label == baseline.label and gated.score == baseline.score
@@ -0,0 +1,108 @@
+"""
+Tests for vectorized script detection and language ID batching.
+
+Covers:
+- lookup-table script counts match per-character classification (incl. astral chars)
+- per-text memoization of detection results
+- detect_languages / identify_languages: one predict() call for the whole batch
+"""
+
+import random
+
+import pytest
+
+from app.pipelines import language_id
+from app.pipelines.lang.detect_script import ScriptDetector
+
+POOL = [chr(cp) for cp in (
+    list(range(0x20, 0x250)) + list(range(0x590, 0x800)) + list(range(0x3000, 0x3100))
+    + list(range(0x4E00, 0x4E40)) + list(range(0xAC00, 0xAC40)) + list(range(0xFE70, 0xFF10))
+    + [0x20000, 0x20001, 0x1F600, 0x1D400]
+)]
+
+
+def _random_texts(n=500, seed=7):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(POOL) for _ in range(rng.randint(0, 80))) for _ in range(n)]
+
+
+def _reference_script_counts(detector, text):
+    counts = {}
+    for ch in text:
+        if ch.strip():
+            script = detector._get_char_script(ch)
+            if script != "unknown":
+                counts[script] = counts.get(script, 0) + 1
+    return counts
+
+
+def _reference_bucket_counts(text):
+    counts = {}
+    for ch in text:
+        if ch.isalpha():
+            bucket = language_id._script_bucket(ch)
+            counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+def test_script_detector_matches_per_char():
+    detector = ScriptDetector()
+    for text in _random_texts():
+        expected = _reference_script_counts(detector, text)
+        got = detector.detect_scripts(text)
+        assert got == expected
+        assert list(got) == list(expected)  # first-appearance order (tie-breaking)
+
+
+def test_script_stats_match_per_char():
+    for text in _random_texts(seed=11):
+        stats = language_id._script_stats(text)
+        expected = _reference_bucket_counts(text)
+        assert stats["alpha_total"] == sum(expected.values())
+        for bucket, count in expected.items():
+            assert stats["ratios"][bucket] == pytest.approx(count / stats["alpha_total"])
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, text, k=1):
+        self.calls.append(text)
+        if isinstance(text, list):
+            return [["__label__en"] for _ in text], [[0.9] for _ in text]
+        return ["__label__en"], [0.9]
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(language_id, "_load_fasttext_model", lambda: model)
+    language_id._detect_language_memo.cache_clear()
+    yield model
+    language_id._detect_language_memo.cache_clear()
+
+
+LATIN = "Thank you for shopping with us today please come again soon and keep this receipt"
+ARABIC = "شكرا لتسوقكم معنا اليوم نتمنى لكم يوما سعيدا ونرجو الاحتفاظ بهذا الإيصال دائما"
+
+
+def test_detect_language_is_memoized(fake_model):
+    assert language_id.detect_language(LATIN) == ("en", 0.9)
+    assert language_id.detect_language(LATIN) == ("en", 0.9)
+    assert len(fake_model.calls) == 1
+
+
+def test_batch_uses_one_predict_call(fake_model):
+    results = language_id.detect_languages([LATIN, "short", ARABIC, LATIN + " again"])
+    assert results[0] == ("en", 0.9)
+    assert results[1] == ("mixed", 0.0)
+    assert results[2][0] == "ar"  # decided by script, never reaches the model
+    assert results[3] == ("en", 0.9)
+    assert fake_model.calls == [[LATIN, LATIN + " again"]]
+
+
+def test_identify_languages_matches_single(fake_model):
+    docs = [[LATIN], ["12.50", "TOTAL"], [ARABIC]]
+    batch = language_id.identify_languages(docs)
+    assert batch == [language_id.identify_language(lines) for lines in docs]
@@ -0,0 +1,91 @@
+"""
+Tests for the per-document spatial index (app.pipelines.spatial_index).
+
+Covers:
+- left_of / above / within_radius / in_region / on_lines against brute-force scans
+- tokens without coordinates, oversized boxes
+- find_label_for_amount with and without an index
+- LayoutDocument.spatial_index() caching
+"""
+
+import math
+import random
+
+from app.pipelines.layout_tokens import LayoutDocument, LayoutToken
+from app.pipelines.spatial_index import SpatialIndex
+from app.pipelines.spatial_intelligence import TOTAL_LABELS, find_label_for_amount
+
+
+def _doc_tokens(seed=3, n=300):
+    rng = random.Random(seed)
+    tokens = []
+    for i in range(n):
+        if i % 17 == 0:
+            tokens.append(LayoutToken(text=f"t{i}", line_idx=i // 6))
+            continue
+        x0, y0 = rng.uniform(0, 600), rng.uniform(0, 800)
+        tokens.append(LayoutToken(
+            text=f"t{i}", x0=x0, y0=y0, x1=x0 + rng.uniform(5, 120), y1=y0 + rng.uniform(6, 14),
+            line_idx=i // 6,
+        ))
+    # One box spanning most of the page
+    tokens.append(LayoutToken(text="banner", x0=0, y0=0, x1=600, y1=800, line_idx=0))
+    return tokens
+
+
+def _brute(tokens, pred):
+    return [i for i, t in enumerate(tokens) if t.has_coords and pred(t)]
+
+
+def test_queries_match_brute_force():
+    tokens = _doc_tokens()
+    index = SpatialIndex(tokens, cell_size=40)
+    rng = random.Random(9)
+    for _ in range(50):
+        x, y = rng.uniform(0, 600), rng.uniform(0, 800)
+        assert index.left_of(x, y, 15) == _brute(
+            tokens, lambda t: t.x1 < x and abs(t.center_y - y) < 15)
+        assert index.above(x - 30, x + 30, y, 40) == _brute(
+            tokens, lambda t: t.y1 <= y and y - t.y1 <= 40 and t.x1 >= x - 30 and t.x0 <= x + 30)
+        assert index.within_radius(x, y, 50) == _brute(
+            tokens, lambda t: math.hypot(max(t.x0 - x, 0, x - t.x1), max(t.y0 - y, 0, y - t.y1)) <= 50)
+        assert index.in_region(x, y, x + 150, y + 100, tolerance=10) == _brute(
+            tokens, lambda t: t.x0 >= x - 10 and t.x1 <= x + 160 and t.y0 >= y - 10 and t.y1 <= y + 110)
+
+
+def test_on_lines_includes_tokens_without_coords():
+    tokens = _doc_tokens()
+    index = SpatialIndex(tokens)
+    expected = [i for i, t in enumerate(tokens) if 2 <= t.line_idx <= 4]
+    assert index.on_lines(2, 4) == expected
+    assert any(not tokens[i].has_coords for i in expected)
+    assert SpatialIndex([]).left_of(10, 10, 5) == []
+
+
+def test_find_label_for_amount_same_with_index():
+    tokens = [
+        LayoutToken(text="Subtotal", x0=10, y0=10, x1=60, y1=20, line_idx=0),
+        LayoutToken(text="40.00", x0=200, y0=10, x1=240, y1=20, line_idx=0),
+        LayoutToken(text="TOTAL:", x0=10, y0=30, x1=50, y1=40, line_idx=1),
+        LayoutToken(text="45.00", x0=200, y0=30, x1=240, y1=40, line_idx=1),
+    ]
+    # A column layout: the label is far away in line order but on the same row
+    tokens += [LayoutToken(text=f"item {i}", line_idx=2 + i) for i in range(10)]
+    tokens += [
+        LayoutToken(text="Grand Total", x0=10, y0=300, x1=80, y1=310, line_idx=20),
+        LayoutToken(text="49.50", x0=200, y0=301, x1=240, y1=311, line_idx=40),
+    ]
+    index = SpatialIndex(tokens)
+    for amount in (tokens[3], tokens[-1]):
+        assert find_label_for_amount(amount, tokens, TOTAL_LABELS, index=index) == \
+            find_label_for_amount(amount, tokens, TOTAL_LABELS)
+    assert find_label_for_amount(tokens[3], tokens, TOTAL_LABELS, index=index)[0] == "TOTAL:"
+    assert find_label_for_amount(tokens[-1], tokens, TOTAL_LABELS, index=index)[0] == "Grand Total"
+
+
+def test_document_spatial_index_is_cached():
+    doc = LayoutDocument(tokens=_doc_tokens(n=20))
+    index = doc.spatial_index()
+    assert doc.spatial_index() is index
+    doc.tokens.append(LayoutToken(text="late", x0=1, y0=1, x1=2, y1=2, line_idx=99))
+    assert doc.spatial_index() is not index and doc.spatial_index().on_lines(99, 99) == [len(doc.tokens) - 1]
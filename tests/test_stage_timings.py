@@ -0,0 +1,104 @@
+"""
+Tests for stage timings / latency histograms.
+
+Covers:
+- StageLaps recording into the active request timer
+- Prometheus rendering of the process-wide histograms
+- Chrome trace export format
+- debug["timings"] on decisions produced by the rule engine
+"""
+
+import json
+
+from app.pipelines.rules import _score_and_explain
+from app.schemas.receipt import ReceiptFeatures
+from app.telemetry.timings import (
+    RequestTimer,
+    StageHistograms,
+    StageLaps,
+    current_timer,
+    get_global_histograms,
+    request_timer,
+)
+
+
+def _features():
+    return ReceiptFeatures(
+        file_features={"source_type": "image"},
+        text_features={
+            "doc_class": "POS_RETAIL",
+            "doc_subtype_guess": "POS_RETAIL",
+            "doc_profile_confidence": 0.8,
+            "merchant_candidate": "Test Store",
+            "has_any_amount": True,
+            "total_line_present": True,
+            "total_amount": 10.0,
+            "has_date": True,
+        },
+        layout_features={"lines": ["Test Store", "TOTAL 10.00"], "num_lines": 2},
+        forensic_features={},
+    )
+
+
+def test_laps_record_into_active_timer():
+    with request_timer("t") as timer:
+        assert current_timer() is timer
+        laps = StageLaps("demo")
+        laps.mark("a")
+        laps.mark("b")
+        laps.stop()
+        with request_timer("nested") as inner:
+            assert inner is timer
+    assert current_timer() is None
+    assert list(timer.summary()) == ["demo.a", "demo.b"]
+
+
+def test_histograms_render_prometheus():
+    hist = StageHistograms(buckets=(0.001, 0.01))
+    hist.observe("rules.GROUP_5F_TAX", 0.0005)
+    hist.observe("rules.GROUP_5F_TAX", 0.005)
+    hist.observe("rules.GROUP_5F_TAX", 5.0)
+    text = hist.render_prometheus()
+    assert 'stage="rules.GROUP_5F_TAX",le="0.001"} 1' in text
+    assert 'stage="rules.GROUP_5F_TAX",le="0.01"} 2' in text
+    assert 'stage="rules.GROUP_5F_TAX",le="+Inf"} 3' in text
+    assert 'verireceipt_stage_duration_seconds_count{stage="rules.GROUP_5F_TAX"} 3' in text
+
+
+def test_chrome_trace_export(tmp_path):
+    timer = RequestTimer("receipt.png", histograms=StageHistograms())
+    with timer.stage("pipeline.rules", "pipeline"):
+        pass
+    path = timer.export_chrome_trace(str(tmp_path / "trace.json"))
+    with open(path) as f:
+        trace = json.load(f)
+    (event,) = trace["traceEvents"]
+    assert event["ph"] == "X"
+    assert event["name"] == "pipeline.rules"
+    assert event["dur"] >= 0
+
+
+def test_decision_carries_rule_group_timings():
+    decision = _score_and_explain(_features(), apply_learned=False)
+    timings = decision.debug["timings"]
+    assert "rules.setup" in timings
+    assert "rules.GROUP_5F_TAX" in timings
+    assert "rules.R10_TEMPLATE_QUALITY" in timings
+    assert all(v >= 0 for v in timings.values())
+    assert "rules.GROUP_5F_TAX" in get_global_histograms().snapshot()
+
+
+def test_finalize_keeps_rule_group_timings(monkeypatch):
+    from app.pipelines import rules
+    from app.repository import feature_store
+
+    monkeypatch.setattr(feature_store, "FEATURE_SNAPSHOTS_ENABLED", False)
+    # Scored outside the request (private lap timer), finalized under it
+    decision = _score_and_explain(_features(), apply_learned=False)
+    with request_timer("r.png") as timer:
+        with timer.stage("pipeline.ocr", "pipeline"):
+            pass
+        decision = rules._finalize_analysis(timer, _features(), decision, "r.png")
+    timings = decision.debug["timings"]
+    assert "pipeline.ocr" in timings
+    assert "rules.GROUP_5F_TAX" in timings
@@ -0,0 +1,72 @@
+"""
+Tests for the R10 keyword typo index.
+
+The deletion index must produce exactly the evidence the original
+token-by-token Levenshtein scan produced.
+"""
+
+import re
+
+import pytest
+
+from app.pipelines.template_quality_signals import (
+    SEMANTIC_KEYWORDS_BY_LANG,
+    detect_keyword_typos,
+    get_typo_index,
+    levenshtein_distance,
+    normalize_text,
+)
+
+
+def _reference_near_matches(keyword_normalized, tokens):
+    """Brute-force scan used before the index existed."""
+    found = []
+    for token in tokens:
+        if abs(len(token) - len(keyword_normalized)) > 2:
+            continue
+        distance = levenshtein_distance(token, keyword_normalized)
+        if distance in (1, 2):
+            found.append((token, distance))
+    return found
+
+
+SAMPLES = [
+    ("en", "INVOICE\nMaximun quantity: 4\nTotai amount due 12.00\nCustorner: ACME\nSubtota1 10.00"),
+    ("en", "Reciept\nPaymnt recieved\nbalanse 0.00\ndescripton item numbr 12"),
+    ("es", "Factnra\nCantldad 3\nPrecio unitario 2,00\nImpuest0 0,42\nDescrlpción articulo"),
+    ("fr", "Facture\nQuantlté 2\nMontnat total 4,00\nSous total 4,00\nrecu"),
+    ("de", "Rechnurig\nGesamtt 10,00\nBetmg fallig\nZahlunq per Karte"),
+    ("ru", "Счёт\nИтогг 100\nКоличесвто 2\nЦена 50"),
+    ("en", ""),
+]
+
+
+@pytest.mark.parametrize("lang,text", SAMPLES)
+def test_index_matches_bruteforce_scan(lang, text):
+    tokens = re.findall(r"\b\w+\b", normalize_text(text.lower()))
+    by_keyword = get_typo_index(lang).match_tokens(tokens)
+
+    for keyword in SEMANTIC_KEYWORDS_BY_LANG[lang]:
+        keyword_normalized = normalize_text(keyword)
+        expected = _reference_near_matches(keyword_normalized, tokens)
+        assert by_keyword.get(keyword_normalized, []) == expected, keyword
+
+
+def test_detect_keyword_typos_reports_pattern_and_index_matches():
+    tf = {"full_text": "Maximun quantity\nTotai amount due\nSubtota1 10.00"}
+    score, evidence = detect_keyword_typos(tf, "en")
+
+    found = {(e["expected"], e["found"], e["edit_distance"], e["pattern_match"]) for e in evidence}
+    assert ("maximum", "maximun", 1, True) in found
+    assert ("total", "totai", 1, False) in found
+    assert score == pytest.approx(0.4)
+
+
+def test_detect_keyword_typos_clean_text():
+    tf = {"full_text": "Invoice total amount due 10.00"}
+    assert detect_keyword_typos(tf, "en") == (0.0, None)
+
+
+def test_index_is_cached_per_language():
+    assert get_typo_index("en") is get_typo_index("en")
+    assert get_typo_index("en") is not get_typo_index("es")
@@ -0,0 +1,110 @@
+"""
+Tests for the struct-of-arrays token geometry (app.pipelines.token_geometry)
+and the font-inconsistency detectors built on it.
+
+Covers:
+- filtering of tokens without coordinates / text, NaN for missing confidence
+- line grouping: tolerance anchoring, single-token lines dropped, x ordering
+- detectors flag the planted anomaly and nothing on a clean layout
+- LayoutDocument.geometry() caching and run_fraud_detection(geometry=...)
+"""
+
+import numpy as np
+
+from app.pipelines.layout_tokens import LayoutDocument, LayoutToken
+from app.pipelines.spatial_intelligence import (
+    _detect_baseline_misalignment,
+    _detect_height_variation_in_lines,
+    _detect_vertical_discontinuities,
+    _group_tokens_into_lines,
+    detect_font_inconsistencies,
+    run_fraud_detection,
+)
+from app.pipelines.token_geometry import TokenGeometry
+
+
+def _tok(text, x0, y0, w=30.0, h=10.0, conf=0.95):
+    return LayoutToken(text=text, x0=x0, y0=y0, x1=x0 + w, y1=y0 + h, confidence=conf)
+
+
+def _grid(rows=8, cols=5, line_gap=15.0):
+    """Evenly printed document: `rows` lines of `cols` same-size words."""
+    return [
+        _tok(f"w{r}{c}", 10 + c * 40, 20 + r * line_gap)
+        for r in range(rows)
+        for c in range(cols)
+    ]
+
+
+def test_from_tokens_filters_and_reads_arrays():
+    tokens = [
+        _tok("TOTAL", 10, 20, conf=None),
+        LayoutToken(text="no coords"),
+        _tok("   ", 50, 20),
+        _tok("12.50", 50, 20),
+    ]
+    geom = TokenGeometry.from_tokens(tokens)
+    assert [t.text for t in geom.tokens] == ["TOTAL", "12.50"]
+    assert np.isnan(geom.conf[0]) and geom.conf[1] == 0.95
+    assert geom.text_len.tolist() == [5, 5]
+    assert geom.height.tolist() == [10.0, 10.0]
+
+
+def test_line_grouping():
+    tokens = [
+        _tok("b", 60, 21),          # same line as "a" (center within 5)
+        _tok("a", 10, 20),
+        _tok("alone", 10, 60),      # single-token line: dropped
+        _tok("d", 70, 100),
+        _tok("c", 10, 104),         # within 5 of the line's first center
+        _tok("e", 40, 108.5),       # 8.5 from the anchor: next line
+    ]
+    lines = _group_tokens_into_lines(tokens)
+    assert {i: [t.text for t in toks] for i, toks in lines.items()} == {0: ["a", "b"], 1: ["c", "d"]}
+    assert TokenGeometry.from_tokens([]).line_count == 0
+
+
+def test_clean_layout_has_no_font_signals():
+    assert detect_font_inconsistencies(_grid()) == []
+
+
+def test_planted_anomalies_are_flagged():
+    tokens = _grid()
+    # Shift one word down on line 2 and enlarge one on line 5 (both stay on their line)
+    shifted = tokens[2 * 5 + 1]
+    shifted.y0 += 4
+    shifted.y1 += 4
+    enlarged = tokens[5 * 5 + 2]
+    enlarged.y0 -= 7
+    enlarged.y1 += 2
+    geom = TokenGeometry.from_tokens(tokens)
+
+    baseline = _detect_baseline_misalignment(geom)
+    assert [a["line_idx"] for a in baseline] == [2]
+    assert baseline[0]["examples"][0]["text"] == shifted.text
+
+    heights = _detect_height_variation_in_lines(geom)
+    assert [a["line_idx"] for a in heights] == [5]
+    assert heights[0]["outliers"][0]["height"] == 19.0
+
+
+def test_vertical_discontinuity():
+    tokens = _grid(rows=12)
+    for t in tokens[-5:]:  # push the last line far down
+        t.y0 += 60
+        t.y1 += 60
+    jumps = _detect_vertical_discontinuities(TokenGeometry.from_tokens(tokens))
+    assert [j["between_lines"] for j in jumps] == ["10-11"]
+
+
+def test_document_geometry_is_cached_and_reused():
+    doc = LayoutDocument(tokens=_grid())
+    geom = doc.geometry()
+    assert doc.geometry() is geom
+    doc.tokens.append(_tok("late", 10, 300))
+    assert doc.geometry() is not geom and len(doc.geometry()) == len(geom) + 1
+
+    tokens = _grid()
+    tokens[7].y1 += 12
+    with_geom = run_fraud_detection(tokens, geometry=TokenGeometry.from_tokens(tokens))
+    assert with_geom == run_fraud_detection(tokens)
@@ -0,0 +1,155 @@
+"""
+Tests for the combined extract + forensics + authenticity vision prompt.
+
+The VLM call is replaced by a canned response; covers:
+- parsing of the three sections
+- single-flight memoization (one call for concurrent callers on one image)
+- failures not memoized
+- fan-out into build_vision_assessment / extract_receipt_fields contracts
+- extraction on its own prompt when VISION_MODEL is not the combined model
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from app.pipelines import vision_combined
+from app.pipelines.ollama_client import OllamaClient
+
+
+COMBINED_RESPONSE = json.dumps({
+    "extraction": {"merchant_name": "Test Store", "total": 18.98, "receipt_date": "06/08/25"},
+    "forensics": {
+        "is_suspicious": True,
+        "confidence": 0.6,
+        "claims": [
+            {"observable_claim": "edge halos around total", "severity": "HARD_FAIL", "confidence": 0.9},
+            "not a dict",
+        ],
+    },
+    "authenticity": {"visual_integrity": "tampered", "confidence": 0.8},
+})
+
+
+@pytest.fixture
+def fake_vlm(monkeypatch):
+    calls = []
+
+    def fake_query(image_b64, prompt, model, timeout):
+        calls.append(image_b64)
+        time.sleep(0.05)
+        return fake_query.response
+
+    fake_query.response = "```json\n" + COMBINED_RESPONSE + "\n```"
+    vision_combined.clear_combined_memo()
+    monkeypatch.setattr(vision_combined, "_query_ollama_vision_b64", fake_query)
+    monkeypatch.setattr(vision_combined, "_encode_image_with_meta",
+                        lambda path, model=None, policy=None: (f"b64:{path}", {"sent_size": [1, 1]}))
+    yield fake_query, calls
+    vision_combined.clear_combined_memo()
+
+
+def test_parse_combined_response():
+    sections = vision_combined.parse_combined_response(COMBINED_RESPONSE)
+    assert sections["extraction"]["merchant_name"] == "Test Store"
+    assert sections["authenticity"]["visual_integrity"] == "tampered"
+    assert vision_combined.parse_combined_response("no json here") is None
+    assert vision_combined.parse_combined_response('{"other": 1}') is None
+
+
+def test_concurrent_callers_share_one_call(fake_vlm):
+    _, calls = fake_vlm
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(vision_combined.analyze_image_combined("r.jpg")))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    vision_combined.analyze_image_combined("other.jpg")
+    assert len(calls) == 2
+
+
+def test_failed_call_not_memoized(fake_vlm):
+    fake_query, calls = fake_vlm
+    fake_query.response = "sorry, I cannot help"
+    assert vision_combined.analyze_image_combined("r.jpg") is None
+    fake_query.response = COMBINED_RESPONSE
+    assert vision_combined.analyze_image_combined("r.jpg") is not None
+    assert len(calls) == 2
+
+
+def test_fan_out_to_existing_contracts(fake_vlm, monkeypatch):
+    from app.pipelines import vision_extract, vision_llm
+
+    monkeypatch.setattr(vision_llm, "USE_OLLAMA", True)
+    closed_client = OllamaClient("http://x")
+    monkeypatch.setattr(vision_llm, "get_ollama_client", lambda url=None: closed_client)
+    monkeypatch.setattr(vision_extract, "get_ollama_client", lambda url=None: closed_client)
+    monkeypatch.setattr(vision_extract, "VISION_EXTRACT_ENABLED", True)
+    monkeypatch.setattr(vision_llm, "DEFAULT_VISION_MODEL", vision_combined.VISION_COMBINED_MODEL)
+    monkeypatch.setattr(vision_llm, "detect_fraud_indicators_with_vision",
+                        lambda *a, **k: pytest.fail("separate forensic call"))
+    _, calls = fake_vlm
+
+    assessment = vision_llm.build_vision_assessment("r.jpg", model=vision_combined.VISION_COMBINED_MODEL)
+    assert assessment["visual_integrity"] == "tampered"
+    assert assessment["confidence"] == 0.9
+    assert assessment["observable_reasons"] == ["edge halos around total"]
+    assert assessment["raw"]["prompt_mode"] == "combined"
+    assert assessment["raw"]["fraud_detection"]["claims"][0]["claim_id"] == "VCLM_UNK"
+
+    vlm_data = vision_extract.extract_receipt_fields("r.jpg")
+    assert vlm_data["_vlm_meta"]["success"] and vlm_data["_vlm_meta"]["prompt"] == "combined"
+    tf = vision_extract.merge_vlm_into_features(vlm_data, {"merchant_guess": None})
+    assert tf["merchant_candidate"] == "Test Store"
+    assert tf["total_amount"] == 18.98
+
+    assert len(calls) == 1
+
+
+def test_assessment_on_another_model_uses_that_model(fake_vlm, monkeypatch):
+    from app.pipelines import vision_llm
+
+    monkeypatch.setattr(vision_llm, "USE_OLLAMA", True)
+    monkeypatch.setattr(vision_llm, "get_ollama_client", lambda url=None: OllamaClient("http://x"))
+    used = []
+    monkeypatch.setattr(vision_llm, "detect_fraud_indicators_with_vision",
+                        lambda path, model: used.append(model) or {"is_suspicious": False, "claims": []})
+    monkeypatch.setattr(vision_llm, "assess_receipt_authenticity",
+                        lambda path, model: used.append(model) or {"visual_integrity": "clean"})
+    monkeypatch.setattr(vision_llm, "encode_image_file", lambda *a, **k: ("b64", {}))
+    _, calls = fake_vlm
+
+    assessment = vision_llm.build_vision_assessment("r.jpg", model="other-vlm")
+    assert assessment["raw"]["prompt_mode"] == "separate"
+    assert used == ["other-vlm", "other-vlm"]
+    assert calls == []
+
+
+def test_extraction_not_combined_for_other_vision_model(fake_vlm, monkeypatch):
+    from app.pipelines import vision_extract, vision_llm
+
+    monkeypatch.setattr(vision_extract, "get_ollama_client", lambda url=None: OllamaClient("http://x"))
+    monkeypatch.setattr(vision_extract, "VISION_EXTRACT_ENABLED", True)
+    monkeypatch.setattr(vision_llm, "DEFAULT_VISION_MODEL", "other-vlm")
+    prompts = []
+
+    def single_task(image_b64, prompt, model, timeout):
+        prompts.append((prompt, model))
+        return json.dumps({"merchant_name": "Test Store", "total": 18.98})
+
+    monkeypatch.setattr(vision_extract, "_query_ollama_vision_b64", single_task)
+    monkeypatch.setattr(vision_extract, "_encode_image_with_meta", lambda path: ("b64", {"sent_size": [1, 1]}))
+    _, calls = fake_vlm
+
+    vlm_data = vision_extract.extract_receipt_fields("r.jpg")
+    assert vlm_data["_vlm_meta"]["success"] and "prompt" not in vlm_data["_vlm_meta"]
+    assert prompts == [(vision_extract.EXTRACTION_PROMPT, vision_extract.VISION_EXTRACT_MODEL)]
+    assert calls == []
@@ -0,0 +1,98 @@
+"""
+Tests for concurrent per-page VLM extraction of multi-page PDFs.
+
+Pages are fake images and the VLM call is a canned per-page response.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from app.pipelines import vision_extract
+from app.pipelines.ollama_client import OllamaClient
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": [], "pages": {}}
+    lock = threading.Lock()
+
+    def fake_query(image_b64, prompt, model, timeout):
+        with lock:
+            state["calls"].append(image_b64)
+            state["in_flight"] += 1
+            state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        time.sleep(0.05)
+        with lock:
+            state["in_flight"] -= 1
+        return json.dumps(state["pages"][image_b64])
+
+    monkeypatch.setattr(vision_extract, "VISION_EXTRACT_ENABLED", True)
+    monkeypatch.setattr(vision_extract, "get_ollama_client", lambda url=None: OllamaClient(url or "http://x"))
+    monkeypatch.setattr(vision_extract, "VISION_EXTRACT_PAGE_WORKERS", 2)
+    monkeypatch.setattr(vision_extract, "_pil_image_to_base64", lambda img: img)
+    monkeypatch.setattr(vision_extract, "_query_ollama_vision_b64", fake_query)
+    monkeypatch.setattr(vision_extract, "_pdf_pages_to_images",
+                        lambda path, dpi=200: sorted(state["pages"]))
+    return state
+
+
+def test_pages_run_concurrently_and_merge_in_order(fake_pdf):
+    fake_pdf["pages"] = {
+        "p1": {"merchant_name": "Acme", "items": [{"name": "a"}]},
+        "p2": {"items": [{"name": "b"}]},
+        "p3": {"items": [{"name": "c"}], "total": 30.0},
+    }
+    start = time.time()
+    result = vision_extract.extract_receipt_fields("invoice.pdf")
+    assert time.time() - start < 0.14  # 3 pages x 50ms with 2 workers
+    assert fake_pdf["max_in_flight"] == 2
+    assert [i["name"] for i in result["items"]] == ["a", "b", "c"]
+    assert result["total"] == 30.0
+    meta = result["_vlm_meta"]
+    assert meta["pages_extracted"] == 3 and meta["pages_skipped"] == 0
+    assert all(lat is not None for lat in meta["page_latencies_s"])
+
+
+def test_stops_after_totals_page(fake_pdf):
+    fake_pdf["pages"] = {
+        "p1": {"merchant_name": "Acme", "subtotal": 11.0, "tax": 1.5, "total": 12.5},
+        "p2": {"items": []},
+        "p3": {"items": []},
+        "p4": {"items": []},
+    }
+    result = vision_extract.extract_receipt_fields("invoice.pdf")
+    assert result["total"] == 12.5
+    meta = result["_vlm_meta"]
+    # page 2 was already in flight as the look-ahead page; 3 and 4 never ran
+    assert meta["page_latencies_s"][2:] == [None, None]
+    assert meta["pages_skipped"] == 2
+    assert len(fake_pdf["calls"]) == 2
+
+
+def test_carry_forward_total_does_not_stop_early(fake_pdf):
+    fake_pdf["pages"] = {
+        "p1": {"merchant_name": "Acme", "items": [{"name": "a"}], "total": 10.0},
+        "p2": {"items": [{"name": "b"}], "total": 20.0},
+        "p3": {"items": [{"name": "c"}], "subtotal": 27.0, "tax": 3.0, "total": 30.0},
+    }
+    result = vision_extract.extract_receipt_fields("invoice.pdf")
+    assert [i["name"] for i in result["items"]] == ["a", "b", "c"]
+    assert result["total"] == 30.0
+    assert result["_vlm_meta"]["pages_skipped"] == 0
+    assert len(fake_pdf["calls"]) == 3
+
+
+def test_in_flight_page_items_are_kept_after_stop(fake_pdf):
+    fake_pdf["pages"] = {
+        "p1": {"items": [{"name": "a"}], "subtotal": 9.0, "total": 10.0},
+        "p2": {"items": [{"name": "b"}]},
+        "p3": {"items": [{"name": "c"}]},
+    }
+    result = vision_extract.extract_receipt_fields("invoice.pdf")
+    assert [i["name"] for i in result["items"]] == ["a", "b"]
+    assert result["_vlm_meta"]["page_latencies_s"][2] is None
+    # no page-thread still running once the call returns
+    assert fake_pdf["in_flight"] == 0
@@ -0,0 +1,115 @@
+"""
+Tests for the vision payload policy (crop / downscale / grayscale / memo).
+"""
+
+import base64
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.pipelines import vision_payload
+from app.pipelines.vision_payload import (
+    VisionPayloadPolicy,
+    encode_image_file,
+    encode_pil_image,
+    policy_for_model,
+)
+
+
+def _receipt_photo(size=(3000, 4000)):
+    """White receipt with text lines on a dark table."""
+    img = Image.new("RGB", size, (40, 35, 30))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((1000, 500, 2000, 3500), fill=(245, 245, 240))
+    for y in range(700, 3300, 120):
+        draw.rectangle((1100, y, 1900, y + 30), fill=(20, 20, 20))
+    return img
+
+
+def _decode(b64):
+    return Image.open(io.BytesIO(base64.b64decode(b64)))
+
+
+def test_downscale_to_long_edge():
+    img = Image.new("RGB", (3000, 1500), "white")
+    b64, meta = encode_pil_image(img, VisionPayloadPolicy(max_long_edge=1200, auto_crop=False))
+    assert _decode(b64).size == (1200, 600)
+    assert meta["orig_size"] == [3000, 1500] and meta["sent_size"] == [1200, 600]
+    assert meta["policy"]["max_long_edge"] == 1200
+
+
+def test_pixel_budget_and_grayscale():
+    img = Image.new("RGB", (2000, 2000), "white")
+    policy = VisionPayloadPolicy(max_long_edge=0, max_pixels=1000 * 1000, grayscale=True, auto_crop=False)
+    b64, meta = encode_pil_image(img, policy)
+    sent = _decode(b64)
+    assert sent.mode == "L"
+    assert sent.width * sent.height <= 1000 * 1000
+
+
+def test_auto_crop_to_receipt_bounds():
+    _, meta = encode_pil_image(_receipt_photo(), VisionPayloadPolicy(max_long_edge=0))
+    assert meta["cropped"]
+    left, top, right, bottom = meta["crop_box"]
+    assert 850 <= left <= 1000 and 350 <= top <= 500
+    assert 2000 <= right <= 2150 and 3500 <= bottom <= 3650
+
+
+def test_auto_crop_skips_full_page_scan():
+    img = Image.new("RGB", (1000, 1400), "white")
+    ImageDraw.Draw(img).rectangle((5, 5, 995, 1395), outline="black", width=3)
+    _, meta = encode_pil_image(img, VisionPayloadPolicy())
+    assert not meta["cropped"]
+
+
+def test_file_encoding_memoized(tmp_path, monkeypatch):
+    path = tmp_path / "r.jpg"
+    _receipt_photo((600, 800)).save(path)
+    vision_payload.clear_payload_memo()
+    opened = []
+    real_open = vision_payload._open_image
+    monkeypatch.setattr(vision_payload, "_open_image", lambda p: opened.append(p) or real_open(p))
+
+    policy = VisionPayloadPolicy(max_long_edge=400)
+    first = encode_image_file(str(path), policy)
+    first[1]["mutated"] = True
+    again = encode_image_file(str(path), policy)
+    assert again[0] == first[0] and "mutated" not in again[1]
+    encode_image_file(str(path), VisionPayloadPolicy(max_long_edge=300))
+    assert len(opened) == 2
+
+
+def test_unreadable_file_passthrough(tmp_path):
+    path = tmp_path / "blob.bin"
+    path.write_bytes(b"not an image")
+    b64, meta = encode_image_file(str(path))
+    assert base64.b64decode(b64) == b"not an image"
+    assert meta["passthrough"]
+
+
+def test_policy_for_model_token_budget(monkeypatch):
+    monkeypatch.setattr(vision_payload, "VISION_MAX_VISUAL_TOKENS", 1000)
+    monkeypatch.setattr(vision_payload, "_OVERRIDES", {"llama3.2-vision": {"max_long_edge": 1120}})
+    assert policy_for_model("qwen2.5vl:32b").max_pixels == 1000 * 28 * 28
+    llama = policy_for_model("llama3.2-vision:fp16")
+    assert llama.max_long_edge == 1120
+    assert llama.max_pixels == 1000 * ((560 * 560) // 1601)
+
+
+def test_forensic_policy_is_lossless_by_default(tmp_path, monkeypatch):
+    path = tmp_path / "r.jpg"
+    _receipt_photo((2400, 3200)).save(path, quality=95)
+    vision_payload.clear_payload_memo()
+
+    policy = vision_payload.forensic_policy_for_model("qwen2.5vl:32b")
+    assert policy.lossless
+    b64, meta = encode_image_file(str(path), policy)
+    assert base64.b64decode(b64) == path.read_bytes()
+    assert meta["passthrough"]
+
+    _, meta = encode_pil_image(_receipt_photo((2400, 3200)), policy)
+    assert meta["sent_size"] == [2400, 3200] and not meta["cropped"]
+
+    monkeypatch.setattr(vision_payload, "VISION_FORENSIC_PAYLOAD_POLICY", True)
+    assert vision_payload.forensic_policy_for_model("qwen2.5vl:32b") == policy_for_model("qwen2.5vl:32b")
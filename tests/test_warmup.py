@@ -0,0 +1,72 @@
+"""
+Tests for pre-fork warm-up (app.warmup, app.geo.db snapshot, app.telemetry.memory).
+
+Covers:
+- geo snapshot serving the unfiltered queries without changing results
+- warmup() report: per-component status, memory breakdown, frozen objects
+- worker memory metrics
+"""
+
+import gc
+import os
+
+import pytest
+
+from app.geo import db as geo_db
+from app.telemetry.memory import process_memory, render_prometheus
+from app.warmup import warmup
+
+
+@pytest.fixture
+def restore_gc():
+    enabled = gc.isenabled()
+    yield
+    gc.unfreeze()
+    geo_db.clear_geo_snapshot()
+    if enabled:
+        gc.enable()
+
+
+def test_geo_snapshot_matches_sqlite():
+    expected = (geo_db.query_postal_patterns(), geo_db.query_cities(), geo_db.query_terms())
+    try:
+        counts = geo_db.load_geo_snapshot()
+        assert counts == {k: len(v) for k, v in zip(("postal_patterns", "cities", "terms"), expected)}
+        assert (geo_db.query_postal_patterns(), geo_db.query_cities(), geo_db.query_terms()) == expected
+        # Filtered queries still go to SQLite
+        if expected[1]:
+            country = expected[1][0]["country_code"]
+            assert geo_db.query_cities(country) == [c for c in expected[1] if c["country_code"] == country]
+    finally:
+        geo_db.clear_geo_snapshot()
+
+
+def test_warmup_report(restore_gc):
+    report = warmup(models=[])
+
+    assert set(report["components"]) == {"langpacks", "domainpacks", "templates", "geo", "pin_codes", "fasttext"}
+    for name in ("langpacks", "domainpacks", "templates", "geo"):
+        assert report["components"][name]["ok"], report["components"][name]
+    assert report["models"] == {}
+    assert report["memory"]["rss"] > 0
+    assert report["gc_frozen"] > 0
+    assert not gc.isenabled()
+
+
+def test_warmup_without_freeze_keeps_gc(restore_gc):
+    report = warmup(models=[], freeze=False)
+    assert gc.isenabled()
+    assert report["gc_frozen"] == gc.get_freeze_count()
+
+
+def test_process_memory_breakdown():
+    mem = process_memory()
+    assert mem["rss"] > 0
+    if os.path.exists("/proc/self/smaps_rollup"):
+        assert set(mem) == {"rss", "pss", "uss", "shared"}
+        assert mem["uss"] <= mem["rss"]
+
+
+def test_memory_prometheus_labels_pid():
+    body = render_prometheus()
+    assert f'verireceipt_process_memory_mb{{pid="{os.getpid()}",kind="rss"}}' in body